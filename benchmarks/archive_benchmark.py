@@ -0,0 +1,70 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.archive import ArchiveExporter
+from pyafc.listing import DirectoryLister
+from pyafc.transfer import DownloadEngine, format_size, iter_download_items
+
+def main():
+    parser = argparse.ArgumentParser(description="Download-then-zip vs streamed archive export against a fake AFC server")
+    parser.add_argument("--dirs", type=int, default=4)
+    parser.add_argument("--files", type=int, default=25, help="files per directory")
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--format", default="zip", choices=["zip", "tar", "tar.gz"])
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    for d in range(args.dirs):
+        for f in range(args.files):
+            server.add_file(f"/DCIM/{d:03d}/IMG_{f:05d}.JPG", os.urandom(1024) * args.size_kb)
+    total = args.dirs * args.files * args.size_kb * 1024
+
+    out = tempfile.mkdtemp(prefix="pyafc-bench-")
+    try:
+        pool = AfcSessionPool(server.connect, size=args.sessions)
+        lister = DirectoryLister(pool)
+
+        start = time.perf_counter()
+        staged = os.path.join(out, "staged")
+        DownloadEngine(pool, workers=args.sessions).download(list(iter_download_items(lister, "/DCIM", os.path.join(staged, "DCIM"))))
+        fmt = {"zip": "zip", "tar": "tar", "tar.gz": "gztar"}[args.format]
+        shutil.make_archive(os.path.join(out, "staged-archive"), fmt, staged)
+        staged_time = time.perf_counter() - start
+
+        path = os.path.join(out, f"DCIM.{args.format}")
+        tracemalloc.start()
+        start = time.perf_counter()
+        report = ArchiveExporter(lister, pool).export("/DCIM", path)
+        streamed_time = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        lister.close()
+        pool.close()
+
+        if args.format == "zip":
+            with zipfile.ZipFile(path) as zf:
+                assert zf.testzip() is None
+        archive_size = os.path.getsize(path)
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+    assert not report.failed and report.completed == args.dirs * args.files
+    print(f"files:           {report.completed} ({format_size(total)})")
+    print(f"download + zip:  {staged_time:.3f}s, {format_size(total)} of temp files")
+    print(f"streamed export: {streamed_time:.3f}s, no temp files, {format_size(archive_size)} archive")
+    print(f"peak memory:     {format_size(peak)} (traced, streamed export)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.transfer import DownloadEngine, TransferItem, format_size
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-file download benchmark against a fake AFC server")
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--size-kb", type=int, default=64)
+    parser.add_argument("--large-mb", type=int, default=32, help="size of one large file mixed into the batch")
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    items = []
+    for i in range(args.files):
+        server.add_file(f"/DCIM/100APPLE/IMG_{i:05d}.JPG", b"x" * (args.size_kb * 1024))
+        items.append((f"/DCIM/100APPLE/IMG_{i:05d}.JPG", args.size_kb * 1024))
+    if args.large_mb:
+        server.add_file("/DCIM/100APPLE/MOV_00000.MOV", b"x" * (args.large_mb * 1024 * 1024))
+        items.append(("/DCIM/100APPLE/MOV_00000.MOV", args.large_mb * 1024 * 1024))
+
+    out = tempfile.mkdtemp(prefix="pyafc-bench-")
+    try:
+        afc = server.connect()
+        start = time.perf_counter()
+        for src, _ in items:
+            afc.pull(src, os.path.join(out, "seq_" + os.path.basename(src)))
+        sequential = time.perf_counter() - start
+
+        pool = AfcSessionPool(server.connect, size=args.sessions)
+        engine = DownloadEngine(pool, workers=args.sessions)
+        report = engine.download([TransferItem(src, os.path.join(out, os.path.basename(src)), size) for src, size in items])
+        pool.close()
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+    assert not report.failed
+    total = sum(size for _, size in items)
+    print(f"files:      {len(items)} ({format_size(total)})")
+    print(f"sequential: {sequential:.3f}s ({format_size(total / sequential)}/s)")
+    print(f"engine x{args.sessions}:  {report.elapsed:.3f}s ({format_size(report.throughput)}/s, {sequential / report.elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
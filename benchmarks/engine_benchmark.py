@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.engine import DeviceEngine
+
+class PeakThreads:
+    # samples the live thread count while a run is going
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(0.002):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def thread_per_operation(pool, paths):
+    # the old way: every action starts its own thread
+    results = [None] * len(paths)
+    def stat(i, path):
+        with pool.lease() as afc:
+            results[i] = afc.stat(path)
+    threads = [threading.Thread(target=stat, args=(i, p), daemon=True) for i, p in enumerate(paths)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def engine_operations(engine, paths):
+    async def run_all():
+        return await asyncio.gather(*(engine.stat(p, timeout=None) for p in paths))
+    return engine.run(run_all())
+
+def main():
+    parser = argparse.ArgumentParser(description="Hundreds of concurrent device operations: a thread each vs the asyncio device engine")
+    parser.add_argument("--operations", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--sessions", type=int, default=8)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    paths = [f"/DCIM/100APPLE/IMG_{i:05d}.JPG" for i in range(args.operations)]
+    for path in paths:
+        server.add_file(path, b"x")
+
+    pool = AfcSessionPool(server.connect, size=args.sessions)
+    base = threading.active_count()
+    with PeakThreads() as threads:
+        start = time.perf_counter()
+        thread_per_operation(pool, paths)
+        threaded = time.perf_counter() - start
+    threaded_peak = threads.peak - base
+
+    engine = DeviceEngine(None, pool)
+    engine_operations(engine, paths[:args.sessions])
+    with PeakThreads() as threads:
+        start = time.perf_counter()
+        engine_operations(engine, paths)
+        engined = time.perf_counter() - start
+    engine_peak = threads.peak - base
+    engine.close()
+    pool.close()
+
+    print(f"operations:        {args.operations} stats, {args.sessions} sessions, {args.rtt_ms} ms RTT")
+    print(f"thread each:       {threaded:.2f}s, peak {threaded_peak} extra threads")
+    print(f"device engine:     {engined:.2f}s, peak {engine_peak} extra threads")
+
+if __name__ == "__main__":
+    main()
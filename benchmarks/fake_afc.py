@@ -0,0 +1,147 @@
+import posixpath
+import struct
+import threading
+import time
+from datetime import datetime
+from pymobiledevice3.exceptions import PyMobileDevice3Exception
+
+PULL_CHUNK_SIZE = 1024 * 1024
+
+class FakeAfcServer:
+    def __init__(self, rtt=0.002, bandwidth=40 * 1024 * 1024):
+        self.rtt = rtt
+        self.bandwidth = bandwidth
+        self.dirs = {"/": set()}
+        self.files = {}
+        self.mtimes = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def add_dir(self, path):
+        path = posixpath.normpath(path)
+        if path in self.dirs:
+            return
+        parent = posixpath.dirname(path)
+        self.add_dir(parent)
+        self.dirs[parent].add(posixpath.basename(path))
+        self.dirs[path] = set()
+
+    def add_file(self, path, data):
+        path = posixpath.normpath(path)
+        parent = posixpath.dirname(path)
+        self.add_dir(parent)
+        self.dirs[parent].add(posixpath.basename(path))
+        self.files[path] = bytes(data)
+        self.mtimes[path] = datetime.now()
+
+    def connect(self):
+        return FakeAfcSession(self)
+
+class FakeAfcSession:
+    # one request in flight per session, like a real AFC socket
+    def __init__(self, server):
+        self.server = server
+        self._channel = threading.Lock()
+        self.handles = {}
+        self._next_handle = 1
+
+    def _round_trip(self, payload=0):
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.rtt + payload / self.server.bandwidth)
+
+    def listdir(self, path):
+        with self._channel:
+            self._round_trip()
+            path = posixpath.normpath(path)
+            if path not in self.server.dirs:
+                raise PyMobileDevice3Exception(f"No such directory: {path}")
+            return ['.', '..'] + sorted(self.server.dirs[path])
+
+    def stat(self, path):
+        with self._channel:
+            self._round_trip()
+            path = posixpath.normpath(path)
+            if path in self.server.dirs:
+                return {'st_ifmt': 'S_IFDIR', 'st_size': 0, 'st_mtime': datetime.now()}
+            if path in self.server.files:
+                return {'st_ifmt': 'S_IFREG', 'st_size': len(self.server.files[path]), 'st_mtime': self.server.mtimes[path]}
+            raise PyMobileDevice3Exception(f"No such file: {path}")
+
+    def pull(self, src, dst):
+        with self._channel:
+            src = posixpath.normpath(src)
+            if src not in self.server.files:
+                self._round_trip()
+                raise PyMobileDevice3Exception(f"No such file: {src}")
+            data = self.server.files[src]
+            self._round_trip()  # open
+            for pos in range(0, len(data), PULL_CHUNK_SIZE):
+                self._round_trip(len(data[pos:pos + PULL_CHUNK_SIZE]))  # read
+            self._round_trip()  # close
+        with open(dst, "wb") as f:
+            f.write(data)
+
+    def makedirs(self, path):
+        with self._channel:
+            self._round_trip()
+            self.server.add_dir(path)
+
+    def fopen(self, path, mode="r"):
+        with self._channel:
+            self._round_trip()
+            path = posixpath.normpath(path)
+            if posixpath.dirname(path) not in self.server.dirs:
+                raise PyMobileDevice3Exception(f"No such directory: {posixpath.dirname(path)}")
+            if "w" in mode:
+                self.server.add_file(path, b"")
+            elif path not in self.server.files:
+                raise PyMobileDevice3Exception(f"No such file: {path}")
+            handle, self._next_handle = self._next_handle, self._next_handle + 1
+            self.handles[handle] = {"path": path, "pos": 0}
+            return handle
+
+    def _do_operation(self, opcode, data=b""):
+        # like AfcService there is no lseek: FILE_SEEK (0x11) only goes through
+        # the raw op, and handles are plain integers on the wire
+        with self._channel:
+            self._round_trip()
+            if opcode != 0x11:
+                raise PyMobileDevice3Exception(f"opcode: {opcode} not supported")
+            handle, whence, offset = struct.unpack("<QQq", data)
+            self.handles[handle]["pos"] = offset
+            return b""
+
+    def fread(self, handle, size):
+        with self._channel:
+            state = self.handles[handle]
+            data = self.server.files[state["path"]][state["pos"]:state["pos"] + size]
+            self._round_trip(len(data))
+            state["pos"] += len(data)
+            return data
+
+    def fwrite(self, handle, data):
+        # writes land immediately so an interrupted transfer leaves a partial file
+        with self._channel:
+            self._round_trip(len(data))
+            state = self.handles[handle]
+            old = self.server.files[state["path"]]
+            pos = state["pos"]
+            self.server.files[state["path"]] = old[:pos] + bytes(data) + old[pos + len(data):]
+            self.server.mtimes[state["path"]] = datetime.now()
+            state["pos"] += len(data)
+
+    def fclose(self, handle):
+        with self._channel:
+            self._round_trip()
+            self.handles.pop(handle, None)
+
+    def push(self, local_path, remote_path):
+        with open(local_path, "rb") as f:
+            data = f.read()
+        handle = self.fopen(remote_path, "w")
+        self.fwrite(handle, data)
+        self.fclose(handle)
+
+    def close(self):
+        pass
@@ -0,0 +1,63 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.device_index import DeviceIndex, DeviceIndexer
+from pyafc.listing import DirectoryLister, walk
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Device index build and query times against a fake AFC server")
+    parser.add_argument("--dirs", type=int, default=200)
+    parser.add_argument("--files", type=int, default=50, help="files per directory")
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    for d in range(args.dirs):
+        for f in range(args.files):
+            server.add_file(f"/DCIM/{d:03d}APPLE/IMG_{d * args.files + f:06d}.HEIC", b"x" * (f + 1))
+    server.add_file("/Downloads/crash-report.ips", b"y" * 4096)
+
+    out = tempfile.mkdtemp(prefix="pyafc-bench-")
+    try:
+        pool = AfcSessionPool(server.connect, size=args.sessions)
+        lister = DirectoryLister(pool)
+        start = time.perf_counter()
+        sequential = sum(len(entries) for _, entries in walk(lister, "/"))
+        walk_time = time.perf_counter() - start
+        index = DeviceIndex("bench", out)
+        start = time.perf_counter()
+        total = DeviceIndexer(lister, index).run("/")
+        index_time = time.perf_counter() - start
+        lister.close()
+        pool.close()
+
+        queries = [("find substring", index.find, "crash"), ("find glob", index.find, "*.ips"),
+                   ("find common", index.find, "IMG_0001"), ("largest", index.largest, "/")]
+        results = [(label, *timed(func, arg)) for label, func, arg in queries]
+        index.close()
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+    assert total == sequential
+    print(f"entries:          {total}")
+    print(f"sequential walk:  {walk_time:.3f}s")
+    print(f"index build:      {index_time:.3f}s (parallel walk + batched commits, {walk_time / index_time:.1f}x)")
+    for label, found, ms in results:
+        print(f"{label + ':':<17} {ms:.1f} ms ({len(found)} result(s))")
+
+if __name__ == "__main__":
+    main()
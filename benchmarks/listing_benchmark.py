@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirectoryLister, coalesce, stat_entry
+
+def sequential_listing(afc, path):
+    return [stat_entry(afc, path, n) for n in afc.listdir(path) if n not in ('.', '..')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Directory listing benchmark against a fake AFC server")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--sessions", type=int, default=8)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    for i in range(args.entries):
+        if i % 10 == 0:
+            server.add_dir(f"/DCIM/100APPLE/DIR_{i:05d}")
+        else:
+            server.add_file(f"/DCIM/100APPLE/IMG_{i:05d}.JPG", b"x" * 16)
+
+    start = time.perf_counter()
+    baseline = sequential_listing(server.connect(), "/DCIM/100APPLE")
+    sequential = time.perf_counter() - start
+
+    pool = AfcSessionPool(server.connect, size=args.sessions)
+    lister = DirectoryLister(pool)
+    start = time.perf_counter()
+    entries = lister.list("/DCIM/100APPLE")
+    pooled = time.perf_counter() - start
+    # streamed: how long until the first rows can be shown
+    start = time.perf_counter()
+    streamed, first = [], None
+    for batch in coalesce(lister.iter_list("/DCIM/100APPLE")):
+        first = first or time.perf_counter() - start
+        streamed.extend(batch)
+    lister.close()
+    pool.close()
+
+    assert sorted(e[:4] for e in baseline) == sorted(e[:4] for e in entries) == sorted(e[:4] for e in streamed)
+    print(f"entries:    {len(entries)}")
+    print(f"sequential: {sequential:.3f}s")
+    print(f"pooled x{args.sessions}: {pooled:.3f}s ({sequential / pooled:.1f}x)")
+    print(f"streamed:   first rows after {first:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.engine import DeviceEngine, LatestRequest
+
+def navigate(engine, folders, gap, latest_only):
+    # clicks through the folders gap apart and waits for the last one to show
+    listing = LatestRequest(engine, "listing")
+    shown = []
+    finished = threading.Semaphore(0)
+    last = threading.Event()
+    async def list_folder(generation, path):
+        try:
+            await engine.list(path)
+            if not latest_only or listing.is_current(generation):
+                shown.append(path)
+                if path == folders[-1]:
+                    last.set()
+        finally:
+            finished.release()
+    start = time.perf_counter()
+    for path in folders:
+        if latest_only:
+            listing.submit(lambda generation, p=path: list_folder(generation, p))
+        else:
+            engine.submit(list_folder(None, path))
+        time.sleep(gap)
+    last.wait()
+    settled = time.perf_counter() - start
+    # the device work still running after the last folder is on screen counts too
+    for _ in folders:
+        finished.acquire(timeout=60)
+    return settled, shown, listing.cancelled
+
+def main():
+    parser = argparse.ArgumentParser(description="Quick navigation through big folders: every listing runs to the end vs only the latest one")
+    parser.add_argument("--folders", type=int, default=8)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--gap-ms", type=float, default=50.0)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    folders = [f"/DCIM/{100 + i}APPLE" for i in range(args.folders)]
+    for folder in folders:
+        for i in range(args.entries):
+            server.add_file(f"{folder}/IMG_{i:05d}.JPG", b"x")
+
+    results = []
+    for latest_only in (False, True):
+        pool = AfcSessionPool(server.connect, size=8)
+        engine = DeviceEngine(None, pool)
+        before = server.requests
+        settled, shown, cancelled = navigate(engine, folders, args.gap_ms / 1000, latest_only)
+        time.sleep(0.1)
+        results.append((settled, server.requests - before, shown, cancelled))
+        engine.close()
+        pool.close()
+
+    print(f"navigation:  {args.folders} folders x {args.entries} entries, {args.gap_ms} ms apart, {args.rtt_ms} ms RTT")
+    for label, (settled, requests, shown, cancelled) in zip(("every listing", "latest only"), results):
+        print(f"{label + ':':<15}last folder after {settled:.2f}s, {requests} device requests, "
+              f"{cancelled} cancelled, last shown {shown[-1] if shown else None}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool, format_pool_stats
+from pyafc.listing import DirectoryLister
+from pyafc.transfer import DownloadEngine, TransferItem
+
+def browse_during_download(server, items, out, pool, transfers, listings):
+    # lists a folder over and over while a download keeps the bulk sessions busy
+    lister = DirectoryLister(pool)
+    engine = DownloadEngine(transfers, workers=transfers.size)
+    download = threading.Thread(target=engine.download, args=([TransferItem(src, os.path.join(out, os.path.basename(src)), size) for src, size in items],))
+    download.start()
+    time.sleep(0.05)
+    times = []
+    while download.is_alive() and len(times) < listings:
+        start = time.perf_counter()
+        lister.list("/DCIM/100APPLE")
+        times.append(time.perf_counter() - start)
+    download.join()
+    lister.close()
+    stats = pool.stats()
+    pool.close()
+    return sorted(times), stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Folder listing latency while a download runs on the same pool, with and without reserved sessions")
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--listings", type=int, default=10)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--sessions", type=int, default=6)
+    parser.add_argument("--reserved", type=int, default=2)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    items = []
+    for i in range(args.files):
+        server.add_file(f"/DCIM/Movies/MOV_{i:04d}.MOV", b"x" * (args.size_mb * 1024 * 1024))
+        items.append((f"/DCIM/Movies/MOV_{i:04d}.MOV", args.size_mb * 1024 * 1024))
+    for i in range(args.entries):
+        server.add_file(f"/DCIM/100APPLE/IMG_{i:05d}.JPG", b"x")
+
+    out = tempfile.mkdtemp(prefix="pyafc-bench-")
+    try:
+        shared = AfcSessionPool(server.connect, size=args.sessions)
+        plain, plain_stats = browse_during_download(server, items, out, shared, shared, args.listings)
+        reserved = AfcSessionPool(server.connect, size=args.sessions, reserved=args.reserved)
+        leased, leased_stats = browse_during_download(server, items, out, reserved, reserved.bulk(), args.listings)
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+    # only listings made while the download was still running count
+    median = lambda times: times[len(times) // 2] * 1000
+    print(f"download:   {args.files} x {args.size_mb} MB, listing {args.entries} entries x{args.listings}, {args.rtt_ms} ms RTT")
+    print(f"no reserve: median {median(plain):.0f} ms, worst {plain[-1] * 1000:.0f} ms  [{format_pool_stats(plain_stats)}]")
+    print(f"reserved {args.reserved}: median {median(leased):.0f} ms, worst {leased[-1] * 1000:.0f} ms  [{format_pool_stats(leased_stats)}]")
+
+if __name__ == "__main__":
+    main()
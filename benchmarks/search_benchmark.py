@@ -0,0 +1,58 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc.search import FilenameIndex
+
+WORDS = ["photo", "video", "backup", "report", "invoice", "voice", "memo", "track", "album", "notes", "draft", "export",
+         "crash", "diagnostic", "screenshot", "recording", "podcast", "chapter", "session", "archive"]
+EXTS = [".jpg", ".heic", ".mov", ".mp4", ".m4a", ".pdf", ".txt", ".plist", ".db", ".ips", ".json", ".zip"]
+
+def make_paths(count, seed=1):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        folder = f"/{rng.choice(['DCIM', 'Downloads', 'Books', 'Recordings', 'Documents'])}/{rng.randrange(500):03d}"
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i:07d}{rng.choice(EXTS)}"
+        if rng.random() < 0.5:
+            name = f"IMG_{i:07d}{rng.choice(EXTS)}".upper()
+        paths.append(f"{folder}/{name}")
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Filename search latency over a synthetic device tree")
+    parser.add_argument("--paths", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = make_paths(args.paths)
+    index = FilenameIndex()
+    start = time.perf_counter()
+    for path in paths:
+        index.add(path)
+    index.prepare()
+    build = time.perf_counter() - start
+
+    # typed one keystroke at a time, like the search box does
+    queries = [("substring", False, "diagnostic_rep"), ("substring", False, "0012345"), ("short", False, "zq"),
+               ("common", False, "img"), ("glob", False, "crash_*.ips"), ("glob", False, "*.m4?"),
+               ("fuzzy", True, "diagnstic_reprot"), ("fuzzy", True, "screnshot_album")]
+    print(f"paths:     {len(index)} (built in {build:.2f}s)")
+    worst = 0.0
+    for label, fuzzy, query in queries:
+        times = []
+        for _ in range(args.repeat):
+            for n in range(1, len(query) + 1):
+                t = time.perf_counter()
+                results = index.search(query[:n], fuzzy=fuzzy)
+                times.append((time.perf_counter() - t) * 1000)
+        worst = max(worst, max(times))
+        print(f"{label + ':':<10} {query!r:<20} median {sorted(times)[len(times) // 2]:6.2f} ms, max {max(times):6.2f} ms, {len(results)} result(s)")
+    print(f"worst keystroke: {worst:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_MS = 600
+DEVICE_MODULES = ("pymobiledevice3.lockdown", "pymobiledevice3.usbmux", "pymobiledevice3.services")
+# what each entry point imports before its first window can show; run_path runs a
+# script's top level without its __main__ block. Modules listed after it must not
+# load at that point: they belong to the other toolkit, or wait for first use.
+TARGETS = {
+    "pyafc.py": ("import runpy; runpy.run_path('pyafc.py', run_name='startup')", ("PySide6", "PIL") + DEVICE_MODULES),
+    "pyside6afc.py": ("import runpy; runpy.run_path('pyside6afc.py', run_name='startup')", ("tkinter", "customtkinter", "PIL") + DEVICE_MODULES),
+    "pyafc.gui": ("import pyafc.gui", ("PySide6", "PIL") + DEVICE_MODULES),
+    "pyafc.cli": ("import pyafc.cli", ("tkinter", "customtkinter", "PySide6", "PIL") + DEVICE_MODULES),
+}
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+def import_times(code):
+    # (module, depth, cumulative us) for every import -X importtime reports
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    rows, other = [], []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append((match.group(4), len(match.group(3)) // 2, int(match.group(2))))
+        elif not line.startswith("import time:"):
+            other.append(line)
+    return proc.returncode, rows, other
+
+def measure(code, interpreter_modules):
+    # only what the entry point adds on top of a bare interpreter counts
+    status, rows, other = import_times(code)
+    if status:
+        return None, rows, other[-1] if other else f"exit {status}"
+    top = [(name, us) for name, depth, us in rows if depth == 0 and name not in interpreter_modules]
+    # whole packages, wherever they were first pulled in, to show where the time goes
+    packages = {}
+    for name, _, us in rows:
+        if "." not in name and name not in interpreter_modules and name not in ("pyafc", "runpy"):
+            packages[name] = max(packages.get(name, 0), us)
+    return sum(us for _, us in top) / 1000, rows, packages
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of each entry point before its first window, from python -X importtime")
+    parser.add_argument("targets", nargs="*", help=f"any of {', '.join(TARGETS)}; all by default")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    _, bare, _ = import_times("pass")
+    interpreter_modules = {name for name, _, _ in bare}
+    failed = False
+    for target in args.targets or TARGETS:
+        code, forbidden = TARGETS[target]
+        first = measure(code, interpreter_modules)
+        if first[0] is None:
+            # a toolkit or pymobiledevice3 itself is not installed here
+            print(f"{target + ':':<15}skipped, {first[2]}")
+            continue
+        runs = [first] + [measure(code, interpreter_modules) for _ in range(args.runs - 1)]
+        totals = [total for total, _, _ in runs]
+        median = statistics.median(totals)
+        loaded = sorted({name for name, _, _ in runs[0][1] if any(name == f or name.startswith(f + ".") for f in forbidden)})
+        over = median > args.budget_ms
+        failed = failed or over or bool(loaded)
+        print(f"{target + ':':<15}{median:.0f} ms median, first run {totals[0]:.0f} ms, budget {args.budget_ms:.0f} ms"
+              f"{'  OVER BUDGET' if over else ''}")
+        if loaded:
+            print(f"{'':<15}loaded at startup but should not be: {', '.join(loaded)}")
+        heaviest = sorted(runs[0][2].items(), key=lambda row: -row[1])[:args.top]
+        print(f"{'':<15}heaviest: " + ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in heaviest))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
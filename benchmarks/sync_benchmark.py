@@ -0,0 +1,58 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirectoryLister
+from pyafc.sync import FolderSync
+from pyafc.transfer import DownloadEngine, format_size
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs incremental folder sync against a fake AFC server")
+    parser.add_argument("--dirs", type=int, default=10)
+    parser.add_argument("--files", type=int, default=40, help="files per directory")
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--changed", type=int, default=5, help="files modified between runs")
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    paths = []
+    for d in range(args.dirs):
+        for f in range(args.files):
+            path = f"/Media/{d:03d}/IMG_{f:05d}.JPG"
+            server.add_file(path, b"x" * (args.size_kb * 1024))
+            paths.append(path)
+
+    out = tempfile.mkdtemp(prefix="pyafc-bench-")
+    try:
+        pool = AfcSessionPool(server.connect, size=args.sessions)
+        lister = DirectoryLister(pool)
+        sync = FolderSync(lister, DownloadEngine(pool, workers=args.sessions))
+        first = sync.sync("/Media", os.path.join(out, "Media"))
+        for path in paths[:args.changed]:
+            server.add_file(path, b"y" * (args.size_kb * 1024 + 1))
+        server.add_file("/Media/000/NEW.JPG", b"z" * 1024)
+        start = time.perf_counter()
+        second = sync.sync("/Media", os.path.join(out, "Media"), delete=True)
+        incremental = time.perf_counter() - start
+        lister.close()
+        pool.close()
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+    assert not first.failed and not second.failed
+    assert second.completed == args.changed + 1 and second.skipped == len(paths) - args.changed
+    print(f"files:       {len(paths)} ({format_size(len(paths) * args.size_kb * 1024)})")
+    print(f"first sync:  {first.elapsed:.3f}s ({first.completed} copied)")
+    print(f"incremental: {incremental:.3f}s ({second.completed} copied, {second.skipped} unchanged, {first.elapsed / incremental:.1f}x)")
+
+if __name__ == "__main__":
+    main()
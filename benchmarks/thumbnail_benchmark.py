@@ -0,0 +1,89 @@
+import argparse
+import io
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirectoryLister
+from pyafc.thumbnails import ThumbnailCache, ThumbnailLoader
+
+def _jpeg(size, color, quality=85):
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+def make_photo(index, size, with_exif):
+    # a camera-style JPEG: a big main image, and an APP1 block holding a 160x120 thumbnail
+    color = (index * 37 % 256, index * 91 % 256, index * 53 % 256)
+    photo = _jpeg(size, color)
+    if not with_exif:
+        return photo
+    thumb = _jpeg((160, 120), color, quality=70)
+    def ifd(entries, following):
+        data = struct.pack("<H", len(entries))
+        for tag, value in entries:
+            data += struct.pack("<HHII", tag, 4, 1, value)
+        return data + struct.pack("<I", following)
+    ifd0 = ifd([(0x0112, 1)], 0)
+    ifd1_at = 8 + len(ifd0)
+    thumb_at = ifd1_at + len(ifd([(0x0201, 0), (0x0202, 0)], 0))
+    tiff = b"II*\0" + struct.pack("<I", 8) + ifd([(0x0112, 1)], ifd1_at) + ifd([(0x0201, thumb_at), (0x0202, len(thumb))], 0) + thumb
+    app1 = b"Exif\0\0" + tiff
+    return photo[:2] + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + photo[2:]
+
+def load_all(loader, entries):
+    done = threading.Event()
+    left = [len(entries)]
+    lock = threading.Lock()
+    def on_ready(entry, data):
+        with lock:
+            left[0] -= 1
+            if not left[0]:
+                done.set()
+    start = time.perf_counter()
+    loader.request(entries, on_ready)
+    done.wait()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Thumbnail loading: EXIF ranged reads vs whole files, cold vs cached")
+    parser.add_argument("--photos", type=int, default=120)
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    for i in range(args.photos):
+        server.add_file(f"/DCIM/100APPLE/IMG_{i:04d}.JPG", make_photo(i, (args.width, args.height), True))
+        server.add_file(f"/DCIM/101APPLE/IMG_{i:04d}.JPG", make_photo(i, (args.width, args.height), False))
+    photo_mb = sum(len(d) for p, d in server.files.items() if p.startswith("/DCIM/100APPLE")) / 1e6
+
+    pool = AfcSessionPool(server.connect, size=3)
+    lister = DirectoryLister(pool)
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = ThumbnailLoader(pool, ThumbnailCache(tmp), "bench")
+        exif = lister.list("/DCIM/100APPLE")
+        full = lister.list("/DCIM/101APPLE")
+        exif_time = load_all(loader, exif)
+        full_time = load_all(loader, full)
+        cached_time = load_all(loader, exif)
+        loader.close()
+    lister.close()
+    pool.close()
+
+    print(f"photos:       {args.photos} x {args.width}x{args.height} ({photo_mb:.1f} MB), {args.rtt_ms} ms RTT")
+    print(f"whole files:  {full_time:.2f}s")
+    print(f"EXIF ranged:  {exif_time:.2f}s ({full_time / exif_time:.1f}x)")
+    print(f"cached:       {cached_time * 1000:.0f} ms ({cached_time / args.photos * 1000:.2f} ms per thumbnail)")
+
+if __name__ == "__main__":
+    main()
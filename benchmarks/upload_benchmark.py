@@ -0,0 +1,55 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.transfer import UploadEngine, TransferItem, format_size
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-file upload benchmark against a fake AFC server")
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--size-kb", type=int, default=32)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+
+    src_dir = tempfile.mkdtemp(prefix="pyafc-bench-")
+    try:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(src_dir, f"asset_{i:05d}.bin")
+            with open(path, "wb") as f:
+                f.write(os.urandom(args.size_kb * 1024))
+            paths.append(path)
+        total = sum(os.path.getsize(p) for p in paths)
+
+        server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+        server.add_dir("/Downloads/seq")
+        server.add_dir("/Downloads/engine")
+        afc = server.connect()
+        start = time.perf_counter()
+        for p in paths:
+            afc.push(p, "/Downloads/seq/" + os.path.basename(p))
+        sequential = time.perf_counter() - start
+
+        pool = AfcSessionPool(server.connect, size=args.sessions)
+        engine = UploadEngine(pool, workers=args.sessions)
+        report = engine.upload(TransferItem(p, "/Downloads/engine/" + os.path.basename(p), os.path.getsize(p)) for p in paths)
+        pool.close()
+    finally:
+        shutil.rmtree(src_dir, ignore_errors=True)
+
+    assert not report.failed
+    assert all(server.files["/Downloads/engine/" + os.path.basename(p)] == server.files["/Downloads/seq/" + os.path.basename(p)] for p in paths)
+    print(f"files:      {len(paths)} ({format_size(total)})")
+    print(f"sequential: {sequential:.3f}s ({format_size(total / sequential)}/s)")
+    print(f"engine x{args.sessions}:  {report.elapsed:.3f}s ({format_size(report.throughput)}/s, {sequential / report.elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
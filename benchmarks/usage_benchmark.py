@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirectoryLister, walk
+from pyafc.usage import DiskUsage, UsageAnalyzer, UsageCache, format_usage_row
+
+def main():
+    parser = argparse.ArgumentParser(description="Recursive folder sizes: sequential walk vs. the parallel usage analyzer")
+    parser.add_argument("--dirs", type=int, default=40)
+    parser.add_argument("--subdirs", type=int, default=5)
+    parser.add_argument("--files", type=int, default=10, help="files per directory")
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    expected = 0
+    for d in range(args.dirs):
+        for s in range(args.subdirs):
+            for f in range(args.files):
+                data = b"x" * ((d + 1) * (f + 1))
+                server.add_file(f"/Media/{d:03d}/{s:02d}/file_{f:03d}.bin", data)
+                expected += len(data)
+
+    pool = AfcSessionPool(server.connect, size=args.sessions)
+    lister = DirectoryLister(pool)
+    start = time.perf_counter()
+    sequential = sum(e.size or 0 for _, entries in walk(lister, "/Media") for e in entries if not e.is_dir)
+    walk_time = time.perf_counter() - start
+
+    first = []
+    usage = DiskUsage("/Media")
+    start = time.perf_counter()
+    UsageAnalyzer(lister, refresh_interval=0.05).analyze(usage, on_progress=lambda u: first or first.append(time.perf_counter() - start))
+    analyze_time = time.perf_counter() - start
+    assert sequential == expected == usage.total("/Media")[0], (sequential, expected, usage.total("/Media"))
+
+    cache = UsageCache()
+    cache.put("bench", usage)
+    start = time.perf_counter()
+    rows = cache.find("bench", "/Media/039").children("/Media/039")
+    drill_ms = (time.perf_counter() - start) * 1000
+    lister.close()
+    pool.close()
+
+    print(f"tree:        {args.dirs * args.subdirs} folders, {args.dirs * args.subdirs * args.files} files, {args.sessions} sessions, {args.rtt_ms} ms RTT")
+    print(f"sequential:  {walk_time:.2f}s")
+    print(f"analyzer:    {analyze_time:.2f}s ({walk_time / analyze_time:.1f}x), first partial totals after {first[0] * 1000:.0f} ms")
+    print(f"drill-down:  {drill_ms:.2f} ms from cache")
+    total = usage.total("/Media/039")[0]
+    for item in rows[:3]:
+        print("  " + format_usage_row(item, total))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.engine_benchmark import PeakThreads
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirectoryLister
+from pyafc.workers import Workers, format_worker_stats
+
+def thread_per_click(lister, clicks, gap):
+    # the old way: every click starts its own thread, however many are already listing
+    threads = []
+    for _ in range(clicks):
+        thread = threading.Thread(target=lister.list, args=("/DCIM/100APPLE",), daemon=True)
+        thread.start()
+        threads.append(thread)
+        time.sleep(gap)
+    for thread in threads:
+        thread.join()
+    return len(threads)
+
+def pooled_clicks(lister, workers, clicks, gap):
+    futures = set()
+    for _ in range(clicks):
+        future = workers.run(lister.list, "/DCIM/100APPLE", key=("list", "/DCIM/100APPLE"))
+        if future is not None:
+            futures.add(future)
+        time.sleep(gap)
+    for future in futures:
+        future.result()
+    return len(futures)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rapid Refresh clicks: a thread per click vs the bounded worker pool with coalescing")
+    parser.add_argument("--clicks", type=int, default=50)
+    parser.add_argument("--gap-ms", type=float, default=5.0)
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = FakeAfcServer(rtt=args.rtt_ms / 1000)
+    for i in range(args.entries):
+        server.add_file(f"/DCIM/100APPLE/IMG_{i:05d}.JPG", b"x")
+    pool = AfcSessionPool(server.connect, size=8)
+    lister = DirectoryLister(pool)
+    base = threading.active_count()
+
+    with PeakThreads() as threads:
+        start = time.perf_counter()
+        threaded_runs = thread_per_click(lister, args.clicks, args.gap_ms / 1000)
+        threaded = time.perf_counter() - start
+    threaded_peak = threads.peak - base
+
+    workers = Workers()
+    with PeakThreads() as threads:
+        start = time.perf_counter()
+        pooled_runs = pooled_clicks(lister, workers, args.clicks, args.gap_ms / 1000)
+        pooled = time.perf_counter() - start
+    pooled_peak = threads.peak - base
+    stats = workers.stats()
+    workers.shutdown()
+    lister.close()
+    pool.close()
+
+    print(f"clicks:       {args.clicks} refreshes {args.gap_ms} ms apart, {args.entries} entries, {args.rtt_ms} ms RTT")
+    print(f"thread each:  {threaded:.2f}s, {threaded_runs} listings, peak {threaded_peak} extra threads")
+    print(f"worker pool:  {pooled:.2f}s, {pooled_runs} listings, peak {pooled_peak} extra threads  [{format_worker_stats(stats)}]")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,7 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, Menu
 import customtkinter as ctk
-from pymobiledevice3.lockdown import create_using_usbmux
-try:
-    from pymobiledevice3.lockdown import MissingValue
-except ImportError:
-    MissingValue = None
 from pymobiledevice3.exceptions import PyMobileDevice3Exception
-from pymobiledevice3.services.afc import AfcService
-from pymobiledevice3.services.installation_proxy import InstallationProxyService
-from pymobiledevice3.services.house_arrest import HouseArrestService
-from pymobiledevice3.services.diagnostics import DiagnosticsService
-from pymobiledevice3.services.screenshot import ScreenshotService
-from pymobiledevice3.services.syslog import SyslogService
-from pymobiledevice3.usbmux import list_devices
 import threading
 import json
 import os
@@ -21,7 +9,25 @@ import sys
 import time
 import base64
 import stat
-from PIL import Image, ImageTk
+from pyafc.afc_pool import AfcSessionPool, DEVICE_POOL_SIZE, INTERACTIVE_RESERVED, check_session, format_pool_stats
+from pyafc.dircache import DirectoryCache
+from pyafc.engine import DeviceEngine, LatestRequest, mount_developer_image
+from pyafc.listing import DirEntry, DirectoryLister, split_entries, join_path
+from pyafc.prefetch import Prefetcher
+from pyafc.history import NavigationHistory
+from pyafc.journal import TransferJournal
+from pyafc.sync import FolderSync, SyncReport
+from pyafc.archive import ArchiveExporter, ARCHIVE_FORMATS
+from pyafc.device_index import DeviceIndex, DeviceIndexer
+from pyafc.search import FilenameIndex
+from pyafc.usage import DiskUsage, UsageAnalyzer, UsageCache, format_usage_row
+from pyafc.virtual_list import VirtualListbox
+from pyafc.workers import Workers, BUSY_MESSAGE, STATS_INTERVAL_MS, format_worker_stats
+from pyafc.thumbnails import ThumbnailCache, ThumbnailLoader
+from pyafc.thumb_grid import ThumbnailGrid
+from pyafc.progress import TransferMonitor, format_event
+from pyafc.scheduler import TransferScheduler, transfer_priority, NORMAL, BULK
+from pyafc.transfer import DownloadEngine, UploadEngine, Throttle, TransferItem, TransferReport, format_size, iter_download_items, iter_upload_items
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
@@ -33,6 +39,7 @@ LIST_FONT = ("Segoe UI", 11)
 LOG_FONT = ("Consolas", 10)
 APP_GRID_FONT = ("Segoe UI", 10)
 LINK_FONT = ("Segoe UI", 12, "underline")
+LISTING_REFRESH_INTERVAL = 1.0
 
 def json_bytes_handler(obj):
     if isinstance(obj, bytes):
@@ -43,23 +50,55 @@ def json_bytes_handler(obj):
     raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
 
 class DeviceLogic:
-    def __init__(self):
+    def __init__(self, dir_cache=None):
         self.client = None
+        self.udid = None
         self.afc = None
+        self.afc_pool = None
+        self.engine = None
+        self.listing = None
+        self.lister = None
+        self.prefetcher = None
+        self.transfer_pool = None
+        self.thumbnails = None
+        self.thumb_cache = None
+        self._thumb_entries = (None, {})
+        self.downloader = None
+        self.uploader = None
+        self.journal = None
+        self.last_monitor = None
+        self.scheduler = None
+        self.device_index = None
+        self.index_task = None
+        self.index_stop = threading.Event()
+        self.filename_index = None
+        self._filename_seq = 0
+        self._search_seq = 0
+        self.usage_cache = UsageCache()
+        self.usage_stop = None
+        self.dir_cache = dir_cache if dir_cache is not None else DirectoryCache()
+        self.listing_refresh = Throttle(LISTING_REFRESH_INTERVAL)
+        self.history = NavigationHistory()
         self.current_path = "/"
         self.is_jailbroken = False
         self.apps_cache = []
         self.initial_files_cache = ([], [], None)
-        self.syslog_thread = None
-        self.stop_syslog_event = threading.Event()
+        self.syslog_task = None
+        # every one-off action runs on these, never on a thread of its own
+        self.workers = Workers()
 
-    def run_in_thread(self, func, *args):
-        def wrapper():
-            threading.Thread(target=func, args=args, daemon=True).start()
-        return wrapper
+    def is_indexing(self):
+        return self.index_task is not None and not self.index_task.done()
 
     def connect_device(self, app, log_func, success_callback, failure_callback):
         print("LOGIC: connect_device function started")
+        # lockdown pulls in most of pymobiledevice3, so it loads with the first connection, not the window
+        from pymobiledevice3.lockdown import create_using_usbmux
+        from pymobiledevice3.usbmux import list_devices
+        try:
+            from pymobiledevice3.lockdown import MissingValue
+        except ImportError:
+            MissingValue = None
         client_instance = None
         device_name = "Unknown Device"
         all_values = None
@@ -75,6 +114,7 @@ class DeviceLogic:
 
             client_instance = create_using_usbmux(serial=target_udid)
             log_func(f"Connection successful to {target_udid}, client object created.")
+            self.udid = target_udid
 
             log_func("Waiting for connection to stabilize...")
             time.sleep(1)
@@ -103,9 +143,10 @@ class DeviceLogic:
             
             log_func("Attempting to mount Developer Image...")
             try:
-                with MounterService(self.client) as mounter:
-                    mounter.mount_developer_image()
-                log_func("Developer Image mounted successfully.")
+                if mount_developer_image(self.client):
+                    log_func("Developer Image mounted successfully.")
+                else:
+                    log_func("Developer Image already mounted.")
             except Exception as mount_error:
                 log_func(f"WARNING: Failed to mount Developer Image: {mount_error}")
                 log_func("Device actions (Screenshot, Reboot) may fail if Developer Mode is not enabled or image is missing.")
@@ -117,14 +158,14 @@ class DeviceLogic:
                  return
 
             log_func(f"Fetching initial file list for {self.current_path}...")
-            preloaded_files = self._get_file_list_sync(self.current_path)
+            preloaded_files = self.engine.run(self._get_file_list(self.current_path))
             folders, files, error = preloaded_files
             if error:
                 log_func(f"Warning: Error fetching initial files ({self.current_path}): {error}")
                 if self.current_path != "/":
                     log_func("Attempting fallback to '/'...")
                     self.current_path = "/"
-                    preloaded_files = self._get_file_list_sync(self.current_path)
+                    preloaded_files = self.engine.run(self._get_file_list(self.current_path))
                     folders, files, error = preloaded_files
                     if error:
                         log_func(f"Warning: Fallback path also failed: {error}")
@@ -140,7 +181,7 @@ class DeviceLogic:
 
 
             log_func("Fetching application list...")
-            preloaded_apps, app_error = self._get_app_list_sync()
+            preloaded_apps, app_error = self.engine.run(self._get_app_list())
             self.apps_cache = preloaded_apps
             if app_error:
                 log_func(f"Warning: Error fetching apps: {app_error}")
@@ -196,13 +237,35 @@ class DeviceLogic:
             self.afc = None
             return
         log_func("Attempting AfcService...")
+        self._init_scheduler(app)
         try:
-            self.afc = AfcService(self.client)
+            from pymobiledevice3.services.afc import AfcService
+            # one pool per connection: every operation leases its own session, transfers and
+            # background walks as bulk leases that leave sessions free for browsing
+            self.afc_pool = AfcSessionPool(lambda: AfcService(self.client), size=DEVICE_POOL_SIZE,
+                                           reserved=INTERACTIVE_RESERVED, health_check=check_session)
+            self.afc = self.afc_pool
+            self.lister = DirectoryLister(self.afc_pool)
+            # listings, apps and syslog are coroutines on the connection's loop thread
+            self.engine = DeviceEngine(self.client, self.afc_pool, self.lister)
+            # only the folder on screen is listed: a new navigation cancels the one before
+            self.listing = LatestRequest(self.engine, "listing")
+            self.prefetcher = Prefetcher(self.lister, self.dir_cache)
+            self.transfer_pool = self.afc_pool.bulk()
+            self.journal = TransferJournal(self.udid)
+            self.downloader = DownloadEngine(self.transfer_pool, journal=self.journal)
+            self.uploader = UploadEngine(self.transfer_pool, journal=self.journal)
+            self.device_index = DeviceIndex(self.udid)
+            self.thumb_cache = self.thumb_cache or ThumbnailCache()
+            self.thumbnails = ThumbnailLoader(self.afc_pool, self.thumb_cache, self.udid)
+            self.filename_index = None
+            self.load_filename_index(app)
             log_func("AfcService created.")
             time.sleep(0.2)
             try:
                 log_func("Checking JB (access '/private')...")
-                self.afc.listdir("/private")
+                with self.afc_pool.lease() as afc:
+                    afc.listdir("/private")
                 log_func("Jailbroken (AFC2).")
                 self.is_jailbroken = True
                 self.current_path = "/"
@@ -212,10 +275,39 @@ class DeviceLogic:
                 self.current_path = "/"
                 log_func(f"Set initial jailed path to: {self.current_path} (will remap to Media)")
             log_func("AFC ready.")
+            self.start_indexing(app)
         except Exception as e:
             log_func(f"ERROR: AFC start fail: {e}")
             self.afc = None
 
+    def close_afc_sessions(self):
+        self.index_stop.set()
+        self.stop_usage()
+        if self.scheduler:
+            self.scheduler.shutdown()
+            self.scheduler = None
+        if self.prefetcher:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        if self.engine:
+            self.engine.close()
+            self.engine = None
+            self.listing = None
+            self.syslog_task = None
+        if self.lister:
+            self.lister.close()
+            self.lister = None
+        if self.thumbnails:
+            self.thumbnails.close()
+            self.thumbnails = None
+        self.transfer_pool = None
+        if self.afc_pool:
+            print(f"POOL: {format_pool_stats(self.afc_pool.stats())}")
+            self.afc_pool.close()
+            self.afc_pool = None
+        if self.journal:
+            self.journal.flush()
+
     def _update_status_afc(self, app, suffix, color):
         try:
             if hasattr(app, 'status_label') and app.status_label.winfo_exists():
@@ -225,78 +317,169 @@ class DeviceLogic:
         except tk.TclError:
             pass
 
-    def _get_file_list_sync(self, path_to_list):
+    async def _list_entries(self, path_to_list, use_cache=True, on_batch=None):
+        entries = self.dir_cache.get(self.udid, path_to_list) if use_cache else None
+        mtime = None
+        if entries is not None:
+            print(f"LOGIC (Sync): Cache hit for '{path_to_list}'")
+        else:
+            print(f"LOGIC (Sync): Listing '{path_to_list}'...")
+            with self.prefetcher.user_request():
+                # stat the folder first, so a change during the listing still shows up as a newer mtime
+                mtime = await self.engine.dir_mtime(path_to_list)
+                entries = await self.engine.list(path_to_list, on_batch=on_batch)
+            print(f"LOGIC (Sync): Listed {len(entries)} items")
+            self.dir_cache.put(self.udid, path_to_list, entries)
+            if self.filename_index is not None:
+                self.filename_index.add_entries(entries)
+        self.history.remember(path_to_list, entries, mtime)
+        self.prefetcher.schedule(self.udid, [e.path for e in entries if e.is_dir])
+        return entries
+
+    async def _get_file_list(self, path_to_list, use_cache=True, on_batch=None):
         folders, files, error_msg = [], [], None
-        if not self.afc:
+        if not self.afc or not self.engine:
             return folders, files, "AFC service not ready"
         try:
-            print(f"LOGIC (Sync): Attempting AFC listdir('{path_to_list}')...")
-            items = self.afc.listdir(path_to_list)
-            print(f"LOGIC (Sync): listdir found {len(items)} items")
-            for item in items:
-                if item in ('.', '..'): continue
-                fp = os.path.join(path_to_list, item).replace("\\", "/")
-                is_dir = False
-                try:
-                    info = self.afc.stat(fp)
-                    if hasattr(info, 'st_ifmt') and stat.S_ISDIR(info.st_ifmt):
-                        is_dir = True
-                except (PyMobileDevice3Exception, AttributeError):
-                    try:
-                        self.afc.listdir(fp)
-                        is_dir = True
-                        print(f"DEBUG: stat failed, but listdir succeeded for {item}")
-                    except PyMobileDevice3Exception:
-                        is_dir = False
-                
-                if is_dir:
-                    folders.append(f"[FOLDER] {item}")
-                else:
-                    files.append(item)
+            folders, files = split_entries(await self._list_entries(path_to_list, use_cache, on_batch))
         except Exception as e:
             print(f"LOGIC (Sync): listdir FAILED: {e}")
             error_msg = e
         return folders, files, error_msg
 
 
-    def browse_to_path(self, app, path=None):
+    def browse_to_path(self, app, path=None, refresh=False):
         print(f"LOGIC: browse: {path if path else self.current_path}")
         if not self.afc:
             print("LOGIC: AFC not ready")
             app.after(0, lambda: self._update_file_listbox(app, [], [], "AFC not ready"))
             return
+        if path and path != self.current_path:
+            self._save_view(app)
         if path:
             self.current_path = path
+        self.history.visit(self.current_path)
+        self._show_path(app)
+        self._list_in_background(app, self.current_path, use_cache=not refresh)
+
+    def _list_in_background(self, app, path, use_cache=True, keep_view=False):
+        self.listing.submit(lambda gen: self._list_dir_task(app, gen, path, use_cache, keep_view))
+
+    async def _list_dir_task(self, app, gen, path, use_cache, keep_view):
+        streamed = []
+        listing = self.listing
+
+        def _on_batch(batch):
+            # a new folder fills in as the stats come back; the first batch replaces the old rows
+            first = not streamed
+            streamed.append(len(batch))
+            app.after(0, lambda: listing.is_current(gen) and self._append_file_listbox(app, batch, first))
+
+        folders, files, error = await self._get_file_list(path, use_cache=use_cache, on_batch=None if keep_view else _on_batch)
+        # a slower listing must not overwrite a folder the user has moved on from, even one
+        # for the same path; the sorted final listing keeps whatever was selected while it streamed
+        app.after(0, lambda: listing.is_current(gen) and self._update_file_listbox(
+            app, folders, files, error, view=self._current_view(app) if keep_view or streamed else None))
+
+    def go_back(self, app):
+        if self.history.can_back(): self._jump(app, self.history.back)
+
+    def go_forward(self, app):
+        if self.history.can_forward(): self._jump(app, self.history.forward)
+
+    def _jump(self, app, step):
+        if not self.afc: return
+        self._save_view(app)
+        path = step()
+        self.current_path = path
+        self._show_path(app)
+        state = self.history.view(path)
+        if state is None:
+            self._list_in_background(app, path)
+            return
+        print(f"LOGIC: History jump to '{path}', rendering retained listing")
+        self._update_file_listbox(app, *split_entries(state.entries), view=(state.selection, state.scroll))
+
+        async def _revalidate_task(gen):
+            if self.history.is_current(path, await self.engine.dir_mtime(path)):
+                print(f"LOGIC: '{path}' unchanged since it was listed")
+                return
+            print(f"LOGIC: '{path}' changed, refreshing in background")
+            await self._list_dir_task(app, gen, path, False, True)
+
+        # also cancels any listing still running for the folder the user just left
+        self.listing.submit(_revalidate_task)
+
+    def _show_path(self, app):
         try:
             if hasattr(app, 'path_entry') and app.path_entry.winfo_exists():
                  app.path_entry.delete(0, tk.END)
                  app.path_entry.insert(0, self.current_path)
+            if hasattr(app, 'back_btn') and app.back_btn.winfo_exists():
+                app.back_btn.configure(state=tk.NORMAL if self.history.can_back() else tk.DISABLED)
+                app.forward_btn.configure(state=tk.NORMAL if self.history.can_forward() else tk.DISABLED)
         except tk.TclError:
             pass
 
-        def _list_dir_task():
-            folders, files, error = self._get_file_list_sync(self.current_path)
-            app.after(0, lambda flds=folders, fls=files, err=error: self._update_file_listbox(app, flds, fls, err))
+    def _current_view(self, app):
+        try:
+            lb = app.file_listbox
+            return [lb.get(i) for i in lb.curselection()], lb.yview()[0]
+        except (AttributeError, tk.TclError):
+            return None
 
-        threading.Thread(target=_list_dir_task, daemon=True).start()
+    def _save_view(self, app):
+        view = self._current_view(app)
+        if view is not None:
+            self.history.save_view(self.current_path, *view)
 
-    def _update_file_listbox(self, app, folders, files, error=None):
+    def _update_file_listbox(self, app, folders, files, error=None, view=None):
         try:
             if hasattr(app, 'file_listbox') and app.file_listbox.winfo_exists():
                 lb = app.file_listbox
-                lb.delete(0, tk.END)
                 if error:
-                    lb.insert(tk.END, f"Error: {error}")
-                    lb.itemconfig(tk.END, {'fg': 'red'})
+                    lb.set_items([f"Error: {error}"], {0: 'red'})
+                    app.refresh_thumbnails()
                     return
-                for f in sorted(folders, key=str.lower):
-                    lb.insert(tk.END, f)
-                    lb.itemconfig(tk.END, {'fg': '#87CEFA'})
-                for f in sorted(files, key=str.lower):
-                    lb.insert(tk.END, f)
+                # the listbox only builds the rows on screen, however big the folder
+                folders = sorted(folders, key=str.lower)
+                selected, scroll = view or ((), 0.0)
+                lb.set_items(folders + sorted(files, key=str.lower), dict.fromkeys(range(len(folders)), '#87CEFA'), selected, scroll)
+                if view:
+                    app.on_file_selection()
+                app.refresh_thumbnails()
         except tk.TclError:
             pass
 
+    def _append_file_listbox(self, app, entries, first=False):
+        try:
+            if hasattr(app, 'file_listbox') and app.file_listbox.winfo_exists():
+                lb = app.file_listbox
+                if first:
+                    lb.set_items([])
+                folders, files = split_entries(entries)
+                lb.append_items(folders, '#87CEFA')
+                lb.append_items(files)
+                app.refresh_thumbnails()
+        except tk.TclError:
+            pass
+
+    def load_thumbnails(self, app, names):
+        # names of the grid cells in and just below view; pictures come back through the UI thread
+        state = self.history.view(self.current_path)
+        if not self.thumbnails or state is None:
+            return
+        if self._thumb_entries[0] is not state.entries:
+            self._thumb_entries = (state.entries, {e.name: e for e in state.entries})
+        by_name = self._thumb_entries[1]
+        folder = self.current_path
+
+        def _ready(entry, data):
+            if data is not None:
+                app.after(0, lambda: self.current_path == folder and app.thumb_grid.set_thumbnail(entry.name, data))
+
+        self.thumbnails.request([by_name[n] for n in names if n in by_name], _ready)
+
     def on_file_double_click(self, app, event=None):
         try:
             if not hasattr(app, 'file_listbox') or not app.file_listbox.winfo_exists():
@@ -338,6 +521,99 @@ class DeviceLogic:
         print(f"DEBUG GO UP: New path: {p}")
         self.browse_to_path(app, p)
 
+    def start_indexing(self, app, force=False):
+        if not self.client or not self.device_index: return
+        if self.is_indexing(): return
+        if not force and not self.device_index.is_stale():
+            print(f"LOGIC: Device index is fresh ({self.device_index.count()} entries)")
+            return
+        self.index_stop.clear()
+        def _index_task():
+            # bulk leases, so a full-device walk never takes the sessions browsing needs
+            lister = DirectoryLister(self.afc_pool.bulk())
+            try:
+                DeviceIndexer(lister, self.device_index).run("/", cancelled=self.index_stop.is_set,
+                                                             on_progress=lambda n: app.after(0, lambda: app.set_find_status(f"Indexing... {n} entries")))
+            except Exception as e:
+                print(f"LOGIC: Indexing failed: {e}")
+            finally:
+                lister.close()
+                app.after(0, app.refresh_find_status)
+            if not self.index_stop.is_set():
+                self.load_filename_index(app)
+        self.index_task = self.workers.run_bulk(_index_task, key="index")
+
+    def load_filename_index(self, app=None):
+        if not self.device_index: return
+        device_index = self.device_index
+        self._filename_seq += 1
+        seq = self._filename_seq
+        def _load_task():
+            started = time.monotonic()
+            names = FilenameIndex()
+            try:
+                names.add_entries(device_index.iter_entries())
+                names.prepare()
+            except Exception as e:
+                print(f"LOGIC: Loading filename index failed: {e}")
+                return
+            # a newer load (reindex or another device) wins
+            if seq == self._filename_seq:
+                self.filename_index = names
+            print(f"LOGIC: Filename index holds {len(names)} names ({time.monotonic() - started:.1f}s)")
+            if app: app.after(0, app.refresh_find_status)
+        self.workers.run_bulk(_load_task)
+
+    def search_index(self, app, query, mode="name"):
+        if not self.device_index: return
+        self._search_seq += 1
+        seq = self._search_seq
+        names = self.filename_index
+        if names is not None and mode != "largest":
+            # in memory and quick enough to answer on the Tk thread at every keystroke
+            started = time.perf_counter()
+            app.show_find_results(names.search(query, fuzzy=mode == "fuzzy"), (time.perf_counter() - started) * 1000)
+            return
+        def _search_task():
+            started = time.perf_counter()
+            try:
+                results = self.device_index.largest(query or "/") if mode == "largest" else self.device_index.find(query)
+            except Exception as e:
+                print(f"LOGIC: Index query failed: {e}")
+                results = []
+            if seq == self._search_seq:
+                app.after(0, lambda: app.show_find_results(results, (time.perf_counter() - started) * 1000))
+        self.workers.run(_search_task)
+
+    def analyze_usage(self, app, path, rescan=False):
+        if not self.client or not self.afc: return
+        usage = None if rescan else self.usage_cache.find(self.udid, path)
+        if usage is not None:
+            print(f"LOGIC: Usage of '{path}' from the tree under '{usage.root}'")
+            app.show_usage(usage, path)
+            return
+        self.stop_usage()
+        stop = self.usage_stop = threading.Event()
+        usage = DiskUsage(path)
+        self.usage_cache.put(self.udid, usage)
+        app.show_usage(usage, path)
+        def _usage_task():
+            # bulk leases, like indexing, so browsing stays responsive during the walk
+            lister = DirectoryLister(self.afc_pool.bulk())
+            try:
+                UsageAnalyzer(lister).analyze(usage, on_progress=lambda u: app.after(0, lambda: app.refresh_usage(u)), cancelled=stop.is_set)
+            except Exception as e:
+                print(f"LOGIC: Usage analysis failed: {e}")
+                usage.cancelled = True
+                app.after(0, lambda: app.refresh_usage(usage))
+            finally:
+                lister.close()
+        self.workers.run_bulk(_usage_task)
+
+    def stop_usage(self):
+        if self.usage_stop:
+            self.usage_stop.set()
+
     def _update_status_label(self, app, text, color):
          app.after(0, lambda t=text, c=color: app.status_label.configure(text=t, text_color=c) if hasattr(app, 'status_label') and app.status_label.winfo_exists() else None)
 
@@ -345,67 +621,219 @@ class DeviceLogic:
         if not self.afc: return
         paths = filedialog.askopenfilenames(title="Upload")
         if not paths: return
-        def _task():
-            try:
-                for p in paths:
-                    fn = os.path.basename(p)
-                    dp = os.path.join(self.current_path, fn).replace("\\", "/")
-                    self._update_status_label(app, f"Uploading {fn}...", "yellow")
-                    self.afc.push(p, dp)
-                app.after(0, lambda: messagebox.showinfo("Done", f"Uploaded {len(paths)} file(s)."))
-                self._update_status_label(app, "Status: Upload complete.", "green")
+        sizes = [os.path.getsize(p) for p in paths]
+        self._submit(f"Upload {len(paths)} file(s) to {self.current_path}", "upload",
+                     {"dest_dir": self.current_path, "paths": list(paths)}, transfer_priority(sizes))
+
+    def upload_folder(self, app):
+        if not self.afc: return
+        local_dir = filedialog.askdirectory(title="Upload Folder")
+        if not local_dir: return
+        local_dir = os.path.normpath(local_dir)
+        self._submit(f"Upload {os.path.basename(local_dir)} to {self.current_path}", "upload",
+                     {"dest_dir": self.current_path, "local_dir": local_dir}, BULK)
+
+    def _run_upload(self, app, job, spec):
+        dest_dir, remote_root = spec["dest_dir"], None
+        report = TransferReport()
+        if spec.get("local_dir"):
+            remote_root = join_path(dest_dir, os.path.basename(spec["local_dir"]))
+            items = iter_upload_items(self.transfer_pool, spec["local_dir"], remote_root,
+                                      on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
+        else:
+            items = [TransferItem(p, join_path(dest_dir, os.path.basename(p)), os.path.getsize(p)) for p in spec["paths"]]
+        try:
+            self._update_status_label(app, "Uploading...", "yellow")
+            report = self.uploader.upload(items, report=report, monitor=self._new_monitor(app, "Uploading", report), control=job,
+                                          on_progress=lambda item, r, err: self._on_upload_progress(app, dest_dir, item, r, err))
+            self._show_transfer_report(app, "Upload", report, job)
+        finally:
+            self.dir_cache.invalidate(self.udid, dest_dir)
+            if remote_root:
+                self.dir_cache.invalidate(self.udid, remote_root, recursive=True)
+            if self.current_path == dest_dir:
                 self.browse_to_path(app)
-            except Exception as e:
-                app.after(0, lambda err=e: messagebox.showerror("Error", f"Upload failed: {err}"))
-                self._update_status_label(app, "Upload failed", "red")
-        threading.Thread(target=_task, daemon=True).start()
+
+    def _on_upload_progress(self, app, dest_dir, item, report, error):
+        if error is None:
+            self.dir_cache.upsert(self.udid, os.path.dirname(item.dst), DirEntry(os.path.basename(item.dst), item.dst, False, item.size, time.time()))
+        if self.current_path == dest_dir and self.listing_refresh.ready():
+            entries = self.dir_cache.get(self.udid, dest_dir)
+            if entries is not None:
+                app.after(0, lambda flds_fls=split_entries(entries): self._update_file_listbox(app, *flds_fls))
 
     def download_files(self, app):
         if not self.afc: return
         if not hasattr(app, 'file_listbox') or not app.file_listbox.winfo_exists(): return
         sel = app.file_listbox.curselection()
         if not sel:
-            app.after(0, lambda: messagebox.showwarning("Select", "Select file(s)."))
+            app.after(0, lambda: messagebox.showwarning("Select", "Select file(s) or folder(s)."))
             return
         save_dir = filedialog.askdirectory(title="Save To")
         if not save_dir: return
-        to_dl = []
+        to_dl, folders = [], []
         try:
             for i in sel:
                 fn = app.file_listbox.get(i)
-                if not fn.startswith("[FOLDER] "):
+                if fn.startswith("[FOLDER] "):
+                    folders.append(fn.replace("[FOLDER] ", "", 1))
+                else:
                     to_dl.append(fn)
         except tk.TclError:
             app.after(0, lambda: messagebox.showerror("Error", "Selection changed."))
             return
-        if not to_dl:
-            app.after(0, lambda: messagebox.showwarning("Select", "Select file(s), not folders."))
+        cached = {e.name: e.size for e in self.dir_cache.get(self.udid, self.current_path) or []}
+        sizes = {fn: cached.get(fn) for fn in to_dl}
+        name = to_dl[0] if len(to_dl) == 1 and not folders else f"{len(to_dl) + len(folders)} item(s)"
+        self._submit(f"Download {name} from {self.current_path}", "download",
+                     {"src_dir": self.current_path, "files": to_dl, "folders": folders, "save_dir": save_dir, "sizes": sizes},
+                     transfer_priority(list(sizes.values()), bool(folders)))
+
+    def _run_download(self, app, job, spec):
+        src_dir, save_dir, folders = spec["src_dir"], spec["save_dir"], spec.get("folders", [])
+        sizes = spec.get("sizes", {})
+        items = [TransferItem(join_path(src_dir, fn), os.path.join(save_dir, fn), sizes.get(fn)) for fn in spec["files"]]
+        report = TransferReport()
+        # folder walks of a job lease bulk sessions, as the index and usage walks do
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            if folders:
+                def _all_items():
+                    yield from items
+                    for name in folders:
+                        yield from iter_download_items(lister, join_path(src_dir, name), os.path.join(save_dir, name),
+                                                       on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
+                items = _all_items()
+            self._update_status_label(app, "Downloading...", "yellow")
+            report = self.downloader.download(items, report=report, monitor=self._new_monitor(app, "Downloading", report), control=job)
+        finally:
+            lister.close()
+        self._show_transfer_report(app, "Download", report, job)
+
+    def sync_folder(self, app):
+        if not self.afc: return
+        remote_root = self.current_path
+        try:
+            sel = app.file_listbox.curselection() if hasattr(app, 'file_listbox') else ()
+            names = [app.file_listbox.get(i) for i in sel]
+        except tk.TclError:
+            names = []
+        if len(names) == 1 and names[0].startswith("[FOLDER] "):
+            remote_root = join_path(remote_root, names[0].replace("[FOLDER] ", "", 1))
+        save_dir = filedialog.askdirectory(title=f"Sync {remote_root} To")
+        if not save_dir: return
+        local_root = os.path.join(save_dir, os.path.basename(remote_root.rstrip("/")) or "device")
+        delete = messagebox.askyesno("Sync", f"Delete files in\n{local_root}\nthat no longer exist on the device?")
+        self._submit(f"Sync {remote_root} to {local_root}", "sync",
+                     {"remote_root": remote_root, "local_root": local_root, "delete": delete}, BULK)
+
+    def _run_sync(self, app, job, spec):
+        self._update_status_label(app, f"Syncing {spec['remote_root']}...", "yellow")
+        report = SyncReport()
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            report = FolderSync(lister, self.downloader).sync(spec["remote_root"], spec["local_root"], delete=spec["delete"],
+                                                              report=report, monitor=self._new_monitor(app, "Syncing", report), control=job)
+        finally:
+            lister.close()
+        self._show_transfer_report(app, "Sync", report, job)
+
+    def export_archive(self, app):
+        if not self.afc: return
+        remote_root = self.current_path
+        try:
+            sel = app.file_listbox.curselection() if hasattr(app, 'file_listbox') else ()
+            names = [app.file_listbox.get(i) for i in sel]
+        except tk.TclError:
+            names = []
+        if len(names) == 1 and names[0].startswith("[FOLDER] "):
+            remote_root = join_path(remote_root, names[0].replace("[FOLDER] ", "", 1))
+        archive_path = filedialog.asksaveasfilename(title=f"Export {remote_root} As", filetypes=ARCHIVE_FORMATS, defaultextension=".zip",
+                                                    initialfile=(os.path.basename(remote_root.rstrip("/")) or "device") + ".zip")
+        if not archive_path: return
+        self._submit(f"Export {remote_root} to {archive_path}", "archive",
+                     {"remote_root": remote_root, "archive_path": archive_path, "compress": True}, BULK)
+
+    def _run_archive(self, app, job, spec):
+        self._update_status_label(app, f"Exporting {spec['remote_root']}...", "yellow")
+        report = TransferReport()
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            report = ArchiveExporter(lister, self.downloader.pool).export(spec["remote_root"], spec["archive_path"], compress=spec["compress"],
+                                                                         report=report, monitor=self._new_monitor(app, "Exporting", report), control=job)
+        finally:
+            lister.close()
+        self._show_transfer_report(app, "Export", report, job)
+
+    def _init_scheduler(self, app):
+        def _job_runner(run):
+            def _factory(spec):
+                def _job(job):
+                    try:
+                        run(app, job, spec)
+                    except Exception as e:
+                        if not job.cancelled:
+                            app.after(0, lambda err=e: messagebox.showerror("Error", f"{job.name} failed: {err}"))
+                            self._update_status_label(app, f"{job.kind.capitalize()} failed", "red")
+                        raise
+                return _job
+            return _factory
+        self.scheduler = TransferScheduler(self.udid, on_change=lambda: app.after(0, app.refresh_transfers_window))
+        self.scheduler.register("upload", _job_runner(self._run_upload))
+        self.scheduler.register("download", _job_runner(self._run_download))
+        self.scheduler.register("sync", _job_runner(self._run_sync))
+        self.scheduler.register("archive", _job_runner(self._run_archive))
+        self.scheduler.register("install", _job_runner(self._run_install))
+        restored = self.scheduler.restore()
+        if restored:
+            print(f"LOGIC: Restored {len(restored)} unfinished transfer job(s), paused")
+
+    def _submit(self, name, kind, spec, priority):
+        if not self.scheduler: return None
+        job = self.scheduler.submit(name, kind, spec, priority)
+        print(f"LOGIC: Queued {job.describe()}")
+        return job
+
+    def _new_monitor(self, app, action, report):
+        def _on_event(event):
+            if not event.final:
+                self._update_status_label(app, format_event(event), "yellow")
+        self.last_monitor = TransferMonitor(action, report, on_event=_on_event)
+        return self.last_monitor
+
+    def export_transfer_stats(self, app):
+        if not self.last_monitor:
+            app.after(0, lambda: messagebox.showinfo("Stats", "No transfer has run yet."))
+            return
+        path = filedialog.asksaveasfilename(title="Export Transfer Stats", defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path: return
+        try:
+            self.last_monitor.export_json(path)
+        except OSError as e:
+            app.after(0, lambda err=e: messagebox.showerror("Error", f"Export failed: {err}"))
+
+    def _show_transfer_report(self, app, action, report, job=None):
+        summary = report.summary()
+        print(f"LOGIC: {action} finished: {summary}")
+        if job and job.cancelled:
+            self._update_status_label(app, f"{action} cancelled: {summary}", "orange")
             return
-        def _task():
-            try:
-                for fn in to_dl:
-                    sp = os.path.join(self.current_path, fn).replace("\\", "/")
-                    pp = os.path.join(save_dir, fn)
-                    self._update_status_label(app, f"Downloading {fn}...", "yellow")
-                    self.afc.pull(sp, pp)
-                app.after(0, lambda n=len(to_dl): messagebox.showinfo("Done", f"Downloaded {n} file(s)."))
-                self._update_status_label(app, "Download complete.", "green")
-            except Exception as e:
-                app.after(0, lambda err=e: messagebox.showerror("Error", f"Download failed: {err}"))
-                self._update_status_label(app, "Download failed", "red")
-        threading.Thread(target=_task, daemon=True).start()
+        if report.failed:
+            app.after(0, lambda: messagebox.showerror("Error", f"{action} finished with errors.\n{summary}\n\n{report.failure_lines()}"))
+            self._update_status_label(app, f"{action} finished with errors.", "red")
+        else:
+            app.after(0, lambda: messagebox.showinfo("Done", f"{action} complete.\n{summary}"))
+            self._update_status_label(app, f"{action} complete: {summary}", "green")
 
-    def _get_app_list_sync(self):
+    async def _get_app_list(self):
         apps_data = []
         error_msg = None
-        if not self.client:
+        if not self.client or not self.engine:
             return apps_data, "Client not connected"
         try:
-            print("LOGIC (Sync): Starting InstallationProxyService...")
-            with InstallationProxyService(self.client) as ip:
-                print("LOGIC (Sync): Fetching apps...")
-                apps = ip.get_apps()
-                print(f"LOGIC (Sync): Fetched {len(apps) if apps else 0} apps.")
+            print("LOGIC (Sync): Fetching apps...")
+            apps = await self.engine.get_apps()
+            print(f"LOGIC (Sync): Fetched {len(apps) if apps else 0} apps.")
             if apps:
                 for bundle_id, info in apps.items():
                     name = info.get('CFBundleDisplayName', bundle_id)
@@ -442,9 +870,9 @@ class DeviceLogic:
             print("DEBUG: Using cached app data.")
             self._update_app_grid(app, app_tab, self.apps_cache)
         else:
-            def _fetch_apps_task():
+            async def _fetch_apps_task():
                 print("DEBUG: _fetch_apps_task started (background)")
-                apps_data, error_msg = self._get_app_list_sync()
+                apps_data, error_msg = await self._get_app_list()
                 self.apps_cache = apps_data
 
                 if error_msg:
@@ -453,7 +881,7 @@ class DeviceLogic:
                     app.after(0, lambda data=apps_data, tab=app_tab: self._update_app_grid(app, tab, data))
                 print("DEBUG: _fetch_apps_task finished.")
 
-            threading.Thread(target=_fetch_apps_task, daemon=True).start()
+            self.engine.submit(_fetch_apps_task(), key="apps")
 
     def _update_app_grid(self, app, app_tab, apps_data):
         try:
@@ -536,37 +964,32 @@ class DeviceLogic:
         ipa=filedialog.askopenfilename(title="Select .ipa", filetypes=[("IPA","*.ipa")])
         if not ipa: return
         if not messagebox.askyesno("Confirm", f"Install {os.path.basename(ipa)}?"): return
-        def _task():
-            try:
-                 self._update_status_label(app, "Installing...", "yellow")
-                 with InstallationProxyService(self.client) as ip:
-                     ip.install(ipa)
-                 app.after(0, lambda: messagebox.showinfo("Done", "Success."))
-                 self._update_status_label(app, "Install complete.", "green")
-                 self.list_applications(app)
-            except Exception as e:
-                 app.after(0, lambda err=e: messagebox.showerror("Error", f"Install failed: {err}"))
-                 self._update_status_label(app, "Install failed", "red")
-        threading.Thread(target=_task, daemon=True).start()
+        self._submit(f"Install {os.path.basename(ipa)}", "install", {"ipa": ipa}, NORMAL)
+
+    def _run_install(self, app, job, spec):
+        self._update_status_label(app, "Installing...", "yellow")
+        self.engine.run(self.engine.install(spec["ipa"]))
+        app.after(0, lambda: messagebox.showinfo("Done", "Success."))
+        self._update_status_label(app, "Install complete.", "green")
+        self.list_applications(app)
 
     def uninstall_app_action(self, app, bundle_id, app_name):
         if not messagebox.askyesno("Confirm", f"Uninstall '{app_name}'?"): return
         if "com.apple." in bundle_id:
              if not messagebox.askyesno("Warning", f"'{app_name}' might be system app.\nProceed anyway?"): return
-        def _task():
+        async def _task():
             err = False
             try:
                 self._update_status_label(app, f"Uninstalling {app_name}...", "yellow")
-                with InstallationProxyService(self.client) as ip:
-                    ip.uninstall(bundle_id)
+                await self.engine.uninstall(bundle_id)
             except Exception as e:
                 err = True
                 app.after(0, lambda bid=bundle_id, error=e: messagebox.showerror("Error", f"Failed to uninstall {bid}:\n{error}"))
             if not err:
                 app.after(0, lambda name=app_name: messagebox.showinfo("Done", f"'{name}' uninstalled."))
             self._update_status_label(app, "Uninstall finished.", "green" if not err else "red")
-            self.list_applications(app)
-        threading.Thread(target=_task, daemon=True).start()
+            app.after(0, lambda: self.list_applications(app))
+        self.engine.submit(_task())
 
     def explore_app_documents(self, app, bundle_id):
         print(f"LOGIC: explore docs for {bundle_id}")
@@ -577,6 +1000,7 @@ class DeviceLogic:
             contents, error = [], None
             try:
                 print("LOGIC: Starting HouseArrest...")
+                from pymobiledevice3.services.house_arrest import HouseArrestService
                 with HouseArrestService(self.client, bundle_id=bundle_id, connection_type='DOCUMENTS') as ha:
                     print("LOGIC: Listing /Documents...")
                     items = ha.listdir('/Documents')
@@ -592,7 +1016,7 @@ class DeviceLogic:
             else:
                 display = f"App: {bundle_id}\n\nDocuments:\n- " + "\n- ".join(contents)
                 app.after(0, lambda txt=display: messagebox.showinfo("Explore", txt))
-        threading.Thread(target=_task, daemon=True).start()
+        self.workers.run(_task, key=("explore", bundle_id), on_dropped=app.show_busy)
 
     def take_screenshot(self, app):
         if not self.client:
@@ -605,15 +1029,18 @@ class DeviceLogic:
         def _task():
             self._update_status_label(app, "Taking screenshot...", "yellow")
             try:
+                from pymobiledevice3.services.screenshot import ScreenshotService
                 with ScreenshotService(self.client) as screenshoter:
-                    screenshoter.save(save_path)
+                    data = screenshoter.take_screenshot()
+                with open(save_path, "wb") as f:
+                    f.write(data)
                 app.after(0, lambda p=save_path: messagebox.showinfo("Success", f"Screenshot saved to:\n{p}"))
                 self._update_status_label(app, "Screenshot saved.", "green")
             except Exception as e:
                 app.after(0, lambda err=e: messagebox.showerror("Error", f"Failed to take screenshot:\n{err}"))
                 self._update_status_label(app, "Screenshot failed.", "red")
         
-        self.run_in_thread(_task)()
+        self.workers.run(_task, key="screenshot", on_dropped=app.show_busy)
 
     def get_battery_info(self, app):
         if not self.client:
@@ -622,6 +1049,7 @@ class DeviceLogic:
         
         def _task():
             try:
+                from pymobiledevice3.services.diagnostics import DiagnosticsService
                 with DiagnosticsService(self.client) as diag:
                     info = diag.get_battery()
                 
@@ -632,7 +1060,7 @@ class DeviceLogic:
             except Exception as e:
                 app.after(0, lambda err=e: messagebox.showerror("Error", f"Failed to get battery info:\n{err}"))
         
-        self.run_in_thread(_task)()
+        self.workers.run(_task, key="battery", on_dropped=app.show_busy)
 
     def reboot_device(self, app):
         if not self.client:
@@ -644,6 +1072,7 @@ class DeviceLogic:
         def _task():
             self._update_status_label(app, "Sending reboot command...", "yellow")
             try:
+                from pymobiledevice3.services.diagnostics import DiagnosticsService
                 with DiagnosticsService(self.client) as diag:
                     diag.restart()
                 app.after(0, lambda: messagebox.showinfo("Reboot", "Device is rebooting. App will reset."))
@@ -651,7 +1080,7 @@ class DeviceLogic:
             except Exception as e:
                 app.after(0, lambda err=e: messagebox.showerror("Error", f"Failed to reboot:\n{err}"))
         
-        self.run_in_thread(_task)()
+        self.workers.run(_task, key="reboot", on_dropped=app.show_busy)
 
     def shutdown_device(self, app):
         if not self.client:
@@ -663,6 +1092,7 @@ class DeviceLogic:
         def _task():
             self._update_status_label(app, "Sending shutdown command...", "yellow")
             try:
+                from pymobiledevice3.services.diagnostics import DiagnosticsService
                 with DiagnosticsService(self.client) as diag:
                     diag.shutdown()
                 app.after(0, lambda: messagebox.showinfo("Shutdown", "Device is powering off. App will reset."))
@@ -670,7 +1100,7 @@ class DeviceLogic:
             except Exception as e:
                 app.after(0, lambda err=e: messagebox.showerror("Error", f"Failed to shutdown:\n{err}"))
         
-        self.run_in_thread(_task)()
+        self.workers.run(_task, key="shutdown", on_dropped=app.show_busy)
 
     def enter_recovery(self, app):
         if not self.client:
@@ -685,6 +1115,7 @@ class DeviceLogic:
         def _task():
             self._update_status_label(app, "Entering recovery mode...", "red")
             try:
+                from pymobiledevice3.services.diagnostics import DiagnosticsService
                 with DiagnosticsService(self.client) as diag:
                     diag.enter_recovery()
                 app.after(0, lambda: messagebox.showinfo("Recovery", "Device entering recovery mode. App will reset."))
@@ -692,51 +1123,55 @@ class DeviceLogic:
             except Exception as e:
                 app.after(0, lambda err=e: messagebox.showerror("Error", f"Failed to enter recovery:\n{err}"))
         
-        self.run_in_thread(_task)()
+        self.workers.run(_task, key="recovery", on_dropped=app.show_busy)
 
     def toggle_syslog_stream(self, app):
-        if self.syslog_thread and self.syslog_thread.is_alive():
+        if self.syslog_task and not self.syslog_task.done():
             print("LOGIC: Stopping syslog stream...")
-            self.stop_syslog_event.set()
+            self.syslog_task.cancel()
             app.syslog_btn.configure(text="Start Syslog")
             return
 
-        if not self.client:
+        if not self.client or not self.engine:
             messagebox.showerror("Error", "Not connected.")
             return
 
-        self.stop_syslog_event.clear()
         app.syslog_btn.configure(text="Stop Syslog (Running...)")
 
-        def _stream_task():
+        async def _stream_task():
             try:
-                print("LOGIC: Starting syslog stream thread...")
-                with SyslogService(self.client) as syslog:
-                    for line in syslog.watch():
-                        if self.stop_syslog_event.is_set():
-                            print("LOGIC: Syslog stop event received.")
-                            break
-                        app.after(0, lambda l=line: app.append_to_syslog(l))
+                print("LOGIC: Starting syslog stream...")
+                async for line in self.engine.syslog():
+                    app.after(0, lambda l=line: app.append_to_syslog(l))
             except Exception as e:
                 print(f"LOGIC: Syslog stream error: {e}")
                 app.after(0, lambda err=e: app.append_to_syslog(f"\n--- SYSLOG ERROR: {err} ---\n"))
             finally:
-                print("LOGIC: Syslog stream thread finished.")
+                print("LOGIC: Syslog stream finished.")
                 app.after(0, lambda: app.syslog_btn.configure(text="Start Syslog") if hasattr(app, 'syslog_btn') and app.syslog_btn.winfo_exists() else None)
 
-        self.syslog_thread = threading.Thread(target=_stream_task, daemon=True)
-        self.syslog_thread.start()
+        self.syslog_task = self.engine.submit(_stream_task())
 
 
 class PyAFCGui(ctk.CTk):
     def __init__(self):
         super().__init__()
         self.title("PyAFC v1.0")
-        self.logic = DeviceLogic()
+        self.dir_cache = DirectoryCache()
+        self.logic = DeviceLogic(self.dir_cache)
         self.device_listener_thread = None
         self.stop_listener = threading.Event()
         self.log_window = None
         self.log_textbox = None
+        self.transfers_window = None
+        self.transfers_listbox = None
+        self.transfers_job_ids = []
+        self.find_window = None
+        self.find_results = []
+        self.usage_window = None
+        self.usage = None
+        self.usage_path = "/"
+        self.usage_items = []
         self.is_connecting = False
         
         self.menubar = Menu(self, font=MAIN_FONT, bg="#2B2B2B", fg="white", activebackground="#36719F", activeforeground="white")
@@ -749,13 +1184,14 @@ class PyAFCGui(ctk.CTk):
         self.device_menu = Menu(self.menubar, tearoff=0, font=MAIN_FONT, bg="#2B2B2B", fg="white", activebackground="#36719F", activeforeground="white")
         self.menubar.add_cascade(label="Device", menu=self.device_menu, state="disabled")
         
-        self.device_menu.add_command(label="Take Screenshot...", command=lambda: self.logic.run_in_thread(self.logic.take_screenshot, self))
-        self.device_menu.add_command(label="Get Battery Info", command=lambda: self.logic.run_in_thread(self.logic.get_battery_info, self))
+        # these ask on the Tk thread, then hand the device call to a worker
+        self.device_menu.add_command(label="Take Screenshot...", command=lambda: self.logic.take_screenshot(self))
+        self.device_menu.add_command(label="Get Battery Info", command=lambda: self.logic.get_battery_info(self))
         self.device_menu.add_separator()
-        self.device_menu.add_command(label="Reboot Device...", command=lambda: self.logic.run_in_thread(self.logic.reboot_device, self))
-        self.device_menu.add_command(label="Shutdown Device...", command=lambda: self.logic.run_in_thread(self.logic.shutdown_device, self))
+        self.device_menu.add_command(label="Reboot Device...", command=lambda: self.logic.reboot_device(self))
+        self.device_menu.add_command(label="Shutdown Device...", command=lambda: self.logic.shutdown_device(self))
         self.device_menu.add_separator()
-        self.device_menu.add_command(label="Enter Recovery Mode...", command=lambda: self.logic.run_in_thread(self.logic.enter_recovery, self))
+        self.device_menu.add_command(label="Enter Recovery Mode...", command=lambda: self.logic.enter_recovery(self))
         
         self.setup_waiting_ui()
         self.center_window(400, 200)
@@ -824,6 +1260,7 @@ class PyAFCGui(ctk.CTk):
         print("LISTENER: Started.")
 
     def _listen_for_devices(self):
+        from pymobiledevice3.usbmux import list_devices
         while not self.stop_listener.is_set():
             if self.is_connecting:
                 time.sleep(1)
@@ -856,7 +1293,9 @@ class PyAFCGui(ctk.CTk):
                 self.log_textbox.after(0, lambda m=msg: self._append_log_message(m))
             else:
                 print(f"LOG (No Win): {msg}")
-        threading.Thread(target=self.logic.connect_device, args=(self, log, self._connection_successful, self._connection_failed), daemon=True).start()
+        # dropped, the connection attempt never starts: back to the waiting screen with the reason
+        self.logic.workers.run(self.logic.connect_device, self, log, self._connection_successful, self._connection_failed, key="connect",
+                               on_dropped=lambda: self._connection_failed(BUSY_MESSAGE))
 
     def _append_log_message(self, message):
          try:
@@ -882,6 +1321,181 @@ class PyAFCGui(ctk.CTk):
         else:
             self.log_window.lift()
 
+    def show_transfers_window(self):
+        if self.transfers_window is not None and self.transfers_window.winfo_exists():
+            self.transfers_window.lift()
+            return
+        self.transfers_window=ctk.CTkToplevel(self)
+        self.transfers_window.title("Transfers")
+        self.center_toplevel(self.transfers_window, 760, 320)
+        self.transfers_listbox=tk.Listbox(self.transfers_window, font=LIST_FONT, bg="#2B2B2B", fg="white", selectbackground="#36719F", borderwidth=0, highlightthickness=0)
+        self.transfers_listbox.pack(expand=True, fill="both", padx=10, pady=(10, 0))
+        self.pool_label=ctk.CTkLabel(self.transfers_window, text="", font=self.font, anchor="w")
+        self.pool_label.pack(fill=tk.X, padx=10)
+        self.workers_label=ctk.CTkLabel(self.transfers_window, text="", font=self.font, anchor="w", justify="left")
+        self.workers_label.pack(fill=tk.X, padx=10)
+        btn_frame=ctk.CTkFrame(self.transfers_window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=10)
+        for text, action in (("Pause", "pause"), ("Resume", "resume"), ("Cancel", "cancel"), ("Move Up", "move_up"), ("Move Down", "move_down")):
+            ctk.CTkButton(btn_frame, text=text, font=self.font, width=90, command=lambda a=action: self._transfer_job_action(a)).pack(side=tk.LEFT, padx=(0, 10))
+        ctk.CTkButton(btn_frame, text="Clear Finished", font=self.font, command=lambda: self.logic.scheduler and self.logic.scheduler.clear_finished()).pack(side=tk.RIGHT)
+        self.refresh_transfers_window()
+        self.refresh_worker_stats()
+
+    def refresh_transfers_window(self):
+        if self.transfers_listbox is None or not self.transfers_listbox.winfo_exists(): return
+        jobs = self.logic.scheduler.jobs() if self.logic.scheduler else []
+        # the selection follows the job, since moving one reorders the list
+        sel = {self.transfers_job_ids[i] for i in self.transfers_listbox.curselection() if i < len(self.transfers_job_ids)}
+        self.transfers_listbox.delete(0, tk.END)
+        self.transfers_job_ids = [job.id for job in jobs]
+        for i, job in enumerate(jobs):
+            self.transfers_listbox.insert(tk.END, job.describe())
+            if job.id in sel: self.transfers_listbox.selection_set(i)
+        if self.logic.afc_pool:
+            self.pool_label.configure(text="AFC: " + format_pool_stats(self.logic.afc_pool.stats()))
+
+    def refresh_worker_stats(self):
+        # queue depth and wait times change without job events, so this one ticks while the window is open
+        if self.transfers_window is None or not self.transfers_window.winfo_exists(): return
+        stats = self.logic.workers.stats() + ([self.logic.engine.stats()] if self.logic.engine else [])
+        self.workers_label.configure(text="Workers: " + format_worker_stats(stats).replace(" | ", "\n"))
+        if self.logic.afc_pool:
+            self.pool_label.configure(text="AFC: " + format_pool_stats(self.logic.afc_pool.stats()))
+        self.after(STATS_INTERVAL_MS, self.refresh_worker_stats)
+
+    def _transfer_job_action(self, action):
+        if not self.logic.scheduler or self.transfers_listbox is None: return
+        for i in self.transfers_listbox.curselection():
+            if i < len(self.transfers_job_ids): getattr(self.logic.scheduler, action)(self.transfers_job_ids[i])
+
+    def show_find_window(self):
+        if self.find_window is not None and self.find_window.winfo_exists():
+            self.find_window.lift()
+            return
+        self.find_window=ctk.CTkToplevel(self)
+        self.find_window.title("Find on Device")
+        self.center_toplevel(self.find_window, 720, 420)
+        bar=ctk.CTkFrame(self.find_window)
+        bar.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.find_mode=ctk.CTkSegmentedButton(bar, values=["Name", "Fuzzy", "Largest"], font=self.font, command=lambda v: self._run_find())
+        self.find_mode.set("Name")
+        self.find_mode.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.find_entry=ctk.CTkEntry(bar, font=MONO_FONT, placeholder_text="name, *.glob or folder for Largest")
+        self.find_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, pady=10)
+        self.find_entry.bind("<KeyRelease>", lambda e: self._run_find())
+        ctk.CTkButton(bar, text="Reindex", width=80, font=self.font, command=self._reindex).pack(side=tk.LEFT, padx=(10, 0), pady=10)
+        self.find_listbox=tk.Listbox(self.find_window, font=LIST_FONT, bg="#2B2B2B", fg="white", selectbackground="#36719F", borderwidth=0, highlightthickness=0)
+        self.find_listbox.pack(expand=True, fill="both", padx=10, pady=(10, 0))
+        self.find_listbox.bind("<Double-Button-1>", self._open_find_result)
+        self.find_status=ctk.CTkLabel(self.find_window, text="", font=self.font, anchor="w")
+        self.find_status.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.refresh_find_status()
+        self.find_entry.focus_set()
+
+    def _run_find(self):
+        if self.find_window is None or not self.find_window.winfo_exists(): return
+        self.logic.search_index(self, self.find_entry.get(), self.find_mode.get().lower())
+
+    def _reindex(self):
+        self.logic.start_indexing(self, force=True)
+        self.refresh_find_status()
+
+    def set_find_status(self, text):
+        if self.find_window is not None and self.find_window.winfo_exists():
+            self.find_status.configure(text=text)
+
+    def refresh_find_status(self):
+        index = self.logic.device_index
+        if index is None:
+            text = "Index not available"
+        elif self.logic.is_indexing():
+            text = "Indexing..."
+        else:
+            last = index.last_scan
+            text = f"{index.count()} entries indexed" + (f", last scan {time.strftime('%Y-%m-%d %H:%M', time.localtime(last))}" if last else ", never scanned")
+            if self.logic.filename_index is None:
+                text += ", loading names..."
+        self.set_find_status(text)
+
+    def show_find_results(self, results, elapsed_ms):
+        if self.find_window is None or not self.find_window.winfo_exists(): return
+        self.find_results = results
+        self.find_listbox.delete(0, tk.END)
+        for e in results:
+            self.find_listbox.insert(tk.END, f"{'<dir>' if e.is_dir else format_size(e.size or 0):>10}  {e.path}")
+            if e.is_dir: self.find_listbox.itemconfig(tk.END, {'fg': '#87CEFA'})
+        self.set_find_status(f"{len(results)} result(s) in {elapsed_ms:.0f} ms")
+
+    def _open_find_result(self, event=None):
+        sel = self.find_listbox.curselection()
+        if not sel or sel[0] >= len(self.find_results): return
+        entry = self.find_results[sel[0]]
+        self.logic.browse_to_path(self, entry.path if entry.is_dir else os.path.dirname(entry.path) or "/")
+        self.tab_view.set("Files")
+
+    def show_usage_window(self):
+        if self.usage_window is None or not self.usage_window.winfo_exists():
+            self.usage_window=ctk.CTkToplevel(self)
+            self.usage_window.title("Disk Usage")
+            self.center_toplevel(self.usage_window, 760, 460)
+            self.usage_window.protocol("WM_DELETE_WINDOW", self._close_usage_window)
+            bar=ctk.CTkFrame(self.usage_window)
+            bar.pack(fill=tk.X, padx=10, pady=(10, 0))
+            ctk.CTkButton(bar, text="Up", width=40, font=self.font, command=self._usage_up).pack(side=tk.LEFT, padx=(10, 5), pady=10)
+            self.usage_path_label=ctk.CTkLabel(bar, text="", font=MONO_FONT, anchor="w")
+            self.usage_path_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=10)
+            self.usage_sort=ctk.CTkSegmentedButton(bar, values=["Size", "Files", "Name"], font=self.font, command=lambda v: self.refresh_usage(self.usage))
+            self.usage_sort.set("Size")
+            self.usage_sort.pack(side=tk.LEFT, padx=5, pady=10)
+            ctk.CTkButton(bar, text="Rescan", width=80, font=self.font, command=lambda: self.logic.analyze_usage(self, self.usage_path, rescan=True)).pack(side=tk.LEFT, padx=(5, 10), pady=10)
+            self.usage_listbox=VirtualListbox(self.usage_window, font=MONO_FONT, bg="#2B2B2B", fg="white", selectbackground="#36719F", borderwidth=0, highlightthickness=0)
+            self.usage_listbox.pack(expand=True, fill="both", padx=10, pady=(10, 0))
+            self.usage_listbox.bind("<Double-Button-1>", self._usage_open)
+            self.usage_listbox.bind("<Return>", self._usage_open)
+            self.usage_listbox.bind("<BackSpace>", lambda e: self._usage_up())
+            self.usage_status=ctk.CTkLabel(self.usage_window, text="", font=self.font, anchor="w")
+            self.usage_status.pack(fill=tk.X, padx=10, pady=(0, 10))
+        else:
+            self.usage_window.lift()
+        self.logic.analyze_usage(self, self.logic.current_path)
+
+    def _close_usage_window(self):
+        self.logic.stop_usage()
+        self.usage_window.destroy()
+
+    def show_usage(self, usage, path):
+        if self.usage_window is None or not self.usage_window.winfo_exists(): return
+        self.usage, self.usage_path = usage, path
+        self.usage_path_label.configure(text=path)
+        self.usage_listbox.delete(0, tk.END)
+        self.refresh_usage(usage)
+
+    def refresh_usage(self, usage):
+        # partial totals stream in while the walk runs; "+" marks folders still being added up
+        if self.usage_window is None or not self.usage_window.winfo_exists() or usage is not self.usage: return
+        items = usage.children(self.usage_path, self.usage_sort.get().lower()) or []
+        total, files, _ = usage.total(self.usage_path)
+        sel = self.usage_listbox.curselection()
+        selected = self.usage_items[sel[0]].entry.path if sel and sel[0] < len(self.usage_items) else None
+        scroll = self.usage_listbox.yview()[0]
+        self.usage_items = items
+        self.usage_listbox.set_items([format_usage_row(item, total) for item in items],
+                                     {i: '#87CEFA' for i, item in enumerate(items) if item.entry.is_dir}, scroll=scroll)
+        for i, item in enumerate(items):
+            if item.entry.path == selected: self.usage_listbox.selection_set(i)
+        self.usage_status.configure(text=f"{self.usage_path}: {format_size(total)} in {files} file(s) | {usage.summary()}")
+
+    def _usage_open(self, event=None):
+        sel = self.usage_listbox.curselection()
+        if not sel or sel[0] >= len(self.usage_items): return
+        entry = self.usage_items[sel[0]].entry
+        if entry.is_dir: self.logic.analyze_usage(self, entry.path)
+
+    def _usage_up(self):
+        parent = os.path.dirname(self.usage_path.rstrip("/")) or "/"
+        if parent != self.usage_path: self.logic.analyze_usage(self, parent)
+
     def _connection_successful(self, device_name, all_device_info, preloaded_apps, preloaded_files_data):
         print("MAIN: Success.")
         self.is_connecting = False
@@ -914,7 +1528,8 @@ class PyAFCGui(ctk.CTk):
             messagebox.showerror("Failed", error_message)
         
         self.menubar.entryconfig("Device", state="disabled")
-        self.logic = DeviceLogic()
+        self.logic.close_afc_sessions()
+        self.logic = DeviceLogic(self.dir_cache)
         self.setup_waiting_ui()
         self.center_window(400, 200)
         self.start_device_listener()
@@ -952,7 +1567,7 @@ class PyAFCGui(ctk.CTk):
 
     def setup_info_tab(self, tab, all_device_info):
         self.info_btn = ctk.CTkButton(tab, text="Refresh Info", font=self.font,
-                                      command=lambda: self.logic.run_in_thread(self.update_info_tab))
+                                      command=lambda: self.logic.workers.run(self.update_info_tab, key="device-info", on_dropped=self.show_busy))
         self.info_btn.pack(pady=10, padx=10, fill=tk.X)
         self.info_text = ctk.CTkTextbox(tab, wrap=tk.WORD, state=tk.DISABLED, font=MONO_FONT)
         self.info_text.pack(pady=(0, 10), padx=10, fill=tk.BOTH, expand=True)
@@ -972,33 +1587,59 @@ class PyAFCGui(ctk.CTk):
     def setup_files_tab(self, tab, preloaded_files_data):
         nav=ctk.CTkFrame(tab)
         nav.pack(fill=tk.X, padx=10, pady=(5,0))
+        self.back_btn=ctk.CTkButton(nav, text="<", width=30, font=self.font, command=lambda: self.logic.go_back(self), state=tk.DISABLED)
+        self.back_btn.pack(side=tk.LEFT, padx=(10, 0), pady=10)
+        self.forward_btn=ctk.CTkButton(nav, text=">", width=30, font=self.font, command=lambda: self.logic.go_forward(self), state=tk.DISABLED)
+        self.forward_btn.pack(side=tk.LEFT, padx=(5, 0), pady=10)
+        self.bind("<Alt-Left>", lambda e: self.logic.go_back(self))
+        self.bind("<Alt-Right>", lambda e: self.logic.go_forward(self))
+        self.bind("<Control-f>", lambda e: self.show_find_window())
         ctk.CTkLabel(nav, text="Path:", font=self.font).pack(side=tk.LEFT, padx=(10, 5))
         self.path_entry=ctk.CTkEntry(nav, font=MONO_FONT)
         self.path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, pady=10, padx=5)
-        self.path_entry.bind("<Return>", lambda e: self.logic.browse_to_path(self, self.path_entry.get()))
+        self.path_entry.bind("<Return>", lambda e: self.logic.browse_to_path(self, self.path_entry.get(), refresh=True))
         self.go_up_btn=ctk.CTkButton(nav, text="Up", width=40, font=self.font, command=lambda: self.logic.go_up_directory(self))
         self.go_up_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.find_btn=ctk.CTkButton(nav, text="Find...", width=60, font=self.font, command=self.show_find_window)
+        self.find_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.usage_btn=ctk.CTkButton(nav, text="Usage", width=60, font=self.font, command=self.show_usage_window)
+        self.usage_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.thumbs_btn=ctk.CTkButton(nav, text="Thumbs", width=60, font=self.font, command=self.toggle_thumbnails)
+        self.thumbs_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
         list_frame=ctk.CTkFrame(tab)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        self.file_listbox=tk.Listbox(list_frame, height=15, selectmode=tk.EXTENDED, bg="#2B2B2B", fg="white", selectbackground="#36719F", selectforeground="white", activestyle="none", borderwidth=0, highlightthickness=0, font=LIST_FONT)
-        scroll=ctk.CTkScrollbar(list_frame, command=self.file_listbox.yview)
+        self.file_listbox=VirtualListbox(list_frame, height=15, selectmode=tk.EXTENDED, bg="#2B2B2B", fg="white", selectbackground="#36719F", selectforeground="white", activestyle="none", borderwidth=0, highlightthickness=0, font=LIST_FONT)
+        self.file_scroll=scroll=ctk.CTkScrollbar(list_frame, command=self.file_listbox.yview)
         scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=1, padx=(0,1))
         self.file_listbox.config(yscrollcommand=scroll.set)
         self.file_listbox.pack(fill=tk.BOTH, expand=True, pady=1, padx=(1,0))
         self.file_listbox.bind("<Double-Button-1>", lambda e: self.logic.on_file_double_click(self, e))
         self.file_listbox.bind("<<ListboxSelect>>", self.on_file_selection)
+        # icon view over the same rows and selection, only built while it is shown
+        self.thumb_mode = False
+        self.thumb_grid=ThumbnailGrid(list_frame, self.file_listbox, on_visible=lambda names: self.logic.load_thumbnails(self, names), bg="#2B2B2B")
+        self.thumb_grid.bind("<Double-Button-1>", lambda e: self.logic.on_file_double_click(self, e))
         act_frame=ctk.CTkFrame(tab)
         act_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
         self.upload_btn=ctk.CTkButton(act_frame, text="Upload...", font=self.font, command=lambda: self.logic.upload_files(self))
         self.upload_btn.pack(side=tk.LEFT, padx=10, pady=10)
+        self.upload_folder_btn=ctk.CTkButton(act_frame, text="Upload Folder...", font=self.font, command=lambda: self.logic.upload_folder(self))
+        self.upload_folder_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
         self.download_btn=ctk.CTkButton(act_frame, text="Download...", font=self.font, command=lambda: self.logic.download_files(self), state=tk.DISABLED)
         self.download_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.sync_btn=ctk.CTkButton(act_frame, text="Sync To PC...", font=self.font, command=lambda: self.logic.sync_folder(self))
+        self.sync_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.archive_btn=ctk.CTkButton(act_frame, text="Export Archive...", font=self.font, command=lambda: self.logic.export_archive(self))
+        self.archive_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.stats_btn=ctk.CTkButton(act_frame, text="Export Stats...", font=self.font, command=lambda: self.logic.export_transfer_stats(self))
+        self.stats_btn.pack(side=tk.RIGHT, padx=10, pady=10)
+        self.transfers_btn=ctk.CTkButton(act_frame, text="Transfers...", font=self.font, command=self.show_transfers_window)
+        self.transfers_btn.pack(side=tk.RIGHT, padx=(10, 0), pady=10)
         
         folders, files, error = preloaded_files_data
         self.logic._update_file_listbox(self, folders, files, error)
-        if hasattr(self, 'path_entry') and self.path_entry.winfo_exists():
-            self.path_entry.delete(0, tk.END)
-            self.path_entry.insert(0, self.logic.current_path)
+        self.logic.history.visit(self.logic.current_path)
+        self.logic._show_path(self)
 
     def setup_apps_tab(self, tab, preloaded_apps):
         app_btn_frame = ctk.CTkFrame(tab)
@@ -1046,21 +1687,35 @@ class PyAFCGui(ctk.CTk):
         finally:
             menu.grab_release()
 
+    def toggle_thumbnails(self):
+        self.thumb_mode = not self.thumb_mode
+        shown, hidden = (self.thumb_grid, self.file_listbox) if self.thumb_mode else (self.file_listbox, self.thumb_grid)
+        hidden.pack_forget()
+        hidden.configure(yscrollcommand=None)
+        shown.pack(fill=tk.BOTH, expand=True, pady=1, padx=(1,0))
+        shown.configure(yscrollcommand=self.file_scroll.set)
+        self.file_scroll.configure(command=shown.yview)
+        self.thumbs_btn.configure(text="List" if self.thumb_mode else "Thumbs")
+        self.refresh_thumbnails()
+
+    def refresh_thumbnails(self):
+        if getattr(self, 'thumb_mode', False) and self.thumb_grid.winfo_exists():
+            self.thumb_grid.refresh(self.logic.current_path)
+
     def on_file_selection(self, event=None):
         try:
             if not hasattr(self, 'file_listbox') or not self.file_listbox.winfo_exists(): return
-            sel = self.file_listbox.curselection(); enable = False
-            if sel:
-                for i in sel:
-                    try: item = self.file_listbox.get(i)
-                    except tk.TclError: continue
-                    if not item.startswith("[FOLDER] "): enable = True; break
+            enable = bool(self.file_listbox.curselection())
             if hasattr(self, 'download_btn') and self.download_btn.winfo_exists():
                 self.download_btn.configure(state=tk.NORMAL if enable else tk.DISABLED)
         except tk.TclError:
              if hasattr(self, 'download_btn') and self.download_btn.winfo_exists():
                  self.download_btn.configure(state=tk.DISABLED)
 
+    def show_busy(self):
+        # a click whose task could not even be queued
+        messagebox.showwarning("Busy", BUSY_MESSAGE)
+
     def show_credits(self):
         messagebox.showinfo("PyAFC Credits",
                             "Developer: https://github.com/ZodaciOS\n"
@@ -1070,7 +1725,8 @@ class PyAFCGui(ctk.CTk):
     def on_closing(self):
          print("MAIN: Closing..."); self.stop_listener.set()
          if self.logic:
-             self.logic.stop_syslog_event.set()
+             self.logic.close_afc_sessions()
+             self.logic.workers.shutdown()
          if self.device_listener_thread and self.device_listener_thread.is_alive():
              self.device_listener_thread.join(timeout=1.0)
          if self.logic and self.logic.client:
@@ -1,15 +1,19 @@
 import sys
-import customtkinter as ctk
-from .gui import PyAFCGui
 
 def main():
+    if len(sys.argv) > 1:
+        # any arguments mean the headless command line, which never loads a GUI toolkit
+        from .cli import main as cli_main
+        sys.exit(cli_main())
+
     if sys.platform == "win32":
         try:
             from ctypes import windll
             windll.shcore.SetProcessDpiAwareness(1)
         except Exception:
-            pass 
-            
+            pass
+
+    from .gui import PyAFCGui
     app = PyAFCGui()
     app.mainloop()
 
@@ -0,0 +1,188 @@
+import io
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pymobiledevice3.exceptions import ConnectionTerminatedError
+
+DEFAULT_POOL_SIZE = 4
+DEVICE_POOL_SIZE = 8
+INTERACTIVE_RESERVED = 2
+HEALTH_CHECK_IDLE = 30.0
+AFC_FILE_SEEK = 0x11
+SKIP_CHUNK = 1024 * 1024
+
+PoolStats = namedtuple("PoolStats", ["size", "open", "idle", "bulk", "leases", "waits", "wait_avg_ms", "wait_max_ms", "replaced"])
+
+def is_broken(error):
+    # the socket is gone or out of step with the device: the session must not be reused
+    return isinstance(error, (ConnectionError, OSError, ConnectionTerminatedError))
+
+def afc_seek(afc, handle, offset, position=0):
+    # moves an open handle from position to offset. pymobiledevice3's AfcService
+    # has no lseek, so this sends the AFC FILE_SEEK op itself; a session without
+    # that reads forward and drops the bytes, which only works going forward
+    if offset == position:
+        return
+    if hasattr(afc, "_do_operation"):
+        afc._do_operation(AFC_FILE_SEEK, struct.pack("<QQq", handle, os.SEEK_SET, offset))
+        return
+    if offset < position:
+        raise io.UnsupportedOperation(f"Cannot seek back from {position} to {offset} on this AFC session")
+    while position < offset:
+        data = afc.fread(handle, min(SKIP_CHUNK, offset - position))
+        if not data:
+            raise EOFError(f"File ended at {position}, before offset {offset}")
+        position += len(data)
+
+def check_session(afc):
+    afc.stat("/")
+
+def format_pool_stats(stats):
+    return (f"{stats.open}/{stats.size} sessions ({stats.bulk} bulk), {stats.leases} leases, "
+            f"{stats.waits} waited avg {stats.wait_avg_ms:.0f} ms max {stats.wait_max_ms:.0f} ms, {stats.replaced} replaced")
+
+class AfcSessionPool:
+    # AFC sessions handed out one operation at a time. Bulk leases (transfers, walks)
+    # never take the last `reserved` sessions, so browsing always finds one free.
+    # A session that sat idle for a while is checked before it is handed out, and a
+    # broken one is closed and replaced by a fresh session on the next lease.
+    def __init__(self, factory, size=DEFAULT_POOL_SIZE, reserved=0, health_check=None, check_after=HEALTH_CHECK_IDLE):
+        self.factory = factory
+        self.size = max(1, size)
+        self.reserved = min(max(0, reserved), self.size - 1)
+        self.health_check = health_check
+        self.check_after = check_after
+        self._idle = []
+        self._created = 0
+        self._bulk = set()
+        self._bulk_starting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.leases = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.replaced = 0
+
+    def acquire(self, timeout=None, bulk=False):
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        afc, last_used = None, None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("AFC session pool is closed")
+                if not (bulk and len(self._bulk) + self._bulk_starting >= self.size - self.reserved):
+                    if self._idle:
+                        afc, last_used = self._idle.pop()
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for an AFC session")
+                self._cond.wait(remaining)
+            # the bulk slot is held from here, under the same lock as the check, so
+            # bulk leases still in their health check or factory call count too
+            if bulk:
+                self._bulk_starting += 1
+            self._count_lease(time.monotonic() - started)
+        if afc is not None and self.health_check and time.monotonic() - last_used > self.check_after:
+            try:
+                self.health_check(afc)
+            except Exception as e:
+                print(f"POOL: Idle session failed its check ({e}), replacing it")
+                self._close_session(afc)
+                afc = None
+                with self._cond:
+                    self.replaced += 1
+        if afc is None:
+            try:
+                afc = self.factory()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    if bulk:
+                        self._bulk_starting -= 1
+                    self._cond.notify_all()
+                raise
+        if bulk:
+            with self._cond:
+                self._bulk_starting -= 1
+                self._bulk.add(id(afc))
+        return afc
+
+    def _count_lease(self, waited):
+        self.leases += 1
+        # a lease that found a session at once is not a wait
+        if waited > 0.001:
+            self.waits += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def release(self, afc, broken=False):
+        with self._cond:
+            self._bulk.discard(id(afc))
+            if not broken and not self._closed:
+                self._idle.append((afc, time.monotonic()))
+                self._cond.notify_all()
+                return
+            self._created -= 1
+            if broken:
+                self.replaced += 1
+            self._cond.notify_all()
+        self._close_session(afc)
+
+    @contextmanager
+    def lease(self, timeout=None, bulk=False):
+        afc = self.acquire(timeout=timeout, bulk=bulk)
+        broken = False
+        try:
+            yield afc
+        except Exception as e:
+            broken = is_broken(e)
+            raise
+        finally:
+            self.release(afc, broken=broken)
+
+    def bulk(self):
+        return BulkLeases(self)
+
+    def stats(self):
+        with self._cond:
+            return PoolStats(self.size, self._created, len(self._idle), len(self._bulk) + self._bulk_starting, self.leases, self.waits,
+                             self.wait_total / self.waits * 1000 if self.waits else 0.0, self.wait_max * 1000, self.replaced)
+
+    def _close_session(self, afc):
+        try:
+            afc.close()
+        except Exception as e:
+            print(f"POOL: Close error: {e}")
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for afc, _ in idle:
+            self._close_session(afc)
+
+class BulkLeases:
+    # the pool as seen by transfers and background walks: same sessions, bulk leases only
+    def __init__(self, pool):
+        self.pool = pool
+        self.size = pool.size - pool.reserved
+
+    def acquire(self, timeout=None):
+        return self.pool.acquire(timeout=timeout, bulk=True)
+
+    def release(self, afc, broken=False):
+        self.pool.release(afc, broken=broken)
+
+    def lease(self, timeout=None):
+        return self.pool.lease(timeout=timeout, bulk=True)
@@ -1,22 +1,23 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from pymobiledevice3.services.installation_proxy import InstallationProxyService
 import os
+from .engine import tk_deliver
 
 class AppLogic:
     def __init__(self, app):
         self.app = app
         self.client = None
+        self.engine = None
 
     def list_applications(self):
-        if not self.client: return
+        if not self.client or not self.engine: return
         self.app.app_listbox.delete(0, tk.END)
         self.app.app_listbox.insert(tk.END, "Loading... This may take a moment.")
-        
+        self.engine.submit(self.engine.get_apps(app_type=None), self._show_applications, tk_deliver(self.app), key="apps")
+
+    def _show_applications(self, apps, error):
         try:
-            with InstallationProxyService(self.client) as ip:
-                apps = ip.get_apps(app_type=None)
-            
+            if error: raise error
             self.app.app_listbox.delete(0, tk.END)
             if not apps:
                 self.app.app_listbox.insert(tk.END, "No applications found.")
@@ -39,7 +40,7 @@ class AppLogic:
             messagebox.showerror("App List Error", f"Could not list applications: {e}")
 
     def install_app(self):
-        if not self.client: return
+        if not self.client or not self.engine: return
 
         ipa_path = filedialog.askopenfilename(title="Select .ipa file to install", filetypes=[("IPA files", "*.ipa")])
         if not ipa_path: return
@@ -48,10 +49,11 @@ class AppLogic:
             return
 
         self.app.status_label.configure(text="Status: Installing .ipa...", text_color="yellow")
+        self.engine.submit(self.engine.install(ipa_path), self._installed, tk_deliver(self.app))
+
+    def _installed(self, result, error):
         try:
-            with InstallationProxyService(self.client) as ip:
-                ip.install(ipa_path)
-            
+            if error: raise error
             messagebox.showinfo("Install Complete", "Application installed successfully.")
             self.app.status_label.configure(text="Status: Install complete.", text_color="green")
             self.list_applications()
@@ -60,7 +62,7 @@ class AppLogic:
             self.app.status_label.configure(text="Status: Install failed.", text_color="red")
 
     def uninstall_apps(self):
-        if not self.client: return
+        if not self.client or not self.engine: return
         
         selected_indices = self.app.app_listbox.curselection()
         if not selected_indices:
@@ -91,11 +93,16 @@ class AppLogic:
             return
 
         self.app.status_label.configure(text="Status: Uninstalling...", text_color="yellow")
+
+        async def uninstall_all():
+            for bundle_id in bundle_ids_to_uninstall:
+                await self.engine.uninstall(bundle_id)
+
+        self.engine.submit(uninstall_all(), self._uninstalled, tk_deliver(self.app))
+
+    def _uninstalled(self, result, error):
         try:
-            with InstallationProxyService(self.client) as ip:
-                for bundle_id in bundle_ids_to_uninstall:
-                    ip.uninstall(bundle_id)
-            
+            if error: raise error
             messagebox.showinfo("Uninstall Complete", "Application(s) uninstalled successfully.")
             self.app.status_label.configure(text="Status: Uninstall complete.", text_color="green")
             self.list_applications()
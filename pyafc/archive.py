@@ -0,0 +1,253 @@
+import os
+import posixpath
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from .afc_pool import afc_seek, is_broken
+from .listing import walk
+from .transfer import DOWNLOAD_CHUNK_SIZE, TransferItem, TransferReport, job_pool
+
+ARCHIVE_QUEUE_CHUNKS = 2
+ARCHIVE_FORMATS = (("Zip archive", "*.zip"), ("Gzipped tar", "*.tar.gz"), ("Tar archive", "*.tar"))
+ZIP_DATES = ((1980, 1, 1, 0, 0, 0), (2107, 12, 31, 23, 59, 58))
+
+def zip_date(mtime=None):
+    # zip dates only cover 1980-2107; ZipInfo raises for anything else, which
+    # would end the whole export over one odd timestamp
+    first, last = ZIP_DATES
+    return min(max(time.localtime(mtime)[:6] if mtime else time.localtime()[:6], first), last)
+
+def archive_format(path):
+    lower = path.lower()
+    if lower.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if lower.endswith(".tar"):
+        return "tar"
+    return "zip"
+
+class _EntryStream:
+    # file-like view of one entry's chunks for tarfile.addfile; a failed read is
+    # zero-padded to the announced size so the rest of the archive stays valid
+    def __init__(self, messages, size):
+        self._messages = messages
+        self._remaining = size
+        self._buffer = b""
+        self._ended = False
+
+    def read(self, size=-1):
+        if size < 0:
+            size = self._remaining
+        while not self._ended and len(self._buffer) < size:
+            message = next(self._messages)
+            if isinstance(message, bytes):
+                self._buffer += message
+            else:
+                self._ended = True
+        if len(self._buffer) < size:
+            self._buffer += b"\0" * (min(size, self._remaining) - len(self._buffer))
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._remaining -= len(data)
+        return data
+
+    def drain(self):
+        while not self._ended:
+            if not isinstance(next(self._messages), bytes):
+                self._ended = True
+
+class ArchiveExporter:
+    # readers fetch the next few files on separate sessions, each into its own
+    # small chunk queue; one writer thread drains those queues in walk order and
+    # does the (optional) compression. Nothing is staged on disk and memory is
+    # bounded by readers * queue_chunks * chunk_size.
+    def __init__(self, lister, pool, readers=None, chunk_size=DOWNLOAD_CHUNK_SIZE, queue_chunks=ARCHIVE_QUEUE_CHUNKS):
+        self.lister = lister
+        self.pool = pool
+        self.readers = max(1, readers or pool.size)
+        self.chunk_size = chunk_size
+        self.queue_chunks = max(1, queue_chunks)
+
+    def export(self, remote_root, archive_path, compress=True, report=None, monitor=None, control=None):
+        report = report or TransferReport()
+        order = queue.Queue(maxsize=self.readers)
+        writer_error = []
+        writer = threading.Thread(target=self._write, args=(archive_format(archive_path), archive_path, compress, order, writer_error),
+                                  daemon=True, name="archive-writer")
+        writer.start()
+        executor = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="archive-read")
+        base = posixpath.basename(remote_root.rstrip("/")) or "device"
+        def put(target, message):
+            # gives up as soon as the writer has failed instead of blocking on a full queue
+            while not writer_error:
+                try:
+                    target.put(message, timeout=0.5)
+                    return
+                except queue.Full:
+                    pass
+            raise writer_error[0]
+        try:
+            for dir_path, entries in walk(self.lister, remote_root,
+                                          on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err)):
+                if control and control.cancelled:
+                    break
+                rel = posixpath.relpath(dir_path, remote_root)
+                put(order, ("dir", base if rel == "." else posixpath.join(base, rel), None))
+                for entry in entries:
+                    if control and control.cancelled:
+                        break
+                    if entry.is_dir:
+                        continue
+                    # executor work is FIFO, and readers never wait on the writer while
+                    # holding a session, so the file the writer waits on gets read
+                    chunks = queue.Queue(maxsize=self.queue_chunks)
+                    put(order, chunks)
+                    executor.submit(self._read_file, entry, posixpath.join(base, posixpath.relpath(entry.path, remote_root)),
+                                    chunks, put, report, monitor, control)
+        finally:
+            executor.shutdown(wait=True)
+            try:
+                put(order, None)
+            except Exception:
+                pass
+            writer.join()
+            report.finished = time.monotonic()
+            if monitor:
+                monitor.finish()
+            if writer_error or (control and control.cancelled):
+                try:
+                    os.remove(archive_path)
+                except OSError:
+                    pass
+        if writer_error:
+            raise writer_error[0]
+        return report
+
+    def _read_file(self, entry, arcname, chunks, put, report, monitor, control):
+        # the session is only held while this file can make progress: when its queue
+        # is full the writer is busy elsewhere (or the job is paused), so the session
+        # goes back to the pool and the read picks up at the same offset on whatever
+        # session is free next. Holding it there would deadlock exports that share a pool.
+        item = TransferItem(entry.path, arcname, entry.size, entry.mtime)
+        report.add_total(1, entry.size or 0)
+        if monitor:
+            monitor.start_file(item)
+        error, done, size = None, 0, entry.size
+        afc, handle = None, None
+        pool = job_pool(self.pool, control)
+        try:
+            if control and control.cancelled:
+                control.checkpoint()
+            afc = pool.acquire()
+            if size is None:
+                size = int(afc.stat(entry.path).get('st_size', 0))
+            handle = afc.fopen(entry.path, "r")
+            # the header goes out only once the file is readable, so a
+            # stat or open failure leaves no trace in the archive
+            put(chunks, ("file", arcname, (size, entry.mtime)))
+            while done < size:
+                if control:
+                    if control.paused and afc is not None:
+                        afc, handle = self._release(pool, afc, handle, None)
+                    control.checkpoint()
+                if afc is None:
+                    afc = pool.acquire()
+                    handle = afc.fopen(entry.path, "r")
+                    afc_seek(afc, handle, done)
+                data = afc.fread(handle, min(self.chunk_size, size - done))
+                if not data:
+                    break
+                if chunks.full():
+                    afc, handle = self._release(pool, afc, handle, None)
+                put(chunks, data)
+                done += len(data)
+                if monitor:
+                    monitor.add_bytes(item, len(data))
+            if done != size:
+                error = EOFError(f"Short read: expected {size} bytes, got {done}")
+        except Exception as e:
+            error = e
+        self._release(pool, afc, handle, error)
+        try:
+            put(chunks, ("end", arcname, error))
+        except Exception:
+            pass
+        if error is None:
+            report.add_success(item, done)
+        else:
+            print(f"ARCHIVE: {entry.path} failed: {error}")
+            report.add_failure(item, error)
+        if monitor:
+            monitor.finish_file(item, error)
+
+    def _release(self, pool, afc, handle, error):
+        if afc is None:
+            return None, None
+        if handle is not None:
+            try:
+                afc.fclose(handle)
+            except Exception:
+                pass
+        pool.release(afc, broken=is_broken(error))
+        return None, None
+
+    def _write(self, fmt, archive_path, compress, order, writer_error):
+        try:
+            if fmt == "zip":
+                self._write_zip(archive_path, compress, self._messages(order))
+            else:
+                self._write_tar(archive_path, fmt == "tar.gz" and compress, self._messages(order))
+        except Exception as e:
+            print(f"ARCHIVE: Writing {archive_path} failed: {e}")
+            writer_error.append(e)
+
+    def _messages(self, order):
+        # flattens the per-file queues back into one ordered message stream
+        while True:
+            source = order.get()
+            if source is None:
+                return
+            if isinstance(source, tuple):
+                yield source
+                continue
+            while True:
+                message = source.get()
+                yield message
+                if isinstance(message, tuple) and message[0] == "end":
+                    break
+
+    def _write_zip(self, archive_path, compress, messages):
+        compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(archive_path, "w", compression=compression, allowZip64=True) as zf:
+            for kind, name, meta in messages:
+                if kind == "dir":
+                    zf.writestr(zipfile.ZipInfo(name + "/", date_time=zip_date()), b"")
+                    continue
+                if kind != "file":
+                    continue
+                size, mtime = meta
+                info = zipfile.ZipInfo(name, date_time=zip_date(mtime))
+                info.compress_type = compression
+                info.file_size = size
+                with zf.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as dst:
+                    for data in messages:
+                        if not isinstance(data, bytes):
+                            break
+                        dst.write(data)
+
+    def _write_tar(self, archive_path, compress, messages):
+        with tarfile.open(archive_path, "w:gz" if compress else "w") as tar:
+            for kind, name, meta in messages:
+                info = tarfile.TarInfo(name)
+                if kind == "dir":
+                    info.type, info.mode, info.mtime = tarfile.DIRTYPE, 0o755, time.time()
+                    tar.addfile(info)
+                    continue
+                if kind != "file":
+                    continue
+                size, mtime = meta
+                info.size, info.mode, info.mtime = size, 0o644, mtime or time.time()
+                stream = _EntryStream(messages, size)
+                tar.addfile(info, stream)
+                stream.drain()
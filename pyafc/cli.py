@@ -0,0 +1,284 @@
+import argparse
+import contextlib
+import json
+import os
+import posixpath
+import sys
+import threading
+from datetime import datetime
+from .afc_pool import AfcSessionPool, DEVICE_POOL_SIZE, check_session
+from .engine import DeviceEngine, mount_developer_image
+from .journal import TransferJournal
+from .listing import walk_parallel
+from .progress import TransferMonitor
+from .sync import FolderSync, SyncReport
+from .transfer import DownloadEngine, UploadEngine, TransferItem, TransferReport, TRANSFER_WORKERS, iter_download_items, iter_upload_items
+
+# no GUI toolkit or PIL anywhere below: this runs on hosts without a display.
+# Results go to stdout as JSON (one document, or one object per line for lists
+# and streams); progress and the library's own log lines go to stderr.
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.timestamp()
+    if isinstance(obj, bytes):
+        try:
+            return obj.decode("utf-8")
+        except UnicodeDecodeError:
+            return obj.hex()
+    return str(obj)
+
+class Output:
+    # one JSON value per line; worker threads write through the same lock
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, value):
+        line = json.dumps(value, default=_json_default, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+def entry_dict(entry):
+    return {"name": entry.name, "path": entry.path, "is_dir": entry.is_dir, "size": entry.size, "mtime": entry.mtime}
+
+def report_dict(report):
+    result = {"files_total": report.total_files, "files_completed": report.completed, "files_failed": len(report.failed),
+              "bytes": report.bytes_done, "seconds": round(report.elapsed, 3), "throughput": round(report.throughput, 1),
+              "failures": [{"path": item.src, "error": str(err)} for item, err in report.failed]}
+    if isinstance(report, SyncReport):
+        result.update(skipped=report.skipped, deleted=report.deleted)
+    return result
+
+class Device:
+    # one connection for the whole command, with the same session pool and
+    # engine the GUIs build; nothing is reserved since nobody is browsing
+    def __init__(self, udid=None, sessions=DEVICE_POOL_SIZE):
+        from pymobiledevice3.lockdown import create_using_usbmux
+        from pymobiledevice3.services.afc import AfcService
+        self.client = create_using_usbmux(serial=udid)
+        self.udid = udid or getattr(self.client, "udid", None)
+        self.pool = AfcSessionPool(lambda: AfcService(self.client), size=sessions, health_check=check_session)
+        self.engine = DeviceEngine(self.client, self.pool)
+
+    def is_dir(self, path):
+        try:
+            return self.engine.run(self.engine.stat(path)).get("st_ifmt") == "S_IFDIR"
+        except Exception:
+            return False
+
+    def close(self):
+        self.engine.close()
+        self.pool.close()
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+def _monitor(args, action, report):
+    if not args.progress:
+        return None
+    progress = Output(sys.stderr)
+    return TransferMonitor(action, report, on_event=lambda event: progress.emit(event._asdict()))
+
+def _transfer_result(out, action, report):
+    out.emit(dict(action=action, **report_dict(report)))
+    return EXIT_FAILED if report.failed else 0
+
+def cmd_ls(device, args, out):
+    if args.recursive:
+        failed = []
+        for _, entries in walk_parallel(device.engine.lister, args.path, on_error=lambda path, err: failed.append((path, err))):
+            for entry in entries:
+                out.emit(entry_dict(entry))
+        for path, err in failed:
+            print(f"CLI: Could not list {path}: {err}", file=sys.stderr)
+        return EXIT_FAILED if failed else 0
+    def on_batch(batch):
+        # rows go out as the stats come back, so a huge folder starts printing at once
+        for entry in batch:
+            out.emit(entry_dict(entry))
+    device.engine.run(device.engine.list(args.path, on_batch=on_batch))
+    return 0
+
+def cmd_stat(device, args, out):
+    info = device.engine.run(device.engine.stat(args.path))
+    out.emit(dict(path=args.path, **info))
+    return 0
+
+def cmd_pull(device, args, out):
+    journal = TransferJournal(device.udid)
+    report = TransferReport()
+    remote = args.remote.rstrip("/") or "/"
+    local = args.local
+    if device.is_dir(remote):
+        items = iter_download_items(device.engine.lister, remote, os.path.join(local, posixpath.basename(remote) or "device"),
+                                    on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
+    else:
+        if os.path.isdir(local):
+            local = os.path.join(local, posixpath.basename(remote))
+        items = [TransferItem(remote, local, device.engine.run(device.engine.stat(remote)).get("st_size"))]
+    downloader = DownloadEngine(device.pool, workers=args.workers, journal=journal, verify_hash=args.verify)
+    try:
+        downloader.download(items, report=report, monitor=_monitor(args, "Downloading", report))
+    finally:
+        journal.flush()
+    return _transfer_result(out, "pull", report)
+
+def cmd_push(device, args, out):
+    journal = TransferJournal(device.udid)
+    report = TransferReport()
+    local = os.path.normpath(args.local)
+    remote = args.remote.rstrip("/") or "/"
+    if os.path.isdir(local):
+        items = iter_upload_items(device.pool, local, posixpath.join(remote, os.path.basename(local)),
+                                  on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
+    else:
+        if device.is_dir(remote):
+            remote = posixpath.join(remote, os.path.basename(local))
+        items = [TransferItem(local, remote, os.path.getsize(local))]
+    uploader = UploadEngine(device.pool, workers=args.workers, journal=journal, verify_hash=args.verify)
+    try:
+        uploader.upload(items, report=report, monitor=_monitor(args, "Uploading", report))
+    finally:
+        journal.flush()
+    return _transfer_result(out, "push", report)
+
+def cmd_sync(device, args, out):
+    journal = TransferJournal(device.udid)
+    report = SyncReport()
+    downloader = DownloadEngine(device.pool, workers=args.workers, journal=journal, verify_hash=args.verify)
+    try:
+        FolderSync(device.engine.lister, downloader).sync(args.remote, args.local, delete=args.delete, report=report,
+                                                          monitor=_monitor(args, "Syncing", report))
+    finally:
+        journal.flush()
+    return _transfer_result(out, "sync", report)
+
+def cmd_apps(device, args, out):
+    apps = device.engine.run(device.engine.get_apps(application_type=args.type))
+    for bundle_id, info in sorted(apps.items()):
+        out.emit(dict(info, bundle_id=bundle_id) if args.full else
+                 {"bundle_id": bundle_id, "name": info.get("CFBundleDisplayName"), "version": info.get("CFBundleShortVersionString"),
+                  "type": info.get("ApplicationType")})
+    return 0
+
+def cmd_install(device, args, out):
+    device.engine.run(device.engine.install(args.ipa))
+    out.emit({"installed": args.ipa})
+    return 0
+
+def cmd_uninstall(device, args, out):
+    status = 0
+    for bundle_id in args.bundle_ids:
+        try:
+            device.engine.run(device.engine.uninstall(bundle_id))
+            out.emit({"bundle_id": bundle_id, "uninstalled": True})
+        except Exception as e:
+            out.emit({"bundle_id": bundle_id, "uninstalled": False, "error": str(e)})
+            status = EXIT_FAILED
+    return status
+
+def cmd_syslog(device, args, out):
+    async def follow():
+        count = 0
+        async for line in device.engine.syslog():
+            if args.match and args.match not in line:
+                continue
+            out.emit({"line": line})
+            count += 1
+            if args.count and count >= args.count:
+                break
+    device.engine.run(follow())
+    return 0
+
+def cmd_info(device, args, out):
+    out.emit(device.client.get_value(args.domain, args.key))
+    return 0
+
+def cmd_screenshot(device, args, out):
+    from pymobiledevice3.services.screenshot import ScreenshotService
+    try:
+        mount_developer_image(device.client)
+    except Exception as e:
+        print(f"CLI: Developer image not mounted, the screenshot may fail: {e}", file=sys.stderr)
+    with ScreenshotService(device.client) as screenshots:
+        data = screenshots.take_screenshot()
+    with open(args.output, "wb") as f:
+        f.write(data)
+    out.emit({"path": os.path.abspath(args.output), "bytes": len(data)})
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pyafc", description="Headless PyAFC: device files and apps as JSON / JSON Lines on stdout.")
+    parser.add_argument("--udid", help="device to use; the first one usbmux finds by default")
+    parser.add_argument("--sessions", type=int, default=DEVICE_POOL_SIZE, help="AFC sessions to open in parallel")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def transfer(name, fn, help, first, second):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument(first)
+        sub.add_argument(second)
+        sub.add_argument("--workers", type=int, default=TRANSFER_WORKERS)
+        sub.add_argument("--verify", action="store_true", help="check SHA-256 of every file after the transfer")
+        sub.add_argument("--progress", action="store_true", help="progress events as JSON Lines on stderr")
+        sub.set_defaults(fn=fn)
+        return sub
+
+    sub = commands.add_parser("ls", help="list a folder, one entry per line")
+    sub.add_argument("path", nargs="?", default="/")
+    sub.add_argument("-r", "--recursive", action="store_true")
+    sub.set_defaults(fn=cmd_ls)
+    sub = commands.add_parser("stat", help="AFC stat of one path")
+    sub.add_argument("path")
+    sub.set_defaults(fn=cmd_stat)
+    transfer("pull", cmd_pull, "download a file or folder", "remote", "local")
+    transfer("push", cmd_push, "upload a file or folder", "local", "remote")
+    transfer("sync", cmd_sync, "mirror a device folder into a local folder", "remote", "local").add_argument(
+        "--delete", action="store_true", help="remove local files that are gone from the device")
+    sub = commands.add_parser("apps", help="installed applications, one per line")
+    sub.add_argument("--type", default="Any", choices=["Any", "User", "System"])
+    sub.add_argument("--full", action="store_true", help="every Info.plist key instead of a summary")
+    sub.set_defaults(fn=cmd_apps)
+    sub = commands.add_parser("install", help="install an .ipa")
+    sub.add_argument("ipa")
+    sub.set_defaults(fn=cmd_install)
+    sub = commands.add_parser("uninstall", help="uninstall apps by bundle id")
+    sub.add_argument("bundle_ids", nargs="+")
+    sub.set_defaults(fn=cmd_uninstall)
+    sub = commands.add_parser("syslog", help="follow the device log, one object per log line")
+    sub.add_argument("--match", help="only lines containing this text")
+    sub.add_argument("--count", type=int, help="stop after this many lines")
+    sub.set_defaults(fn=cmd_syslog)
+    sub = commands.add_parser("info", help="lockdown values")
+    sub.add_argument("--domain")
+    sub.add_argument("--key")
+    sub.set_defaults(fn=cmd_info)
+    sub = commands.add_parser("screenshot", help="save a PNG screenshot")
+    sub.add_argument("output")
+    sub.set_defaults(fn=cmd_screenshot)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = Output(sys.stdout)
+    device = None
+    # the library logs with print(); keep stdout for results only
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            device = Device(args.udid, args.sessions)
+            return args.fn(device, args, out)
+        except KeyboardInterrupt:
+            return EXIT_INTERRUPTED
+        except Exception as e:
+            Output(sys.stderr).emit({"error": str(e), "type": type(e).__name__, "command": args.command})
+            return EXIT_FAILED
+        finally:
+            if device:
+                device.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-from pymobiledevice3.lockdown import LockdownClient
 import json
-from .utils import run_in_thread
 
 class DeviceCore:
     def __init__(self, app):
@@ -10,6 +8,7 @@ class DeviceCore:
         self.client = None
 
     def connect_device(self, file_logic, app_logic):
+        from pymobiledevice3.lockdown import LockdownClient
         try:
             self.app.status_label.configure(text="Status: Connecting...", text_color="yellow")
             self.client = LockdownClient()
@@ -22,10 +21,13 @@ class DeviceCore:
             self.app.info_btn.configure(state=tk.NORMAL)
             self.app.apps_btn.configure(state=tk.NORMAL)
             self.app.upload_btn.configure(state=tk.NORMAL)
+            self.app.upload_folder_btn.configure(state=tk.NORMAL)
+            self.app.sync_btn.configure(state=tk.NORMAL)
+            self.app.archive_btn.configure(state=tk.NORMAL)
             self.app.go_up_btn.configure(state=tk.NORMAL)
             self.app.install_btn.configure(state=tk.NORMAL)
             
-            run_in_thread(file_logic.start_afc_service)()
+            self.app.workers.run(file_logic.start_afc_service, key="afc-start")
 
         except Exception as e:
             messagebox.showerror("Connection Error", f"Could not connect to device.\nIs it plugged in and 'Trusted'?\n\nError: {e}")
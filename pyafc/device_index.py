@@ -0,0 +1,251 @@
+import os
+import sqlite3
+import threading
+import time
+from .listing import DirEntry, walk_parallel
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".pyafc", "index")
+INDEX_COMMIT_ROWS = 2000
+INDEX_MAX_AGE = 24 * 3600
+QUERY_LIMIT = 200
+GLOB_CHARS = "*?["
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    scan INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS entries_size ON entries(size) WHERE is_dir = 0;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# trigram full-text index over the names, so substring and glob lookups read a few
+# posting lists instead of every row (SQLite 3.34+; without it find() scans)
+NAMES_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_names USING fts5(name, content='entries', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS entries_names_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_names (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_names_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_names (entries_names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_names_update AFTER UPDATE OF name ON entries WHEN old.name IS NOT new.name BEGIN
+    INSERT INTO entries_names (entries_names, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO entries_names (rowid, name) VALUES (new.id, new.name);
+END;
+"""
+
+def _like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _under(root):
+    # rows at or below root; "/" matches everything
+    root = root.rstrip("/")
+    if not root:
+        return "1", ()
+    return "(path = ? OR path LIKE ? ESCAPE '\\')", (root, _like_escape(root) + "/%")
+
+def _glob_tokens(pattern):
+    # the wildcards as search.glob_regex reads them: "[!...]" negates, "]" right
+    # after the opening bracket is a member, an unclosed "[" is a plain character
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        i += 1
+        if c == "[":
+            negate = i < len(pattern) and pattern[i] == "!"
+            start = i + 1 if negate else i
+            end = pattern.find("]", start + 1)
+            if end >= 0:
+                yield "[", negate, pattern[start:end]
+                i = end + 1
+                continue
+        yield c, False, None
+
+def _sqlite_glob(pattern):
+    # SQLite negates a class with "^" rather than "!", so a leading "^" that is a
+    # member has to move, and a literal "[" needs a class of its own
+    out = []
+    for c, negate, members in _glob_tokens(pattern):
+        if members is None:
+            out.append("[[]" if c == "[" else c)
+        elif negate:
+            out.append(f"[^{members}]")
+        elif members == "^":
+            out.append("^")
+        elif members.startswith("^"):
+            out.append(f"[{members[1:]}^]")
+        else:
+            out.append(f"[{members}]")
+    return "".join(out)
+
+def _like_superset(pattern, glob):
+    # a LIKE pattern matching at least everything the real one does: the trigram
+    # index cannot take ESCAPE, so literal % and _ simply stay wildcards here
+    if not glob:
+        return f"%{pattern}%"
+    wildcards = {"*": "%", "?": "_"}
+    return "".join("_" if members is not None else wildcards.get(c, c) for c, _, members in _glob_tokens(pattern))
+
+class DeviceIndex:
+    # one SQLite file per device; a scan stamps every row it writes and drops the
+    # rows it did not see at the end, so the index survives restarts and partial scans
+    def __init__(self, udid, directory=DEFAULT_INDEX_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{udid or 'unknown'}.sqlite3")
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # an older layout is only a cache of the device: start over, the next scan refills it
+            self._db.executescript("DROP TABLE IF EXISTS entries_names; DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS meta;")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+        try:
+            self._db.executescript(NAMES_SCHEMA)
+            self.names = True
+        except sqlite3.OperationalError as e:
+            print(f"INDEX: No trigram name index in this SQLite ({sqlite3.sqlite_version}), lookups will scan: {e}")
+            self.names = False
+        self._lock = threading.Lock()
+
+    def _meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def begin_scan(self):
+        with self._lock:
+            scan = int(self._meta("scan", 0)) + 1
+            self._set_meta("scan", scan)
+            self._db.commit()
+        return scan
+
+    def add(self, entries, scan):
+        rows = [(e.path, e.path.rsplit("/", 1)[0] or "/", e.name, int(e.is_dir), e.size, e.mtime, scan) for e in entries]
+        with self._lock:
+            # an upsert keeps the row id, so a rescan does not churn the name index
+            self._db.executemany("INSERT INTO entries (path, parent, name, is_dir, size, mtime, scan) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                                 "ON CONFLICT(path) DO UPDATE SET parent = excluded.parent, name = excluded.name, is_dir = excluded.is_dir, "
+                                 "size = excluded.size, mtime = excluded.mtime, scan = excluded.scan", rows)
+            self._db.commit()
+
+    def finish_scan(self, root, scan, keep=()):
+        # drops what this scan did not see under root, except below the folders in
+        # keep (the ones it could not read), whose rows stay as they were
+        with self._lock:
+            where, args = _under(root)
+            # the kept folders go in a table rather than the statement: a chain of
+            # NOT (...) per folder hits SQLite's expression depth limit at about 1000.
+            # Their rows are looked up by path range first, so the delete only probes ids
+            self._db.executescript("CREATE TEMP TABLE IF NOT EXISTS kept (path TEXT PRIMARY KEY); DELETE FROM kept; "
+                                   "CREATE TEMP TABLE IF NOT EXISTS kept_ids (id INTEGER PRIMARY KEY); DELETE FROM kept_ids;")
+            self._db.executemany("INSERT OR IGNORE INTO kept (path) VALUES (?)", ((path.rstrip("/"),) for path in keep))
+            self._db.execute("INSERT OR IGNORE INTO kept_ids SELECT e.id FROM kept k JOIN entries e ON e.path = k.path")
+            # "0" sorts right after "/", so this range is everything below k.path
+            self._db.execute("INSERT OR IGNORE INTO kept_ids SELECT e.id FROM kept k JOIN entries e "
+                             "ON e.path >= k.path || '/' AND e.path < k.path || '0'")
+            self._db.execute(f"DELETE FROM entries WHERE scan != ? AND {where} "
+                             "AND NOT EXISTS (SELECT 1 FROM kept_ids r WHERE r.id = entries.id)", (scan, *args))
+            self._set_meta("last_scan", time.time())
+            self._set_meta("root", root)
+            self._db.commit()
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @property
+    def last_scan(self):
+        with self._lock:
+            value = self._meta("last_scan")
+        return float(value) if value else None
+
+    def is_stale(self, max_age=INDEX_MAX_AGE):
+        last = self.last_scan
+        return last is None or time.time() - last > max_age
+
+    def find(self, pattern, limit=QUERY_LIMIT):
+        # substring match by default, glob when the pattern has wildcards;
+        # exact names first, then shorter paths
+        pattern = pattern.strip()
+        if not pattern:
+            return []
+        glob = any(c in pattern for c in GLOB_CHARS)
+        if glob:
+            clause, args = "lower(name) GLOB ?", (_sqlite_glob(pattern.lower()),)
+        else:
+            clause, args = "name LIKE ? ESCAPE '\\'", (f"%{_like_escape(pattern)}%",)
+        if self.names:
+            # the trigram table narrows the rows, the exact clause then checks them
+            clause, args = f"id IN (SELECT rowid FROM entries_names WHERE name LIKE ?) AND {clause}", \
+                (_like_superset(pattern.lower(), glob), *args)
+        return self._query(f"SELECT name, path, is_dir, size, mtime FROM entries WHERE {clause} "
+                           "ORDER BY name = ? COLLATE NOCASE DESC, length(path) LIMIT ?", (*args, pattern, limit))
+
+    def largest(self, root="/", limit=QUERY_LIMIT):
+        where, args = _under(root)
+        return self._query(f"SELECT name, path, is_dir, size, mtime FROM entries WHERE is_dir = 0 AND size IS NOT NULL AND {where} "
+                           "ORDER BY size DESC LIMIT ?", (*args, limit))
+
+    def iter_entries(self):
+        # own read connection: with WAL this never waits on a scan that is writing
+        db = sqlite3.connect(self.path)
+        try:
+            for name, path, is_dir, size, mtime in db.execute("SELECT name, path, is_dir, size, mtime FROM entries"):
+                yield DirEntry(name, path, bool(is_dir), size, mtime)
+        finally:
+            db.close()
+
+    def _query(self, sql, args):
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [DirEntry(name, path, bool(is_dir), size, mtime) for name, path, is_dir, size, mtime in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class DeviceIndexer:
+    def __init__(self, lister, index, workers=None, commit_rows=INDEX_COMMIT_ROWS):
+        self.lister = lister
+        self.index = index
+        self.workers = workers
+        self.commit_rows = commit_rows
+
+    def run(self, root="/", cancelled=None, on_progress=None):
+        scan = self.index.begin_scan()
+        failed, rows, total = [], [], 0
+        started = time.monotonic()
+        for _, entries in walk_parallel(self.lister, root, self.workers, on_error=lambda path, err: failed.append(path),
+                                        cancelled=cancelled):
+            rows.extend(entries)
+            if len(rows) >= self.commit_rows:
+                self.index.add(rows, scan)
+                total += len(rows)
+                rows = []
+                if on_progress:
+                    on_progress(total)
+            if cancelled and cancelled():
+                break
+        self.index.add(rows, scan)
+        total += len(rows)
+        complete = not (cancelled and cancelled())
+        if complete:
+            # rows under unreadable folders keep their old scan stamp rather than vanish
+            self.index.finish_scan(root, scan, keep=failed)
+        print(f"INDEX: {'Indexed' if complete else 'Stopped after'} {total} entries under {root} "
+              f"in {time.monotonic() - started:.1f}s ({len(failed)} unreadable folder(s))")
+        if on_progress:
+            on_progress(total)
+        return total
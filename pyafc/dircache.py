@@ -0,0 +1,105 @@
+import posixpath
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+ENTRY_OVERHEAD = 120
+
+def normalize_path(path):
+    path = posixpath.normpath(path.replace("\\", "/") or "/")
+    return "/" + path.lstrip("/")
+
+def estimate_size(entries):
+    return sum(ENTRY_OVERHEAD + len(e.name) + len(e.path) for e in entries)
+
+class DirectoryCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, udid, path, max_age=None):
+        key = (udid, normalize_path(path))
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, entries, _ = item
+            if time.monotonic() - stored_at > max_age:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entries
+
+    def put(self, udid, path, entries):
+        key = (udid, normalize_path(path))
+        entries = list(entries)
+        size = estimate_size(entries)
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            # too big to keep: the older listing is gone too, or get() would return it
+            if size > self.max_bytes:
+                return
+            self._items[key] = (time.monotonic(), entries, size)
+            self._bytes += size
+            self._evict()
+
+    def upsert(self, udid, dir_path, entry):
+        # patch a cached listing in place so finished uploads show up without a relist
+        key = (udid, normalize_path(dir_path))
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return False
+            stored_at, entries, size = item
+            replaced = [e for e in entries if e.name == entry.name]
+            entries = [e for e in entries if e.name != entry.name] + [entry]
+            delta = estimate_size([entry]) - estimate_size(replaced)
+            self._items[key] = (stored_at, entries, size + delta)
+            self._bytes += delta
+            self._evict()
+            return key in self._items
+
+    def invalidate(self, udid, path, recursive=False):
+        path = normalize_path(path)
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            for key in list(self._items):
+                if key[0] != udid:
+                    continue
+                if key[1] == path or (recursive and key[1].startswith(prefix)):
+                    self._remove(key)
+
+    def invalidate_item(self, udid, item_path, recursive=False):
+        # a created/removed/renamed item changes its parent's listing
+        item_path = normalize_path(item_path)
+        self.invalidate(udid, posixpath.dirname(item_path))
+        self.invalidate(udid, item_path, recursive=recursive)
+
+    def clear(self, udid=None):
+        with self._lock:
+            for key in list(self._items):
+                if udid is None or key[0] == udid:
+                    self._remove(key)
+
+    def _evict(self):
+        # least recently used first, until both budgets hold again
+        while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._items)))
+
+    def _remove(self, key):
+        _, _, size = self._items.pop(key)
+        self._bytes -= size
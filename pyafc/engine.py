@@ -0,0 +1,305 @@
+import asyncio
+import threading
+from .listing import DirectoryLister, coalesce, to_timestamp
+from .workers import WorkerPool
+
+ENGINE_WORKERS = 12
+CALL_TIMEOUT = 30.0
+LIST_TIMEOUT = 300.0
+INSTALL_TIMEOUT = 900.0
+TRANSFER_CHUNK = 1024 * 1024
+_END = object()
+
+def tk_deliver(widget):
+    # hands a result to the Tk thread
+    return lambda fn: widget.after(0, fn)
+
+def _now(fn):
+    fn()
+
+def mount_developer_image(client):
+    # the DeveloperDiskImage below iOS 17, the personalized image from 17 on;
+    # False when one is mounted already. Blocks, so call it off the UI thread
+    from pymobiledevice3.exceptions import AlreadyMountedError
+    from pymobiledevice3.services.mobile_image_mounter import auto_mount
+    try:
+        mounting = auto_mount(client)
+        if asyncio.iscoroutine(mounting):
+            # newer pymobiledevice3 made it a coroutine
+            asyncio.run(mounting)
+    except AlreadyMountedError:
+        return False
+    return True
+
+class DeviceEngine:
+    # one asyncio loop per device connection, on a thread of its own. Every device
+    # operation is a coroutine with a timeout that can be cancelled. The
+    # pymobiledevice3 calls underneath still block, so they run on one small
+    # executor rather than a thread per action; long ones check a stop flag
+    # between steps, so a timeout or cancel also ends the work on the device.
+    # An operation submitted under a key that is still running joins that one.
+    # Service modules are imported on first use, on the thread that makes the call.
+    def __init__(self, client, pool, lister=None, workers=ENGINE_WORKERS):
+        self.client = client
+        self.pool = pool
+        self._own_lister = lister is None
+        self.lister = lister or DirectoryLister(pool)
+        # unbounded: these are awaited operations, and the executor only bounds how many block at once
+        self._calls = WorkerPool("engine", workers, max_queued=None, report_errors=False)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.coalesced = 0
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="device-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        # let the cancelled operations unwind before the loop goes away
+        pending = asyncio.all_tasks(self.loop)
+        if pending:
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+
+    def submit(self, coro, on_done=None, deliver=None, key=None):
+        # from any thread; on_done(result, error) goes through deliver, e.g. onto the UI
+        # thread. cancel() on the returned future cancels the operation.
+        with self._lock:
+            future = self._inflight.get(key) if key is not None else None
+            joined = future is not None
+            if joined:
+                coro.close()
+                self.coalesced += 1
+            else:
+                future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+                if key is not None:
+                    self._inflight[key] = future
+        if key is not None and not joined:
+            future.add_done_callback(lambda f: self._forget(key, f))
+        future.add_done_callback(lambda f: self._finish(f, on_done, deliver))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    @staticmethod
+    def _finish(future, on_done, deliver):
+        if future.cancelled():
+            return
+        error = future.exception()
+        result = None if error else future.result()
+        if on_done is None:
+            if error:
+                print(f"ENGINE: Operation failed: {error!r}")
+            return
+        (deliver or _now)(lambda: on_done(result, error))
+
+    def run(self, coro, timeout=None):
+        # blocks the calling thread, which must not be the loop thread
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def call(self, fn, *args, timeout=CALL_TIMEOUT):
+        try:
+            return await asyncio.wait_for(self._executor_call(fn, *args), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Device call timed out after {timeout:g}s") from None
+
+    def _executor_call(self, fn, *args):
+        future = self._calls.submit(fn, *args)
+        if future is None:
+            raise RuntimeError("Device engine is closed")
+        return asyncio.wrap_future(future, loop=self.loop)
+
+    def stats(self):
+        # executor depth and latency of the blocking calls, plus joined operations
+        with self._lock:
+            return self._calls.stats()._replace(coalesced=self.coalesced)
+
+    async def _stoppable(self, fn, timeout):
+        # fn(stop) checks stop between steps and gives up once the caller has
+        stop = threading.Event()
+        try:
+            return await self.call(fn, stop, timeout=timeout)
+        finally:
+            stop.set()
+
+    async def with_afc(self, fn, *args, timeout=CALL_TIMEOUT, bulk=False):
+        def _leased():
+            with self.pool.lease(timeout=timeout, bulk=bulk) as afc:
+                return fn(afc, *args)
+        return await self.call(_leased, timeout=timeout)
+
+    async def stat(self, path, timeout=CALL_TIMEOUT):
+        return await self.with_afc(lambda afc: afc.stat(path), timeout=timeout)
+
+    async def dir_mtime(self, path, timeout=CALL_TIMEOUT):
+        # None when the folder cannot be stat'ed, as DirectoryLister.dir_mtime
+        try:
+            return to_timestamp((await self.stat(path, timeout)).get('st_mtime'))
+        except Exception:
+            return None
+
+    async def list(self, path, on_batch=None, timeout=LIST_TIMEOUT):
+        # DirEntry list; on_batch(batch) runs on a worker as the stats come back
+        def _list(stop):
+            if on_batch is None:
+                return self.lister.list(path, cancelled=stop.is_set)
+            entries = []
+            for batch in coalesce(self.lister.iter_list(path, cancelled=stop.is_set)):
+                entries.extend(batch)
+                on_batch(batch)
+            return entries
+        return await self._stoppable(_list, timeout)
+
+    async def pull(self, remote, local, timeout=None):
+        def _pull(stop):
+            with self.pool.lease(bulk=True) as afc:
+                handle = afc.fopen(remote, "r")
+                try:
+                    with open(local, "wb") as f:
+                        while not stop.is_set():
+                            data = afc.fread(handle, TRANSFER_CHUNK)
+                            if not data:
+                                return f.tell()
+                            f.write(data)
+                finally:
+                    afc.fclose(handle)
+        return await self._stoppable(_pull, timeout)
+
+    async def push(self, local, remote, timeout=None):
+        def _push(stop):
+            with open(local, "rb") as f, self.pool.lease(bulk=True) as afc:
+                handle = afc.fopen(remote, "w")
+                try:
+                    while not stop.is_set():
+                        data = f.read(TRANSFER_CHUNK)
+                        if not data:
+                            return f.tell()
+                        afc.fwrite(handle, data)
+                finally:
+                    afc.fclose(handle)
+        return await self._stoppable(_push, timeout)
+
+    async def get_apps(self, timeout=CALL_TIMEOUT, **options):
+        def _get_apps():
+            from pymobiledevice3.services.installation_proxy import InstallationProxyService
+            with InstallationProxyService(self.client) as ip:
+                return ip.get_apps(**options)
+        return await self.call(_get_apps, timeout=timeout)
+
+    async def install(self, ipa_path, timeout=INSTALL_TIMEOUT):
+        def _install():
+            from pymobiledevice3.services.installation_proxy import InstallationProxyService
+            with InstallationProxyService(self.client) as ip:
+                ip.install(ipa_path)
+        return await self.call(_install, timeout=timeout)
+
+    async def uninstall(self, bundle_id, timeout=INSTALL_TIMEOUT):
+        def _uninstall():
+            from pymobiledevice3.services.installation_proxy import InstallationProxyService
+            with InstallationProxyService(self.client) as ip:
+                ip.uninstall(bundle_id)
+        return await self.call(_uninstall, timeout=timeout)
+
+    async def syslog(self):
+        # syslog lines as they arrive. The watch never ends on its own, so it gets a
+        # daemon thread rather than an executor slot, and gives up at the next line
+        # once the consumer stops iterating.
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        loop = self.loop
+
+        def _put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                stop.set()
+
+        def _watch():
+            try:
+                from pymobiledevice3.services.syslog import SyslogService
+                with SyslogService(self.client) as syslog:
+                    for line in syslog.watch():
+                        if stop.is_set():
+                            break
+                        _put(line)
+            except Exception as e:
+                _put(e)
+            finally:
+                _put(_END)
+
+        threading.Thread(target=_watch, name="device-syslog", daemon=True).start()
+        try:
+            while True:
+                line = await queue.get()
+                if line is _END:
+                    break
+                if isinstance(line, Exception):
+                    raise line
+                yield line
+        finally:
+            stop.set()
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        def _stop():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.stop()
+        try:
+            self.loop.call_soon_threadsafe(_stop)
+        except RuntimeError:
+            return
+        if threading.current_thread() is not self._thread:
+            self._thread.join(2)
+        self._calls.shutdown()
+        if self._own_lister:
+            self.lister.close()
+
+class LatestRequest:
+    # one outstanding operation for what is on screen, such as the folder listing.
+    # Each submit gets the next generation and cancels the one before, which stops
+    # at its next stat; results check is_current(generation) before they are shown.
+    def __init__(self, engine, name):
+        self.engine = engine
+        self.name = name
+        self.generation = 0
+        self.cancelled = 0
+        self._future = None
+        self._lock = threading.Lock()
+
+    def submit(self, make_coro, on_done=None, deliver=None):
+        # make_coro(generation) builds the coroutine; returns the generation
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+            previous, self._future = self._future, None
+        self._cancel(previous, generation - 1)
+        future = self.engine.submit(make_coro(generation), on_done, deliver)
+        with self._lock:
+            if generation == self.generation:
+                self._future = future
+                return generation
+        # a newer submit got in while this one was starting
+        self._cancel(future, generation)
+        return generation
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def cancel(self):
+        # the user left without starting anything new, e.g. a retained listing
+        with self._lock:
+            self.generation += 1
+            previous, self._future = self._future, None
+        self._cancel(previous, self.generation - 1)
+
+    def _cancel(self, future, generation):
+        if future is not None and future.cancel():
+            self.cancelled += 1
+            print(f"ENGINE: Cancelled stale {self.name} #{generation}")
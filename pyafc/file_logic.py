@@ -1,66 +1,234 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from pymobiledevice3.services.afc import AfcService, AfcError
 import os
-from .utils import run_in_thread
+import threading
+import time
+from .afc_pool import AfcSessionPool, DEVICE_POOL_SIZE, INTERACTIVE_RESERVED, check_session, format_pool_stats
+from .dircache import DirectoryCache
+from .engine import DeviceEngine, LatestRequest, tk_deliver
+from .listing import DirEntry, DirectoryLister, split_entries
+from .prefetch import Prefetcher
+from .history import NavigationHistory
+from .journal import TransferJournal
+from .sync import FolderSync, SyncReport
+from .archive import ArchiveExporter, ARCHIVE_FORMATS
+from .device_index import DeviceIndex, DeviceIndexer
+from .search import FilenameIndex
+from .usage import DiskUsage, UsageAnalyzer, UsageCache
+from .thumbnails import ThumbnailCache, ThumbnailLoader
+from .progress import TransferMonitor, format_event
+from .scheduler import TransferScheduler, transfer_priority, BULK
+from .transfer import DownloadEngine, UploadEngine, Throttle, TransferItem, TransferReport, iter_download_items, iter_upload_items
 
 class FileLogic:
     def __init__(self, app):
         self.app = app
         self.client = None
         self.afc = None
+        self.afc_pool = None
+        self.engine = None
+        self.listing = None
+        self.lister = None
+        self.prefetcher = None
+        self.downloader = None
+        self.uploader = None
+        self.journal = None
+        self.last_monitor = None
+        self.scheduler = None
+        self.device_index = None
+        self.index_root = "/"
+        self.index_task = None
+        self.index_stop = threading.Event()
+        self.filename_index = None
+        self._filename_seq = 0
+        self._search_seq = 0
+        self.usage_cache = UsageCache()
+        self.usage_stop = None
+        self.thumbnails = None
+        self.thumb_cache = None
+        self._thumb_entries = (None, {})
+        self.listing_refresh = Throttle(1.0)
+        self.dir_cache = DirectoryCache()
+        self.history = NavigationHistory()
         self.current_path = "/"
         self.is_jailbroken = False
 
+    @property
+    def udid(self):
+        return getattr(self.client, 'udid', None)
+
     def start_afc_service(self):
+        # imported here, on a worker, so the window never waits on pymobiledevice3's service modules
+        from pymobiledevice3.exceptions import AfcException
+        from pymobiledevice3.services.afc import AfcService
         try:
-            self.afc = AfcService(self.client)
+            if self.engine:
+                self.engine.close()
+            if self.afc_pool:
+                print(f"POOL: {format_pool_stats(self.afc_pool.stats())}")
+                self.afc_pool.close()
+            # one pool per connection: every operation leases its own session, transfers and
+            # background walks as bulk leases that leave sessions free for browsing
+            self.afc_pool = AfcSessionPool(lambda: AfcService(self.client), size=DEVICE_POOL_SIZE,
+                                           reserved=INTERACTIVE_RESERVED, health_check=check_session)
+            self.afc = self.afc_pool
+            self.lister = DirectoryLister(self.afc_pool)
+            # listings and app actions are coroutines on the connection's loop thread
+            self.engine = DeviceEngine(self.client, self.afc_pool, self.lister)
+            # only the folder on screen is listed: a new navigation cancels the one before
+            self.listing = LatestRequest(self.engine, "listing")
+            self.app.app_logic.engine = self.engine
+            self.prefetcher = Prefetcher(self.lister, self.dir_cache)
+            transfer_pool = self.afc_pool.bulk()
+            self.journal = TransferJournal(self.udid)
+            self.downloader = DownloadEngine(transfer_pool, journal=self.journal)
+            self.uploader = UploadEngine(transfer_pool, journal=self.journal)
+            self._start_scheduler()
             try:
-                self.afc.listdir("/")
+                with self.afc_pool.lease() as afc:
+                    afc.listdir("/")
                 self.is_jailbroken = True
                 self.current_path = "/"
                 new_status = self.app.status_label.cget("text") + " (AFC2 Root)"
                 self.app.status_label.configure(text=new_status, text_color="green")
-            except AfcError:
+            except AfcException:
                 self.is_jailbroken = False
                 self.current_path = "/var/mobile/Media"
                 new_status = self.app.status_label.cget("text") + " (Jailed AFC)"
                 self.app.status_label.configure(text=new_status, text_color="yellow")
-            
+
+            self.device_index = DeviceIndex(self.udid)
+            if self.thumbnails:
+                self.thumbnails.close()
+            self.thumb_cache = self.thumb_cache or ThumbnailCache()
+            self.thumbnails = ThumbnailLoader(self.afc_pool, self.thumb_cache, self.udid)
+            self.index_root = self.current_path
+            self.filename_index = None
+            self.load_filename_index()
+            self.start_indexing()
             self.browse_to_path(self.current_path)
         except Exception as e:
             messagebox.showerror("AFC Error", f"Could not start AFC service: {e}")
 
-    def browse_to_path(self, path=None):
+    def browse_to_path(self, path=None, refresh=False):
         if not self.afc: return
+        if path and path != self.current_path:
+            self.save_view()
         if path: self.current_path = path
-        
-        self.app.path_entry.delete(0, tk.END)
-        self.app.path_entry.insert(0, self.current_path)
-        
+        self.history.visit(self.current_path)
+        self.show_listing(self.current_path, refresh)
+
+    def show_listing(self, path, refresh=False, keep_view=False):
+        # returns at once: the listing runs on the engine loop and the rows come back through the UI thread
+        self.show_path()
+        self.listing.submit(lambda generation: self._show_listing(generation, path, refresh, keep_view))
+
+    async def _show_listing(self, generation, path, refresh, keep_view):
+        ui = tk_deliver(self.app)
+        streamed = []
+        listing = self.listing
+        current = lambda: listing.is_current(generation)
+
+        def on_batch(batch):
+            # a new folder fills in as the stats come back, sorted once it is complete
+            first = not streamed
+            streamed.append(len(batch))
+            ui(lambda: current() and self.append_listbox(batch, first))
+
         try:
-            items = self.afc.listdir(self.current_path)
-            self.app.file_listbox.delete(0, tk.END)
-            folders, files = [], []
-            for item in items:
-                if item in ('.', '..'): continue
-                full_item_path = os.path.join(self.current_path, item).replace("\\", "/")
-                try:
-                    if self.afc.get_file_info(full_item_path).get('st_ifmt') == 'S_IFDIR':
-                        folders.append(f"[FOLDER] {item}")
-                    else:
-                        files.append(item)
-                except AfcError:
-                    files.append(f"[???] {item}")
-            
-            for folder in sorted(folders, key=str.lower):
-                self.app.file_listbox.insert(tk.END, folder)
-                self.app.file_listbox.itemconfig(tk.END, {'fg': '#00AFFF'})
-            for file in sorted(files, key=str.lower):
-                self.app.file_listbox.insert(tk.END, file)
+            entries = None if refresh else self.dir_cache.get(self.udid, path)
+            mtime = None
+            if entries is None:
+                with self.prefetcher.user_request():
+                    # stat the folder first, so a change during the listing still shows up as a newer mtime
+                    mtime = await self.engine.dir_mtime(path)
+                    entries = await self.engine.list(path, on_batch=None if refresh else on_batch)
+                self.dir_cache.put(self.udid, path, entries)
+                if self.filename_index is not None:
+                    self.filename_index.add_entries(entries)
+            self.history.remember(path, entries, mtime)
+            self.prefetcher.schedule(self.udid, [e.path for e in entries if e.is_dir])
+            # a slower listing must not overwrite a folder the user has moved on from, even one for the same path
+            ui(lambda: current() and self.fill_listbox(entries, self.current_view() if keep_view or streamed else None))
         except Exception as e:
-            self.app.file_listbox.delete(0, tk.END)
-            self.app.file_listbox.insert(tk.END, f"Error: {e}")
+            ui(lambda error=e: current() and self.app.file_listbox.set_items([f"Error: {error}"]))
+
+    def fill_listbox(self, entries, view=None):
+        # the listbox only builds the rows on screen, however big the folder
+        folders, files = split_entries(entries)
+        folders = sorted(folders, key=str.lower)
+        selected, scroll = view or ((), 0.0)
+        self.app.file_listbox.set_items(folders + sorted(files, key=str.lower), dict.fromkeys(range(len(folders)), '#00AFFF'), selected, scroll)
+        if view:
+            self.app.on_file_selection()
+        self.app.refresh_thumbnails()
+
+    def append_listbox(self, entries, first=False):
+        if first:
+            self.app.file_listbox.set_items([])
+        folders, files = split_entries(entries)
+        self.app.file_listbox.append_items(folders, '#00AFFF')
+        self.app.file_listbox.append_items(files)
+        self.app.refresh_thumbnails()
+
+    def load_thumbnails(self, names):
+        # names of the grid cells in and just below view; pictures come back through the UI thread
+        state = self.history.view(self.current_path)
+        if not self.thumbnails or state is None:
+            return
+        if self._thumb_entries[0] is not state.entries:
+            self._thumb_entries = (state.entries, {e.name: e for e in state.entries})
+        by_name = self._thumb_entries[1]
+        folder = self.current_path
+
+        def on_ready(entry, data):
+            if data is not None:
+                self.app.after(0, lambda: self.current_path == folder and self.app.thumb_grid.set_thumbnail(entry.name, data))
+
+        self.thumbnails.request([by_name[n] for n in names if n in by_name], on_ready)
+
+    def show_path(self):
+        self.app.path_entry.delete(0, tk.END)
+        self.app.path_entry.insert(0, self.current_path)
+        self.app.back_btn.configure(state=tk.NORMAL if self.history.can_back() else tk.DISABLED)
+        self.app.forward_btn.configure(state=tk.NORMAL if self.history.can_forward() else tk.DISABLED)
+
+    def current_view(self):
+        listbox = self.app.file_listbox
+        return [listbox.get(i) for i in listbox.curselection()], listbox.yview()[0]
+
+    def save_view(self):
+        self.history.save_view(self.current_path, *self.current_view())
+
+    def go_back(self):
+        if self.history.can_back():
+            self.jump(self.history.back)
+
+    def go_forward(self):
+        if self.history.can_forward():
+            self.jump(self.history.forward)
+
+    def jump(self, step):
+        # the retained listing renders at once; one stat on the folder decides on a refresh
+        if not self.afc: return
+        self.save_view()
+        path = step()
+        self.current_path = path
+        state = self.history.view(path)
+        if state is None:
+            self.show_listing(path)
+            return
+
+        self.show_path()
+        self.fill_listbox(state.entries, (state.selection, state.scroll))
+        # also cancels any listing still running for the folder the user just left
+        self.listing.submit(lambda generation: self._revalidate(generation, path))
+
+    async def _revalidate(self, generation, path):
+        if self.history.is_current(path, await self.engine.dir_mtime(path)):
+            return
+        print(f"HISTORY: {path} changed, refreshing")
+        await self._show_listing(generation, path, True, True)
 
     def on_file_double_click(self, event=None):
         try:
@@ -68,10 +236,111 @@ class FileLogic:
             if selected_item.startswith("[FOLDER] "):
                 folder_name = selected_item.replace("[FOLDER] ", "")
                 new_path = os.path.join(self.current_path, folder_name).replace("\\", "/")
-                run_in_thread(self.browse_to_path, new_path)()
+                self.browse_to_path(new_path)
         except IndexError:
             pass
 
+    def start_indexing(self, force=False):
+        if not self.client or not self.device_index: return
+        if self.is_indexing(): return
+        if not force and not self.device_index.is_stale(): return
+        self.index_stop.clear()
+
+        def index_task():
+            # bulk leases, so a full-device walk never takes the sessions browsing needs
+            lister = DirectoryLister(self.afc_pool.bulk())
+            try:
+                DeviceIndexer(lister, self.device_index).run(self.index_root, cancelled=self.index_stop.is_set,
+                                                             on_progress=lambda n: self.app.after(0, self.app.set_find_status, f"Indexing... {n} entries"))
+            except Exception as e:
+                print(f"INDEX: Indexing failed: {e}")
+            finally:
+                lister.close()
+                self.app.after(0, self.app.refresh_find_status)
+            if not self.index_stop.is_set():
+                self.load_filename_index()
+
+        self.index_task = self.app.workers.run_bulk(index_task, key="index")
+
+    def is_indexing(self):
+        return self.index_task is not None and not self.index_task.done()
+
+    def load_filename_index(self):
+        if not self.device_index: return
+        device_index = self.device_index
+        self._filename_seq += 1
+        seq = self._filename_seq
+
+        def load_task():
+            started = time.monotonic()
+            names = FilenameIndex()
+            try:
+                names.add_entries(device_index.iter_entries())
+                names.prepare()
+            except Exception as e:
+                print(f"INDEX: Loading filename index failed: {e}")
+                return
+            # a newer load (reindex or another device) wins
+            if seq == self._filename_seq:
+                self.filename_index = names
+            print(f"INDEX: Filename index holds {len(names)} names ({time.monotonic() - started:.1f}s)")
+            self.app.after(0, self.app.refresh_find_status)
+
+        self.app.workers.run_bulk(load_task)
+
+    def search_index(self, query, mode="name"):
+        if not self.device_index: return
+        self._search_seq += 1
+        seq = self._search_seq
+        names = self.filename_index
+        if names is not None and mode != "largest":
+            # in memory and quick enough to answer on the Tk thread at every keystroke
+            started = time.perf_counter()
+            self.app.show_find_results(names.search(query, fuzzy=mode == "fuzzy"), (time.perf_counter() - started) * 1000)
+            return
+
+        def search_task():
+            started = time.perf_counter()
+            try:
+                results = self.device_index.largest(query or self.index_root) if mode == "largest" else self.device_index.find(query)
+            except Exception as e:
+                print(f"INDEX: Query failed: {e}")
+                results = []
+            if seq == self._search_seq:
+                self.app.after(0, self.app.show_find_results, results, (time.perf_counter() - started) * 1000)
+
+        self.app.workers.run(search_task)
+
+    def analyze_usage(self, path, rescan=False):
+        if not self.client or not self.afc: return
+        usage = None if rescan else self.usage_cache.find(self.udid, path)
+        if usage is not None:
+            self.app.show_usage(usage, path)
+            return
+        self.stop_usage()
+        stop = self.usage_stop = threading.Event()
+        usage = DiskUsage(path)
+        self.usage_cache.put(self.udid, usage)
+        self.app.show_usage(usage, path)
+
+        def usage_task():
+            # bulk leases, like indexing, so browsing stays responsive during the walk
+            lister = DirectoryLister(self.afc_pool.bulk())
+            try:
+                UsageAnalyzer(lister).analyze(usage, on_progress=lambda u: self.app.after(0, self.app.refresh_usage, u), cancelled=stop.is_set)
+            except Exception as e:
+                print(f"USAGE: Analysis failed: {e}")
+                usage.cancelled = True
+                self.app.after(0, self.app.refresh_usage, usage)
+            finally:
+                lister.close()
+
+        self.app.workers.run_bulk(usage_task)
+
+    def stop_usage(self):
+        if self.usage_stop:
+            self.usage_stop.set()
+
     def go_up_directory(self):
         if self.current_path == "/" or (not self.is_jailbroken and self.current_path == "/var/mobile/Media"):
             return
@@ -84,52 +353,220 @@ class FileLogic:
         pc_file_paths = filedialog.askopenfilenames(title="Select File(s) to Upload")
         if not pc_file_paths: return
 
-        for pc_file_path in pc_file_paths:
-            filename = os.path.basename(pc_file_path)
-            device_dest_path = os.path.join(self.current_path, filename).replace("\\", "/")
-            try:
-                self.app.status_label.configure(text=f"Status: Uploading {filename}...", text_color="yellow")
-                self.afc.push(pc_file_path, device_dest_path)
-            except Exception as e:
-                messagebox.showerror("Upload Error", f"Could not upload {filename}: {e}")
-                self.app.status_label.configure(text="Status: Upload failed", text_color="red")
-                return
+        sizes = [os.path.getsize(p) for p in pc_file_paths]
+        self._submit(f"Upload {len(pc_file_paths)} file(s) to {self.current_path}", "upload",
+                     {"dest_dir": self.current_path, "paths": list(pc_file_paths)}, transfer_priority(sizes))
+
+    def upload_folder(self):
+        if not self.afc: return
+
+        pc_folder = filedialog.askdirectory(title="Select Folder to Upload")
+        if not pc_folder: return
+
+        pc_folder = os.path.normpath(pc_folder)
+        self._submit(f"Upload {os.path.basename(pc_folder)} to {self.current_path}", "upload",
+                     {"dest_dir": self.current_path, "local_dir": pc_folder}, BULK)
+
+    def _run_upload(self, job, spec):
+        dest_dir, device_folder = spec["dest_dir"], None
+        report = TransferReport()
+        if spec.get("local_dir"):
+            device_folder = os.path.join(dest_dir, os.path.basename(spec["local_dir"])).replace("\\", "/")
+            items = iter_upload_items(self.uploader.pool, spec["local_dir"], device_folder,
+                                      on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
+        else:
+            items = [TransferItem(p, os.path.join(dest_dir, os.path.basename(p)).replace("\\", "/"), os.path.getsize(p))
+                     for p in spec["paths"]]
+        self.app.status_label.configure(text="Status: Uploading...", text_color="yellow")
+        report = self.uploader.upload(items, report=report, monitor=self._new_monitor("Uploading", report), control=job,
+                                      on_progress=lambda item, r, err: self._on_upload_progress(dest_dir, item, r, err))
+        self.dir_cache.invalidate(self.udid, dest_dir)
+        if device_folder:
+            self.dir_cache.invalidate(self.udid, device_folder, recursive=True)
         
-        messagebox.showinfo("Upload Complete", f"Successfully uploaded {len(pc_file_paths)} file(s).")
-        self.app.status_label.configure(text="Status: Upload complete.", text_color="green")
+        if job.cancelled:
+            self.app.status_label.configure(text=f"Status: Upload cancelled. {report.summary()}", text_color="orange")
+        elif report.failed:
+            messagebox.showerror("Upload Error", f"Some files could not be uploaded.\n{report.summary()}\n\n{report.failure_lines()}")
+            self.app.status_label.configure(text="Status: Upload failed", text_color="red")
+        else:
+            messagebox.showinfo("Upload Complete", f"Successfully uploaded {report.completed} file(s).\n{report.summary()}")
+            self.app.status_label.configure(text="Status: Upload complete.", text_color="green")
         self.browse_to_path()
 
+    def _on_upload_progress(self, dest_dir, item, report, error):
+        if error is None:
+            self.dir_cache.upsert(self.udid, os.path.dirname(item.dst), DirEntry(os.path.basename(item.dst), item.dst, False, item.size, time.time()))
+        if self.current_path == dest_dir and self.listing_refresh.ready():
+            self.browse_to_path()
+
     def download_files(self):
         if not self.afc: return
         
         selected_indices = self.app.file_listbox.curselection()
         if not selected_indices:
-            messagebox.showwarning("No Selection", "Please select one or more files to download.")
+            messagebox.showwarning("No Selection", "Please select one or more files or folders to download.")
             return
 
         pc_save_directory = filedialog.askdirectory(title="Select Folder to Save Files")
         if not pc_save_directory: return
 
-        files_to_download = []
+        files_to_download, folders_to_download = [], []
         for i in selected_indices:
             filename = self.app.file_listbox.get(i)
-            if not filename.startswith("[FOLDER] "):
+            if filename.startswith("[FOLDER] "):
+                folders_to_download.append(filename.replace("[FOLDER] ", "", 1))
+            else:
                 files_to_download.append(filename)
+
+        cached = {e.name: e.size for e in self.dir_cache.get(self.udid, self.current_path) or []}
+        sizes = {filename: cached.get(filename) for filename in files_to_download}
+        count = len(files_to_download) + len(folders_to_download)
+        self._submit(f"Download {count} item(s) from {self.current_path}", "download",
+                     {"src_dir": self.current_path, "files": files_to_download, "folders": folders_to_download,
+                      "save_dir": pc_save_directory, "sizes": sizes},
+                     transfer_priority(list(sizes.values()), bool(folders_to_download)))
+
+    def _run_download(self, job, spec):
+        src_dir, pc_save_directory, sizes = spec["src_dir"], spec["save_dir"], spec.get("sizes", {})
+        items = [TransferItem(os.path.join(src_dir, filename).replace("\\", "/"),
+                              os.path.join(pc_save_directory, filename), sizes.get(filename))
+                 for filename in spec["files"]]
+        report = TransferReport()
+        # the walk leases bulk sessions too, like the index and usage tasks
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            if spec.get("folders"):
+                items = self._iter_folder_items(lister, items, src_dir, spec["folders"], pc_save_directory, report)
+            self.app.status_label.configure(text="Status: Downloading...", text_color="yellow")
+            report = self.downloader.download(items, report=report, monitor=self._new_monitor("Downloading", report), control=job)
+        finally:
+            lister.close()
         
-        if not files_to_download:
-            messagebox.showwarning("No Files Selected", "Please select files, not folders, to download.")
+        if job.cancelled:
+            self.app.status_label.configure(text=f"Status: Download cancelled. {report.summary()}", text_color="orange")
             return
 
-        for filename in files_to_download:
-            device_source_path = os.path.join(self.current_path, filename).replace("\\", "/")
-            pc_save_path = os.path.join(pc_save_directory, filename)
-            try:
-                self.app.status_label.configure(text=f"Status: Downloading {filename}...", text_color="yellow")
-                self.afc.pull(device_source_path, pc_save_path)
-            except Exception as e:
-                messagebox.showerror("Download Error", f"Could not download {filename}: {e}")
-                self.app.status_label.configure(text="Status: Download failed", text_color="red")
-                return
+        if report.failed:
+            messagebox.showerror("Download Error", f"Some files could not be downloaded.\n{report.summary()}\n\n{report.failure_lines()}")
+            self.app.status_label.configure(text="Status: Download failed", text_color="red")
+            return
         
-        messagebox.showinfo("Download Complete", f"Successfully downloaded {len(files_to_download)} file(s).")
+        messagebox.showinfo("Download Complete", f"Successfully downloaded {report.completed} file(s).\n{report.summary()}")
         self.app.status_label.configure(text="Status: Download complete.", text_color="green")
+
+    def sync_folder(self):
+        if not self.afc: return
+
+        device_folder = self.current_path
+        selected = [self.app.file_listbox.get(i) for i in self.app.file_listbox.curselection()]
+        if len(selected) == 1 and selected[0].startswith("[FOLDER] "):
+            device_folder = os.path.join(device_folder, selected[0].replace("[FOLDER] ", "", 1)).replace("\\", "/")
+
+        pc_save_directory = filedialog.askdirectory(title=f"Select Folder to Sync {device_folder} Into")
+        if not pc_save_directory: return
+
+        pc_folder = os.path.join(pc_save_directory, os.path.basename(device_folder.rstrip("/")) or "device")
+        delete = messagebox.askyesno("Sync", f"Delete files in\n{pc_folder}\nthat no longer exist on the device?")
+        self._submit(f"Sync {device_folder} to {pc_folder}", "sync",
+                     {"remote_root": device_folder, "local_root": pc_folder, "delete": delete}, BULK)
+
+    def _run_sync(self, job, spec):
+        self.app.status_label.configure(text=f"Status: Syncing {spec['remote_root']}...", text_color="yellow")
+        report = SyncReport()
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            report = FolderSync(lister, self.downloader).sync(spec["remote_root"], spec["local_root"], delete=spec["delete"], report=report,
+                                                              monitor=self._new_monitor("Syncing", report), control=job)
+        finally:
+            lister.close()
+
+        if job.cancelled:
+            self.app.status_label.configure(text=f"Status: Sync cancelled. {report.summary()}", text_color="orange")
+            return
+
+        if report.failed:
+            messagebox.showerror("Sync Error", f"Some files could not be synced.\n{report.summary()}\n\n{report.failure_lines()}")
+            self.app.status_label.configure(text="Status: Sync failed", text_color="red")
+            return
+
+        messagebox.showinfo("Sync Complete", f"{spec['local_root']} is up to date.\n{report.summary()}")
+        self.app.status_label.configure(text="Status: Sync complete.", text_color="green")
+
+    def export_archive(self):
+        if not self.afc: return
+
+        device_folder = self.current_path
+        selected = [self.app.file_listbox.get(i) for i in self.app.file_listbox.curselection()]
+        if len(selected) == 1 and selected[0].startswith("[FOLDER] "):
+            device_folder = os.path.join(device_folder, selected[0].replace("[FOLDER] ", "", 1)).replace("\\", "/")
+
+        archive_path = filedialog.asksaveasfilename(title=f"Export {device_folder} As", filetypes=ARCHIVE_FORMATS, defaultextension=".zip",
+                                                    initialfile=(os.path.basename(device_folder.rstrip("/")) or "device") + ".zip")
+        if not archive_path: return
+
+        self._submit(f"Export {device_folder} to {archive_path}", "archive",
+                     {"remote_root": device_folder, "archive_path": archive_path, "compress": True}, BULK)
+
+    def _run_archive(self, job, spec):
+        self.app.status_label.configure(text=f"Status: Exporting {spec['remote_root']}...", text_color="yellow")
+        report = TransferReport()
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            report = ArchiveExporter(lister, self.downloader.pool).export(spec["remote_root"], spec["archive_path"], compress=spec["compress"],
+                                                                         report=report, monitor=self._new_monitor("Exporting", report), control=job)
+        finally:
+            lister.close()
+
+        if job.cancelled:
+            self.app.status_label.configure(text=f"Status: Export cancelled. {report.summary()}", text_color="orange")
+            return
+
+        if report.failed:
+            messagebox.showerror("Export Error", f"Some files could not be archived.\n{report.summary()}\n\n{report.failure_lines()}")
+            self.app.status_label.configure(text="Status: Export finished with errors", text_color="red")
+            return
+
+        messagebox.showinfo("Export Complete", f"Saved {spec['archive_path']}.\n{report.summary()}")
+        self.app.status_label.configure(text="Status: Export complete.", text_color="green")
+
+    def _start_scheduler(self):
+        self.scheduler = TransferScheduler(self.udid, on_change=lambda: self.app.after(0, self.app.refresh_transfers_window))
+        self.scheduler.register("upload", lambda spec: lambda job: self._run_upload(job, spec))
+        self.scheduler.register("download", lambda spec: lambda job: self._run_download(job, spec))
+        self.scheduler.register("sync", lambda spec: lambda job: self._run_sync(job, spec))
+        self.scheduler.register("archive", lambda spec: lambda job: self._run_archive(job, spec))
+        restored = self.scheduler.restore()
+        if restored:
+            print(f"FILE_LOGIC: Restored {len(restored)} unfinished transfer job(s), paused")
+
+    def _submit(self, name, kind, spec, priority):
+        if not self.scheduler: return
+        self.scheduler.submit(name, kind, spec, priority)
+
+    def _new_monitor(self, action, report):
+        def on_event(event):
+            if not event.final:
+                self.app.status_label.configure(text=f"Status: {format_event(event)}", text_color="yellow")
+        self.last_monitor = TransferMonitor(action, report, on_event=on_event)
+        return self.last_monitor
+
+    def export_transfer_stats(self):
+        if not self.last_monitor:
+            messagebox.showinfo("Transfer Stats", "No transfer has run yet.")
+            return
+
+        path = filedialog.asksaveasfilename(title="Export Transfer Stats", defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path: return
+
+        try:
+            self.last_monitor.export_json(path)
+        except OSError as e:
+            messagebox.showerror("Export Error", f"Could not write stats: {e}")
+
+    def _iter_folder_items(self, lister, items, src_dir, folder_names, pc_save_directory, report):
+        yield from items
+        for name in folder_names:
+            device_folder = os.path.join(src_dir, name).replace("\\", "/")
+            yield from iter_download_items(lister, device_folder, os.path.join(pc_save_directory, name),
+                                           on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
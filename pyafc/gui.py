@@ -1,10 +1,17 @@
+import os
+import time
 import tkinter as tk
 from tkinter import messagebox
 import customtkinter as ctk
 from .core import DeviceCore
 from .file_logic import FileLogic
 from .app_logic import AppLogic
-from .utils import run_in_thread
+from .afc_pool import format_pool_stats
+from .transfer import format_size
+from .usage import format_usage_row
+from .virtual_list import VirtualListbox
+from .thumb_grid import ThumbnailGrid
+from .workers import Workers, BUSY_MESSAGE, STATS_INTERVAL_MS, format_worker_stats
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
@@ -16,6 +23,7 @@ class PyAFCGui(ctk.CTk):
         self.title("PyAFC v1.0")
         self.geometry("750x600")
 
+        self.workers = Workers()
         self.core = DeviceCore(self)
         self.file_logic = FileLogic(self)
         self.app_logic = AppLogic(self)
@@ -24,7 +32,8 @@ class PyAFCGui(ctk.CTk):
         top_frame.pack(fill=tk.X, padx=10, pady=10)
 
         self.connect_btn = ctk.CTkButton(top_frame, text="Connect to Device", 
-                                         command=lambda: run_in_thread(self.core.connect_device, self.file_logic, self.app_logic))
+                                         command=lambda: self.workers.run(self.core.connect_device, self.file_logic, self.app_logic, key="connect",
+                                                                          on_dropped=self.show_busy))
         self.connect_btn.pack(side=tk.LEFT, padx=10, pady=10)
 
         self.status_label = ctk.CTkLabel(top_frame, text="Status: Disconnected", text_color="gray")
@@ -44,10 +53,11 @@ class PyAFCGui(ctk.CTk):
         self.setup_info_tab(self.tab_view.tab("Device Info"))
         self.setup_files_tab(self.tab_view.tab("File Explorer"))
         self.setup_apps_tab(self.tab_view.tab("Applications"))
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def setup_info_tab(self, tab):
         self.info_btn = ctk.CTkButton(tab, text="Get Device Info", 
-                                      command=lambda: run_in_thread(self.core.get_device_info), 
+                                      command=lambda: self.workers.run(self.core.get_device_info, key="device-info", on_dropped=self.show_busy), 
                                       state=tk.DISABLED)
         self.info_btn.pack(pady=10, padx=10, fill=tk.X)
         
@@ -58,20 +68,45 @@ class PyAFCGui(ctk.CTk):
         file_nav_frame = ctk.CTkFrame(tab)
         file_nav_frame.pack(fill=tk.X, padx=10, pady=5)
         
+        self.back_btn = ctk.CTkButton(file_nav_frame, text="<", width=30, 
+                                      command=self.file_logic.go_back, 
+                                      state=tk.DISABLED)
+        self.back_btn.pack(side=tk.LEFT, padx=(10, 0), pady=10)
+        self.forward_btn = ctk.CTkButton(file_nav_frame, text=">", width=30, 
+                                         command=self.file_logic.go_forward, 
+                                         state=tk.DISABLED)
+        self.forward_btn.pack(side=tk.LEFT, padx=(5, 0), pady=10)
+        self.bind("<Alt-Left>", lambda e: self.file_logic.go_back())
+        self.bind("<Alt-Right>", lambda e: self.file_logic.go_forward())
+        self.bind("<Control-f>", lambda e: self.show_find_window())
+
         ctk.CTkLabel(file_nav_frame, text="Path:").pack(side=tk.LEFT, padx=(10, 5))
         self.path_entry = ctk.CTkEntry(file_nav_frame, font=("Consolas", 12))
         self.path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, pady=10)
-        self.path_entry.bind("<Return>", lambda e: run_in_thread(self.file_logic.browse_to_path, self.path_entry.get()))
+        self.path_entry.bind("<Return>", lambda e: self.file_logic.browse_to_path(self.path_entry.get(), True))
         
         self.go_up_btn = ctk.CTkButton(file_nav_frame, text="Up (..)", width=50, 
-                                       command=lambda: run_in_thread(self.file_logic.go_up_directory), 
+                                       command=self.file_logic.go_up_directory, 
                                        state=tk.DISABLED)
         self.go_up_btn.pack(side=tk.LEFT, padx=10, pady=10)
 
+        self.find_btn = ctk.CTkButton(file_nav_frame, text="Find...", width=60, command=self.show_find_window)
+        self.find_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.usage_btn = ctk.CTkButton(file_nav_frame, text="Usage", width=60, command=self.show_usage_window)
+        self.usage_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.thumbs_btn = ctk.CTkButton(file_nav_frame, text="Thumbs", width=60, command=self.toggle_thumbnails)
+        self.thumbs_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.find_window = None
+        self.find_results = []
+        self.usage_window = None
+        self.usage = None
+        self.usage_path = "/"
+        self.usage_items = []
+
         file_list_frame = ctk.CTkFrame(tab)
         file_list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        self.file_listbox = tk.Listbox(file_list_frame, 
+        self.file_listbox = VirtualListbox(file_list_frame, 
                                         height=15, 
                                         selectmode=tk.EXTENDED,
                                         bg="#2B2B2B", 
@@ -83,43 +118,72 @@ class PyAFCGui(ctk.CTk):
                                         highlightthickness=0,
                                         font=("Consolas", 11))
         
-        file_scrollbar = ctk.CTkScrollbar(file_list_frame, command=self.file_listbox.yview)
+        self.file_scrollbar = file_scrollbar = ctk.CTkScrollbar(file_list_frame, command=self.file_listbox.yview)
         file_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.file_listbox.config(yscrollcommand=file_scrollbar.set)
         
         self.file_listbox.pack(fill=tk.BOTH, expand=True, pady=1, padx=1)
         self.file_listbox.bind("<Double-Button-1>", lambda e: self.file_logic.on_file_double_click(e))
         self.file_listbox.bind("<<ListboxSelect>>", self.on_file_selection)
+        # icon view over the same rows and selection, only built while it is shown
+        self.thumb_mode = False
+        self.thumb_grid = ThumbnailGrid(file_list_frame, self.file_listbox, on_visible=self.file_logic.load_thumbnails, bg="#2B2B2B", select_color="#1F6AA5")
+        self.thumb_grid.bind("<Double-Button-1>", lambda e: self.file_logic.on_file_double_click(e))
 
         file_action_frame = ctk.CTkFrame(tab)
         file_action_frame.pack(fill=tk.X, padx=10, pady=5)
 
         self.upload_btn = ctk.CTkButton(file_action_frame, text="Upload File(s)...", 
-                                        command=lambda: run_in_thread(self.file_logic.upload_files), 
+                                        command=self.file_logic.upload_files, 
                                         state=tk.DISABLED)
         self.upload_btn.pack(side=tk.LEFT, padx=10, pady=10)
 
+        self.upload_folder_btn = ctk.CTkButton(file_action_frame, text="Upload Folder...", 
+                                               command=self.file_logic.upload_folder, 
+                                               state=tk.DISABLED)
+        self.upload_folder_btn.pack(side=tk.LEFT, padx=10, pady=10)
+
         self.download_btn = ctk.CTkButton(file_action_frame, text="Download Selected...", 
-                                          command=lambda: run_in_thread(self.file_logic.download_files), 
+                                          command=self.file_logic.download_files, 
                                           state=tk.DISABLED)
         self.download_btn.pack(side=tk.LEFT, padx=10, pady=10)
 
+        self.sync_btn = ctk.CTkButton(file_action_frame, text="Sync To PC...", 
+                                      command=self.file_logic.sync_folder, 
+                                      state=tk.DISABLED)
+        self.sync_btn.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.archive_btn = ctk.CTkButton(file_action_frame, text="Export Archive...", 
+                                         command=self.file_logic.export_archive, 
+                                         state=tk.DISABLED)
+        self.archive_btn.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.stats_btn = ctk.CTkButton(file_action_frame, text="Export Stats...", 
+                                       command=self.file_logic.export_transfer_stats)
+        self.stats_btn.pack(side=tk.RIGHT, padx=10, pady=10)
+
+        self.transfers_btn = ctk.CTkButton(file_action_frame, text="Transfers...", command=self.show_transfers_window)
+        self.transfers_btn.pack(side=tk.RIGHT, padx=10, pady=10)
+        self.transfers_window = None
+        self.transfers_listbox = None
+        self.transfers_job_ids = []
+
     def setup_apps_tab(self, tab):
         app_btn_frame = ctk.CTkFrame(tab)
         app_btn_frame.pack(fill=tk.X, padx=10, pady=5)
 
         self.apps_btn = ctk.CTkButton(app_btn_frame, text="List Installed Applications", 
-                                      command=lambda: run_in_thread(self.app_logic.list_applications), 
+                                      command=self.app_logic.list_applications, 
                                       state=tk.DISABLED)
         self.apps_btn.pack(side=tk.LEFT, padx=10, pady=10)
 
         self.install_btn = ctk.CTkButton(app_btn_frame, text="Install .ipa...", fg_color="green", 
-                                         command=lambda: run_in_thread(self.app_logic.install_app), 
+                                         command=self.app_logic.install_app, 
                                          state=tk.DISABLED)
         self.install_btn.pack(side=tk.LEFT, padx=10, pady=10)
         
         self.uninstall_btn = ctk.CTkButton(app_btn_frame, text="Uninstall Selected", fg_color="#D32F2F", hover_color="#B71C1C", 
-                                           command=lambda: run_in_thread(self.app_logic.uninstall_apps), 
+                                           command=self.app_logic.uninstall_apps, 
                                            state=tk.DISABLED)
         self.uninstall_btn.pack(side=tk.RIGHT, padx=10, pady=10)
 
@@ -144,19 +208,23 @@ class PyAFCGui(ctk.CTk):
         self.app_listbox.pack(fill=tk.BOTH, expand=True, pady=1, padx=1)
         self.app_listbox.bind("<<ListboxSelect>>", self.on_app_selection)
 
+    def toggle_thumbnails(self):
+        self.thumb_mode = not self.thumb_mode
+        shown, hidden = (self.thumb_grid, self.file_listbox) if self.thumb_mode else (self.file_listbox, self.thumb_grid)
+        hidden.pack_forget()
+        hidden.configure(yscrollcommand=None)
+        shown.pack(fill=tk.BOTH, expand=True, pady=1, padx=1)
+        shown.configure(yscrollcommand=self.file_scrollbar.set)
+        self.file_scrollbar.configure(command=shown.yview)
+        self.thumbs_btn.configure(text="List" if self.thumb_mode else "Thumbs")
+        self.refresh_thumbnails()
+
+    def refresh_thumbnails(self):
+        if getattr(self, 'thumb_mode', False):
+            self.thumb_grid.refresh(self.file_logic.current_path)
+
     def on_file_selection(self, event=None):
-        selected_indices = self.file_listbox.curselection()
-        if not selected_indices:
-            self.download_btn.configure(state=tk.DISABLED)
-            return
-        
-        is_file_selected = False
-        for i in selected_indices:
-            if not self.file_listbox.get(i).startswith("[FOLDER] "):
-                is_file_selected = True
-                break
-        
-        if is_file_selected:
+        if self.file_listbox.curselection():
             self.download_btn.configure(state=tk.NORMAL)
         else:
             self.download_btn.configure(state=tk.DISABLED)
@@ -167,15 +235,221 @@ class PyAFCGui(ctk.CTk):
         else:
             self.uninstall_btn.configure(state=tk.DISABLED)
 
+    def show_transfers_window(self):
+        if self.transfers_window is not None and self.transfers_window.winfo_exists():
+            self.transfers_window.lift()
+            return
+
+        self.transfers_window = ctk.CTkToplevel(self)
+        self.transfers_window.title("Transfers")
+        self.transfers_window.geometry("760x300")
+
+        self.transfers_listbox = tk.Listbox(self.transfers_window, bg="#2B2B2B", fg="white", selectbackground="#1F6AA5", borderwidth=0, highlightthickness=0)
+        self.transfers_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+        self.pool_label = ctk.CTkLabel(self.transfers_window, text="", anchor="w")
+        self.pool_label.pack(fill=tk.X, padx=10)
+        self.workers_label = ctk.CTkLabel(self.transfers_window, text="", anchor="w", justify="left")
+        self.workers_label.pack(fill=tk.X, padx=10)
+
+        button_frame = ctk.CTkFrame(self.transfers_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        for text, action in (("Pause", "pause"), ("Resume", "resume"), ("Cancel", "cancel"), ("Move Up", "move_up"), ("Move Down", "move_down")):
+            ctk.CTkButton(button_frame, text=text, width=90, command=lambda a=action: self.transfer_job_action(a)).pack(side=tk.LEFT, padx=(0, 10))
+        ctk.CTkButton(button_frame, text="Clear Finished",
+                      command=lambda: self.file_logic.scheduler and self.file_logic.scheduler.clear_finished()).pack(side=tk.RIGHT)
+        self.refresh_transfers_window()
+        self.refresh_worker_stats()
+
+    def refresh_transfers_window(self):
+        if self.transfers_listbox is None or not self.transfers_listbox.winfo_exists(): return
+        jobs = self.file_logic.scheduler.jobs() if self.file_logic.scheduler else []
+        # the selection follows the job, since moving one reorders the list
+        selected = {self.transfers_job_ids[i] for i in self.transfers_listbox.curselection() if i < len(self.transfers_job_ids)}
+        self.transfers_listbox.delete(0, tk.END)
+        self.transfers_job_ids = [job.id for job in jobs]
+        for i, job in enumerate(jobs):
+            self.transfers_listbox.insert(tk.END, job.describe())
+            if job.id in selected:
+                self.transfers_listbox.selection_set(i)
+        if self.file_logic.afc_pool:
+            self.pool_label.configure(text="AFC: " + format_pool_stats(self.file_logic.afc_pool.stats()))
+
+    def refresh_worker_stats(self):
+        # queue depth and wait times change without job events, so this one ticks while the window is open
+        if self.transfers_window is None or not self.transfers_window.winfo_exists(): return
+        stats = self.workers.stats() + ([self.file_logic.engine.stats()] if self.file_logic.engine else [])
+        self.workers_label.configure(text="Workers: " + format_worker_stats(stats).replace(" | ", "\n"))
+        if self.file_logic.afc_pool:
+            self.pool_label.configure(text="AFC: " + format_pool_stats(self.file_logic.afc_pool.stats()))
+        self.after(STATS_INTERVAL_MS, self.refresh_worker_stats)
+
+    def show_find_window(self):
+        if self.find_window is not None and self.find_window.winfo_exists():
+            self.find_window.lift()
+            return
+
+        self.find_window = ctk.CTkToplevel(self)
+        self.find_window.title("Find on Device")
+        self.find_window.geometry("700x400")
+
+        search_frame = ctk.CTkFrame(self.find_window)
+        search_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.find_mode = ctk.CTkSegmentedButton(search_frame, values=["Name", "Fuzzy", "Largest"], command=lambda value: self.run_find())
+        self.find_mode.set("Name")
+        self.find_mode.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.find_entry = ctk.CTkEntry(search_frame, font=("Consolas", 12), placeholder_text="name, *.glob or folder for Largest")
+        self.find_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, pady=10)
+        self.find_entry.bind("<KeyRelease>", lambda e: self.run_find())
+        ctk.CTkButton(search_frame, text="Reindex", width=80, command=self.reindex).pack(side=tk.LEFT, padx=(10, 0), pady=10)
+
+        self.find_listbox = tk.Listbox(self.find_window, bg="#2B2B2B", fg="white", selectbackground="#1F6AA5", borderwidth=0, highlightthickness=0, font=("Consolas", 11))
+        self.find_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+        self.find_listbox.bind("<Double-Button-1>", self.open_find_result)
+        self.find_status = ctk.CTkLabel(self.find_window, text="", anchor="w")
+        self.find_status.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.refresh_find_status()
+        self.find_entry.focus_set()
+
+    def run_find(self):
+        if self.find_window is None or not self.find_window.winfo_exists(): return
+        self.file_logic.search_index(self.find_entry.get(), self.find_mode.get().lower())
+
+    def reindex(self):
+        self.file_logic.start_indexing(force=True)
+        self.refresh_find_status()
+
+    def set_find_status(self, text):
+        if self.find_window is not None and self.find_window.winfo_exists():
+            self.find_status.configure(text=text)
+
+    def refresh_find_status(self):
+        index = self.file_logic.device_index
+        if index is None:
+            text = "Index not available"
+        elif self.file_logic.is_indexing():
+            text = "Indexing..."
+        else:
+            last = index.last_scan
+            text = f"{index.count()} entries indexed" + (f", last scan {time.strftime('%Y-%m-%d %H:%M', time.localtime(last))}" if last else ", never scanned")
+            if self.file_logic.filename_index is None:
+                text += ", loading names..."
+        self.set_find_status(text)
+
+    def show_find_results(self, results, elapsed_ms):
+        if self.find_window is None or not self.find_window.winfo_exists(): return
+        self.find_results = results
+        self.find_listbox.delete(0, tk.END)
+        for entry in results:
+            self.find_listbox.insert(tk.END, f"{'<dir>' if entry.is_dir else format_size(entry.size or 0):>10}  {entry.path}")
+            if entry.is_dir:
+                self.find_listbox.itemconfig(tk.END, {'fg': '#00AFFF'})
+        self.set_find_status(f"{len(results)} result(s) in {elapsed_ms:.0f} ms")
+
+    def open_find_result(self, event=None):
+        selected = self.find_listbox.curselection()
+        if not selected or selected[0] >= len(self.find_results): return
+        entry = self.find_results[selected[0]]
+        self.tab_view.set("File Explorer")
+        self.file_logic.browse_to_path(entry.path if entry.is_dir else os.path.dirname(entry.path) or "/")
+
+    def show_usage_window(self):
+        if self.usage_window is None or not self.usage_window.winfo_exists():
+            self.usage_window = ctk.CTkToplevel(self)
+            self.usage_window.title("Disk Usage")
+            self.usage_window.geometry("760x460")
+            self.usage_window.protocol("WM_DELETE_WINDOW", self.close_usage_window)
+
+            bar = ctk.CTkFrame(self.usage_window)
+            bar.pack(fill=tk.X, padx=10, pady=(10, 0))
+            ctk.CTkButton(bar, text="Up", width=40, command=self.usage_up).pack(side=tk.LEFT, padx=(10, 5), pady=10)
+            self.usage_path_label = ctk.CTkLabel(bar, text="", font=("Consolas", 12), anchor="w")
+            self.usage_path_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=10)
+            self.usage_sort = ctk.CTkSegmentedButton(bar, values=["Size", "Files", "Name"], command=lambda value: self.refresh_usage(self.usage))
+            self.usage_sort.set("Size")
+            self.usage_sort.pack(side=tk.LEFT, padx=5, pady=10)
+            ctk.CTkButton(bar, text="Rescan", width=80, command=lambda: self.file_logic.analyze_usage(self.usage_path, rescan=True)).pack(side=tk.LEFT, padx=(5, 10), pady=10)
+
+            self.usage_listbox = VirtualListbox(self.usage_window, bg="#2B2B2B", fg="white", selectbackground="#1F6AA5", borderwidth=0, highlightthickness=0, font=("Consolas", 11))
+            self.usage_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+            self.usage_listbox.bind("<Double-Button-1>", self.open_usage_item)
+            self.usage_listbox.bind("<Return>", self.open_usage_item)
+            self.usage_listbox.bind("<BackSpace>", lambda e: self.usage_up())
+            self.usage_status = ctk.CTkLabel(self.usage_window, text="", anchor="w")
+            self.usage_status.pack(fill=tk.X, padx=10, pady=(0, 10))
+        else:
+            self.usage_window.lift()
+        self.file_logic.analyze_usage(self.file_logic.current_path)
+
+    def close_usage_window(self):
+        self.file_logic.stop_usage()
+        self.usage_window.destroy()
+
+    def show_usage(self, usage, path):
+        if self.usage_window is None or not self.usage_window.winfo_exists(): return
+        self.usage, self.usage_path = usage, path
+        self.usage_path_label.configure(text=path)
+        self.usage_listbox.delete(0, tk.END)
+        self.refresh_usage(usage)
+
+    def refresh_usage(self, usage):
+        # partial totals stream in while the walk runs; "+" marks folders still being added up
+        if self.usage_window is None or not self.usage_window.winfo_exists() or usage is not self.usage: return
+        items = usage.children(self.usage_path, self.usage_sort.get().lower()) or []
+        total, files, _ = usage.total(self.usage_path)
+        selected = self.usage_listbox.curselection()
+        selected_path = self.usage_items[selected[0]].entry.path if selected and selected[0] < len(self.usage_items) else None
+        scroll = self.usage_listbox.yview()[0]
+        self.usage_items = items
+        self.usage_listbox.set_items([format_usage_row(item, total) for item in items],
+                                     {i: '#00AFFF' for i, item in enumerate(items) if item.entry.is_dir}, scroll=scroll)
+        for i, item in enumerate(items):
+            if item.entry.path == selected_path:
+                self.usage_listbox.selection_set(i)
+        self.usage_status.configure(text=f"{self.usage_path}: {format_size(total)} in {files} file(s) | {usage.summary()}")
+
+    def open_usage_item(self, event=None):
+        selected = self.usage_listbox.curselection()
+        if not selected or selected[0] >= len(self.usage_items): return
+        entry = self.usage_items[selected[0]].entry
+        if entry.is_dir:
+            self.file_logic.analyze_usage(entry.path)
+
+    def usage_up(self):
+        parent = os.path.dirname(self.usage_path.rstrip("/")) or "/"
+        if parent != self.usage_path:
+            self.file_logic.analyze_usage(parent)
+
+    def transfer_job_action(self, action):
+        if not self.file_logic.scheduler or self.transfers_listbox is None: return
+        for i in self.transfers_listbox.curselection():
+            if i < len(self.transfers_job_ids):
+                getattr(self.file_logic.scheduler, action)(self.transfers_job_ids[i])
+
     def disable_all_buttons(self):
         self.info_btn.configure(state=tk.DISABLED)
         self.apps_btn.configure(state=tk.DISABLED)
         self.upload_btn.configure(state=tk.DISABLED)
+        self.upload_folder_btn.configure(state=tk.DISABLED)
+        self.sync_btn.configure(state=tk.DISABLED)
+        self.archive_btn.configure(state=tk.DISABLED)
         self.download_btn.configure(state=tk.DISABLED)
         self.go_up_btn.configure(state=tk.DISABLED)
         self.install_btn.configure(state=tk.DISABLED)
         self.uninstall_btn.configure(state=tk.DISABLED)
     
+    def on_closing(self):
+        # pool threads are not daemons, so stop the long walks and drop queued work before leaving
+        self.file_logic.index_stop.set()
+        self.file_logic.stop_usage()
+        if self.file_logic.engine:
+            self.file_logic.engine.close()
+        self.workers.shutdown()
+        self.destroy()
+
+    def show_busy(self):
+        # a click whose task could not even be queued
+        messagebox.showwarning("Busy", BUSY_MESSAGE)
+
     def show_credits(self):
         messagebox.showinfo("PyAFC Credits", 
                             "Developer: https://github.com/ZodaciOS\n"
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+HISTORY_SIZE = 100
+RETAINED_VIEWS = 20
+MTIME_EPSILON = 1e-6
+
+# selection is a list of listbox labels, scroll the first visible fraction
+ViewState = namedtuple("ViewState", ["entries", "mtime", "selection", "scroll"])
+
+class NavigationHistory:
+    # browser-style back/forward over paths; the last few listings are kept with
+    # the directory mtime they were read at plus the selection and scroll position,
+    # so a history jump renders at once and a single stat decides on a refresh
+    def __init__(self, limit=HISTORY_SIZE, retained=RETAINED_VIEWS):
+        self.limit = limit
+        self.retained = retained
+        self._paths = []
+        self._pos = -1
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        return self._paths[self._pos] if self._pos >= 0 else None
+
+    def can_back(self):
+        return self._pos > 0
+
+    def can_forward(self):
+        return self._pos < len(self._paths) - 1
+
+    def visit(self, path):
+        if path == self.current:
+            return
+        del self._paths[self._pos + 1:]
+        self._paths.append(path)
+        if len(self._paths) > self.limit:
+            del self._paths[0]
+        self._pos = len(self._paths) - 1
+
+    def back(self):
+        if not self.can_back():
+            return None
+        self._pos -= 1
+        return self._paths[self._pos]
+
+    def forward(self):
+        if not self.can_forward():
+            return None
+        self._pos += 1
+        return self._paths[self._pos]
+
+    def remember(self, path, entries, mtime=None):
+        # a listing served from cache has no fresh mtime; keep the one it was read at
+        with self._lock:
+            old = self._views.get(path)
+            if mtime is None and old is not None and old.entries is entries:
+                mtime = old.mtime
+            selection, scroll = (old.selection, old.scroll) if old else ([], 0.0)
+            self._store(path, ViewState(entries, mtime, selection, scroll))
+
+    def save_view(self, path, selection, scroll):
+        with self._lock:
+            old = self._views.get(path)
+            if old is not None:
+                self._store(path, old._replace(selection=list(selection), scroll=scroll))
+
+    def view(self, path):
+        with self._lock:
+            return self._views.get(path)
+
+    def is_current(self, path, mtime):
+        state = self.view(path)
+        return (state is not None and state.mtime is not None and mtime is not None
+                and abs(state.mtime - mtime) < MTIME_EPSILON)
+
+    def invalidate(self, path):
+        with self._lock:
+            self._views.pop(path, None)
+
+    def _store(self, path, state):
+        self._views[path] = state
+        self._views.move_to_end(path)
+        while len(self._views) > self.retained:
+            self._views.popitem(last=False)
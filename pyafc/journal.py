@@ -0,0 +1,72 @@
+import json
+import os
+import threading
+import time
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".pyafc", "journal")
+FLUSH_INTERVAL = 0.5
+
+def journal_key(direction, src, dst):
+    return f"{direction}:{src}->{dst}"
+
+class TransferJournal:
+    # one small JSON file per device; offsets are only trusted once flushed,
+    # so a resume never starts past bytes that are known to be on the target
+    def __init__(self, udid, directory=DEFAULT_JOURNAL_DIR, flush_interval=FLUSH_INTERVAL):
+        self.udid = udid
+        self.path = os.path.join(directory, f"{udid or 'unknown'}.json")
+        self.flush_interval = flush_interval
+        self._entries = self._load()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, key, size, mtime):
+        # an entry only applies to the exact same source file
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or entry.get("size") != size or entry.get("mtime") != mtime:
+            return 0
+        return entry.get("offset", 0)
+
+    def update(self, key, offset, size, mtime):
+        with self._lock:
+            self._entries[key] = {"offset": offset, "size": size, "mtime": mtime, "updated": time.time()}
+            self._dirty = True
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def complete(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+                self._flush_locked()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._entries)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"JOURNAL: Could not write {self.path}: {e}")
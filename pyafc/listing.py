@@ -0,0 +1,164 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime
+from pymobiledevice3.exceptions import PyMobileDevice3Exception
+
+FOLDER_PREFIX = "[FOLDER] "
+STAT_BATCH_SIZE = 32
+STREAM_INTERVAL = 0.05
+STREAM_ENTRIES = 500
+
+# is_dir is also set for a symlink that can be listed, so it can be browsed like
+# a folder; recursive walks never go through one (see descends)
+DirEntry = namedtuple("DirEntry", ["name", "path", "is_dir", "size", "mtime", "is_link"], defaults=(False,))
+
+class ListingCancelled(Exception):
+    pass
+
+def join_path(base, name):
+    return os.path.join(base, name).replace("\\", "/")
+
+def to_timestamp(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        # AFC reports nanoseconds; older wrappers already converted to seconds
+        return value / 1e9 if value > 1e11 else float(value)
+    return None
+
+def _is_listable(afc, path):
+    try:
+        afc.listdir(path)
+        return True
+    except PyMobileDevice3Exception:
+        return False
+
+def stat_entry(afc, dir_path, name):
+    fp = join_path(dir_path, name)
+    try:
+        info = afc.stat(fp)
+    except PyMobileDevice3Exception:
+        return DirEntry(name, fp, _is_listable(afc, fp), None, None)
+    ifmt = info.get('st_ifmt')
+    is_link = ifmt == 'S_IFLNK'
+    is_dir = ifmt == 'S_IFDIR' or (is_link and _is_listable(afc, fp))
+    size = info.get('st_size')
+    return DirEntry(name, fp, is_dir, int(size) if size is not None else None, to_timestamp(info.get('st_mtime')), is_link)
+
+def descends(entry):
+    # links on a jailbroken / point back into the tree (/var -> /private/var) or
+    # into loops, so walks count and copy only what is really below the root
+    return entry.is_dir and not entry.is_link
+
+def split_entries(entries):
+    folders = [FOLDER_PREFIX + e.name for e in entries if e.is_dir]
+    files = [e.name for e in entries if not e.is_dir]
+    return folders, files
+
+def coalesce(batches, interval=STREAM_INTERVAL, max_entries=STREAM_ENTRIES):
+    # merges small stat batches so a UI gets one update per interval or per max_entries
+    pending, last = [], time.monotonic()
+    for batch in batches:
+        pending.extend(batch)
+        now = time.monotonic()
+        if len(pending) >= max_entries or now - last >= interval:
+            yield pending
+            pending, last = [], now
+    if pending:
+        yield pending
+
+def walk(lister, root, on_error=None):
+    # depth-first and lazy: only the pending directory paths are held in memory
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            entries = lister.list(path)
+        except Exception as e:
+            if on_error:
+                on_error(path, e)
+            continue
+        yield path, entries
+        stack.extend(e.path for e in reversed(entries) if descends(e))
+
+def walk_parallel(lister, root, workers=None, on_error=None, cancelled=None):
+    # lists several directories at once and yields them in completion order, so
+    # trees made of many small folders are not bound by one round trip at a time
+    executor = ThreadPoolExecutor(max_workers=workers or lister.pool.size, thread_name_prefix="afc-walk")
+    pending = {executor.submit(lister.list, root): root}
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    if on_error:
+                        on_error(path, e)
+                    continue
+                if not (cancelled and cancelled()):
+                    for entry in entries:
+                        if descends(entry):
+                            pending[executor.submit(lister.list, entry.path)] = entry.path
+                yield path, entries
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+class DirectoryLister:
+    def __init__(self, pool, batch_size=STAT_BATCH_SIZE):
+        self.pool = pool
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="afc-stat")
+
+    def list(self, path, parallel=True, cancelled=None):
+        with self.pool.lease() as afc:
+            names = [n for n in afc.listdir(path) if n not in ('.', '..')]
+        if not parallel:
+            return self._stat_batch(path, names, cancelled)
+        # spread small listings over every session instead of filling one batch
+        size = max(1, min(self.batch_size, -(-len(names) // self.pool.size)))
+        batches = [names[i:i + size] for i in range(0, len(names), size)]
+        entries = []
+        for batch_entries in self._executor.map(lambda batch: self._stat_batch(path, batch, cancelled), batches):
+            entries.extend(batch_entries)
+        return entries
+
+    def iter_list(self, path, cancelled=None):
+        # the same listing as list(), yielded batch by batch as the stats come back,
+        # so the first rows can be shown long before a big folder is done
+        with self.pool.lease() as afc:
+            names = [n for n in afc.listdir(path) if n not in ('.', '..')]
+        size = max(1, min(self.batch_size, -(-len(names) // self.pool.size)))
+        futures = [self._executor.submit(self._stat_batch, path, names[i:i + size], cancelled)
+                   for i in range(0, len(names), size)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def dir_mtime(self, path):
+        # one round trip: adding, removing or renaming an entry bumps the folder mtime
+        try:
+            with self.pool.lease() as afc:
+                return to_timestamp(afc.stat(path).get('st_mtime'))
+        except Exception:
+            return None
+
+    def _stat_batch(self, path, names, cancelled=None):
+        entries = []
+        with self.pool.lease() as afc:
+            for name in names:
+                if cancelled is not None and cancelled():
+                    raise ListingCancelled(path)
+                entries.append(stat_entry(afc, path, name))
+        return entries
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,85 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from .listing import ListingCancelled
+
+PREFETCH_WORKERS = 2
+SMALL_TREE_LIMIT = 64
+MAX_CHILDREN = 256
+
+class Prefetcher:
+    def __init__(self, lister, cache, workers=PREFETCH_WORKERS, small_tree_limit=SMALL_TREE_LIMIT):
+        self.lister = lister
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.small_tree_limit = small_tree_limit
+        self.prefetched = 0
+        self._queue = deque()
+        self._generation = 0
+        self._user_active = 0
+        self._stopped = False
+        self._threads = []
+        self._cond = threading.Condition()
+
+    def schedule(self, udid, child_paths):
+        with self._cond:
+            if self._stopped:
+                return
+            self._generation += 1
+            self._queue.clear()
+            for path in list(child_paths)[:MAX_CHILDREN]:
+                self._queue.append((self._generation, udid, path, 1))
+            while len(self._threads) < self.workers:
+                t = threading.Thread(target=self._worker, daemon=True, name="afc-prefetch")
+                self._threads.append(t)
+                t.start()
+            self._cond.notify_all()
+
+    @contextmanager
+    def user_request(self):
+        with self._cond:
+            self._user_active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._user_active -= 1
+                self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._queue.clear()
+            self._cond.notify_all()
+
+    def _should_yield(self, generation):
+        return self._stopped or self._user_active > 0 or generation != self._generation
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._queue or self._user_active):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                item = self._queue.popleft()
+            generation, udid, path, depth = item
+            entries = self.cache.get(udid, path)
+            if entries is None:
+                try:
+                    entries = self.lister.list(path, parallel=False, cancelled=lambda: self._should_yield(generation))
+                except ListingCancelled:
+                    with self._cond:
+                        if generation == self._generation and not self._stopped:
+                            self._queue.appendleft(item)
+                    continue
+                except Exception as e:
+                    print(f"PREFETCH: {path} failed: {e}")
+                    continue
+                self.cache.put(udid, path, entries)
+                self.prefetched += 1
+            if depth == 1 and len(entries) <= self.small_tree_limit:
+                with self._cond:
+                    if generation == self._generation:
+                        self._queue.extend((generation, udid, e.path, 2) for e in entries if e.is_dir)
+                        self._cond.notify_all()
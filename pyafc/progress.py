@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from collections import deque, namedtuple
+from .transfer import Throttle, format_size
+
+EVENT_INTERVAL = 0.25
+RATE_WINDOW = 5.0
+FILE_HISTORY = 1000
+
+ProgressEvent = namedtuple("ProgressEvent", ["action", "file", "file_bytes", "file_size", "bytes_done", "total_bytes",
+                                             "files_done", "total_files", "rate", "eta", "final"])
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+def format_event(event):
+    total = f"/{format_size(event.total_bytes)}" if event.total_bytes else ""
+    text = (f"{event.action} {event.files_done}/{event.total_files} file(s), {format_size(event.bytes_done)}{total} "
+            f"at {format_size(event.rate)}/s, ETA {format_eta(event.eta)}")
+    if event.file and not event.final:
+        text += f" - {event.file}"
+    return text
+
+class TransferMonitor:
+    # fed per chunk by the transfer engines; emits at most one event per interval.
+    # For JSON export it keeps a small stats record for every failed file and for
+    # the last `history` finished ones; older successes are only counted, so a
+    # million-file transfer does not keep a million dicts alive after it ends
+    def __init__(self, action, report, on_event=None, interval=EVENT_INTERVAL, window=RATE_WINDOW, history=FILE_HISTORY):
+        self.action = action
+        self.report = report
+        self.on_event = on_event
+        self.window = window
+        self.bytes_done = 0
+        self.failures = []
+        self.recent = deque(maxlen=history)
+        self.omitted = 0
+        self._active = {}
+        self._samples = deque([(time.monotonic(), 0)])
+        self._throttle = Throttle(interval)
+        self._lock = threading.Lock()
+
+    def start_file(self, item):
+        with self._lock:
+            self._active[item] = [time.monotonic(), 0]
+
+    def add_bytes(self, item, num_bytes):
+        now = time.monotonic()
+        with self._lock:
+            self.bytes_done += num_bytes
+            state = self._active.get(item)
+            if state is not None:
+                state[1] += num_bytes
+            self._samples.append((now, self.bytes_done))
+            while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+            file_bytes = state[1] if state else 0
+        if self._throttle.ready():
+            self._emit(item, file_bytes)
+
+    def finish_file(self, item, error=None):
+        now = time.monotonic()
+        with self._lock:
+            started, num_bytes = self._active.pop(item, (now, 0))
+            seconds = now - started
+            record = {"src": item.src, "dst": item.dst, "size": item.size, "bytes": num_bytes,
+                      "seconds": round(seconds, 4), "rate": round(num_bytes / seconds, 1) if seconds > 0 else None,
+                      "error": str(error) if error else None}
+            if error:
+                self.failures.append(record)
+            else:
+                if len(self.recent) == self.recent.maxlen:
+                    self.omitted += 1
+                self.recent.append(record)
+        if self._throttle.ready():
+            self._emit(item, num_bytes)
+
+    def finish(self):
+        self._emit(None, 0, final=True)
+
+    @property
+    def rate(self):
+        with self._lock:
+            (t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+        if t1 - t0 <= 0:
+            return 0.0
+        return (b1 - b0) / (t1 - t0)
+
+    def snapshot(self, item=None, file_bytes=0, final=False):
+        rate = self.report.throughput if final else self.rate
+        remaining = self.report.total_bytes - self.bytes_done
+        eta = 0 if final else (remaining / rate if rate > 0 and remaining > 0 else None)
+        return ProgressEvent(self.action, item.src.replace("\\", "/").rsplit("/", 1)[-1] if item and item.src else None,
+                             file_bytes, item.size if item else None, self.bytes_done, self.report.total_bytes,
+                             self.report.processed, self.report.total_files, rate, eta, final)
+
+    def _emit(self, item, file_bytes, final=False):
+        if self.on_event:
+            self.on_event(self.snapshot(item, file_bytes, final))
+
+    def to_dict(self):
+        report = self.report
+        with self._lock:
+            files = self.failures + list(self.recent)
+            omitted = self.omitted
+        return {"action": self.action, "files_total": report.total_files, "files_completed": report.completed,
+                "files_failed": len(report.failed), "bytes": report.bytes_done, "seconds": round(report.elapsed, 3),
+                "throughput": round(report.throughput, 1), "files": files, "files_omitted": omitted}
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
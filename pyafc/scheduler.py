@@ -0,0 +1,390 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from .afc_pool import is_broken
+
+DEFAULT_QUEUE_DIR = os.path.join(os.path.expanduser("~"), ".pyafc", "queue")
+MAX_CONCURRENT_JOBS = 2
+INTERACTIVE_MAX_SIZE = 8 * 1024 * 1024
+
+INTERACTIVE, NORMAL, BULK = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BULK: "bulk"}
+
+QUEUED, RUNNING, PAUSED, DONE, FAILED, CANCELLED = "queued", "running", "paused", "done", "failed", "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING, PAUSED)
+
+class JobCancelled(Exception):
+    pass
+
+def transfer_priority(sizes, has_folders=False):
+    # a single small file is what the user is waiting on right now
+    if has_folders:
+        return BULK
+    if len(sizes) == 1 and sizes[0] is not None and sizes[0] <= INTERACTIVE_MAX_SIZE:
+        return INTERACTIVE
+    return BULK if len(sizes) > 1 and sum(s or 0 for s in sizes) > INTERACTIVE_MAX_SIZE * 8 else NORMAL
+
+class TransferJob:
+    def __init__(self, job_id, name, kind, priority, spec, run):
+        self.id = job_id
+        self.name = name
+        self.kind = kind
+        self.priority = priority
+        self.spec = spec
+        self.run = run
+        self.state = QUEUED
+        self.error = None
+        self.created = time.time()
+        self._cancelled = False
+        self._started = False
+        self._slot = None
+        self._seq = None
+        self._queued = False
+        self._resume = threading.Event()
+        self._resume.set()
+        self._held = 0
+        self._held_lock = threading.Lock()
+        self._on_idle = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    @property
+    def paused(self):
+        # engines give their AFC sessions back before they block in checkpoint()
+        return not self._resume.is_set()
+
+    @property
+    def idle(self):
+        # no AFC session taken (or being taken) through leases()
+        with self._held_lock:
+            return self._held == 0
+
+    def leases(self, pool):
+        # the engines lease through this, so a paused job gives up its slot only
+        # once every session it holds is back in the pool
+        return JobLeases(pool, self)
+
+    def _hold(self, change):
+        with self._held_lock:
+            self._held += change
+            idle = self._held == 0
+        if idle and change < 0 and self.paused and self._on_idle:
+            self._on_idle(self)
+
+    def checkpoint(self):
+        # engines call this between chunks: blocks while paused (or paused and
+        # waiting for a free slot again), raises once cancelled
+        self._resume.wait()
+        if self._cancelled:
+            raise JobCancelled(self.name)
+
+    def describe(self):
+        text = f"#{self.id} [{self.state}] {self.name} ({PRIORITY_NAMES.get(self.priority, self.priority)})"
+        if self.error:
+            text += f" - {self.error}"
+        return text
+
+class JobLeases:
+    # the pool as one job sees it; counts the job's sessions, including the ones
+    # it is still waiting for
+    def __init__(self, pool, job):
+        self.pool = pool
+        self.job = job
+        self.size = pool.size
+
+    def acquire(self, timeout=None):
+        self.job._hold(1)
+        try:
+            return self.pool.acquire(timeout=timeout)
+        except BaseException:
+            self.job._hold(-1)
+            raise
+
+    def release(self, afc, broken=False):
+        try:
+            self.pool.release(afc, broken=broken)
+        finally:
+            self.job._hold(-1)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        afc = self.acquire(timeout=timeout)
+        broken = False
+        try:
+            yield afc
+        except Exception as e:
+            broken = is_broken(e)
+            raise
+        finally:
+            self.release(afc, broken=broken)
+
+class TransferScheduler:
+    # one queue per device; bulk jobs share max_concurrent slots and one extra
+    # slot is kept for interactive jobs so they never wait behind a big pull.
+    # Waiting jobs start in (priority, position) order; a paused job gives its
+    # slot up once its sessions are back and queues for one again when resumed.
+    def __init__(self, udid=None, max_concurrent=MAX_CONCURRENT_JOBS, directory=DEFAULT_QUEUE_DIR, on_change=None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.path = os.path.join(directory, f"{udid or 'unknown'}.json") if directory else None
+        self.on_change = on_change
+        self._jobs = OrderedDict()
+        self._heap = []
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._factories = {}
+        self._running = 0
+        self._running_interactive = 0
+        self._stopped = False
+        self._lock = threading.RLock()
+
+    def register(self, kind, factory):
+        # factory(spec) -> run(job); needed to rebuild persisted jobs after a restart
+        self._factories[kind] = factory
+
+    def submit(self, name, kind, spec=None, priority=NORMAL, run=None, start_paused=False):
+        run = run or self._factories[kind](spec)
+        with self._lock:
+            job = TransferJob(next(self._ids), name, kind, priority, spec, run)
+            job._on_idle = self._idle
+            if start_paused:
+                job.state = PAUSED
+                job._resume.clear()
+            self._jobs[job.id] = job
+            job._seq = next(self._seq)
+            self._enqueue(job)
+            self._dispatch()
+        self._changed()
+        return job
+
+    def restore(self):
+        # persisted jobs come back paused so nothing starts without the user asking
+        if not self.path:
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return []
+        restored = []
+        for record in saved:
+            if record.get("kind") not in self._factories:
+                continue
+            restored.append(self.submit(record["name"], record["kind"], record.get("spec"), record.get("priority", NORMAL),
+                                        start_paused=True))
+        return restored
+
+    def jobs(self):
+        # active jobs in the order they run or start, then the finished ones
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: (j.state not in ACTIVE_STATES, j.priority, j._seq))
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pause(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.state not in (QUEUED, RUNNING):
+                return False
+            job._resume.clear()
+            job.state = PAUSED
+            # the engines hand their sessions back before they park in checkpoint();
+            # until the last one is back the slot stays, or the next job would only
+            # wait in the pool. A job holding none frees it here, the others in _idle
+            if job._slot is not None and job.idle:
+                self._free_slot(job)
+                self._dispatch()
+        self._changed()
+        return True
+
+    def _idle(self, job):
+        with self._lock:
+            if job.state != PAUSED or job._slot is None:
+                return
+            self._free_slot(job)
+            self._dispatch()
+        self._changed()
+
+    def resume(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.state != PAUSED:
+                return False
+            if job._slot is not None:
+                # resumed before its sessions were all back: it still has its slot
+                job.state = RUNNING
+                job._resume.set()
+            else:
+                # started or not, the job waits for a free slot like any other
+                job.state = QUEUED
+                self._enqueue(job)
+                self._dispatch()
+        self._changed()
+        return True
+
+    def set_priority(self, job_id, priority):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.state not in ACTIVE_STATES or job.priority == priority:
+                return False
+            job.priority = priority
+            self._reorder(self._waiting())
+            self._dispatch()
+        self._changed()
+        return True
+
+    def move(self, job_id, offset):
+        # moves a waiting job offset places up (negative) or down the start order;
+        # it takes the priority of the job it lands next to, so the order holds
+        with self._lock:
+            waiting = self._waiting()
+            job = self._jobs.get(job_id)
+            if job not in waiting:
+                return False
+            index = waiting.index(job)
+            target = max(0, min(len(waiting) - 1, index + offset))
+            if target == index:
+                return False
+            job.priority = waiting[target].priority
+            waiting.insert(target, waiting.pop(index))
+            self._reorder(waiting)
+            self._dispatch()
+        self._changed()
+        return True
+
+    def move_up(self, job_id):
+        return self.move(job_id, -1)
+
+    def move_down(self, job_id):
+        return self.move(job_id, 1)
+
+    def _waiting(self):
+        return [job for _, _, job in sorted(self._heap, key=lambda entry: entry[:2])]
+
+    def _reorder(self, waiting):
+        for job in waiting:
+            job._seq = next(self._seq)
+        self._heap = [(job.priority, job._seq, job) for job in waiting]
+        heapq.heapify(self._heap)
+
+    def _enqueue(self, job):
+        if not job._queued:
+            job._queued = True
+            heapq.heappush(self._heap, (job.priority, job._seq, job))
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.state not in ACTIVE_STATES:
+                return False
+            job._cancelled = True
+            job._resume.set()
+            if not job._started:
+                job.state = CANCELLED
+        self._changed()
+        return True
+
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.state not in ACTIVE_STATES]:
+                del self._jobs[job_id]
+        self._changed()
+
+    def shutdown(self):
+        # running jobs are cancelled but stay persisted, so they can be resumed later
+        with self._lock:
+            self._save()
+            self._stopped = True
+            for job in self._jobs.values():
+                if job.state in ACTIVE_STATES:
+                    job._cancelled = True
+                    job._resume.set()
+
+    def _dispatch(self):
+        held = []
+        while self._heap and not self._stopped:
+            priority, seq, job = self._heap[0]
+            if job.state == CANCELLED or job._cancelled:
+                heapq.heappop(self._heap)
+                job._queued = False
+                continue
+            if job.state == PAUSED:
+                held.append(heapq.heappop(self._heap))
+                continue
+            interactive = priority == INTERACTIVE and self._running_interactive == 0
+            if self._running >= self.max_concurrent and not interactive:
+                break
+            heapq.heappop(self._heap)
+            job._queued = False
+            job.state = RUNNING
+            if priority == INTERACTIVE and self._running >= self.max_concurrent:
+                job._slot = INTERACTIVE
+                self._running_interactive += 1
+            else:
+                job._slot = NORMAL
+                self._running += 1
+            job._resume.set()
+            if job._started:
+                # a resumed job: its thread is parked in checkpoint() and carries on
+                continue
+            job._started = True
+            threading.Thread(target=self._run, args=(job,), daemon=True, name=f"transfer-job-{job.id}").start()
+        for entry in held:
+            heapq.heappush(self._heap, entry)
+
+    def _free_slot(self, job):
+        if job._slot == INTERACTIVE:
+            self._running_interactive -= 1
+        elif job._slot is not None:
+            self._running -= 1
+        job._slot = None
+
+    def _run(self, job):
+        print(f"SCHEDULER: Starting {job.describe()}")
+        error = None
+        try:
+            job.run(job)
+            state = DONE
+        except JobCancelled:
+            state = CANCELLED
+        except Exception as e:
+            print(f"SCHEDULER: Job {job.id} failed: {e}")
+            state, error = FAILED, str(e)
+        with self._lock:
+            job.state, job.error = state, error
+            self._free_slot(job)
+            if not self._stopped:
+                self._save()
+                self._dispatch()
+        self._changed()
+
+    def _save(self):
+        if not self.path:
+            return
+        # in start order, so a restore keeps the order the user arranged
+        jobs = sorted(self._jobs.values(), key=lambda j: (j.priority, j._seq))
+        records = [{"name": j.name, "kind": j.kind, "priority": j.priority, "spec": j.spec}
+                   for j in jobs if j.state in ACTIVE_STATES and j.spec is not None and not j._cancelled]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"SCHEDULER: Could not write {self.path}: {e}")
+
+    def _changed(self):
+        with self._lock:
+            if not self._stopped:
+                self._save()
+        if self.on_change:
+            self.on_change()
@@ -0,0 +1,245 @@
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from .listing import DirEntry
+
+MAX_RESULTS = 200
+MAX_MATCHES = 2000
+REJOIN_TAIL = 20000
+FUZZY_BUDGET = 50000
+FUZZY_MIN_SHARED = 0.5
+GLOB_CHARS = "*?["
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def glob_literals(pattern):
+    return re.split(r"\*|\?|\[[^\]]*\]?", pattern)
+
+def glob_needle(pattern):
+    # longest literal run of the pattern; a run at either end keeps the newline
+    # that bounds a name in the joined text, so "*.m4a" looks for ".m4a\n"
+    parts = glob_literals(pattern)
+    parts[0] = "\n" + parts[0]
+    parts[-1] += "\n"
+    return max(parts, key=lambda part: len(part.strip("\n")))
+
+def glob_regex(pattern):
+    # fnmatch.translate for a single lower-cased name
+    out, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            out.append(".*")
+        elif c == "?":
+            out.append(".")
+        elif c == "[":
+            negate = i < len(pattern) and pattern[i] == "!"
+            start = i + 1 if negate else i
+            end = pattern.find("]", start + 1)
+            if end < 0:
+                out.append(re.escape(c))
+                continue
+            body = pattern[start:end].replace("\\", "\\\\").replace("^", "\\^")
+            i = end + 1
+            out.append(f"[^{body}]" if negate else f"[{body}]")
+        else:
+            out.append(re.escape(c))
+    return "(?s:" + "".join(out) + r")\Z"
+
+class FilenameIndex:
+    # lower-cased file names with trigram postings: a query with a rare trigram
+    # verifies only the names in the shortest postings, anything else is a str.find
+    # over all names joined into one string that stops once it has enough hits.
+    # A sorted copy of the names finds exact and prefix hits, which rank first.
+    # Listings added later are kept in a short tail until the next join.
+    def __init__(self):
+        self._paths = []
+        self._names = []
+        self._sizes = array("q")
+        self._dirs = bytearray()
+        self._ids = {}
+        self._grams = {}
+        self._text = "\n"
+        self._starts = array("I", [1])
+        self._joined = 0
+        self._sorted = []
+        self._order = array("I")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def add(self, path, is_dir=False, size=None):
+        with self._lock:
+            self._add(path, is_dir, size)
+
+    def add_entries(self, entries):
+        with self._lock:
+            for e in entries:
+                self._add(e.path, e.is_dir, e.size)
+
+    def _add(self, path, is_dir, size):
+        i = self._ids.get(path)
+        if i is not None:
+            self._sizes[i] = -1 if size is None else size
+            return
+        i = len(self._paths)
+        self._ids[path] = i
+        name = path.rsplit("/", 1)[-1].lower().replace("\n", " ")
+        self._paths.append(path)
+        self._names.append(name)
+        self._sizes.append(-1 if size is None else size)
+        self._dirs.append(bool(is_dir))
+        grams = self._grams
+        for gram in trigrams(name):
+            postings = grams.get(gram)
+            if postings is None:
+                postings = grams[gram] = array("I")
+            postings.append(i)
+
+    def search(self, query, fuzzy=False, limit=MAX_RESULTS):
+        q = query.strip().lower()
+        if not q:
+            return []
+        with self._lock:
+            if fuzzy:
+                ids = self._fuzzy(q, limit)
+            elif any(c in q for c in GLOB_CHARS):
+                ids = self._glob(q, limit)
+            else:
+                ids = self._substring(q, limit)
+            return [self._entry(i) for i in ids]
+
+    def _entry(self, i):
+        path = self._paths[i]
+        size = self._sizes[i]
+        return DirEntry(path.rsplit("/", 1)[-1], path, bool(self._dirs[i]), None if size < 0 else size, None)
+
+    def _postings(self, grams):
+        return sorted((self._grams.get(g, ()) for g in grams), key=len)
+
+    def _narrow(self, grams):
+        # candidate ids when some trigram is rare enough, None to fall back to a scan
+        lists = self._postings(grams)
+        if not lists or len(lists[0]) > MAX_MATCHES:
+            return None
+        result = set(lists[0])
+        for postings in lists[1:]:
+            # once the postings dwarf the candidates left, verifying those is cheaper
+            if len(postings) > 8 * len(result):
+                break
+            result.intersection_update(postings)
+        return sorted(result)
+
+    def prepare(self):
+        # joins the names up front, so the first search after a bulk load stays fast
+        with self._lock:
+            self._join()
+
+    def _join(self):
+        names = self._names
+        self._text = "\n" + "\n".join(names) + "\n"
+        starts, pos = array("I"), 1
+        for name in names:
+            starts.append(pos)
+            pos += len(name) + 1
+        starts.append(pos)
+        self._starts = starts
+        self._order = array("I", sorted(range(len(names)), key=names.__getitem__))
+        self._sorted = [names[i] for i in self._order]
+        self._joined = len(names)
+
+    def _tail(self):
+        # names added since the last join are checked one by one until there are too many
+        if len(self._names) - self._joined > REJOIN_TAIL:
+            self._join()
+        return range(self._joined, len(self._names))
+
+    def _prefixed(self, prefix, cap=None):
+        # ids of the names starting with prefix, joined ones in name order first
+        tail = self._tail()
+        lo = bisect_left(self._sorted, prefix)
+        hi = bisect_left(self._sorted, prefix + "\U0010ffff", lo)
+        ids = list(self._order[lo:hi if cap is None else min(hi, lo + cap)])
+        ids.extend(i for i in tail if self._names[i].startswith(prefix))
+        return ids
+
+    def _scan(self, needle, cap, accept=None):
+        tail = self._tail()
+        text, starts = self._text, self._starts
+        found = []
+        pos = text.find(needle)
+        while pos >= 0 and len(found) < cap:
+            # pos + 1 lands inside the name even when the needle starts at its newline
+            i = bisect_right(starts, pos + 1) - 1
+            if accept is None or accept(i):
+                found.append(i)
+            pos = text.find(needle, starts[i + 1] - 1)
+        for i in tail:
+            if len(found) >= cap:
+                break
+            if needle in f"\n{self._names[i]}\n" and (accept is None or accept(i)):
+                found.append(i)
+        return found
+
+    def _substring(self, q, limit):
+        names = self._names
+        candidates = self._narrow(trigrams(q))
+        if candidates is not None:
+            ids = [i for i in candidates if q in names[i]]
+        else:
+            ids = self._scan(q, MAX_MATCHES)
+            if len(ids) >= MAX_MATCHES:
+                # too many hits to rank them all: make sure exact and prefix hits are among them
+                ids.extend(self._prefixed(q, MAX_MATCHES))
+        return heapq.nsmallest(limit, set(ids), key=lambda i: (names[i] != q, not names[i].startswith(q), len(names[i]), i))
+
+    def _glob(self, q, limit):
+        regex = re.compile(glob_regex(q))
+        names = self._names
+        accept = lambda i: regex.match(names[i]) is not None
+        literals = glob_literals(q)
+        candidates = self._narrow(set().union(*(trigrams(part) for part in literals)))
+        if candidates is None and literals[0]:
+            candidates = self._prefixed(literals[0])
+        if candidates is None and glob_needle(q).strip("\n"):
+            ids = self._scan(glob_needle(q), MAX_MATCHES, accept)
+        else:
+            ids = []
+            for i in range(len(names)) if candidates is None else candidates:
+                if accept(i):
+                    ids.append(i)
+                    if len(ids) >= MAX_MATCHES:
+                        break
+        return heapq.nsmallest(limit, ids, key=lambda i: (len(names[i]), i))
+
+    def _fuzzy(self, q, limit):
+        # typo-tolerant: names sharing at least half of the counted trigrams with the
+        # query, best trigram overlap (Jaccard) first. Only the rarest postings are
+        # counted, up to a budget; common trigrams say little and cost the most.
+        grams = trigrams(q)
+        if not grams:
+            return self._substring(q, limit)
+        lists = [postings for postings in self._postings(grams) if postings]
+        counts, spent, used = Counter(), 0, 0
+        for postings in lists:
+            if used and spent + len(postings) > FUZZY_BUDGET:
+                break
+            counts.update(postings)
+            spent += len(postings)
+            used += 1
+        if not used:
+            return []
+        need = max(1, int(used * FUZZY_MIN_SHARED))
+        rough = heapq.nlargest(limit * 4, (i for i, shared in counts.items() if shared >= need), key=counts.__getitem__)
+        names = self._names
+        def score(i):
+            name = names[i]
+            shared = len(grams & trigrams(name))
+            return (shared / (len(grams) + max(len(name) - 2, 0) - shared), q in name, -len(name), -i)
+        return heapq.nlargest(limit, rough, key=score)
@@ -0,0 +1,101 @@
+import os
+import posixpath
+from .listing import walk
+from .transfer import TransferItem, TransferReport, local_path_for
+
+MTIME_TOLERANCE = 2.0
+
+def is_current(local_path, entry, tolerance=MTIME_TOLERANCE):
+    # a listing that could not say how big or how old the file is proves nothing:
+    # fetch it again rather than keep a copy that may be stale
+    if entry.size is None or entry.mtime is None:
+        return False
+    try:
+        st = os.stat(local_path)
+    except OSError:
+        return False
+    return st.st_size == entry.size and abs(st.st_mtime - entry.mtime) <= tolerance
+
+class SyncReport(TransferReport):
+    def __init__(self):
+        super().__init__()
+        self.skipped = 0
+        self.deleted = 0
+
+    def summary(self):
+        text = f"{super().summary()}, {self.skipped} unchanged"
+        if self.deleted:
+            text += f", {self.deleted} deleted"
+        return text
+
+class FolderSync:
+    # one-way mirror of a device folder into a local folder: the listing walk
+    # already carries size and mtime, so unchanged files cost no transfer at all
+    def __init__(self, lister, downloader, mtime_tolerance=MTIME_TOLERANCE):
+        self.lister = lister
+        self.downloader = downloader
+        self.mtime_tolerance = mtime_tolerance
+
+    def sync(self, remote_root, local_root, delete=False, on_progress=None, monitor=None, report=None, control=None):
+        report = report or SyncReport()
+        seen, kept_dirs = set(), []
+        def on_error(path, err):
+            kept_dirs.append(posixpath.relpath(path, remote_root))
+            report.add_failure(TransferItem(path, None, None), err)
+        walked = []
+        items = self._changed_items(remote_root, local_root, seen, kept_dirs, report, on_error, walked)
+        self.downloader.download(items, on_progress=on_progress, report=report, monitor=monitor, control=control)
+        if delete and not (control and control.cancelled):
+            # seen is only the whole device tree once the walk ran to its end
+            if walked:
+                self._delete_extras(local_root, seen, kept_dirs, report)
+            else:
+                print("SYNC: The device walk did not finish, nothing deleted")
+        return report
+
+    def _changed_items(self, remote_root, local_root, seen, kept_dirs, report, on_error, walked):
+        for dir_path, entries in walk(self.lister, remote_root, on_error=on_error):
+            local_dir = local_path_for(remote_root, local_root, dir_path)
+            try:
+                os.makedirs(local_dir, exist_ok=True)
+            except OSError as e:
+                # e.g. a local file where the device has a folder: that subtree is left alone
+                on_error(dir_path, e)
+                continue
+            for entry in entries:
+                rel = posixpath.relpath(entry.path, remote_root)
+                seen.add(rel)
+                if entry.is_dir:
+                    if entry.is_link:
+                        # links are not followed; whatever a local copy has below one stays
+                        kept_dirs.append(rel)
+                    continue
+                local_path = os.path.join(local_dir, entry.name)
+                if is_current(local_path, entry, self.mtime_tolerance):
+                    report.skipped += 1
+                    continue
+                yield TransferItem(entry.path, local_path, entry.size, entry.mtime)
+        walked.append(True)
+
+    def _delete_extras(self, local_root, seen, kept_dirs, report):
+        # never delete below a directory we could not list or did not follow
+        def protected(rel):
+            return any(rel == d or rel.startswith(d + "/") for d in kept_dirs) or "." in kept_dirs
+        for dir_path, dir_names, file_names in os.walk(local_root, topdown=False):
+            rel_dir = os.path.relpath(dir_path, local_root).replace(os.sep, "/")
+            for name in file_names:
+                rel = name if rel_dir == "." else f"{rel_dir}/{name}"
+                if rel in seen or protected(rel):
+                    continue
+                try:
+                    os.remove(os.path.join(dir_path, name))
+                    report.deleted += 1
+                except OSError as e:
+                    report.add_failure(TransferItem(os.path.join(dir_path, name), None, None), e)
+            if rel_dir == "." or rel_dir in seen or protected(rel_dir):
+                continue
+            try:
+                os.rmdir(dir_path)
+                report.deleted += 1
+            except OSError as e:
+                report.add_failure(TransferItem(dir_path, None, None), e)
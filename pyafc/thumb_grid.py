@@ -0,0 +1,150 @@
+import io
+import tkinter as tk
+from collections import OrderedDict
+from .thumbnails import THUMB_SIZE, is_media
+
+CELL_WIDTH = THUMB_SIZE + 24
+CELL_HEIGHT = THUMB_SIZE + 40
+LABEL_CHARS = 20
+LOOKAHEAD_ROWS = 3
+KEPT_IMAGES = 600
+
+class ThumbnailGrid(tk.Canvas):
+    # icon view over the rows of a VirtualListbox: the same items and the same
+    # selection, so everything that reads the listbox selection keeps working.
+    # Only the cells in view exist as canvas items; pictures arrive later through
+    # set_thumbnail() and the last few hundred stay around for scrolling back.
+    def __init__(self, master, listbox, on_visible=None, fg="white", select_color="#36719F", **kw):
+        kw.setdefault("highlightthickness", 0)
+        super().__init__(master, yscrollincrement=CELL_HEIGHT, **kw)
+        self.listbox = listbox
+        self.on_visible = on_visible
+        self.fg = fg
+        self.select_color = select_color
+        self.folder = None
+        self._items = []
+        self._cells = {}
+        self._columns = 0
+        self._images = OrderedDict()
+        self._requested = None
+        self._anchor = None
+        self.bind("<Configure>", lambda e: self._render())
+        self.bind("<Button-1>", self._on_click)
+        self.bind("<Shift-Button-1>", lambda e: self._on_click(e, extend=True))
+        self.bind("<Control-Button-1>", lambda e: self._on_click(e, toggle=True))
+        self.bind("<MouseWheel>", lambda e: self.yview_scroll(-1 if e.delta > 0 else 1, tk.UNITS))
+        self.bind("<Button-4>", lambda e: self.yview_scroll(-1, tk.UNITS))
+        self.bind("<Button-5>", lambda e: self.yview_scroll(1, tk.UNITS))
+
+    def refresh(self, folder):
+        # the listbox changed; pictures are kept unless it now shows another folder
+        if folder != self.folder:
+            self.folder = folder
+            self._images.clear()
+            super().yview_moveto(0)
+        self._items = list(self.listbox.get(0, tk.END))
+        self._clear_cells()
+        self._requested = None
+        self._render()
+
+    def set_thumbnail(self, name, data):
+        # PIL loads with the first picture, not with the window
+        from PIL import Image, ImageTk
+        try:
+            image = ImageTk.PhotoImage(Image.open(io.BytesIO(data)))
+        except Exception as e:
+            print(f"THUMB: Bad thumbnail for {name}: {e}")
+            return
+        self._images[name] = image
+        self._images.move_to_end(name)
+        while len(self._images) > KEPT_IMAGES:
+            self._images.popitem(last=False)
+        for index in [i for i in self._cells if self._items[i] == name]:
+            self._draw(index)
+
+    def yview(self, *args):
+        result = super().yview(*args)
+        if args:
+            self._render()
+        return result
+
+    def yview_scroll(self, number, what):
+        super().yview_scroll(number, what)
+        self._render()
+        return "break"
+
+    def _clear_cells(self):
+        self.delete("cell")
+        self._cells.clear()
+
+    def _render(self):
+        columns = max(1, self.winfo_width() // CELL_WIDTH)
+        if columns != self._columns:
+            self._columns = columns
+            self._clear_cells()
+        rows = -(-len(self._items) // columns)
+        self.configure(scrollregion=(0, 0, columns * CELL_WIDTH, max(1, rows * CELL_HEIGHT)))
+        top = int(self.canvasy(0)) // CELL_HEIGHT
+        bottom = int(self.canvasy(self.winfo_height())) // CELL_HEIGHT + 1
+        visible = range(top * columns, min(len(self._items), bottom * columns))
+        for index in [i for i in self._cells if i not in visible]:
+            self.delete(f"i{index}")
+            del self._cells[index]
+        for index in visible:
+            if index not in self._cells:
+                self._draw(index)
+        ahead = (visible.start, min(len(self._items), visible.stop + LOOKAHEAD_ROWS * columns))
+        if self.on_visible and ahead != self._requested:
+            self._requested = ahead
+            self.on_visible([self._items[i] for i in range(*ahead)])
+
+    def _draw(self, index):
+        self.delete(f"i{index}")
+        row, column = divmod(index, self._columns)
+        x, y = column * CELL_WIDTH, row * CELL_HEIGHT
+        name = self._items[index]
+        tags = ("cell", f"i{index}")
+        selected = self.listbox.selection_includes(index)
+        self.create_rectangle(x + 2, y + 2, x + CELL_WIDTH - 2, y + CELL_HEIGHT - 2, width=0,
+                              fill=self.select_color if selected else "", tags=tags + ("back",))
+        middle = x + CELL_WIDTH // 2, y + 6 + THUMB_SIZE // 2
+        image = self._images.get(name)
+        if image is not None:
+            self.create_image(*middle, image=image, tags=tags)
+        else:
+            # folders and files without a picture (yet) get a plain tile
+            half = THUMB_SIZE // 4 if name.startswith("[FOLDER] ") or not is_media(name) else THUMB_SIZE // 2 - 4
+            self.create_rectangle(middle[0] - half, middle[1] - half, middle[0] + half, middle[1] + half,
+                                  outline="gray40", fill="#87CEFA" if name.startswith("[FOLDER] ") else "#3A3A3A", tags=tags)
+        label = name.replace("[FOLDER] ", "", 1)
+        if len(label) > LABEL_CHARS:
+            label = label[:LABEL_CHARS - 1] + "…"
+        self.create_text(x + CELL_WIDTH // 2, y + CELL_HEIGHT - 8, text=label, fill=self.fg, anchor=tk.S, tags=tags)
+        self._cells[index] = name
+
+    def _index_at(self, event):
+        column = int(self.canvasx(event.x)) // CELL_WIDTH
+        index = int(self.canvasy(event.y)) // CELL_HEIGHT * self._columns + column
+        return index if column < self._columns and 0 <= index < len(self._items) else None
+
+    def _on_click(self, event, extend=False, toggle=False):
+        self.focus_set()
+        index = self._index_at(event)
+        if index is None:
+            return "break"
+        lb = self.listbox
+        if extend and self._anchor is not None:
+            low, high = sorted((self._anchor, index))
+            lb.selection_clear(0, tk.END)
+            lb.selection_set(low, high)
+        elif toggle:
+            (lb.selection_clear if lb.selection_includes(index) else lb.selection_set)(index)
+            self._anchor = index
+        else:
+            lb.selection_clear(0, tk.END)
+            lb.selection_set(index)
+            self._anchor = index
+        for i in self._cells:
+            self.itemconfigure(f"i{i}&&back", fill=self.select_color if lb.selection_includes(i) else "")
+        lb.event_generate("<<ListboxSelect>>")
+        return "break"
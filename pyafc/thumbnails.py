@@ -0,0 +1,450 @@
+import hashlib
+import importlib.util
+import io
+import os
+import struct
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .afc_pool import afc_seek
+
+DEFAULT_THUMB_DIR = os.path.join(os.path.expanduser("~"), ".pyafc", "thumbs")
+THUMB_CACHE_BYTES = 256 * 1024 * 1024
+THUMB_SIZE = 128
+THUMB_QUALITY = 80
+THUMB_WORKERS = 3
+HEAD_BYTES = 64 * 1024
+FULL_READ_MAX = 24 * 1024 * 1024
+READ_CHUNK = 1024 * 1024
+HEIF_META_MAX = 1024 * 1024
+HEIF_PREVIEW_MAX = 4 * 1024 * 1024
+HEIF_EXTENSIONS = (".heic", ".heif")
+MEDIA_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp") + HEIF_EXTENSIONS
+# EXIF orientation to the PIL transpose that undoes it
+TRANSPOSES = {2: "FLIP_LEFT_RIGHT", 3: "ROTATE_180", 4: "FLIP_TOP_BOTTOM", 5: "TRANSPOSE",
+              6: "ROTATE_270", 7: "TRANSVERSE", 8: "ROTATE_90"}
+
+# the parts of a HEIC that hold its thumbnail item, (offset, bytes) each;
+# everything else in the file reads as zeros
+HeifPreview = namedtuple("HeifPreview", ["size", "chunks"])
+
+def is_media(name):
+    return name.lower().endswith(MEDIA_EXTENSIONS)
+
+def is_heif(name):
+    return name.lower().endswith(HEIF_EXTENSIONS)
+
+def heif_supported():
+    # pillow-heif is optional; looked up without importing it
+    return importlib.util.find_spec("pillow_heif") is not None
+
+def thumbnail_key(udid, path, size, mtime):
+    return hashlib.sha1(f"{udid}\0{path}\0{size}\0{mtime}".encode("utf-8", "surrogatepass")).hexdigest()
+
+def _read_ifd(data, base, offset, order):
+    # SHORT and LONG values of one TIFF directory plus the offset of the next one
+    pos = base + offset
+    if pos + 2 > len(data):
+        return {}, 0
+    count = struct.unpack(order + "H", data[pos:pos + 2])[0]
+    tags = {}
+    for entry in range(pos + 2, pos + 2 + 12 * count, 12):
+        if entry + 12 > len(data):
+            return tags, 0
+        tag, kind = struct.unpack(order + "HH", data[entry:entry + 4])
+        if kind == 3:
+            tags[tag] = struct.unpack(order + "H", data[entry + 8:entry + 10])[0]
+        elif kind == 4:
+            tags[tag] = struct.unpack(order + "I", data[entry + 8:entry + 12])[0]
+    end = pos + 2 + 12 * count
+    return tags, struct.unpack(order + "I", data[end:end + 4])[0] if end + 4 <= len(data) else 0
+
+def exif_thumbnail(head):
+    # (offset, length, orientation) of the JPEG thumbnail a camera embeds in the EXIF
+    # block, found from the first bytes of the file; None when there is none
+    if head[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(head):
+        if head[pos] != 0xFF:
+            return None
+        marker = head[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in (0xD9, 0xDA):
+            return None
+        length = struct.unpack(">H", head[pos + 2:pos + 4])[0]
+        if marker == 0xE1 and head[pos + 4:pos + 10] == b"Exif\0\0":
+            return _tiff_thumbnail(head, pos + 10)
+        pos += 2 + length
+    return None
+
+def _tiff_thumbnail(data, base):
+    order = {b"II": "<", b"MM": ">"}.get(data[base:base + 2])
+    if order is None or len(data) < base + 8:
+        return None
+    first = struct.unpack(order + "I", data[base + 4:base + 8])[0]
+    tags, following = _read_ifd(data, base, first, order)
+    if not following:
+        return None
+    # IFD1 describes the thumbnail; its offsets count from the TIFF header
+    thumb, _ = _read_ifd(data, base, following, order)
+    offset, length = thumb.get(0x0201), thumb.get(0x0202)
+    if not offset or not length:
+        return None
+    return base + offset, length, tags.get(0x0112, 1)
+
+def _uint(data, pos, size):
+    return int.from_bytes(data[pos:pos + size], "big")
+
+def _boxes(data, start, end):
+    # (type, payload start, end) of the ISO BMFF boxes between start and end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            size, header = _uint(data, pos + 8, 8), 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+def heif_meta(head):
+    # (payload start, end) of the top-level meta box, which may run past head
+    for kind, start, end in _boxes(head, 0, len(head)):
+        if kind == b"meta":
+            return start, end
+    return None
+
+def _iloc(data, start, end):
+    # item id -> [(file offset, length)]; [] for data kept inside the meta box
+    version = data[start]
+    pos = start + 4
+    offset_size, length_size = data[pos] >> 4, data[pos] & 15
+    base_size, index_size = data[pos + 1] >> 4, data[pos + 1] & 15 if version in (1, 2) else 0
+    id_size = 4 if version == 2 else 2
+    count = _uint(data, pos + 2, id_size)
+    pos += 2 + id_size
+    items = {}
+    for _ in range(count):
+        if pos > end:
+            break
+        item = _uint(data, pos, id_size)
+        pos += id_size
+        method = 0
+        if version in (1, 2):
+            method = _uint(data, pos, 2) & 15
+            pos += 2
+        reference, base, extents = _uint(data, pos, 2), _uint(data, pos + 2, base_size), _uint(data, pos + 2 + base_size, 2)
+        pos += 4 + base_size
+        ranges = []
+        for _ in range(extents):
+            pos += index_size
+            ranges.append((base + _uint(data, pos, offset_size), _uint(data, pos + offset_size, length_size)))
+            pos += offset_size + length_size
+        if method == 1:
+            items[item] = []
+        elif method == 0 and reference == 0 and all(length for _, length in ranges):
+            items[item] = ranges
+    return items
+
+def heif_preview_ranges(data, meta_start, meta_end):
+    # file ranges of the thumbnail items of the primary image, plus the primary's
+    # own data when it is only a grid descriptor (libheif reads that on open);
+    # None when the file has no thumbnail to read
+    boxes = {kind: (start, end) for kind, start, end in _boxes(data, meta_start + 4, meta_end)}
+    if not {b"pitm", b"iref", b"iloc"} <= boxes.keys():
+        return None
+    start, _ = boxes[b"pitm"]
+    primary = _uint(data, start + 4, 2 if data[start] == 0 else 4)
+    start, end = boxes[b"iref"]
+    id_size = 2 if data[start] == 0 else 4
+    thumbs = []
+    for kind, ref, _ in _boxes(data, start + 4, end):
+        count = _uint(data, ref + id_size, 2)
+        targets = {_uint(data, ref + id_size + 2 + i * id_size, id_size) for i in range(count)}
+        if kind == b"thmb" and primary in targets:
+            thumbs.append(_uint(data, ref, id_size))
+    locations = _iloc(data, *boxes[b"iloc"])
+    if not thumbs or any(t not in locations for t in thumbs):
+        return None
+    ranges = [r for t in thumbs for r in locations[t]]
+    grid = locations.get(primary, [])
+    if sum(length for _, length in grid) <= 1024:
+        ranges += grid
+    return ranges
+
+def _open_image(data):
+    from PIL import Image
+    if isinstance(data, HeifPreview):
+        # libheif only reads the thumbnail item from this sparse copy of the file
+        import pillow_heif
+        buffer = bytearray(data.size)
+        for offset, chunk in data.chunks:
+            buffer[offset:offset + len(chunk)] = chunk
+        heif = pillow_heif.open_heif(io.BytesIO(bytes(buffer)))
+        return heif[heif.primary_index].get_thumbnail(0).to_pillow()
+    try:
+        return Image.open(io.BytesIO(data))
+    except Image.UnidentifiedImageError:
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+        return Image.open(io.BytesIO(data))
+
+def decode_thumbnail(data, orientation=None, size=THUMB_SIZE):
+    # runs in a worker process; orientation None reads it from the image itself.
+    # data is the file (or EXIF thumbnail) bytes, or a HeifPreview
+    from PIL import Image, ImageOps
+    image = _open_image(data)
+    # JPEG decodes straight at 1/2..1/8 scale, most of the win for big photos
+    image.draft("RGB", (size, size))
+    if orientation is None:
+        image = ImageOps.exif_transpose(image)
+    elif orientation in TRANSPOSES:
+        image = image.transpose(getattr(Image.Transpose, TRANSPOSES[orientation]))
+    image = image.convert("RGB")
+    image.thumbnail((size, size))
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=THUMB_QUALITY)
+    return out.getvalue()
+
+class ThumbnailCache:
+    # one small JPEG per (device, path, size, mtime) on disk, least recently used
+    # dropped past max_bytes. An empty file marks a picture that could not be made.
+    def __init__(self, directory=DEFAULT_THUMB_DIR, max_bytes=THUMB_CACHE_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = sum(e.stat().st_size for e in os.scandir(directory) if e.name.endswith(".jpg"))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".jpg")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"THUMB: Cache write failed: {e}")
+            return
+        with self._lock:
+            self._bytes += len(data)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # oldest use first, down to 90% so the next few writes do not rescan
+        files = sorted((e for e in os.scandir(self.directory) if e.name.endswith(".jpg")), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in files)
+        for entry in files:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self._bytes = total
+
+class _RangedReader:
+    # one file read at any offset through afc_seek; on a session that can only
+    # read forward, going back means opening the file again
+    def __init__(self, afc, path):
+        self.afc = afc
+        self.path = path
+        self.handle = afc.fopen(path, "r")
+        self.position = 0
+
+    def read(self, offset, length):
+        if offset != self.position:
+            try:
+                afc_seek(self.afc, self.handle, offset, self.position)
+            except io.UnsupportedOperation:
+                self.close()
+                self.handle = self.afc.fopen(self.path, "r")
+                afc_seek(self.afc, self.handle, offset)
+            self.position = offset
+        chunks = []
+        while length > 0:
+            data = self.afc.fread(self.handle, min(READ_CHUNK, length))
+            if not data:
+                break
+            chunks.append(data)
+            self.position += len(data)
+            length -= len(data)
+        return b"".join(chunks)
+
+    def close(self):
+        if self.handle is not None:
+            handle, self.handle = self.handle, None
+            self.afc.fclose(handle)
+
+class ThumbnailLoader:
+    # thumbnails for the cells on screen: disk cache first, otherwise the smallest
+    # read that holds a picture (the EXIF thumbnail of a JPEG, the thumbnail item of
+    # a HEIC, else the whole file up to a cap), decoded and scaled in worker
+    # processes. A new request replaces the last one, so work for cells scrolled
+    # out of view is dropped before it starts. HEIC needs pillow-heif: without it
+    # they keep their placeholder, and nothing is cached so they show up once it
+    # is installed.
+    def __init__(self, pool, cache, udid, size=THUMB_SIZE, workers=THUMB_WORKERS, processes=None):
+        self.pool = pool
+        self.cache = cache
+        self.udid = udid
+        self.size = size
+        self.processes = processes or max(1, (os.cpu_count() or 2) - 1)
+        self.hits = 0
+        self.misses = 0
+        self._fetcher = ThreadPoolExecutor(max_workers=min(workers, pool.size), thread_name_prefix="afc-thumb")
+        self._decoder = None
+        self._wanted = set()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def request(self, entries, on_ready):
+        # on_ready(entry, data) runs on a worker thread; data is None without a picture
+        keys = {thumbnail_key(self.udid, e.path, e.size, e.mtime): e for e in entries if not e.is_dir and is_media(e.name)}
+        with self._lock:
+            self._wanted = set(keys)
+            new = [(key, entry) for key, entry in keys.items() if key not in self._pending]
+            self._pending.update(key for key, _ in new)
+        for key, entry in new:
+            self._fetcher.submit(self._load, key, entry, on_ready)
+
+    def _is_wanted(self, key):
+        with self._lock:
+            if key in self._wanted:
+                return True
+            self._pending.discard(key)
+            return False
+
+    def _done(self, key, entry, data, on_ready):
+        with self._lock:
+            self._pending.discard(key)
+        on_ready(entry, data)
+
+    def _load(self, key, entry, on_ready):
+        if not self._is_wanted(key):
+            return
+        data = self.cache.get(key)
+        if data is not None:
+            self.hits += 1
+            self._done(key, entry, data or None, on_ready)
+            return
+        self.misses += 1
+        if is_heif(entry.name) and not heif_supported():
+            self._done(key, entry, None, on_ready)
+            return
+        try:
+            source, orientation = self._read(entry)
+        except Exception as e:
+            print(f"THUMB: Read failed for {entry.path}: {e}")
+            self._done(key, entry, None, on_ready)
+            return
+        if source is None or not self._is_wanted(key):
+            if source is None:
+                self.cache.put(key, b"")
+            self._done(key, entry, None, on_ready)
+            return
+        future = self._decoders().submit(decode_thumbnail, source, orientation, self.size)
+        future.add_done_callback(lambda f: self._decoded(f, key, entry, on_ready))
+
+    def _decoded(self, future, key, entry, on_ready):
+        if future.cancelled():
+            self._done(key, entry, None, on_ready)
+            return
+        try:
+            data = future.result()
+        except (ImportError, BrokenProcessPool) as e:
+            # not the picture's fault: no placeholder is cached, the next visit tries again
+            print(f"THUMB: Could not decode {entry.path}: {e!r}")
+            if isinstance(e, BrokenProcessPool):
+                with self._lock:
+                    if self._decoder is not None:
+                        self._decoder.shutdown(wait=False, cancel_futures=True)
+                        self._decoder = None
+            self._done(key, entry, None, on_ready)
+            return
+        except Exception as e:
+            print(f"THUMB: Decode failed for {entry.path}: {e}")
+            data = b""
+        self.cache.put(key, data)
+        self._done(key, entry, data or None, on_ready)
+
+    def _decoders(self):
+        with self._lock:
+            if self._decoder is None:
+                self._decoder = ProcessPoolExecutor(max_workers=self.processes)
+            return self._decoder
+
+    def _read(self, entry):
+        with self.pool.lease() as afc:
+            reader = _RangedReader(afc, entry.path)
+            try:
+                head = reader.read(0, HEAD_BYTES)
+                if is_heif(entry.name):
+                    preview = self._read_heif_preview(reader, head, entry.size)
+                    if preview is not None:
+                        # libheif applies the thumbnail's own rotation
+                        return preview, 1
+                found = exif_thumbnail(head)
+                if found:
+                    start, length, orientation = found
+                    if start + length <= len(head):
+                        return head[start:start + length], orientation
+                    return reader.read(start, length), orientation
+                if (entry.size or 0) > FULL_READ_MAX:
+                    return None, None
+                return head + reader.read(len(head), (entry.size or FULL_READ_MAX) - len(head)), None
+            finally:
+                reader.close()
+
+    def _read_heif_preview(self, reader, head, size):
+        # ranged reads: the meta box (usually inside head), then the thumbnail extents
+        meta = heif_meta(head)
+        if meta is None or not size:
+            return None
+        start, end = meta
+        # and the mdat header after it, which libheif checks too
+        if end + 16 > len(head):
+            if end > HEIF_META_MAX:
+                return None
+            head += reader.read(len(head), end + 16 - len(head))
+        try:
+            ranges = heif_preview_ranges(head, start, end)
+        except (IndexError, struct.error):
+            return None
+        if ranges is None or sum(length for _, length in ranges) > HEIF_PREVIEW_MAX or any(o + n > size for o, n in ranges):
+            return None
+        chunks = [(0, head)]
+        for offset, length in sorted(ranges):
+            if offset + length > len(head):
+                chunks.append((offset, reader.read(offset, length)))
+        return HeifPreview(size, chunks)
+
+    def close(self):
+        with self._lock:
+            self._wanted = set()
+        self._fetcher.shutdown(wait=False, cancel_futures=True)
+        if self._decoder is not None:
+            self._decoder.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,514 @@
+import hashlib
+import os
+import posixpath
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from pymobiledevice3.exceptions import PyMobileDevice3Exception
+from .afc_pool import afc_seek, is_broken
+from .journal import journal_key
+from .listing import walk, to_timestamp
+
+TRANSFER_WORKERS = 4
+LARGE_FILE_SIZE = 8 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+READ_AHEAD_CHUNKS = 8
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+RESUME_MIN_SIZE = 4 * 1024 * 1024
+STREAM_QUEUE_SIZE = 256
+
+class TransferVerifyError(Exception):
+    pass
+
+def job_pool(pool, control):
+    # a scheduled job counts the sessions it holds, see TransferJob.leases
+    return control.leases(pool) if control is not None else pool
+
+TransferItem = namedtuple("TransferItem", ["src", "dst", "size", "mtime"], defaults=(None,))
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+class Throttle:
+    def __init__(self, interval):
+        self.interval = interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def ready(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last < self.interval:
+                return False
+            self._last = now
+            return True
+
+class TransferReport:
+    # counters rather than per-item lists so huge recursive jobs stay flat in memory
+    def __init__(self, total_files=0):
+        self.total_files = total_files
+        self.total_bytes = 0
+        self.completed = 0
+        self.failed = []
+        self.bytes_done = 0
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add_total(self, count, num_bytes=0):
+        with self._lock:
+            self.total_files += count
+            self.total_bytes += num_bytes
+
+    def add_success(self, item, num_bytes):
+        with self._lock:
+            self.completed += 1
+            self.bytes_done += num_bytes
+
+    def add_failure(self, item, error):
+        with self._lock:
+            self.failed.append((item, error))
+
+    @property
+    def processed(self):
+        return self.completed + len(self.failed)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self):
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def failure_lines(self, limit=15):
+        lines = [f"- {os.path.basename(item.src or '') or item.src}: {err}" for item, err in self.failed[:limit]]
+        if len(self.failed) > limit:
+            lines.append(f"... and {len(self.failed) - limit} more")
+        return "\n".join(lines)
+
+    def summary(self):
+        text = (f"{self.completed}/{self.total_files} file(s), {format_size(self.bytes_done)} "
+                f"in {self.elapsed:.1f}s ({format_size(self.throughput)}/s)")
+        if self.failed:
+            text += f", {len(self.failed)} failed"
+        return text
+
+class TransferQueue:
+    # sorted smallest first; one lane drains large files from the other end
+    # so a few big files never hold up a batch of small ones
+    def __init__(self, items, large_size=LARGE_FILE_SIZE):
+        self.large_size = large_size
+        self._items = deque(sorted(items, key=lambda i: i.size or 0))
+        self._lock = threading.Lock()
+
+    def take(self, large_lane=False):
+        with self._lock:
+            if not self._items:
+                return None
+            if large_lane and (self._items[-1].size or 0) >= self.large_size:
+                return self._items.pop()
+            return self._items.popleft()
+
+    def close(self):
+        with self._lock:
+            self._items.clear()
+
+class StreamingQueue:
+    # fed from a generator on a producer thread; the bounded queue lets
+    # transfers start while the source (e.g. a tree walk) is still running
+    _DONE = object()
+
+    def __init__(self, items, report, maxsize=STREAM_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._report = report
+        self._closed = False
+        self._thread = threading.Thread(target=self._produce, args=(items,), daemon=True)
+        self._thread.start()
+
+    def _produce(self, items):
+        try:
+            for item in items:
+                if self._closed:
+                    return
+                self._report.add_total(1, item.size or 0)
+                self._queue.put(item)
+        except Exception as e:
+            print(f"TRANSFER: Item source failed: {e}")
+            self._report.add_failure(TransferItem(None, None, None), e)
+        finally:
+            self._queue.put(self._DONE)
+
+    def take(self, large_lane=False):
+        item = self._queue.get()
+        if item is self._DONE:
+            self._queue.put(self._DONE)
+            return None
+        return item
+
+    def close(self):
+        # unblock and stop the producer when the consumers quit early (cancel)
+        self._closed = True
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def make_pending(items, report):
+    if isinstance(items, (list, tuple)):
+        report.add_total(len(items), sum(i.size or 0 for i in items))
+        return TransferQueue(items), len(items)
+    return StreamingQueue(items, report), None
+
+def file_sha256(path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(chunk_size), b""):
+            digest.update(data)
+    return digest.hexdigest()
+
+def remote_sha256(afc, path, size, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    digest = hashlib.sha256()
+    handle = afc.fopen(path, "r")
+    try:
+        done = 0
+        while done < size:
+            data = afc.fread(handle, min(chunk_size, size - done))
+            if not data:
+                break
+            digest.update(data)
+            done += len(data)
+    finally:
+        afc.fclose(handle)
+    return digest.hexdigest()
+
+def join_all(threads):
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def local_path_for(remote_root, local_root, remote_path):
+    rel = posixpath.relpath(remote_path, remote_root)
+    return local_root if rel == "." else os.path.join(local_root, *rel.split("/"))
+
+def iter_download_items(lister, remote_root, local_root, on_error=None):
+    for dir_path, entries in walk(lister, remote_root, on_error=on_error):
+        local_dir = local_path_for(remote_root, local_root, dir_path)
+        os.makedirs(local_dir, exist_ok=True)
+        for entry in entries:
+            if not entry.is_dir:
+                yield TransferItem(entry.path, os.path.join(local_dir, entry.name), entry.size, entry.mtime)
+
+def _remote_dir(remote_root, local_root, local_dir):
+    rel = os.path.relpath(local_dir, local_root)
+    return remote_root if rel == "." else posixpath.join(remote_root, *rel.split(os.sep))
+
+def iter_upload_items(pool, local_root, remote_root, on_error=None):
+    # the whole directory skeleton is created before the first file is yielded,
+    # so upload streams never race a missing parent on the device
+    local_root = os.path.normpath(local_root)
+    failed = []
+    with pool.lease() as afc:
+        for dir_path, _, _ in os.walk(local_root, onerror=lambda e: on_error and on_error(e.filename, e)):
+            remote = _remote_dir(remote_root, local_root, dir_path)
+            if any(remote.startswith(f + "/") for f in failed):
+                continue
+            try:
+                afc.makedirs(remote)
+            except PyMobileDevice3Exception as e:
+                failed.append(remote)
+                if on_error:
+                    on_error(dir_path, e)
+    for dir_path, _, file_names in os.walk(local_root):
+        remote = _remote_dir(remote_root, local_root, dir_path)
+        if any(remote == f or remote.startswith(f + "/") for f in failed):
+            continue
+        for name in file_names:
+            local_path = os.path.join(dir_path, name)
+            try:
+                size = os.path.getsize(local_path)
+            except OSError as e:
+                if on_error:
+                    on_error(local_path, e)
+                continue
+            yield TransferItem(local_path, posixpath.join(remote, name), size)
+
+class DownloadEngine:
+    # files are read in fixed chunks at explicit offsets; big ones are journaled
+    # so an interrupted download continues from the last confirmed offset
+    def __init__(self, pool, workers=TRANSFER_WORKERS, journal=None, chunk_size=DOWNLOAD_CHUNK_SIZE, verify_hash=False):
+        self.pool = pool
+        self.workers = max(1, min(workers, pool.size))
+        self.journal = journal
+        self.chunk_size = chunk_size
+        self.verify_hash = verify_hash
+
+    def download(self, items, on_progress=None, report=None, monitor=None, control=None):
+        report = report or TransferReport()
+        pending, count = make_pending(items, report)
+        workers = self.workers if count is None else min(self.workers, count)
+        join_all([threading.Thread(target=self._worker, args=(pending, report, on_progress, monitor, control, n == 0), daemon=True)
+                  for n in range(workers)])
+        pending.close()
+        report.finished = time.monotonic()
+        if monitor:
+            monitor.finish()
+        return report
+
+    def _worker(self, pending, report, on_progress, monitor, control, large_lane):
+        while True:
+            if control and control.cancelled:
+                return
+            item = pending.take(large_lane)
+            if item is None:
+                return
+            if monitor:
+                monitor.start_file(item)
+            try:
+                parent = os.path.dirname(item.dst)
+                if parent:
+                    os.makedirs(parent, exist_ok=True)
+                num_bytes = self._fetch(item, monitor, control)
+                report.add_success(item, num_bytes)
+                error = None
+            except Exception as e:
+                print(f"TRANSFER: Download of {item.src} failed: {e}")
+                report.add_failure(item, e)
+                error = e
+            if monitor:
+                monitor.finish_file(item, error)
+            if on_progress:
+                on_progress(item, report, error)
+
+    def _fetch(self, item, monitor=None, control=None):
+        # item.size may come from a cached or prefetched listing; the file can have
+        # changed since, and one stat is cheap next to the transfer itself
+        pool = job_pool(self.pool, control)
+        with pool.lease() as afc:
+            info = afc.stat(item.src)
+        size, mtime = int(info.get('st_size', 0)), to_timestamp(info.get('st_mtime'))
+        journaled = self.journal is not None and size >= RESUME_MIN_SIZE
+        key = journal_key("download", item.src, item.dst)
+        offset = self.journal.lookup(key, size, mtime) if journaled else 0
+        if offset:
+            # the local file may lag the journal if the process died before the OS flushed it
+            offset = min(offset, os.path.getsize(item.dst)) if os.path.exists(item.dst) else 0
+            if offset:
+                print(f"TRANSFER: Resuming download of {item.src} at {offset}")
+        start = offset
+        with open(item.dst, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            paused = True
+            while paused:
+                # a paused job waits here with its session back in the pool, and
+                # the read goes on at the same offset on the next free one
+                if control:
+                    control.checkpoint()
+                paused = False
+                with pool.lease() as afc:
+                    handle = afc.fopen(item.src, "r")
+                    try:
+                        afc_seek(afc, handle, offset)
+                        while offset < size:
+                            if control:
+                                if control.paused:
+                                    paused = True
+                                    break
+                                control.checkpoint()
+                            data = afc.fread(handle, min(self.chunk_size, size - offset))
+                            if not data:
+                                break
+                            f.write(data)
+                            offset += len(data)
+                            if monitor:
+                                monitor.add_bytes(item, len(data))
+                            if journaled:
+                                f.flush()
+                                self.journal.update(key, offset, size, mtime)
+                    finally:
+                        afc.fclose(handle)
+        local_size = os.path.getsize(item.dst)
+        if local_size != size:
+            raise TransferVerifyError(f"Size mismatch: expected {size} bytes, got {local_size}")
+        if self.verify_hash:
+            with pool.lease() as afc:
+                if file_sha256(item.dst) != remote_sha256(afc, item.src, size, self.chunk_size):
+                    raise TransferVerifyError("Hash mismatch after download")
+        if journaled:
+            self.journal.complete(key)
+        if mtime is not None:
+            # keep the device mtime so later syncs can tell the copy is current
+            os.utime(item.dst, (mtime, mtime))
+        return offset - start
+
+class UploadEngine:
+    # every stream is a reader thread feeding a writer thread through a bounded
+    # chunk queue, so local reads (including of the next file) overlap device writes
+    def __init__(self, pool, workers=TRANSFER_WORKERS, chunk_size=UPLOAD_CHUNK_SIZE, read_ahead=READ_AHEAD_CHUNKS,
+                 journal=None, verify_hash=False):
+        self.pool = pool
+        self.workers = max(1, min(workers, pool.size))
+        self.chunk_size = chunk_size
+        self.read_ahead = max(1, read_ahead)
+        self.journal = journal
+        self.verify_hash = verify_hash
+
+    def upload(self, items, on_progress=None, report=None, monitor=None, control=None):
+        report = report or TransferReport()
+        pending, count = make_pending(items, report)
+        threads = []
+        for n in range(self.workers if count is None else min(self.workers, count)):
+            chunks = queue.Queue(maxsize=self.read_ahead)
+            threads.append(threading.Thread(target=self._reader, args=(pending, chunks, control, n == 0), daemon=True))
+            threads.append(threading.Thread(target=self._writer, args=(chunks, report, on_progress, monitor, control), daemon=True))
+        join_all(threads)
+        pending.close()
+        report.finished = time.monotonic()
+        if monitor:
+            monitor.finish()
+        return report
+
+    def _reader(self, pending, chunks, control, large_lane):
+        try:
+            while True:
+                if control and control.cancelled:
+                    return
+                item = pending.take(large_lane)
+                if item is None:
+                    return
+                try:
+                    offset = self._resume_offset(item, control)
+                    with open(item.src, "rb") as f:
+                        if offset:
+                            f.seek(offset)
+                            chunks.put((item, offset))
+                        while True:
+                            if control:
+                                control.checkpoint()
+                            data = f.read(self.chunk_size)
+                            if not data:
+                                break
+                            chunks.put((item, data))
+                    chunks.put((item, None))
+                except Exception as e:
+                    chunks.put((item, e))
+        finally:
+            chunks.put(None)
+
+    def _resume_offset(self, item, control=None):
+        if not self._journaled(item):
+            return 0
+        key = journal_key("upload", item.src, item.dst)
+        offset = self.journal.lookup(key, item.size, os.path.getmtime(item.src))
+        if not offset:
+            return 0
+        try:
+            with job_pool(self.pool, control).lease() as afc:
+                remote_size = int(afc.stat(item.dst).get('st_size', 0))
+        except PyMobileDevice3Exception:
+            return 0
+        offset = min(offset, remote_size)
+        print(f"TRANSFER: Resuming upload of {item.src} at {offset}")
+        return offset
+
+    def _journaled(self, item):
+        return self.journal is not None and (item.size or 0) >= RESUME_MIN_SIZE
+
+    def _writer(self, chunks, report, on_progress, monitor, control=None):
+        pool = job_pool(self.pool, control)
+        current, afc, handle, error, written, start, mtime = None, None, None, None, 0, 0, None
+        while True:
+            try:
+                message = chunks.get(timeout=0.2 if afc is not None and control else None)
+            except queue.Empty:
+                # the reader is parked in checkpoint(): hand the session back, the
+                # file is reopened at the same offset when data comes again
+                if control.paused:
+                    afc = self._close(pool, afc, handle, None)
+                continue
+            if message is None:
+                return
+            item, payload = message
+            if item is not current:
+                current, error, written, start = item, None, 0, 0
+                if isinstance(payload, Exception):
+                    error = payload
+                elif isinstance(payload, int):
+                    written = start = payload
+                mtime = os.path.getmtime(item.src) if self._journaled(item) and error is None else None
+                if monitor:
+                    monitor.start_file(item)
+            if afc is None and error is None:
+                handle = None
+                try:
+                    afc = pool.acquire()
+                    handle = afc.fopen(item.dst, "r+" if written else "w")
+                    afc_seek(afc, handle, written)
+                except Exception as e:
+                    error = e
+                    afc = self._close(pool, afc, handle, e)
+            if isinstance(payload, int):
+                continue
+            if isinstance(payload, bytes):
+                if error is None:
+                    try:
+                        afc.fwrite(handle, payload)
+                        written += len(payload)
+                        if monitor:
+                            monitor.add_bytes(item, len(payload))
+                        if mtime is not None:
+                            self.journal.update(journal_key("upload", item.src, item.dst), written, item.size, mtime)
+                    except Exception as e:
+                        error = e
+                        afc = self._close(pool, afc, handle, e)
+                continue
+            if isinstance(payload, Exception) and error is None:
+                error = payload
+            if afc is not None:
+                try:
+                    afc.fclose(handle)
+                    if error is None:
+                        self._verify_upload(afc, item, written, mtime is not None)
+                except Exception as e:
+                    error = error or e
+                afc = self._close(pool, afc, None, None)
+            if error is None:
+                if mtime is not None:
+                    self.journal.complete(journal_key("upload", item.src, item.dst))
+                report.add_success(item, written - start)
+            else:
+                print(f"TRANSFER: Upload of {item.src} failed: {error}")
+                report.add_failure(item, error)
+            current = None
+            if monitor:
+                monitor.finish_file(item, error)
+            if on_progress:
+                on_progress(item, report, error)
+
+    def _verify_upload(self, afc, item, written, check_remote):
+        if item.size is not None and written != item.size:
+            raise TransferVerifyError(f"Size mismatch: expected {item.size} bytes, sent {written}")
+        if check_remote:
+            remote_size = int(afc.stat(item.dst).get('st_size', 0))
+            if remote_size != item.size:
+                raise TransferVerifyError(f"Size mismatch: expected {item.size} bytes, device has {remote_size}")
+        if self.verify_hash and file_sha256(item.src) != remote_sha256(afc, item.dst, item.size, self.chunk_size):
+            raise TransferVerifyError("Hash mismatch after upload")
+
+    def _close(self, pool, afc, handle, error):
+        if afc is None:
+            return None
+        if handle is not None:
+            try:
+                afc.fclose(handle)
+            except Exception:
+                pass
+        pool.release(afc, broken=is_broken(error))
+        return None
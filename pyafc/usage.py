@@ -0,0 +1,166 @@
+import posixpath
+import threading
+import time
+from collections import namedtuple
+from .dircache import normalize_path
+from .listing import descends, walk_parallel
+from .transfer import Throttle, format_size
+
+USAGE_REFRESH_INTERVAL = 0.5
+USAGE_TTL = 600.0
+USAGE_CACHED_TREES = 8
+USAGE_SORTS = ("size", "name", "files")
+BAR_WIDTH = 20
+
+# size and files are recursive for folders; complete is False while part of a folder is unlisted
+UsageItem = namedtuple("UsageItem", ["entry", "size", "files", "complete"])
+
+def format_usage_row(item, total, width=BAR_WIDTH):
+    share = item.size / total if total else 0.0
+    bar = "#" * round(share * width)
+    name = item.entry.name + ("/" if item.entry.is_dir else "")
+    return f"{format_size(item.size):>10}{'' if item.complete else '+'} {bar:<{width}} {share * 100:5.1f}%  {name}"
+
+class DiskUsage:
+    # recursive sizes below one device folder. Every listing adds its file sizes to
+    # the folder and all its ancestors at once, so the totals are usable (as lower
+    # bounds) while the walk still runs. The listings are kept, so drilling into
+    # any subfolder is answered from here without touching the device.
+    def __init__(self, root):
+        self.root = normalize_path(root)
+        self.started = time.monotonic()
+        self.finished = None
+        self.cancelled = False
+        self.failed = []
+        self._listings = {}
+        self._sizes = {}
+        self._open = {}
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self):
+        return self._open.get(self.root) == 0
+
+    def covers(self, path):
+        path = normalize_path(path)
+        return self.root == "/" or path == self.root or path.startswith(self.root + "/")
+
+    def add(self, path, entries):
+        size = sum(e.size or 0 for e in entries if not e.is_dir)
+        files = sum(1 for e in entries if not e.is_dir)
+        with self._lock:
+            self._listings[path] = entries
+            node = path
+            while True:
+                totals = self._sizes.setdefault(node, [0, 0])
+                totals[0] += size
+                totals[1] += files
+                if node == self.root:
+                    break
+                node = posixpath.dirname(node)
+            self._open[path] = sum(1 for e in entries if descends(e))
+            if not self._open[path]:
+                self._close(path)
+
+    def fail(self, path, error):
+        with self._lock:
+            self.failed.append(path)
+            self._close(path)
+
+    def _close(self, path):
+        # a folder is final once all its subfolders are; tell the parents
+        self._open[path] = 0
+        while path != self.root:
+            path = posixpath.dirname(path)
+            self._open[path] -= 1
+            if self._open[path] > 0:
+                return
+
+    def total(self, path):
+        path = normalize_path(path)
+        with self._lock:
+            size, files = self._sizes.get(path, (0, 0))
+            return size, files, self._open.get(path) == 0
+
+    def children(self, path, sort="size"):
+        # None while the folder itself has not been listed
+        path = normalize_path(path)
+        with self._lock:
+            entries = self._listings.get(path)
+            if entries is None:
+                return None
+            items = []
+            for e in entries:
+                if e.is_link and e.is_dir:
+                    # not followed, so it adds nothing here
+                    items.append(UsageItem(e, 0, 0, True))
+                elif e.is_dir:
+                    size, files = self._sizes.get(e.path, (0, 0))
+                    items.append(UsageItem(e, size, files, self._open.get(e.path) == 0))
+                else:
+                    items.append(UsageItem(e, e.size or 0, 1, True))
+        if sort == "name":
+            items.sort(key=lambda item: item.entry.name.lower())
+        else:
+            items.sort(key=lambda item: item.files if sort == "files" else item.size, reverse=True)
+        return items
+
+    def summary(self):
+        size, files, _ = self.total(self.root)
+        if self.cancelled:
+            state = "stopped"
+        elif self.complete:
+            state = f"done in {(self.finished or time.monotonic()) - self.started:.1f}s"
+        else:
+            state = "scanning"
+        text = f"{format_size(size)} in {files} file(s) under {self.root}, {state}"
+        return text + (f", {len(self.failed)} unreadable folder(s)" if self.failed else "")
+
+class UsageCache:
+    # finished and running trees per device; a drill-down below a cached root is served
+    # from that tree, a stopped or old tree is never reused
+    def __init__(self, ttl=USAGE_TTL, max_trees=USAGE_CACHED_TREES):
+        self.ttl = ttl
+        self.max_trees = max_trees
+        self._trees = {}
+        self._lock = threading.Lock()
+
+    def find(self, udid, path):
+        now = time.monotonic()
+        with self._lock:
+            trees = [u for u in self._trees.get(udid, []) if not u.cancelled and now - u.started <= self.ttl]
+            self._trees[udid] = trees
+            usable = [u for u in trees if u.covers(path)]
+        # the deepest root holds the most recent numbers for this folder
+        return max(usable, key=lambda u: len(u.root)) if usable else None
+
+    def put(self, udid, usage):
+        with self._lock:
+            trees = [u for u in self._trees.get(udid, []) if not usage.covers(u.root)]
+            trees.append(usage)
+            self._trees[udid] = trees[-self.max_trees:]
+
+    def invalidate(self, udid, path):
+        with self._lock:
+            self._trees[udid] = [u for u in self._trees.get(udid, []) if not u.covers(path)]
+
+class UsageAnalyzer:
+    def __init__(self, lister, workers=None, refresh_interval=USAGE_REFRESH_INTERVAL):
+        self.lister = lister
+        self.workers = workers
+        self.refresh_interval = refresh_interval
+
+    def analyze(self, usage, on_progress=None, cancelled=None):
+        throttle = Throttle(self.refresh_interval)
+        for path, entries in walk_parallel(self.lister, usage.root, self.workers, on_error=usage.fail, cancelled=cancelled):
+            usage.add(path, entries)
+            if cancelled and cancelled():
+                usage.cancelled = True
+                break
+            if on_progress and throttle.ready():
+                on_progress(usage)
+        usage.finished = time.monotonic()
+        print(f"USAGE: {usage.summary()}")
+        if on_progress:
+            on_progress(usage)
+        return usage
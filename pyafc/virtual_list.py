@@ -0,0 +1,302 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+WHEEL_ROWS = 3
+
+def _span(first, last, size):
+    # like Listbox: "end" is the last element everywhere but insert
+    first = size - 1 if first == tk.END else int(first)
+    if last is None:
+        return first, first
+    return first, size - 1 if last == tk.END else int(last)
+
+class VirtualListbox(tk.Listbox):
+    # a Listbox that only ever holds the rows on screen. The full list lives in a
+    # Python list; scrolling, selection and the scrollbar work on that list and a
+    # render touches just the on-screen rows that changed, so a 100k-entry folder
+    # costs the same to show as a 30-entry one. The usual Listbox calls (insert,
+    # delete, get, curselection, selection_set, itemconfig, yview, nearest, see)
+    # keep working with indices into the full list.
+    def __init__(self, master=None, **kw):
+        self._yscroll = kw.pop("yscrollcommand", None)
+        # the on-screen rows are rebuilt all the time; their X selection must not leak out
+        kw.setdefault("exportselection", False)
+        super().__init__(master, **kw)
+        self._items = []
+        self._colors = {}
+        self._selected = set()
+        self._anchor = None
+        self._top = 0
+        self._shown = []
+        self._shown_top = 0
+        self._pending = None
+        self._fg = self.cget("fg")
+        self._font = tkfont.Font(font=self.cget("font"))
+        # the stock Listbox bindings would select and scroll the on-screen rows only
+        self.bindtags(tuple(tag for tag in self.bindtags() if tag != "Listbox"))
+        self.bind("<Configure>", lambda e: self._render())
+        self.bind("<Button-1>", self._on_click)
+        self.bind("<Shift-Button-1>", lambda e: self._on_click(e, extend=True))
+        self.bind("<Control-Button-1>", lambda e: self._on_click(e, toggle=True))
+        self.bind("<B1-Motion>", self._on_drag)
+        self.bind("<MouseWheel>", lambda e: self._scroll(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.bind("<Button-4>", lambda e: self._scroll(-WHEEL_ROWS))
+        self.bind("<Button-5>", lambda e: self._scroll(WHEEL_ROWS))
+        for key, step in (("Up", -1), ("Down", 1), ("Prior", "page-"), ("Next", "page+"), ("Home", "home"), ("End", "end")):
+            self.bind(f"<{key}>", lambda e, s=step: self._on_key(s))
+            self.bind(f"<Shift-{key}>", lambda e, s=step: self._on_key(s, extend=True))
+        self.bind("<Control-a>", lambda e: self._select_all())
+
+    # -- the full list
+
+    def set_items(self, items, colors=None, selected=(), scroll=0.0):
+        # one call for a whole listing: no per-row Tk work however long it is
+        self._items = list(items)
+        self._colors = dict(colors or {})
+        wanted = set(selected)
+        self._selected = {i for i, text in enumerate(self._items) if text in wanted} if wanted else set()
+        self._anchor = min(self._selected) if self._selected else None
+        self._top = int(scroll * len(self._items))
+        self._render()
+
+    def append_items(self, items, color=None):
+        # a streamed listing grows at the end; only the scrollbar changes once the screen is full
+        start = len(self._items)
+        self._items.extend(items)
+        if color is not None:
+            self._colors.update(dict.fromkeys(range(start, len(self._items)), color))
+        self._schedule()
+
+    def size(self):
+        return len(self._items)
+
+    def get(self, first, last=None):
+        first, end = _span(first, last, len(self._items))
+        if last is None:
+            return self._items[first] if 0 <= first < len(self._items) else ""
+        return tuple(self._items[first:end + 1])
+
+    def insert(self, index, *elements):
+        index = len(self._items) if index == tk.END else int(index)
+        if index < len(self._items):
+            shift = len(elements)
+            self._selected = {i + shift if i >= index else i for i in self._selected}
+            self._colors = {i + shift if i >= index else i: c for i, c in self._colors.items()}
+        self._items[index:index] = elements
+        self._schedule()
+
+    def delete(self, first, last=None):
+        first, end = _span(first, last, len(self._items))
+        if first >= len(self._items) or end < first:
+            return
+        gone = end - first + 1
+        del self._items[first:end + 1]
+        self._selected = {i - gone if i > end else i for i in self._selected if not first <= i <= end}
+        self._colors = {i - gone if i > end else i: c for i, c in self._colors.items() if not first <= i <= end}
+        if not self._items:
+            self._top = 0
+        self._schedule()
+
+    def itemconfig(self, index, cnf=None, **kw):
+        index = len(self._items) - 1 if index == tk.END else int(index)
+        options = dict(cnf or {}, **kw)
+        color = options.get("fg", options.get("foreground"))
+        if color is not None:
+            self._colors[index] = color
+            self._schedule()
+
+    itemconfigure = itemconfig
+
+    def curselection(self):
+        return tuple(sorted(self._selected))
+
+    def selection_set(self, first, last=None):
+        first, end = _span(first, last, len(self._items))
+        self._selected.update(range(first, min(end, len(self._items) - 1) + 1))
+        self._schedule()
+
+    def selection_clear(self, first, last=None):
+        first, end = _span(first, last, len(self._items))
+        self._selected = {i for i in self._selected if not first <= i <= end}
+        self._schedule()
+
+    def selection_includes(self, index):
+        return int(index) in self._selected
+
+    select_set = selection_set
+    select_clear = selection_clear
+    select_includes = selection_includes
+
+    # -- scrolling
+
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, dict) and "yscrollcommand" in cnf:
+            cnf = dict(cnf)
+            kw["yscrollcommand"] = cnf.pop("yscrollcommand")
+        if "yscrollcommand" in kw:
+            self._yscroll = kw.pop("yscrollcommand")
+            self._update_scrollbar()
+            if not cnf and not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def yview(self, *args):
+        if not args:
+            total = len(self._items)
+            if not total:
+                return 0.0, 1.0
+            return self._top / total, min(1.0, (self._top + self._rows()) / total)
+        if args[0] == tk.MOVETO:
+            self.yview_moveto(args[1])
+        else:
+            self.yview_scroll(args[1], args[2])
+
+    def yview_moveto(self, fraction):
+        self._top = int(float(fraction) * len(self._items))
+        self._render()
+
+    def yview_scroll(self, number, what):
+        self._scroll(int(number) * (self._rows() if what == tk.PAGES else 1))
+
+    def see(self, index):
+        index = int(index)
+        if index < self._top:
+            self._top = index
+        elif index >= self._top + self._rows():
+            self._top = index - self._rows() + 1
+        self._render()
+
+    def nearest(self, y):
+        if not self._items:
+            return -1
+        return min(len(self._items) - 1, self._top + super().nearest(y))
+
+    def _rows(self):
+        # whole rows that fit; one more partial row is rendered below them
+        line = self._font.metrics("linespace") + 2 * int(self.cget("selectborderwidth"))
+        inner = self.winfo_height() - 2 * (int(self.cget("borderwidth")) + int(self.cget("highlightthickness")))
+        return max(1, inner // max(1, line))
+
+    def _scroll(self, rows):
+        self._top += rows
+        self._render()
+        return "break"
+
+    def _update_scrollbar(self):
+        if self._yscroll:
+            first, last = self.yview()
+            self._yscroll(first, last)
+
+    def _schedule(self):
+        # element-by-element callers (insert in a loop) get one render when idle
+        if self._pending is None:
+            self._pending = self.after_idle(self._render)
+
+    def _render(self):
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+            self._pending = None
+        rows = self._rows()
+        self._top = max(0, min(self._top, len(self._items) - rows))
+        wanted = [(self._items[i], self._colors.get(i), i in self._selected)
+                  for i in range(self._top, min(len(self._items), self._top + rows + 1))]
+        shown = self._shown
+        # scrolling by a few rows drops or adds rows at the edge instead of redrawing them all
+        shift = self._top - self._shown_top
+        if shown and 0 < shift < len(shown):
+            super().delete(0, shift - 1)
+            shown = shown[shift:]
+        elif shown and 0 < -shift < len(shown):
+            texts = self._items[self._top:self._shown_top]
+            super().insert(0, *texts)
+            shown = [(text, None, False) for text in texts] + shown
+        for row, want in enumerate(wanted):
+            have = shown[row] if row < len(shown) else None
+            if have == want:
+                continue
+            if have is None or have[0] != want[0]:
+                if have is not None:
+                    super().delete(row)
+                super().insert(row, want[0])
+                have = (want[0], None, False)
+            if have[1] != want[1]:
+                super().itemconfig(row, fg=want[1] or self._fg)
+            if have[2] != want[2]:
+                if want[2]:
+                    super().selection_set(row)
+                else:
+                    super().selection_clear(row)
+        if len(shown) > len(wanted):
+            super().delete(len(wanted), tk.END)
+        self._shown = wanted
+        self._shown_top = self._top
+        super().yview_moveto(0)
+        self._update_scrollbar()
+
+    # -- mouse and keyboard selection on the full list
+
+    def _on_click(self, event, extend=False, toggle=False):
+        self.focus_set()
+        index = self.nearest(event.y)
+        if index < 0:
+            return "break"
+        multi = self.cget("selectmode") in (tk.EXTENDED, tk.MULTIPLE)
+        if extend and multi and self._anchor is not None:
+            low, high = sorted((self._anchor, index))
+            self._selected = set(range(low, high + 1))
+        elif toggle and multi:
+            self._selected ^= {index}
+            self._anchor = index
+        else:
+            self._selected = {index}
+            self._anchor = index
+        self._selection_changed()
+        return "break"
+
+    def _on_drag(self, event):
+        if self._anchor is None or self.cget("selectmode") not in (tk.EXTENDED, tk.MULTIPLE):
+            return "break"
+        if event.y < 0:
+            self._top -= 1
+        elif event.y > self.winfo_height():
+            self._top += 1
+        self._render()
+        low, high = sorted((self._anchor, self.nearest(event.y)))
+        self._selected = set(range(low, high + 1))
+        self._selection_changed()
+        return "break"
+
+    def _on_key(self, step, extend=False):
+        if not self._items:
+            return "break"
+        current = max(self._selected) if self._selected else self._top - 1
+        if step == "home":
+            index = 0
+        elif step == "end":
+            index = len(self._items) - 1
+        elif step in ("page-", "page+"):
+            index = current + (self._rows() if step == "page+" else -self._rows())
+        else:
+            index = current + step
+        index = max(0, min(len(self._items) - 1, index))
+        if extend and self._anchor is not None and self.cget("selectmode") in (tk.EXTENDED, tk.MULTIPLE):
+            low, high = sorted((self._anchor, index))
+            self._selected = set(range(low, high + 1))
+        else:
+            self._selected = {index}
+            self._anchor = index
+        self.see(index)
+        self._selection_changed()
+        return "break"
+
+    def _select_all(self):
+        if self.cget("selectmode") in (tk.EXTENDED, tk.MULTIPLE):
+            self._selected = set(range(len(self._items)))
+            self._selection_changed()
+        return "break"
+
+    def _selection_changed(self):
+        self._render()
+        self.event_generate("<<ListboxSelect>>")
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+INTERACTIVE_WORKERS = 4
+BULK_WORKERS = 3
+MAX_QUEUED = 32
+STATS_INTERVAL_MS = 1000
+BUSY_MESSAGE = "Too much device work is already waiting, so this was not started.\nTry again in a moment."
+
+WorkerStats = namedtuple("WorkerStats", ["name", "workers", "running", "queued", "done", "coalesced", "rejected", "wait_avg_ms", "wait_max_ms", "run_avg_ms"])
+
+def _task_name(fn):
+    return getattr(fn, "__qualname__", repr(fn))
+
+def format_worker_stats(stats):
+    return " | ".join(f"{s.name} {s.running}/{s.workers} busy, {s.queued} queued, {s.done} done, {s.coalesced} joined, "
+                      f"wait avg {s.wait_avg_ms:.0f} ms max {s.wait_max_ms:.0f} ms" for s in stats)
+
+class WorkerPool:
+    # a fixed set of threads behind a bounded queue. A task submitted under a key
+    # that is still queued or running is not run twice: the caller gets the future
+    # of the one already on its way. Past max_queued new work is dropped, not piled up.
+    def __init__(self, name, workers, max_queued=MAX_QUEUED, report_errors=True):
+        self.name = name
+        self.workers = workers
+        self.max_queued = max_queued
+        self.report_errors = report_errors
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pyafc-{name}")
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._queued = 0
+        self._running = 0
+        self.started = 0
+        self.done = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+
+    def submit(self, fn, *args, key=None):
+        # the future of the task, or None when the queue is full or the pool shut down
+        with self._lock:
+            if key is not None and key in self._keys:
+                self.coalesced += 1
+                return self._keys[key]
+            if self.max_queued is not None and self._queued >= self.max_queued:
+                self.rejected += 1
+                print(f"WORKER: {self.name} queue full ({self._queued} waiting), dropped {_task_name(fn)}")
+                return None
+            try:
+                future = self._executor.submit(self._run, time.monotonic(), fn, args)
+            except RuntimeError:
+                return None
+            self._queued += 1
+            if key is not None:
+                self._keys[key] = future
+        future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    def _done(self, key, future):
+        with self._lock:
+            if future.cancelled():
+                # cancelled while still queued, so _run never saw it
+                self._queued -= 1
+            if key is not None and self._keys.get(key) is future:
+                del self._keys[key]
+
+    def _run(self, queued_at, fn, args):
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self.started += 1
+            self.wait_total += started - queued_at
+            self.wait_max = max(self.wait_max, started - queued_at)
+        try:
+            return fn(*args)
+        except Exception as e:
+            # most callers never look at the future, so say it here
+            if self.report_errors:
+                print(f"WORKER: {self.name} task {_task_name(fn)} failed: {e!r}")
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.done += 1
+                self.run_total += time.monotonic() - started
+
+    def stats(self):
+        with self._lock:
+            return WorkerStats(self.name, self.workers, self._running, self._queued, self.done, self.coalesced, self.rejected,
+                               self.wait_total / self.started * 1000 if self.started else 0.0, self.wait_max * 1000,
+                               self.run_total / self.done * 1000 if self.done else 0.0)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+class Workers:
+    # one app-wide pair of pools: clicks and device queries never wait behind
+    # long walks and index loads, and neither can grow without bound
+    def __init__(self, interactive=INTERACTIVE_WORKERS, bulk=BULK_WORKERS):
+        self.interactive = WorkerPool("interactive", interactive)
+        self.bulk = WorkerPool("bulk", bulk)
+
+    def run(self, fn, *args, key=None, on_dropped=None):
+        # on_dropped() runs on the calling thread when the task was not queued, so
+        # a click can say it did nothing rather than only print it
+        future = self.interactive.submit(fn, *args, key=key)
+        if future is None and on_dropped:
+            on_dropped()
+        return future
+
+    def run_bulk(self, fn, *args, key=None):
+        return self.bulk.submit(fn, *args, key=key)
+
+    def stats(self):
+        return [self.interactive.stats(), self.bulk.stats()]
+
+    def shutdown(self):
+        self.interactive.shutdown()
+        self.bulk.shutdown()
@@ -1,21 +1,5 @@
 # in beta- install pyside6 before usage
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import customtkinter as ctk
-from pymobiledevice3.lockdown import create_using_usbmux
-try:
-    from pymobiledevice3.lockdown import MissingValue
-except ImportError:
-    MissingValue = None
 from pymobiledevice3.exceptions import PyMobileDevice3Exception
-from pymobiledevice3.services.afc import AfcService
-from pymobiledevice3.services.installation_proxy import InstallationProxyService
-from pymobiledevice3.services.house_arrest import HouseArrestService
-from pymobiledevice3.services.diagnostics import DiagnosticsService
-from pymobiledevice3.services.screenshot import ScreenshotService
-from pymobiledevice3.services.syslog import SyslogService
-from pymobiledevice3.services.mounter import MounterService
-from pymobiledevice3.usbmux import list_devices
 import threading
 import json
 import os
@@ -23,24 +7,39 @@ import sys
 import time
 import base64
 import stat
-from PIL import Image, ImageTk
+from collections import OrderedDict
+from pyafc.afc_pool import AfcSessionPool, DEVICE_POOL_SIZE, INTERACTIVE_RESERVED, check_session, format_pool_stats
+from pyafc.dircache import DirectoryCache
+from pyafc.engine import DeviceEngine, LatestRequest, mount_developer_image
+from pyafc.listing import DirEntry, DirectoryLister, split_entries, join_path
+from pyafc.prefetch import Prefetcher
+from pyafc.history import NavigationHistory
+from pyafc.journal import TransferJournal
+from pyafc.sync import FolderSync, SyncReport
+from pyafc.archive import ArchiveExporter
+from pyafc.device_index import DeviceIndex, DeviceIndexer
+from pyafc.search import FilenameIndex
+from pyafc.usage import DiskUsage, UsageAnalyzer, UsageCache, format_usage_row
+from pyafc.thumbnails import ThumbnailCache, ThumbnailLoader, THUMB_SIZE
+from pyafc.progress import TransferMonitor, format_event
+from pyafc.scheduler import TransferScheduler, transfer_priority, NORMAL, BULK
+from pyafc.workers import Workers, BUSY_MESSAGE, STATS_INTERVAL_MS, format_worker_stats
+from pyafc.transfer import DownloadEngine, UploadEngine, Throttle, TransferItem, TransferReport, format_size, iter_download_items, iter_upload_items
 
 from PySide6.QtCore import (
-    QObject, QThread, Signal, Qt, QSize, QEvent
+    QObject, QThread, Signal, Qt, QSize, QPoint, QEvent, QTimer, QAbstractListModel, QModelIndex, QItemSelectionModel
 )
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QDialog, QTextEdit, QTabWidget, QMenuBar,
-    QPushButton, QListWidget, QListWidgetItem, QLineEdit,
+    QPushButton, QListWidget, QListWidgetItem, QListView, QAbstractItemView, QLineEdit,
     QGridLayout, QScrollArea, QFrame, QSizePolicy, QMessageBox,
-    QFileDialog, QMenu
+    QFileDialog, QMenu, QComboBox
 )
 from PySide6.QtGui import (
     QFont, QColor, QPalette, QAction, QPixmap, QIcon, QCursor
 )
 
-ctk.set_appearance_mode("Dark")
-ctk.set_default_color_theme("blue")
 
 STYLESHEET = """
     QMainWindow, QDialog, QWidget {
@@ -147,6 +146,7 @@ LIST_FONT = QFont("Segoe UI", 11)
 LOG_FONT = QFont("Consolas", 10)
 APP_GRID_FONT = QFont("Segoe UI", 10)
 LINK_FONT = QFont("Segoe UI", 12, QFont.Weight.Normal)
+LISTING_REFRESH_INTERVAL = 1.0
 
 def json_bytes_handler(obj):
     if isinstance(obj, bytes):
@@ -163,26 +163,62 @@ class DeviceLogic(QObject):
 
     device_info_updated = Signal(str)
     file_list_updated = Signal(list, list, object)
+    file_list_batch = Signal(str, list, list, bool)
     app_list_updated = Signal(list, object)
     
     action_finished = Signal(str, str)
     action_error = Signal(str, str)
+    status_message = Signal(str)
+    jobs_changed = Signal()
+    index_status = Signal(str)
+    index_results = Signal(list, float)
+    usage_updated = Signal(object)
+    thumbnail_ready = Signal(str, str, bytes)
     
     syslog_message = Signal(str)
     syslog_stopped = Signal()
     device_disconnected = Signal(str)
 
-    def __init__(self):
+    def __init__(self, dir_cache=None):
         super().__init__()
         self.client = None
+        self.udid = None
         self.afc = None
+        self.afc_pool = None
+        self.engine = None
+        self.listing = None
+        self.lister = None
+        self.prefetcher = None
+        self.transfer_pool = None
+        self.thumbnails = None
+        self.thumb_cache = None
+        self._thumb_entries = (None, {})
+        self.downloader = None
+        self.uploader = None
+        self.journal = None
+        self.last_monitor = None
+        self.scheduler = None
+        self.progress_log = Throttle(2.0)
+        self.device_index = None
+        self.index_task = None
+        self.index_stop = threading.Event()
+        self.filename_index = None
+        self._filename_seq = 0
+        self._search_seq = 0
+        self.usage_cache = UsageCache()
+        self.usage_stop = None
+        self.dir_cache = dir_cache if dir_cache is not None else DirectoryCache()
+        self.listing_refresh = Throttle(LISTING_REFRESH_INTERVAL)
+        self.history = NavigationHistory()
         self.current_path = "/"
         self.is_jailbroken = False
         self.stop_listener = threading.Event()
-        self.stop_syslog_event = threading.Event()
-        self.syslog_thread = None
+        self.syslog_task = None
+        # every one-off action runs on these, never on a thread of its own
+        self.workers = Workers()
 
     def start_device_listener(self):
+        from pymobiledevice3.usbmux import list_devices
         self.stop_listener.clear()
         print("LISTENER: Started device listener thread.")
         while not self.stop_listener.is_set():
@@ -205,7 +241,6 @@ class DeviceLogic(QObject):
     def stop_all_activity(self):
         print("LOGIC: Stop signal received")
         self.stop_listener.set()
-        self.stop_syslog_event.set()
         if self.client:
             try:
                 self.client.close()
@@ -214,9 +249,25 @@ class DeviceLogic(QObject):
                 print(f"LOGIC: Error closing client: {e}")
         self.client = None
         self.afc = None
+        self.close_afc_sessions()
+
+    def close_afc_sessions(self):
+        self.index_stop.set(); self.stop_usage()
+        if self.scheduler: self.scheduler.shutdown(); self.scheduler = None
+        if self.prefetcher: self.prefetcher.stop(); self.prefetcher = None
+        if self.engine: self.engine.close(); self.engine = None; self.listing = None; self.syslog_task = None
+        if self.lister: self.lister.close(); self.lister = None
+        if self.thumbnails: self.thumbnails.close(); self.thumbnails = None
+        self.transfer_pool = None
+        if self.afc_pool: print(f"POOL: {format_pool_stats(self.afc_pool.stats())}"); self.afc_pool.close(); self.afc_pool = None
+        if self.journal: self.journal.flush()
 
     def connect_to_device(self, udid):
         print(f"LOGIC: connect_device function started for {udid}")
+        # lockdown pulls in most of pymobiledevice3, so it loads with the first connection, not the window
+        from pymobiledevice3.lockdown import create_using_usbmux
+        try: from pymobiledevice3.lockdown import MissingValue
+        except ImportError: MissingValue = None
         client_instance = None
         device_name = "Unknown Device"
         all_values = None
@@ -226,6 +277,7 @@ class DeviceLogic(QObject):
         try:
             self.log_message.emit(f"Connecting to {udid} via USB...")
             client_instance = create_using_usbmux(serial=udid)
+            self.udid = udid
             self.log_message.emit("Connection successful. Stabilizing...")
             time.sleep(1)
 
@@ -249,9 +301,10 @@ class DeviceLogic(QObject):
 
             self.log_message.emit("Attempting to mount Developer Image...")
             try:
-                with MounterService(self.client) as mounter:
-                    mounter.mount_developer_image()
-                self.log_message.emit("Developer Image mounted successfully.")
+                if mount_developer_image(self.client):
+                    self.log_message.emit("Developer Image mounted successfully.")
+                else:
+                    self.log_message.emit("Developer Image already mounted.")
             except Exception as mount_error:
                 self.log_message.emit(f"WARNING: Failed to mount Developer Image: {mount_error}")
                 self.log_message.emit("Device actions (Screenshot, Reboot) may fail.")
@@ -263,13 +316,13 @@ class DeviceLogic(QObject):
                  return
 
             self.log_message.emit(f"Fetching initial file list for {self.current_path}...")
-            preloaded_files_data = self._get_file_list_sync(self.current_path)
+            preloaded_files_data = self.engine.run(self._get_file_list(self.current_path))
             f, fl, e = preloaded_files_data
             if e: self.log_message.emit(f"Warning: Error fetching files: {e}")
             else: self.log_message.emit(f"Fetched initial files: {len(f)} folders, {len(fl)} files.")
 
             self.log_message.emit("Fetching application list...")
-            preloaded_apps, app_error = self._get_app_list_sync()
+            preloaded_apps, app_error = self.engine.run(self._get_app_list())
             self.apps_cache = preloaded_apps # Cache
             if app_error: self.log_message.emit(f"Warning: Error fetching apps: {app_error}")
             else: self.log_message.emit(f"Fetched {len(preloaded_apps)} applications.")
@@ -321,47 +374,195 @@ class DeviceLogic(QObject):
 
     def start_afc_service(self):
         if not self.client: self.afc = None; return
+        self._init_scheduler()
         try:
-            self.afc = AfcService(self.client); time.sleep(0.2)
+            from pymobiledevice3.services.afc import AfcService
+            # one pool per connection: every operation leases its own session, transfers and
+            # background walks as bulk leases that leave sessions free for browsing
+            self.afc_pool = AfcSessionPool(lambda: AfcService(self.client), size=DEVICE_POOL_SIZE,
+                                           reserved=INTERACTIVE_RESERVED, health_check=check_session)
+            self.afc = self.afc_pool
+            self.lister = DirectoryLister(self.afc_pool)
+            # listings, apps and syslog are coroutines on the connection's loop thread; results go out as signals
+            self.engine = DeviceEngine(self.client, self.afc_pool, self.lister)
+            self.listing = LatestRequest(self.engine, "listing")  # a new navigation cancels the listing before it
+            self.prefetcher = Prefetcher(self.lister, self.dir_cache)
+            self.transfer_pool = self.afc_pool.bulk()
+            self.journal = TransferJournal(self.udid)
+            self.downloader = DownloadEngine(self.transfer_pool, journal=self.journal)
+            self.uploader = UploadEngine(self.transfer_pool, journal=self.journal)
+            self.device_index = DeviceIndex(self.udid)
+            self.thumb_cache = self.thumb_cache or ThumbnailCache()
+            self.thumbnails = ThumbnailLoader(self.afc_pool, self.thumb_cache, self.udid)
+            self.filename_index = None
+            self.load_filename_index()
             try:
-                self.afc.listdir("/private")
+                with self.afc_pool.lease() as afc: afc.listdir("/private")
                 self.is_jailbroken = True; self.current_path = "/"
             except PyMobileDevice3Exception:
                 self.is_jailbroken = False; self.current_path = "/"
+            self.start_indexing()
         except Exception as e: self.afc = None; print(f"ERROR: AFC start fail: {e}")
 
-    def _get_file_list_sync(self, path_to_list):
+    async def _list_entries(self, path_to_list, use_cache=True, on_batch=None):
+        entries = self.dir_cache.get(self.udid, path_to_list) if use_cache else None
+        mtime = None
+        if entries is None:
+            # stat the folder first, so a change during the listing still shows up as a newer mtime
+            with self.prefetcher.user_request():
+                mtime = await self.engine.dir_mtime(path_to_list)
+                entries = await self.engine.list(path_to_list, on_batch=on_batch)
+            self.dir_cache.put(self.udid, path_to_list, entries)
+            if self.filename_index is not None: self.filename_index.add_entries(entries)
+        self.history.remember(path_to_list, entries, mtime)
+        self.prefetcher.schedule(self.udid, [e.path for e in entries if e.is_dir])
+        return entries
+
+    async def _get_file_list(self, path_to_list, use_cache=True, on_batch=None):
         folders, files, error_msg = [], [], None
-        if not self.afc: return folders, files, "AFC service not ready"
-        try:
-            items = self.afc.listdir(path_to_list)
-            for item in items:
-                if item in ('.', '..'): continue
-                fp = os.path.join(path_to_list, item).replace("\\", "/")
-                is_dir = False
-                try:
-                    info = self.afc.stat(fp)
-                    if hasattr(info, 'st_ifmt') and stat.S_ISDIR(info.st_ifmt): is_dir = True
-                except (PyMobileDevice3Exception, AttributeError):
-                    try: self.afc.listdir(fp); is_dir = True
-                    except PyMobileDevice3Exception: is_dir = False
-                if is_dir: folders.append(f"[FOLDER] {item}")
-                else: files.append(item)
+        if not self.afc or not self.engine: return folders, files, "AFC service not ready"
+        try: folders, files = split_entries(await self._list_entries(path_to_list, use_cache, on_batch))
         except Exception as e: error_msg = e
         return folders, files, error_msg
 
-    def fetch_file_list(self, path):
-        if not self.afc: self.file_list_updated.emit([], [], "AFC not ready"); return
+    def fetch_file_list(self, path, refresh=False, record=True):
+        # returns at once: the listing runs on the engine loop and reports through signals
+        if not self.afc or not self.engine: self.file_list_updated.emit([], [], "AFC not ready"); return
         self.current_path = path
-        folders, files, error = self._get_file_list_sync(path)
-        self.file_list_updated.emit(folders, files, error)
+        if record: self.history.visit(path)
+        self.listing.submit(lambda gen: self._fetch_file_list(gen, path, refresh))
+
+    async def _fetch_file_list(self, gen, path, refresh):
+        streamed, listing = [], self.listing
+        def on_batch(batch):
+            # a new folder fills in as the stats come back; a refresh waits and applies a diff
+            if listing.is_current(gen): self.file_list_batch.emit(path, *split_entries(batch), not streamed)
+            streamed.append(len(batch))
+        folders, files, error = await self._get_file_list(path, use_cache=not refresh, on_batch=None if refresh else on_batch)
+        # a slower listing must not overwrite a folder the user has moved on from, even one for the same path
+        if listing.is_current(gen): self.file_list_updated.emit(folders, files, error)
+
+    def load_thumbnails(self, names):
+        # names of the grid cells in and just below view; pictures come back as thumbnail_ready
+        state = self.history.view(self.current_path)
+        if not self.thumbnails or state is None: return
+        if self._thumb_entries[0] is not state.entries: self._thumb_entries = (state.entries, {e.name: e for e in state.entries})
+        by_name, folder = self._thumb_entries[1], self.current_path
+        def on_ready(entry, data):
+            if data is not None: self.thumbnail_ready.emit(folder, entry.name, data)
+        self.thumbnails.request([by_name[n] for n in names if n in by_name], on_ready)
+
+    def go_history(self, forward=False):
+        # runs on the UI thread: a retained listing renders at once, one stat decides on a refresh
+        if not self.afc: return
+        path = self.history.forward() if forward else self.history.back()
+        if path is None: return
+        self.current_path = path
+        state = self.history.view(path)
+        if state is None:
+            self.fetch_file_list(path, False, False); return
+        self.file_list_updated.emit(*split_entries(state.entries), None)
+        self.listing.submit(lambda gen: self._revalidate_listing(gen, path))  # also cancels the listing of the folder just left
+
+    async def _revalidate_listing(self, gen, path):
+        if self.history.is_current(path, await self.engine.dir_mtime(path)):
+            print(f"LOGIC: '{path}' unchanged since it was listed"); return
+        await self._fetch_file_list(gen, path, True)
+
+    def is_indexing(self):
+        return self.index_task is not None and not self.index_task.done()
+
+    def start_indexing(self, force=False):
+        if not self.client or not self.device_index: return
+        if self.is_indexing(): return
+        if not force and not self.device_index.is_stale(): return
+        self.index_stop.clear()
+        def _index_task():
+            # bulk leases, so a full-device walk never takes the sessions browsing needs
+            lister = DirectoryLister(self.afc_pool.bulk())
+            try:
+                DeviceIndexer(lister, self.device_index).run("/", cancelled=self.index_stop.is_set,
+                                                             on_progress=lambda n: self.index_status.emit(f"Indexing... {n} entries"))
+            except Exception as e:
+                print(f"LOGIC: Indexing failed: {e}")
+            finally:
+                lister.close()
+                self.index_status.emit(self.index_summary())
+            if not self.index_stop.is_set(): self.load_filename_index()
+        self.index_task = self.workers.run_bulk(_index_task, key="index")
+
+    def load_filename_index(self):
+        if not self.device_index: return
+        device_index = self.device_index
+        self._filename_seq += 1
+        seq = self._filename_seq
+        def _load_task():
+            started = time.monotonic()
+            names = FilenameIndex()
+            try:
+                names.add_entries(device_index.iter_entries()); names.prepare()
+            except Exception as e:
+                print(f"LOGIC: Loading filename index failed: {e}"); return
+            # a newer load (reindex or another device) wins
+            if seq == self._filename_seq: self.filename_index = names
+            print(f"LOGIC: Filename index holds {len(names)} names ({time.monotonic() - started:.1f}s)")
+            self.index_status.emit(self.index_summary())
+        self.workers.run_bulk(_load_task)
+
+    def analyze_usage(self, path, rescan=False):
+        # runs on the UI thread and returns the tree to show; a new walk streams usage_updated
+        if not self.client or not self.afc: return None
+        usage = None if rescan else self.usage_cache.find(self.udid, path)
+        if usage is not None: return usage
+        self.stop_usage()
+        stop = self.usage_stop = threading.Event()
+        usage = DiskUsage(path)
+        self.usage_cache.put(self.udid, usage)
+        def _usage_task():
+            # bulk leases, like indexing, so browsing stays responsive during the walk
+            lister = DirectoryLister(self.afc_pool.bulk())
+            try:
+                UsageAnalyzer(lister).analyze(usage, on_progress=self.usage_updated.emit, cancelled=stop.is_set)
+            except Exception as e:
+                print(f"LOGIC: Usage analysis failed: {e}"); usage.cancelled = True; self.usage_updated.emit(usage)
+            finally:
+                lister.close()
+        self.workers.run_bulk(_usage_task)
+        return usage
+
+    def stop_usage(self):
+        if self.usage_stop: self.usage_stop.set()
+
+    def index_summary(self):
+        if not self.device_index: return "Index not available"
+        if self.is_indexing(): return "Indexing..."
+        last = self.device_index.last_scan
+        text = f"{self.device_index.count()} entries indexed" + (f", last scan {time.strftime('%Y-%m-%d %H:%M', time.localtime(last))}" if last else ", never scanned")
+        return text + (", loading names..." if self.filename_index is None else "")
+
+    def search_index(self, query, mode="name"):
+        if not self.device_index: return
+        self._search_seq += 1
+        seq = self._search_seq
+        names = self.filename_index
+        if names is not None and mode != "largest":
+            # in memory and quick enough to answer on the UI thread at every keystroke
+            started = time.perf_counter()
+            self.index_results.emit(names.search(query, fuzzy=mode == "fuzzy"), (time.perf_counter() - started) * 1000); return
+        def _search_task():
+            started = time.perf_counter()
+            try:
+                results = self.device_index.largest(query or "/") if mode == "largest" else self.device_index.find(query)
+            except Exception as e:
+                print(f"LOGIC: Index query failed: {e}"); results = []
+            if seq == self._search_seq: self.index_results.emit(results, (time.perf_counter() - started) * 1000)
+        self.workers.run(_search_task)
 
-    def _get_app_list_sync(self):
+    async def _get_app_list(self):
         apps_data, error_msg = [], None
-        if not self.client: return apps_data, "Client not connected"
+        if not self.client or not self.engine: return apps_data, "Client not connected"
         try:
-            with InstallationProxyService(self.client) as ip:
-                apps = ip.get_apps()
+            apps = await self.engine.get_apps()
             if apps:
                 for bundle_id, info in apps.items():
                     name = info.get('CFBundleDisplayName', bundle_id)
@@ -372,53 +573,182 @@ class DeviceLogic(QObject):
         return apps_data, error_msg
 
     def fetch_app_list(self):
-        apps_data, error = self._get_app_list_sync()
+        if self.engine: self.engine.submit(self._fetch_app_list(), key="apps")
+
+    async def _fetch_app_list(self):
+        apps_data, error = await self._get_app_list()
         self.apps_cache = apps_data # Update cache
         self.app_list_updated.emit(apps_data, error)
 
     def upload_files(self, file_paths, dest_path):
         if not self.afc: self.action_error.emit("Upload Error", "AFC not connected."); return
+        sizes = [os.path.getsize(p) for p in file_paths]
+        self._submit(f"Upload {len(file_paths)} file(s) to {dest_path}", "upload",
+                     {"dest_dir": dest_path, "paths": list(file_paths)}, transfer_priority(sizes))
+
+    def upload_folder(self, local_dir, dest_path):
+        if not self.afc: self.action_error.emit("Upload Error", "AFC not connected."); return
+        local_dir = os.path.normpath(local_dir)
+        self._submit(f"Upload {os.path.basename(local_dir)} to {dest_path}", "upload", {"dest_dir": dest_path, "local_dir": local_dir}, BULK)
+
+    def _run_upload(self, job, spec):
+        dest_path, remote_root = spec["dest_dir"], None
+        report = TransferReport()
+        if spec.get("local_dir"):
+            remote_root = join_path(dest_path, os.path.basename(spec["local_dir"]))
+            items = iter_upload_items(self.transfer_pool, spec["local_dir"], remote_root,
+                                      on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
+        else:
+            items = [TransferItem(p, join_path(dest_path, os.path.basename(p)), os.path.getsize(p)) for p in spec["paths"]]
         try:
-            for p in file_paths:
-                fn = os.path.basename(p); dp = os.path.join(dest_path, fn).replace("\\", "/")
-                self.log_message.emit(f"Uploading {fn}...")
-                self.afc.push(p, dp)
-            self.action_finished.emit("Done", f"Uploaded {len(file_paths)} file(s).")
-            self.fetch_file_list(dest_path)
-        except Exception as e: self.action_error.emit("Upload Error", f"Upload failed: {e}")
-
-    def download_files(self, file_names, save_dir):
+            self.status_message.emit("Uploading...")
+            report = self.uploader.upload(items, report=report, monitor=self._new_monitor("Uploading", report), control=job,
+                                          on_progress=lambda item, r, err: self._on_upload_progress(dest_path, item, r, err))
+            self._emit_transfer_report("Upload", report, job)
+        finally:
+            self.dir_cache.invalidate(self.udid, dest_path)
+            if remote_root: self.dir_cache.invalidate(self.udid, remote_root, recursive=True)
+            if self.current_path == dest_path: self.fetch_file_list(dest_path)
+
+    def _on_upload_progress(self, dest_path, item, report, error):
+        if error is None:
+            self.dir_cache.upsert(self.udid, os.path.dirname(item.dst), DirEntry(os.path.basename(item.dst), item.dst, False, item.size, time.time()))
+        if self.current_path == dest_path and self.listing_refresh.ready():
+            entries = self.dir_cache.get(self.udid, dest_path)
+            if entries is not None: self.file_list_updated.emit(*split_entries(entries), None)
+
+    def download_files(self, file_names, save_dir, folder_names=()):
         if not self.afc: self.action_error.emit("Download Error", "AFC not connected."); return
+        cached = {e.name: e.size for e in self.dir_cache.get(self.udid, self.current_path) or []}
+        sizes = {fn: cached.get(fn) for fn in file_names}
+        name = file_names[0] if len(file_names) == 1 and not folder_names else f"{len(file_names) + len(folder_names)} item(s)"
+        self._submit(f"Download {name} from {self.current_path}", "download",
+                     {"src_dir": self.current_path, "files": list(file_names), "folders": list(folder_names), "save_dir": save_dir, "sizes": sizes},
+                     transfer_priority(list(sizes.values()), bool(folder_names)))
+
+    def _run_download(self, job, spec):
+        src_dir, save_dir, folder_names = spec["src_dir"], spec["save_dir"], spec.get("folders", [])
+        sizes = spec.get("sizes", {})
+        items = [TransferItem(join_path(src_dir, fn), os.path.join(save_dir, fn), sizes.get(fn)) for fn in spec["files"]]
+        report = TransferReport()
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            if folder_names:
+                def _all_items():
+                    yield from items
+                    for name in folder_names:
+                        yield from iter_download_items(lister, join_path(src_dir, name), os.path.join(save_dir, name),
+                                                       on_error=lambda path, err: report.add_failure(TransferItem(path, None, None), err))
+                items = _all_items()
+            self.status_message.emit("Downloading...")
+            report = self.downloader.download(items, report=report, monitor=self._new_monitor("Downloading", report), control=job)
+        finally:
+            lister.close()
+        self._emit_transfer_report("Download", report, job)
+
+    def sync_folder(self, remote_root, local_root, delete):
+        if not self.afc: self.action_error.emit("Sync Error", "AFC not connected."); return
+        self._submit(f"Sync {remote_root} to {local_root}", "sync", {"remote_root": remote_root, "local_root": local_root, "delete": delete}, BULK)
+
+    def _run_sync(self, job, spec):
+        self.status_message.emit(f"Syncing {spec['remote_root']}...")
+        report = SyncReport()
+        lister = DirectoryLister(self.afc_pool.bulk())
         try:
-            for fn in file_names:
-                sp = os.path.join(self.current_path, fn).replace("\\", "/"); pp = os.path.join(save_dir, fn)
-                self.log_message.emit(f"Downloading {fn}...")
-                self.afc.pull(sp, pp)
-            self.action_finished.emit("Done", f"Downloaded {len(file_names)} file(s).")
-        except Exception as e: self.action_error.emit("Download Error", f"Download failed: {e}")
+            report = FolderSync(lister, self.downloader).sync(spec["remote_root"], spec["local_root"], delete=spec["delete"], report=report,
+                                                              monitor=self._new_monitor("Syncing", report), control=job)
+        finally:
+            lister.close()
+        self._emit_transfer_report("Sync", report, job)
+
+    def export_archive(self, remote_root, archive_path, compress=True):
+        if not self.afc: self.action_error.emit("Export Error", "AFC not connected."); return
+        self._submit(f"Export {remote_root} to {archive_path}", "archive",
+                     {"remote_root": remote_root, "archive_path": archive_path, "compress": compress}, BULK)
+
+    def _run_archive(self, job, spec):
+        self.status_message.emit(f"Exporting {spec['remote_root']}...")
+        report = TransferReport()
+        lister = DirectoryLister(self.afc_pool.bulk())
+        try:
+            report = ArchiveExporter(lister, self.downloader.pool).export(spec["remote_root"], spec["archive_path"], compress=spec["compress"],
+                                                                         report=report, monitor=self._new_monitor("Exporting", report), control=job)
+        finally:
+            lister.close()
+        self._emit_transfer_report("Export", report, job)
+
+    def _init_scheduler(self):
+        def _job_runner(run, title):
+            def _factory(spec):
+                def _job(job):
+                    try: run(job, spec)
+                    except Exception as e:
+                        if not job.cancelled: self.action_error.emit(f"{title} Error", f"{job.name} failed: {e}")
+                        raise
+                return _job
+            return _factory
+        self.scheduler = TransferScheduler(self.udid, on_change=self.jobs_changed.emit)
+        self.scheduler.register("upload", _job_runner(self._run_upload, "Upload"))
+        self.scheduler.register("download", _job_runner(self._run_download, "Download"))
+        self.scheduler.register("sync", _job_runner(self._run_sync, "Sync"))
+        self.scheduler.register("archive", _job_runner(self._run_archive, "Export"))
+        self.scheduler.register("install", _job_runner(self._run_install, "Install"))
+        restored = self.scheduler.restore()
+        if restored: print(f"LOGIC: Restored {len(restored)} unfinished transfer job(s), paused")
+
+    def _submit(self, name, kind, spec, priority):
+        if not self.scheduler: return None
+        job = self.scheduler.submit(name, kind, spec, priority)
+        print(f"LOGIC: Queued {job.describe()}")
+        return job
+
+    def _new_monitor(self, action, report):
+        def _on_event(event):
+            text = format_event(event)
+            if not event.final: self.status_message.emit(text)
+            if event.final or self.progress_log.ready(): self.log_message.emit(text)
+        self.last_monitor = TransferMonitor(action, report, on_event=_on_event)
+        return self.last_monitor
+
+    def export_transfer_stats(self, path):
+        if not self.last_monitor: self.action_error.emit("Stats", "No transfer has run yet."); return
+        try: self.last_monitor.export_json(path)
+        except OSError as e: self.action_error.emit("Stats", f"Export failed: {e}")
+
+    def _emit_transfer_report(self, action, report, job=None):
+        summary = report.summary()
+        if job and job.cancelled: self.status_message.emit(f"{action} cancelled: {summary}"); return
+        if report.failed:
+            self.action_error.emit(f"{action} Error", f"{action} finished with errors.\n{summary}\n\n{report.failure_lines()}")
+        else: self.action_finished.emit("Done", f"{action} complete.\n{summary}")
     
     def install_app(self, ipa_path):
         if not self.client: self.action_error.emit("Install Error", "Not connected."); return
-        try:
-            self.log_message.emit(f"Installing {os.path.basename(ipa_path)}...")
-            with InstallationProxyService(self.client) as ip: ip.install(ipa_path)
-            self.action_finished.emit("Done", "Install successful.")
-            self.fetch_app_list()
-        except Exception as e: self.action_error.emit("Install Error", f"Install failed: {e}")
+        self._submit(f"Install {os.path.basename(ipa_path)}", "install", {"ipa": ipa_path}, NORMAL)
+
+    def _run_install(self, job, spec):
+        self.log_message.emit(f"Installing {os.path.basename(spec['ipa'])}...")
+        self.engine.run(self.engine.install(spec["ipa"]))
+        self.action_finished.emit("Done", "Install successful.")
+        self.fetch_app_list()
 
     def uninstall_app(self, bundle_id, app_name):
-        if not self.client: self.action_error.emit("Uninstall Error", "Not connected."); return
+        if not self.client or not self.engine: self.action_error.emit("Uninstall Error", "Not connected."); return
+        self.engine.submit(self._uninstall_app(bundle_id, app_name))
+
+    async def _uninstall_app(self, bundle_id, app_name):
         try:
             self.log_message.emit(f"Uninstalling {app_name}...")
-            with InstallationProxyService(self.client) as ip: ip.uninstall(bundle_id)
+            await self.engine.uninstall(bundle_id)
             self.action_finished.emit("Done", f"'{app_name}' uninstalled.")
-            self.fetch_app_list()
+            await self._fetch_app_list()
         except Exception as e: self.action_error.emit("Uninstall Error", f"Failed to uninstall {app_name}: {e}")
 
     def explore_app_documents(self, bundle_id):
         if not self.client: self.action_error.emit("Explore Error", "Not connected."); return
         contents, error = [], None
         try:
+            from pymobiledevice3.services.house_arrest import HouseArrestService
             with HouseArrestService(self.client, bundle_id=bundle_id, connection_type='DOCUMENTS') as ha:
                 items = ha.listdir('/Documents')
                 contents = sorted(items)
@@ -431,13 +761,16 @@ class DeviceLogic(QObject):
         if not self.client: self.action_error.emit("Screenshot Error", "Not connected."); return
         try:
             self.log_message.emit("Taking screenshot...")
-            with ScreenshotService(self.client) as s: s.save(save_path)
+            from pymobiledevice3.services.screenshot import ScreenshotService
+            with ScreenshotService(self.client) as s: data = s.take_screenshot()
+            with open(save_path, "wb") as f: f.write(data)
             self.action_finished.emit("Success", f"Screenshot saved to:\n{save_path}")
         except Exception as e: self.action_error.emit("Screenshot Error", f"Failed to take screenshot:\n{e}")
 
     def get_battery_info(self):
         if not self.client: self.action_error.emit("Battery Error", "Not connected."); return
         try:
+            from pymobiledevice3.services.diagnostics import DiagnosticsService
             with DiagnosticsService(self.client) as diag: info = diag.get_battery()
             level = info.get("BatteryCurrentCapacity", "N/A"); status = info.get("BatteryChargeStatus", "N/A")
             self.action_finished.emit("Battery Info", f"Battery Level: {level}%\nStatus: {status}")
@@ -447,6 +780,7 @@ class DeviceLogic(QObject):
         if not self.client: self.action_error.emit("Reboot Error", "Not connected."); return
         try:
             self.log_message.emit("Sending reboot command...")
+            from pymobiledevice3.services.diagnostics import DiagnosticsService
             with DiagnosticsService(self.client) as diag: diag.restart()
             self.action_finished.emit("Reboot", "Device is rebooting. Connection will be lost.")
             self.device_disconnected.emit("Reboot initiated.")
@@ -456,6 +790,7 @@ class DeviceLogic(QObject):
         if not self.client: self.action_error.emit("Shutdown Error", "Not connected."); return
         try:
             self.log_message.emit("Sending shutdown command...")
+            from pymobiledevice3.services.diagnostics import DiagnosticsService
             with DiagnosticsService(self.client) as diag: diag.shutdown()
             self.action_finished.emit("Shutdown", "Device is powering off. Connection will be lost.")
             self.device_disconnected.emit("Shutdown initiated.")
@@ -465,30 +800,110 @@ class DeviceLogic(QObject):
         if not self.client: self.action_error.emit("Recovery Error", "Not connected."); return
         try:
             self.log_message.emit("Sending recovery command...")
+            from pymobiledevice3.services.diagnostics import DiagnosticsService
             with DiagnosticsService(self.client) as diag: diag.enter_recovery()
             self.action_finished.emit("Recovery", "Device entering recovery mode. Connection will be lost.")
             self.device_disconnected.emit("Recovery initiated.")
         except Exception as e: self.action_error.emit("Recovery Error", f"Failed to enter recovery:\n{e}")
     
+    def syslog_running(self):
+        return self.syslog_task is not None and not self.syslog_task.done()
+
     def start_syslog(self):
-        if self.syslog_thread and self.syslog_thread.is_alive(): return
-        if not self.client: self.action_error.emit("Syslog Error", "Not connected."); return
-        self.stop_syslog_event.clear()
-        def _stream_task():
+        if self.syslog_running(): return
+        if not self.client or not self.engine: self.action_error.emit("Syslog Error", "Not connected."); return
+        async def _stream_task():
             try:
-                print("LOGIC: Starting syslog stream thread...")
-                with SyslogService(self.client) as syslog:
-                    for line in syslog.watch():
-                        if self.stop_syslog_event.is_set(): break
-                        self.syslog_message.emit(line)
+                print("LOGIC: Starting syslog stream...")
+                async for line in self.engine.syslog(): self.syslog_message.emit(line)
             except Exception as e: print(f"LOGIC: Syslog stream error: {e}"); self.syslog_message.emit(f"\n--- SYSLOG ERROR: {e} ---\n")
-            finally: print("LOGIC: Syslog stream thread finished."); self.syslog_stopped.emit()
-        self.syslog_thread = threading.Thread(target=_stream_task, daemon=True)
-        self.syslog_thread.start()
+            finally: print("LOGIC: Syslog stream finished."); self.syslog_stopped.emit()
+        self.syslog_task = self.engine.submit(_stream_task())
 
     def stop_syslog(self):
         print("LOGIC: Stopping syslog stream...")
-        self.stop_syslog_event.set()
+        if self.syslog_task: self.syslog_task.cancel()
+
+
+class FileListModel(QAbstractListModel):
+    # rows are (text, color); QListView with uniform item sizes only asks for the
+    # rows it paints. A refreshed listing goes in as row removes/inserts, so the
+    # selection and scroll position of everything that stayed put are untouched.
+    DIFF_MAX_CHANGES = 500
+
+    KEPT_ICONS = 600
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._colors = {}
+        self._icons = OrderedDict()
+        self._row_of = None
+        self.show_icons = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid(): return None
+        text, color = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole: return text
+        if role == Qt.ItemDataRole.DecorationRole and self.show_icons: return self._icons.get(text)
+        if role == Qt.ItemDataRole.ForegroundRole and color:
+            if color not in self._colors: self._colors[color] = QColor(color)
+            return self._colors[color]
+        return None
+
+    def text(self, row):
+        return self._rows[row][0]
+
+    def set_icon(self, text, pixmap):
+        self._icons[text] = pixmap; self._icons.move_to_end(text)
+        while len(self._icons) > self.KEPT_ICONS: self._icons.popitem(last=False)
+        if self._row_of is None: self._row_of = {t: row for row, (t, _) in enumerate(self._rows)}
+        row = self._row_of.get(text)
+        if row is not None: self.dataChanged.emit(self.index(row), self.index(row), [Qt.ItemDataRole.DecorationRole])
+
+    def clear_icons(self):
+        self._icons.clear()
+
+    def set_rows(self, rows, diff=True):
+        # returns True when the rows were applied as a diff
+        self._row_of = None
+        changes = self._diff(self._rows, rows) if diff else None
+        if changes is None:
+            self.beginResetModel(); self._rows = list(rows); self.endResetModel()
+            return False
+        removed, added = changes
+        for start, end in reversed(self._runs(removed)):
+            self.beginRemoveRows(QModelIndex(), start, end); del self._rows[start:end + 1]; self.endRemoveRows()
+        for start, end in self._runs(added):
+            self.beginInsertRows(QModelIndex(), start, end); self._rows[start:start] = rows[start:end + 1]; self.endInsertRows()
+        return True
+
+    def append_rows(self, rows):
+        if not rows: return
+        self._row_of = None
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1); self._rows.extend(rows); self.endInsertRows()
+
+    def _diff(self, old, new):
+        # both lists are sorted the same way, so dropping the removed rows and then
+        # inserting the added ones at their new positions turns old into new
+        new_keys, old_keys = set(new), set(old)
+        removed = [i for i, row in enumerate(old) if row not in new_keys]
+        added = [i for i, row in enumerate(new) if row not in old_keys]
+        if len(removed) + len(added) > self.DIFF_MAX_CHANGES: return None
+        if [row for row in old if row in new_keys] != [row for row in new if row in old_keys]: return None
+        return removed, added
+
+    @staticmethod
+    def _runs(indices):
+        runs = []
+        for i in indices:
+            if runs and runs[-1][1] == i - 1: runs[-1][1] = i
+            else: runs.append([i, i])
+        return runs
 
 
 class PyAFCGui(QMainWindow):
@@ -499,6 +914,14 @@ class PyAFCGui(QMainWindow):
         self.logic = None
         self.worker_thread = None
         self.log_dialog = None
+        self.transfers_dialog = None
+        self.find_dialog = None
+        self.usage_dialog = None
+        self.usage = None
+        self.usage_path = "/"
+        self.shown_path = None
+        self.connected = False
+        self.dir_cache = DirectoryCache()
         
         self.setup_menubar()
         self.setup_waiting_ui()
@@ -571,7 +994,7 @@ class PyAFCGui(QMainWindow):
             self.worker_thread.wait()
 
         self.worker_thread = QThread()
-        self.logic = DeviceLogic()
+        self.logic = DeviceLogic(self.dir_cache)
         self.logic.moveToThread(self.worker_thread)
         
         self.worker_thread.started.connect(self.logic.start_device_listener)
@@ -581,10 +1004,13 @@ class PyAFCGui(QMainWindow):
         
         self.logic.device_info_updated.connect(self.on_device_info_updated)
         self.logic.file_list_updated.connect(self.on_file_list_updated)
+        self.logic.file_list_batch.connect(self.on_file_list_batch)
+        self.logic.thumbnail_ready.connect(self.on_thumbnail_ready)
         self.logic.app_list_updated.connect(self.on_app_list_updated)
         
         self.logic.action_finished.connect(self.on_action_finished)
         self.logic.action_error.connect(self.on_action_error)
+        self.logic.status_message.connect(self.on_status_message)
         
         self.logic.syslog_message.connect(self.on_syslog_message)
         self.logic.syslog_stopped.connect(self.on_syslog_stopped)
@@ -594,6 +1020,8 @@ class PyAFCGui(QMainWindow):
         print("LISTENER: Started.")
 
     def on_log_message(self, message):
+        if self.connected:
+            print(f"LOG: {message}"); return
         if not self.log_dialog:
             self.log_dialog = QDialog(self)
             self.log_dialog.setWindowTitle("Connection Log")
@@ -613,6 +1041,7 @@ class PyAFCGui(QMainWindow):
 
     def on_connection_successful(self, device_name, all_info, preloaded_apps, preloaded_files_data):
         print("MAIN: Success.")
+        self.connected = True
         if self.log_dialog:
             self.log_dialog.accept()
             self.log_dialog = None
@@ -624,6 +1053,7 @@ class PyAFCGui(QMainWindow):
         self.device_menu.setDisabled(False)
 
         self.on_device_info_updated(self.logic.get_formatted_device_info(all_info))
+        self.logic.history.visit(self.logic.current_path)
         self.on_file_list_updated(*preloaded_files_data)
         self.on_app_list_updated(preloaded_apps, None)
         
@@ -636,6 +1066,7 @@ class PyAFCGui(QMainWindow):
 
     def on_connection_failed(self, error_message):
         print("MAIN: Failed.")
+        self.connected = False
         if self.log_dialog:
             self.log_dialog.reject()
             self.log_dialog = None
@@ -671,7 +1102,7 @@ class PyAFCGui(QMainWindow):
         self.device_menu.addAction(ss_action)
         
         bat_action = QAction("Get Battery Info", self)
-        bat_action.triggered.connect(lambda: self.logic.run_in_thread(self.logic.get_battery_info))
+        bat_action.triggered.connect(lambda: self.logic.workers.run(self.logic.get_battery_info, key="battery", on_dropped=self.show_busy))
         self.device_menu.addAction(bat_action)
         
         self.device_menu.addSeparator()
@@ -740,7 +1171,7 @@ class PyAFCGui(QMainWindow):
         tab.setLayout(layout)
         self.info_btn = QPushButton("Refresh Info")
         self.info_btn.setFont(self.font)
-        self.info_btn.clicked.connect(lambda: self.logic.run_in_thread(self.logic.refresh_device_info))
+        self.info_btn.clicked.connect(lambda: self.logic.workers.run(self.logic.refresh_device_info, key="device-info", on_dropped=self.show_busy))
         layout.addWidget(self.info_btn)
         self.info_text = QTextEdit()
         self.info_text.setReadOnly(True)
@@ -754,6 +1185,12 @@ class PyAFCGui(QMainWindow):
         layout = QVBoxLayout()
         tab.setLayout(layout)
         nav = QFrame(); nav_layout = QHBoxLayout(); nav.setLayout(nav_layout)
+        self.back_btn = QPushButton("<"); self.back_btn.setFont(self.font); self.back_btn.setFixedWidth(30); self.back_btn.setShortcut("Alt+Left")
+        self.back_btn.clicked.connect(lambda: self.on_history_step(False)); self.back_btn.setEnabled(False)
+        nav_layout.addWidget(self.back_btn)
+        self.forward_btn = QPushButton(">"); self.forward_btn.setFont(self.font); self.forward_btn.setFixedWidth(30); self.forward_btn.setShortcut("Alt+Right")
+        self.forward_btn.clicked.connect(lambda: self.on_history_step(True)); self.forward_btn.setEnabled(False)
+        nav_layout.addWidget(self.forward_btn)
         nav_layout.addWidget(QLabel("Path:"))
         self.path_entry = QLineEdit()
         self.path_entry.setFont(MONO_FONT)
@@ -763,69 +1200,375 @@ class PyAFCGui(QMainWindow):
         self.go_up_btn.setFont(self.font)
         self.go_up_btn.clicked.connect(self.on_file_go_up)
         nav_layout.addWidget(self.go_up_btn)
+        self.find_btn = QPushButton("Find..."); self.find_btn.setFont(self.font); self.find_btn.clicked.connect(self.on_show_find); self.find_btn.setShortcut("Ctrl+F")
+        nav_layout.addWidget(self.find_btn)
+        self.usage_btn = QPushButton("Usage"); self.usage_btn.setFont(self.font); self.usage_btn.clicked.connect(self.on_show_usage)
+        nav_layout.addWidget(self.usage_btn)
+        self.thumbs_btn = QPushButton("Thumbs"); self.thumbs_btn.setFont(self.font); self.thumbs_btn.setCheckable(True); self.thumbs_btn.toggled.connect(self.on_toggle_thumbnails)
+        nav_layout.addWidget(self.thumbs_btn)
         layout.addWidget(nav)
         
-        self.file_list_widget = QListWidget()
+        self.file_model = FileListModel(self)
+        self.file_list_widget = QListView()
         self.file_list_widget.setFont(LIST_FONT)
-        self.file_list_widget.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
-        self.file_list_widget.itemDoubleClicked.connect(self.on_file_double_clicked)
+        self.file_list_widget.setUniformItemSizes(True)
+        self.file_list_widget.setModel(self.file_model)
+        self.file_list_widget.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.file_list_widget.doubleClicked.connect(self.on_file_double_clicked)
         layout.addWidget(self.file_list_widget)
+        # icon view over the same model and selection; it only paints the cells in view
+        self.thumb_view = QListView()
+        self.thumb_view.setViewMode(QListView.ViewMode.IconMode)
+        self.thumb_view.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self.thumb_view.setGridSize(QSize(THUMB_SIZE + 24, THUMB_SIZE + 40))
+        self.thumb_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.thumb_view.setMovement(QListView.Movement.Static)
+        self.thumb_view.setUniformItemSizes(True)
+        self.thumb_view.setWordWrap(True)
+        self.thumb_view.setModel(self.file_model)
+        self.thumb_view.setSelectionModel(self.file_list_widget.selectionModel())
+        self.thumb_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.thumb_view.doubleClicked.connect(self.on_file_double_clicked)
+        self.thumb_view.hide()
+        layout.addWidget(self.thumb_view)
+        self.thumb_timer = QTimer(self); self.thumb_timer.setSingleShot(True); self.thumb_timer.setInterval(50)
+        self.thumb_timer.timeout.connect(self.request_thumbnails)
+        self.thumb_view.verticalScrollBar().valueChanged.connect(lambda _: self.thumb_timer.start())
+        self.file_model.modelReset.connect(self.thumb_timer.start)
+        self.file_model.rowsInserted.connect(lambda *_: self.thumb_timer.start())
         
         act_frame = QFrame(); act_layout = QHBoxLayout(); act_frame.setLayout(act_layout)
         self.upload_btn = QPushButton("Upload..."); self.upload_btn.setFont(self.font); self.upload_btn.clicked.connect(self.on_file_upload)
         act_layout.addWidget(self.upload_btn)
+        self.upload_folder_btn = QPushButton("Upload Folder..."); self.upload_folder_btn.setFont(self.font); self.upload_folder_btn.clicked.connect(self.on_folder_upload)
+        act_layout.addWidget(self.upload_folder_btn)
         self.download_btn = QPushButton("Download..."); self.download_btn.setFont(self.font); self.download_btn.clicked.connect(self.on_file_download)
         act_layout.addWidget(self.download_btn)
+        self.sync_btn = QPushButton("Sync To PC..."); self.sync_btn.setFont(self.font); self.sync_btn.clicked.connect(self.on_folder_sync)
+        act_layout.addWidget(self.sync_btn)
+        self.archive_btn = QPushButton("Export Archive..."); self.archive_btn.setFont(self.font); self.archive_btn.clicked.connect(self.on_folder_archive)
+        act_layout.addWidget(self.archive_btn)
         act_layout.addStretch()
+        self.transfers_btn = QPushButton("Transfers..."); self.transfers_btn.setFont(self.font); self.transfers_btn.clicked.connect(self.on_show_transfers)
+        act_layout.addWidget(self.transfers_btn)
+        self.stats_btn = QPushButton("Export Stats..."); self.stats_btn.setFont(self.font); self.stats_btn.clicked.connect(self.on_export_stats)
+        act_layout.addWidget(self.stats_btn)
         layout.addWidget(act_frame)
 
     def on_file_path_entered(self):
         path = self.path_entry.text()
-        if self.logic: self.logic.run_in_thread(self.logic.fetch_file_list, path)
+        if self.logic: self.navigate_to(path, True)
             
     def on_file_go_up(self):
         current = self.logic.current_path.rstrip('/')
         if current == "/" or (not self.logic.is_jailbroken and current == ""): return
         p = os.path.dirname(self.logic.current_path).replace("\\", "/")
-        if self.logic: self.logic.run_in_thread(self.logic.fetch_file_list, p)
+        if self.logic: self.navigate_to(p)
 
-    def on_file_double_clicked(self, item):
-        text = item.text()
+    def on_file_double_clicked(self, index):
+        text = self.file_model.text(index.row())
         if text.startswith("[FOLDER] "):
             name = text.replace("[FOLDER] ", "")
             p = os.path.join(self.logic.current_path, name).replace("\\", "/")
-            if self.logic: self.logic.run_in_thread(self.logic.fetch_file_list, p)
+            if self.logic: self.navigate_to(p)
+
+    def navigate_to(self, path, refresh=False):
+        self.save_file_view()
+        self.logic.fetch_file_list(path, refresh)
+
+    def on_history_step(self, forward):
+        if not self.logic: return
+        self.save_file_view()
+        self.logic.go_history(forward)
+
+    def selected_file_names(self):
+        rows = sorted(i.row() for i in self.file_list_widget.selectionModel().selectedRows())
+        return [self.file_model.text(row) for row in rows]
+
+    def file_view(self):
+        bar = self.file_list_widget.verticalScrollBar()
+        return self.selected_file_names(), bar.value() / bar.maximum() if bar.maximum() else 0.0
+
+    def save_file_view(self):
+        if self.shown_path is not None: self.logic.history.save_view(self.shown_path, *self.file_view())
 
     def on_file_list_updated(self, folders, files, error):
-        self.file_list_widget.clear()
+        # a refresh of the shown folder keeps what the user is looking at; another
+        # folder gets back the selection and scroll position it was left with
+        path = self.logic.current_path
+        if path == self.shown_path:
+            view = self.file_view()
+        else:
+            state = self.logic.history.view(path)
+            view = (state.selection, state.scroll) if state else None
+        refresh = path == self.shown_path
+        if not refresh: self.file_model.clear_icons()
+        self.shown_path = path
+        self.path_entry.setText(path)
+        self.back_btn.setEnabled(self.logic.history.can_back()); self.forward_btn.setEnabled(self.logic.history.can_forward())
         if error:
-            item = QListWidgetItem(f"Error: {error}"); item.setForeground(QColor("red")); self.file_list_widget.addItem(item); return
-        for f in sorted(folders, key=str.lower):
-            item = QListWidgetItem(f); item.setForeground(QColor("#87CEFA")); self.file_list_widget.addItem(item)
-        for f in sorted(files, key=str.lower):
-            self.file_list_widget.addItem(f)
-        self.path_entry.setText(self.logic.current_path)
+            self.file_model.set_rows([(f"Error: {error}", "red")], diff=False); return
+        rows = [(f, "#87CEFA") for f in sorted(folders, key=str.lower)] + [(f, None) for f in sorted(files, key=str.lower)]
+        # a refresh that changed a few entries keeps selection and scroll by itself
+        if self.file_model.set_rows(rows, diff=refresh) or not view: return
+        selected, selection = set(view[0]), self.file_list_widget.selectionModel()
+        for row, (text, _) in enumerate(rows):
+            if text in selected: selection.select(self.file_model.index(row), QItemSelectionModel.SelectionFlag.Select)
+        bar = self.file_list_widget.verticalScrollBar()
+        QTimer.singleShot(0, lambda: bar.setValue(int(view[1] * bar.maximum())))
+
+    def on_file_list_batch(self, path, folders, files, first):
+        # appended as they arrive; the sorted listing that follows replaces them
+        if path != self.logic.current_path: return
+        if first:
+            self.shown_path = path
+            self.path_entry.setText(path)
+            self.back_btn.setEnabled(self.logic.history.can_back()); self.forward_btn.setEnabled(self.logic.history.can_forward())
+            self.file_model.clear_icons()
+            self.file_model.set_rows([], diff=False)
+        self.file_model.append_rows([(f, "#87CEFA") for f in folders] + [(f, None) for f in files])
+
+    def on_toggle_thumbnails(self, on):
+        self.file_model.show_icons = on
+        self.file_list_widget.setVisible(not on); self.thumb_view.setVisible(on)
+        self.thumbs_btn.setText("List" if on else "Thumbs")
+        self.thumb_timer.start()
+
+    def request_thumbnails(self):
+        # the cells in view plus a few rows below, so scrolling on finds them ready
+        if not self.logic or not self.thumb_view.isVisible() or not self.file_model.rowCount(): return
+        viewport, count = self.thumb_view.viewport(), self.file_model.rowCount()
+        first = max(0, self.thumb_view.indexAt(viewport.rect().topLeft() + QPoint(4, 4)).row())
+        last = self.thumb_view.indexAt(viewport.rect().bottomRight() - QPoint(4, 4)).row()
+        columns = max(1, viewport.width() // self.thumb_view.gridSize().width())
+        last = min(count - 1, (count - 1 if last < 0 else last) + 3 * columns)
+        self.logic.load_thumbnails([self.file_model.text(row) for row in range(first, last + 1)])
+
+    def on_thumbnail_ready(self, folder, name, data):
+        if not self.logic or folder != self.logic.current_path: return
+        pixmap = QPixmap()
+        if pixmap.loadFromData(data): self.file_model.set_icon(name, pixmap)
 
     def on_file_upload(self):
         paths, _ = QFileDialog.getOpenFileNames(self, "Select File(s) to Upload")
         if not paths: return
-        if self.logic: self.logic.run_in_thread(self.logic.upload_files, paths, self.logic.current_path)
+        if self.logic: self.logic.upload_files(paths, self.logic.current_path)
+
+    def on_folder_upload(self):
+        path = QFileDialog.getExistingDirectory(self, "Select Folder to Upload")
+        if not path: return
+        if self.logic: self.logic.upload_folder(path, self.logic.current_path)
 
     def on_file_download(self):
-        items = self.file_list_widget.selectedItems()
-        if not items: self.on_action_error("Download", "No files selected."); return
-        to_dl = [item.text() for item in items if not item.text().startswith("[FOLDER]")]
-        if not to_dl: self.on_action_error("Download", "Please select files, not folders."); return
+        names = self.selected_file_names()
+        if not names: self.on_action_error("Download", "No files selected."); return
+        to_dl = [name for name in names if not name.startswith("[FOLDER] ")]
+        folders = [name.replace("[FOLDER] ", "", 1) for name in names if name.startswith("[FOLDER] ")]
         save_dir = QFileDialog.getExistingDirectory(self, "Select Folder to Save To")
         if not save_dir: return
-        if self.logic: self.logic.run_in_thread(self.logic.download_files, to_dl, save_dir)
+        if self.logic: self.logic.download_files(to_dl, save_dir, folders)
+
+    def on_show_transfers(self):
+        if not self.transfers_dialog:
+            self.transfers_dialog = QDialog(self)
+            self.transfers_dialog.setWindowTitle("Transfers")
+            layout = QVBoxLayout()
+            self.transfers_list = QListWidget(); self.transfers_list.setFont(LIST_FONT)
+            layout.addWidget(self.transfers_list)
+            self.pool_label = QLabel(); self.pool_label.setFont(self.font)
+            layout.addWidget(self.pool_label)
+            self.workers_label = QLabel(); self.workers_label.setFont(self.font)
+            layout.addWidget(self.workers_label)
+            # queue depth and wait times change without job events, so they tick while the dialog is open
+            self.stats_timer = QTimer(self.transfers_dialog); self.stats_timer.setInterval(STATS_INTERVAL_MS)
+            self.stats_timer.timeout.connect(self.on_worker_stats)
+            btn_layout = QHBoxLayout()
+            for text, action in (("Pause", "pause"), ("Resume", "resume"), ("Cancel", "cancel"), ("Move Up", "move_up"), ("Move Down", "move_down")):
+                btn = QPushButton(text); btn.setFont(self.font); btn.clicked.connect(lambda checked=False, a=action: self.on_transfer_job_action(a))
+                btn_layout.addWidget(btn)
+            btn_layout.addStretch()
+            clear_btn = QPushButton("Clear Finished"); clear_btn.setFont(self.font)
+            clear_btn.clicked.connect(lambda: self.logic.scheduler and self.logic.scheduler.clear_finished())
+            btn_layout.addWidget(clear_btn)
+            layout.addLayout(btn_layout)
+            self.transfers_dialog.setLayout(layout)
+            self.center_toplevel(self.transfers_dialog, 760, 320)
+            self.logic.jobs_changed.connect(self.on_jobs_changed)
+        self.on_jobs_changed(); self.on_worker_stats(); self.stats_timer.start()
+        self.transfers_dialog.show(); self.transfers_dialog.raise_()
+
+    def on_jobs_changed(self):
+        if not self.transfers_dialog or not self.logic: return
+        jobs = self.logic.scheduler.jobs() if self.logic.scheduler else []
+        # the selection follows the job, since moving one reorders the list
+        selected = {i.data(Qt.ItemDataRole.UserRole) for i in self.transfers_list.selectedItems()}
+        self.transfers_list.clear()
+        for job in jobs:
+            item = QListWidgetItem(job.describe()); item.setData(Qt.ItemDataRole.UserRole, job.id)
+            self.transfers_list.addItem(item)
+            if job.id in selected: item.setSelected(True)
+        if self.logic.afc_pool: self.pool_label.setText("AFC: " + format_pool_stats(self.logic.afc_pool.stats()))
+
+    def on_worker_stats(self):
+        if not self.transfers_dialog or not self.logic: return
+        if not self.transfers_dialog.isVisible() and self.stats_timer.isActive(): self.stats_timer.stop(); return
+        stats = self.logic.workers.stats() + ([self.logic.engine.stats()] if self.logic.engine else [])
+        self.workers_label.setText("Workers: " + format_worker_stats(stats).replace(" | ", "\n"))
+        if self.logic.afc_pool: self.pool_label.setText("AFC: " + format_pool_stats(self.logic.afc_pool.stats()))
+
+    def on_transfer_job_action(self, action):
+        if not self.logic or not self.logic.scheduler: return
+        for item in self.transfers_list.selectedItems():
+            getattr(self.logic.scheduler, action)(item.data(Qt.ItemDataRole.UserRole))
+
+    def on_show_find(self):
+        if not self.find_dialog:
+            self.find_dialog = QDialog(self)
+            self.find_dialog.setWindowTitle("Find on Device")
+            layout = QVBoxLayout()
+            bar = QHBoxLayout()
+            self.find_mode = QComboBox(); self.find_mode.addItems(["Name", "Fuzzy", "Largest"]); self.find_mode.setFont(self.font)
+            self.find_mode.currentIndexChanged.connect(self.on_find_query)
+            bar.addWidget(self.find_mode)
+            self.find_entry = QLineEdit(); self.find_entry.setFont(MONO_FONT); self.find_entry.setPlaceholderText("name, *.glob or folder for Largest")
+            self.find_entry.textChanged.connect(self.on_find_query)
+            bar.addWidget(self.find_entry, 1)
+            reindex_btn = QPushButton("Reindex"); reindex_btn.setFont(self.font)
+            reindex_btn.clicked.connect(self.on_find_reindex)
+            bar.addWidget(reindex_btn)
+            layout.addLayout(bar)
+            self.find_list = QListWidget(); self.find_list.setFont(LIST_FONT)
+            self.find_list.itemDoubleClicked.connect(self.on_find_result_open)
+            layout.addWidget(self.find_list)
+            self.find_status = QLabel(""); self.find_status.setFont(self.font)
+            layout.addWidget(self.find_status)
+            self.find_dialog.setLayout(layout)
+            self.center_toplevel(self.find_dialog, 720, 420)
+            self.logic.index_status.connect(self.find_status.setText)
+            self.logic.index_results.connect(self.on_find_results)
+        self.find_status.setText(self.logic.index_summary())
+        self.find_dialog.show(); self.find_dialog.raise_(); self.find_entry.setFocus()
+
+    def on_find_reindex(self):
+        self.logic.start_indexing(force=True)
+        self.find_status.setText(self.logic.index_summary())
+
+    def on_find_query(self):
+        if not self.logic: return
+        self.logic.search_index(self.find_entry.text(), self.find_mode.currentText().lower())
+
+    def on_find_results(self, results, elapsed_ms):
+        self.find_list.clear()
+        for e in results:
+            item = QListWidgetItem(f"{'<dir>' if e.is_dir else format_size(e.size or 0):>10}  {e.path}")
+            item.setData(Qt.ItemDataRole.UserRole, e.path if e.is_dir else os.path.dirname(e.path) or "/")
+            if e.is_dir: item.setForeground(QColor("#87CEFA"))
+            self.find_list.addItem(item)
+        self.find_status.setText(f"{len(results)} result(s) in {elapsed_ms:.0f} ms")
+
+    def on_find_result_open(self, item):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        self.tab_view.setCurrentWidget(self.tab_files)
+        self.navigate_to(path)
+
+    def on_show_usage(self):
+        if not self.logic: return
+        if not self.usage_dialog:
+            self.usage_dialog = QDialog(self)
+            self.usage_dialog.setWindowTitle("Disk Usage")
+            layout = QVBoxLayout()
+            bar = QHBoxLayout()
+            up_btn = QPushButton("Up"); up_btn.setFont(self.font); up_btn.clicked.connect(self.on_usage_up)
+            bar.addWidget(up_btn)
+            self.usage_path_label = QLabel(""); self.usage_path_label.setFont(MONO_FONT)
+            bar.addWidget(self.usage_path_label, 1)
+            self.usage_sort = QComboBox(); self.usage_sort.addItems(["Size", "Files", "Name"]); self.usage_sort.setFont(self.font)
+            self.usage_sort.currentIndexChanged.connect(lambda _: self.on_usage_updated(self.usage))
+            bar.addWidget(self.usage_sort)
+            rescan_btn = QPushButton("Rescan"); rescan_btn.setFont(self.font)
+            rescan_btn.clicked.connect(lambda: self.show_usage(self.usage_path, rescan=True))
+            bar.addWidget(rescan_btn)
+            layout.addLayout(bar)
+            self.usage_list = QListWidget(); self.usage_list.setFont(MONO_FONT)
+            self.usage_list.itemDoubleClicked.connect(self.on_usage_open)
+            layout.addWidget(self.usage_list)
+            self.usage_status = QLabel(""); self.usage_status.setFont(self.font)
+            layout.addWidget(self.usage_status)
+            self.usage_dialog.setLayout(layout)
+            self.center_toplevel(self.usage_dialog, 760, 460)
+            self.usage_dialog.finished.connect(lambda _: self.logic.stop_usage())
+            self.logic.usage_updated.connect(self.on_usage_updated)
+        self.show_usage(self.logic.current_path)
+        self.usage_dialog.show(); self.usage_dialog.raise_()
+
+    def show_usage(self, path, rescan=False):
+        usage = self.logic.analyze_usage(path, rescan)
+        if usage is None: return
+        self.usage, self.usage_path = usage, path
+        self.usage_path_label.setText(path)
+        self.usage_list.clear()
+        self.on_usage_updated(usage)
+
+    def on_usage_updated(self, usage):
+        # partial totals stream in while the walk runs; "+" marks folders still being added up
+        if usage is not self.usage: return
+        items = usage.children(self.usage_path, self.usage_sort.currentText().lower()) or []
+        total, files, _ = usage.total(self.usage_path)
+        current = self.usage_list.currentItem()
+        selected = current.data(Qt.ItemDataRole.UserRole) if current else None
+        scroll = self.usage_list.verticalScrollBar().value()
+        self.usage_list.clear()
+        for item in items:
+            row = QListWidgetItem(format_usage_row(item, total))
+            row.setData(Qt.ItemDataRole.UserRole, item.entry.path if item.entry.is_dir else None)
+            if item.entry.is_dir: row.setForeground(QColor("#87CEFA"))
+            self.usage_list.addItem(row)
+            if selected and item.entry.path == selected: self.usage_list.setCurrentItem(row)
+        self.usage_list.verticalScrollBar().setValue(scroll)
+        self.usage_status.setText(f"{self.usage_path}: {format_size(total)} in {files} file(s) | {usage.summary()}")
+
+    def on_usage_open(self, item):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        if path: self.show_usage(path)
+
+    def on_usage_up(self):
+        parent = os.path.dirname(self.usage_path.rstrip("/")) or "/"
+        if parent != self.usage_path: self.show_usage(parent)
+
+    def on_export_stats(self):
+        if not self.logic: return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Transfer Stats", "transfer-stats.json", "JSON (*.json)")
+        if path: self.logic.export_transfer_stats(path)
+
+    def on_folder_sync(self):
+        if not self.logic: return
+        names = self.selected_file_names()
+        remote_root = self.logic.current_path
+        if len(names) == 1 and names[0].startswith("[FOLDER] "):
+            remote_root = join_path(remote_root, names[0].replace("[FOLDER] ", "", 1))
+        save_dir = QFileDialog.getExistingDirectory(self, f"Sync {remote_root} To")
+        if not save_dir: return
+        local_root = os.path.join(save_dir, os.path.basename(remote_root.rstrip("/")) or "device")
+        delete = QMessageBox.question(self, "Sync", f"Delete files in\n{local_root}\nthat no longer exist on the device?") == QMessageBox.StandardButton.Yes
+        self.logic.sync_folder(remote_root, local_root, delete)
+
+    def on_folder_archive(self):
+        if not self.logic: return
+        names = self.selected_file_names()
+        remote_root = self.logic.current_path
+        if len(names) == 1 and names[0].startswith("[FOLDER] "):
+            remote_root = join_path(remote_root, names[0].replace("[FOLDER] ", "", 1))
+        default = (os.path.basename(remote_root.rstrip("/")) or "device") + ".zip"
+        path, _ = QFileDialog.getSaveFileName(self, f"Export {remote_root} As", default,
+                                              "Zip archive (*.zip);;Gzipped tar (*.tar.gz);;Tar archive (*.tar)")
+        if path: self.logic.export_archive(remote_root, path)
 
     def setup_apps_tab(self, tab):
         layout = QVBoxLayout(); tab.setLayout(layout)
         btn_frame = QFrame(); btn_layout = QHBoxLayout(); btn_frame.setLayout(btn_layout)
         
         self.apps_btn = QPushButton("Refresh App List"); self.apps_btn.setFont(self.font)
-        self.apps_btn.clicked.connect(lambda: self.logic.run_in_thread(self.logic.fetch_app_list))
+        self.apps_btn.clicked.connect(lambda: self.logic.fetch_app_list())
         btn_layout.addWidget(self.apps_btn)
         
         self.install_btn = QPushButton("Install .ipa..."); self.install_btn.setFont(self.font)
@@ -905,7 +1648,7 @@ class PyAFCGui(QMainWindow):
         
         menu = QMenu(self)
         
-        menu.addAction("Explore Documents", lambda: self.logic.run_in_thread(self.logic.explore_app_documents, bundle_id))
+        menu.addAction("Explore Documents", lambda: self.logic.workers.run(self.logic.explore_app_documents, bundle_id, key=("explore", bundle_id), on_dropped=self.show_busy))
         menu.addAction("Export IPA (WIP)", lambda: self.on_action_error("TODO", "Export IPA not implemented."))
         menu.addAction("Export Backup (WIP)", lambda: self.on_action_error("TODO", "Export Backup not implemented."))
         menu.addAction("Import Backup (WIP)", lambda: self.on_action_error("TODO", "Import Backup not implemented."))
@@ -918,7 +1661,7 @@ class PyAFCGui(QMainWindow):
         ipa_path, _ = QFileDialog.getOpenFileName(self, "Select .ipa file", "", "IPA Files (*.ipa)")
         if not ipa_path: return
         if QMessageBox.question(self, "Confirm Install", f"Install {os.path.basename(ipa_path)}?") == QMessageBox.StandardButton.Yes:
-            if self.logic: self.logic.run_in_thread(self.logic.install_app, ipa_path)
+            if self.logic: self.logic.install_app(ipa_path)
 
     def on_app_uninstall(self, bundle_id, app_name):
         if QMessageBox.question(self, "Confirm Uninstall", f"Uninstall '{app_name}'?") == QMessageBox.StandardButton.Yes:
@@ -926,7 +1669,7 @@ class PyAFCGui(QMainWindow):
                 if QMessageBox.warning(self, "System App", f"'{app_name}' looks like a system app.\nProceed anyway?",
                                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No) == QMessageBox.StandardButton.No:
                     return
-            if self.logic: self.logic.run_in_thread(self.logic.uninstall_app, bundle_id, app_name)
+            if self.logic: self.logic.uninstall_app(bundle_id, app_name)
 
     def setup_syslog_tab(self, tab):
         layout = QVBoxLayout(); tab.setLayout(layout)
@@ -938,7 +1681,7 @@ class PyAFCGui(QMainWindow):
 
     def on_toggle_syslog(self):
         if not self.logic: return
-        if self.logic.syslog_thread and self.logic.syslog_thread.is_alive():
+        if self.logic.syslog_running():
             self.logic.stop_syslog()
         else:
             self.syslog_text.clear(); self.logic.start_syslog(); self.syslog_btn.setText("Stop Syslog (Running...)")
@@ -961,10 +1704,17 @@ class PyAFCGui(QMainWindow):
         QMessageBox.warning(self, title, message)
         self.status_label.setText(f"Error: {title}")
 
+    def on_status_message(self, message):
+        if hasattr(self, 'status_label'): self.status_label.setText(message)
+
     def on_device_disconnected(self, reason):
         print(f"MAIN: Device disconnected ({reason}), resetting UI.")
         self.on_connection_failed(f"Device disconnected: {reason}")
         
+    def show_busy(self):
+        # a click whose task could not even be queued
+        QMessageBox.warning(self, "Busy", BUSY_MESSAGE)
+
     def show_credits(self):
         QMessageBox.information(self, "PyAFC Credits",
                             "Developer: https://github.com/ZodaciOS\n"
@@ -975,15 +1725,15 @@ class PyAFCGui(QMainWindow):
         save_path, _ = QFileDialog.getSaveFileName(self, "Save Screenshot As...", filter="PNG Image (*.png)")
         if not save_path: return
         if not save_path.endswith(".png"): save_path += ".png"
-        if self.logic: self.logic.run_in_thread(self.logic.take_screenshot, save_path)
+        if self.logic: self.logic.workers.run(self.logic.take_screenshot, save_path, key="screenshot", on_dropped=self.show_busy)
 
     def on_reboot_device(self):
         if QMessageBox.question(self, "Confirm Reboot", "Are you sure you want to reboot the device?") == QMessageBox.StandardButton.Yes:
-            if self.logic: self.logic.run_in_thread(self.logic.reboot_device)
+            if self.logic: self.logic.workers.run(self.logic.reboot_device, key="reboot", on_dropped=self.show_busy)
             
     def on_shutdown_device(self):
         if QMessageBox.question(self, "Confirm Shutdown", "Are you sure you want to shut down the device?") == QMessageBox.StandardButton.Yes:
-            if self.logic: self.logic.run_in_thread(self.logic.shutdown_device)
+            if self.logic: self.logic.workers.run(self.logic.shutdown_device, key="shutdown", on_dropped=self.show_busy)
 
     def on_enter_recovery(self):
         if QMessageBox.warning(self, "!!! WARNING !!!",
@@ -991,12 +1741,12 @@ class PyAFCGui(QMainWindow):
                                "You must restore it with iTunes/Finder to use it again.\n\n"
                                "ARE YOU ABSOLUTELY SURE?",
                                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No) == QMessageBox.StandardButton.Yes:
-            if self.logic: self.logic.run_in_thread(self.logic.enter_recovery)
+            if self.logic: self.logic.workers.run(self.logic.enter_recovery, key="recovery", on_dropped=self.show_busy)
 
     def closeEvent(self, event):
          print("MAIN: Closing...")
          if self.worker_thread:
-             self.logic.stop_all_activity()
+             self.logic.stop_all_activity(); self.logic.workers.shutdown()
              self.worker_thread.quit()
              self.worker_thread.wait(1000)
          event.accept()
@@ -0,0 +1,54 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc.afc_pool import AfcSessionPool
+
+class SlowSession:
+    def __init__(self):
+        time.sleep(0.05)
+
+    def close(self):
+        pass
+
+def test_concurrent_bulk_leases_leave_the_reserved_sessions():
+    pool = AfcSessionPool(SlowSession, size=8, reserved=2)
+    granted = []
+    def take():
+        try:
+            granted.append(pool.acquire(timeout=1, bulk=True))
+        except TimeoutError:
+            pass
+    threads = [threading.Thread(target=take) for _ in range(8)]
+    for t in threads:
+        t.start()
+    # interactive leases still find a session while the bulk ones are opening
+    afc = pool.acquire(timeout=0.5)
+    pool.release(afc)
+    for t in threads:
+        t.join()
+    assert len(granted) == 6
+    assert pool.stats().bulk == 6
+    for afc in granted:
+        pool.release(afc)
+    assert pool.stats().bulk == 0
+    pool.close()
+
+def test_failed_bulk_open_frees_its_slot():
+    attempts = []
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("device went away")
+        return SlowSession()
+    pool = AfcSessionPool(factory, size=2, reserved=1)
+    try:
+        pool.acquire(bulk=True)
+    except ConnectionError:
+        pass
+    afc = pool.acquire(timeout=0.5, bulk=True)
+    pool.release(afc)
+    pool.close()
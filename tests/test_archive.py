@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import zipfile
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.archive import ArchiveExporter, zip_date
+from pyafc.listing import DirectoryLister
+
+class ReadOnlySession:
+    # neither lseek (like AfcService) nor raw ops: a reopened file is read forward
+    def __init__(self, inner):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        if name in ("lseek", "_do_operation"):
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+@pytest.mark.parametrize("raw_ops", [True, False])
+def test_concurrent_exports_on_a_shared_pool_finish(tmp_path, raw_ops):
+    # more readers than sessions across the exports, and files bigger than a chunk
+    # queue, on sessions without lseek
+    server = FakeAfcServer(rtt=0)
+    for export in range(3):
+        for i in range(12):
+            server.add_file(f"/E{export}/f{i:02d}.bin", bytes([i]) * (64 * 1024))
+    pool = AfcSessionPool(server.connect if raw_ops else lambda: ReadOnlySession(server.connect()), size=4)
+    lister = DirectoryLister(pool)
+    reports = {}
+    def run(export):
+        reports[export] = ArchiveExporter(lister, pool, chunk_size=8 * 1024).export(
+            f"/E{export}", str(tmp_path / f"E{export}.zip"), compress=False)
+    threads = [threading.Thread(target=run, args=(export,), daemon=True) for export in range(3)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        assert not any(t.is_alive() for t in threads)
+    finally:
+        lister.close()
+        pool.close()
+    for export in range(3):
+        assert reports[export].completed == 12 and not reports[export].failed
+        with zipfile.ZipFile(tmp_path / f"E{export}.zip") as zf:
+            assert zf.read(f"E{export}/f05.bin") == bytes([5]) * (64 * 1024)
+
+def test_zip_export_of_files_dated_before_1980(tmp_path):
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/Old/a.txt", b"a")
+    server.add_file("/Old/b.txt", b"b")
+    server.mtimes["/Old/a.txt"] = datetime(1970, 1, 2)
+    pool = AfcSessionPool(server.connect, size=2)
+    lister = DirectoryLister(pool)
+    try:
+        report = ArchiveExporter(lister, pool).export("/Old", str(tmp_path / "old.zip"))
+    finally:
+        lister.close()
+        pool.close()
+    assert report.completed == 2 and not report.failed
+    with zipfile.ZipFile(tmp_path / "old.zip") as zf:
+        assert zf.getinfo("Old/a.txt").date_time == (1980, 1, 1, 0, 0, 0)
+        assert zf.read("Old/b.txt") == b"b"
+    assert zip_date(5e9)[0] == 2107
+
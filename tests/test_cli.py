@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc import cli
+from pymobiledevice3.exceptions import AlreadyMountedError
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+class FakeLockdown:
+    udid = "fake-udid"
+
+    def close(self):
+        pass
+
+class FakeScreenshotService:
+    def __init__(self, client):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def take_screenshot(self):
+        return PNG
+
+@pytest.fixture
+def device(monkeypatch):
+    # the services the CLI opens, swapped for fakes in their real modules, so a
+    # wrong service import fails here as it would on a device
+    from pymobiledevice3.services import afc, mobile_image_mounter, screenshot
+    from pymobiledevice3 import lockdown
+    server = FakeAfcServer(rtt=0)
+    server.mounts = []
+    def auto_mount(client, xcode=None, version=None):
+        server.mounts.append(client)
+    monkeypatch.setattr(lockdown, "create_using_usbmux", lambda serial=None: FakeLockdown())
+    monkeypatch.setattr(afc, "AfcService", lambda client: server.connect())
+    monkeypatch.setattr(mobile_image_mounter, "auto_mount", auto_mount)
+    monkeypatch.setattr(screenshot, "ScreenshotService", FakeScreenshotService)
+    return server
+
+def run(argv, capsys):
+    status = cli.main(argv)
+    out = capsys.readouterr().out
+    return status, [json.loads(line) for line in out.splitlines()]
+
+def test_screenshot_mounts_the_image_and_saves_the_png(device, tmp_path, capsys):
+    path = str(tmp_path / "shot.png")
+    status, results = run(["screenshot", path], capsys)
+    assert status == 0
+    assert results == [{"path": path, "bytes": len(PNG)}]
+    assert len(device.mounts) == 1
+    with open(path, "rb") as f:
+        assert f.read() == PNG
+
+@pytest.mark.parametrize("failure", [AlreadyMountedError, OSError])
+def test_screenshot_without_a_fresh_mount(device, tmp_path, capsys, monkeypatch, failure):
+    from pymobiledevice3.services import mobile_image_mounter
+    def auto_mount(client, xcode=None, version=None):
+        raise failure("no image")
+    monkeypatch.setattr(mobile_image_mounter, "auto_mount", auto_mount)
+    status, results = run(["screenshot", str(tmp_path / "shot.png")], capsys)
+    assert status == 0
+    assert results[0]["bytes"] == len(PNG)
+
+def test_screenshot_with_a_coroutine_auto_mount(device, tmp_path, capsys, monkeypatch):
+    # pymobiledevice3 4.x
+    from pymobiledevice3.services import mobile_image_mounter
+    async def auto_mount(client, xcode=None, version=None):
+        await asyncio.sleep(0)
+        device.mounts.append(client)
+    monkeypatch.setattr(mobile_image_mounter, "auto_mount", auto_mount)
+    status, _ = run(["screenshot", str(tmp_path / "shot.png")], capsys)
+    assert status == 0
+    assert len(device.mounts) == 1
+
+def test_ls_stat_and_pull(device, tmp_path, capsys):
+    device.add_dir("/DCIM")
+    device.add_file("/DCIM/IMG_0001.JPG", b"a" * 100)
+    device.add_file("/DCIM/IMG_0002.JPG", b"b" * 200)
+    status, results = run(["ls", "/DCIM"], capsys)
+    assert status == 0
+    assert sorted((r["name"], r["size"]) for r in results) == [("IMG_0001.JPG", 100), ("IMG_0002.JPG", 200)]
+    status, results = run(["pull", "/DCIM", str(tmp_path)], capsys)
+    assert status == 0
+    assert results[0]["files_completed"] == 2 and results[0]["files_failed"] == 0
+    with open(tmp_path / "DCIM" / "IMG_0002.JPG", "rb") as f:
+        assert f.read() == b"b" * 200
+
+def test_errors_go_to_stderr_as_json(device, capsys):
+    status = cli.main(["stat", "/missing"])
+    captured = capsys.readouterr()
+    assert status == cli.EXIT_FAILED
+    assert captured.out == ""
+    assert json.loads(captured.err.splitlines()[-1])["command"] == "stat"
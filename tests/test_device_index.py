@@ -0,0 +1,93 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc.device_index import DeviceIndex, DeviceIndexer
+from pyafc.listing import DirEntry
+from pyafc.search import FilenameIndex
+
+def folder(path):
+    return DirEntry(path.rsplit("/", 1)[1], path, True, 0, None)
+
+def file(path, size=1):
+    return DirEntry(path.rsplit("/", 1)[1], path, False, size, None)
+
+class TreeLister:
+    def __init__(self, tree, unreadable=()):
+        self.tree = tree
+        self.unreadable = set(unreadable)
+
+    def list(self, path):
+        if path in self.unreadable:
+            raise OSError(f"Permission denied: {path}")
+        return self.tree.get(path, [])
+
+TREE = {
+    "/": [folder("/A"), folder("/B")],
+    "/A": [file("/A/IMG_0001.JPG"), file("/A/img_0002.heic"), file("/A/100%.txt")],
+    "/B": [file("/B/notes.txt")],
+}
+
+def names(entries):
+    return sorted(e.name for e in entries)
+
+def test_find_substring_and_glob(tmp_path):
+    index = DeviceIndex("test", str(tmp_path))
+    DeviceIndexer(TreeLister(TREE), index, workers=2).run("/")
+    assert names(index.find("img_000")) == ["IMG_0001.JPG", "img_0002.heic"]
+    assert names(index.find("G_0")) == ["IMG_0001.JPG", "img_0002.heic"]
+    assert names(index.find("*.HEIC")) == ["img_0002.heic"]
+    assert names(index.find("img_000[1]*")) == ["IMG_0001.JPG"]
+    # % and _ are literal in a substring search
+    assert names(index.find("0%")) == ["100%.txt"]
+    assert names(index.find("G_00")) == ["IMG_0001.JPG", "img_0002.heic"]
+    assert names(index.find("Gx00")) == []
+    index.close()
+
+def test_rescan_prunes_everything_but_unreadable_folders(tmp_path):
+    index = DeviceIndex("test", str(tmp_path))
+    DeviceIndexer(TreeLister(TREE), index, workers=2).run("/")
+    tree = dict(TREE, **{"/A": [file("/A/IMG_0001.JPG")]})
+    # /A lost a file and /B cannot be read this time
+    DeviceIndexer(TreeLister(tree, unreadable=["/B"]), index, workers=2).run("/")
+    assert names(index.find("img")) == ["IMG_0001.JPG"]
+    assert names(index.find("0%")) == []
+    assert names(index.find("notes")) == ["notes.txt"]
+    index.close()
+    # the name index survives a reopen
+    index = DeviceIndex("test", str(tmp_path))
+    assert names(index.find("notes")) == ["notes.txt"]
+    index.close()
+
+def test_rescan_with_thousands_of_unreadable_folders(tmp_path):
+    tree = {"/": [folder(f"/F{n}") for n in range(1500)] + [folder("/Gone")]}
+    tree.update({f"/F{n}": [file(f"/F{n}/f{n}.txt")] for n in range(1500)})
+    tree["/Gone"] = [file("/Gone/old.txt")]
+    index = DeviceIndex("test", str(tmp_path))
+    DeviceIndexer(TreeLister(tree), index, workers=4).run("/")
+    # the same folders, none of them readable now, and /Gone is gone
+    rescan = {"/": [folder(f"/F{n}") for n in range(1500)]}
+    DeviceIndexer(TreeLister(rescan, unreadable=[f"/F{n}" for n in range(1500)]), index, workers=4).run("/")
+    assert index.count() == 3000
+    assert index.find("old.txt") == []
+    assert names(index.find("f1499.txt")) == ["f1499.txt"]
+    index.close()
+
+NAMES = ["IMG_0001.JPG", "img_0002.heic", "IMG_0101.jpg", "a.txt", "b.txt", "^caret.txt", "]bracket", "[x].png",
+         "notes!.md", "100%.txt", "under_score.log", "back\\slash", "Movie.MOV", "movie2.mov", "readme"]
+
+@pytest.mark.parametrize("pattern", ["img", "IMG_0", ".txt", "*.jpg", "img_0?0*", "img_000[12]*", "img_0[!0]*", "[!i]*",
+                                     "[^c]*", "[]]*", "[ab].txt", "*[0-9].*", "[x*", "*!*", "*\\*", "?", "m*v", "*_*",
+                                     "*%*", "[!a-m]*"])
+def test_find_matches_the_in_memory_filename_search(tmp_path, pattern):
+    # the two searches back the same search box, with and without an index scan
+    entries = [file(f"/D/{name}") for name in NAMES]
+    index = DeviceIndex("test", str(tmp_path))
+    DeviceIndexer(TreeLister({"/": [folder("/D")], "/D": entries}), index, workers=2).run("/")
+    memory = FilenameIndex()
+    memory.add_entries([folder("/D")] + entries)
+    assert names(index.find(pattern)) == names(memory.search(pattern))
+    index.close()
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc.dircache import DirectoryCache, estimate_size
+from pyafc.listing import DirEntry
+
+def entries(folder, count):
+    return [DirEntry(f"f{n}", f"{folder}/f{n}", False, n, None) for n in range(count)]
+
+def test_a_listing_over_budget_drops_the_older_one():
+    cache = DirectoryCache(max_bytes=estimate_size(entries("/A", 10)))
+    cache.put("udid", "/A", entries("/A", 5))
+    cache.put("udid", "/A", entries("/A", 20))
+    # the stale five-entry listing must not be served in place of the new one
+    assert cache.get("udid", "/A") is None
+    assert cache._bytes == 0
+
+def test_upsert_keeps_the_byte_budget():
+    budget = estimate_size(entries("/A", 4)) + estimate_size(entries("/B", 4))
+    cache = DirectoryCache(max_bytes=budget)
+    cache.put("udid", "/A", entries("/A", 4))
+    cache.put("udid", "/B", entries("/B", 4))
+    assert cache.upsert("udid", "/B", DirEntry("new", "/B/new", False, 1, None))
+    # /B grew past the budget: the least recently used listing makes room
+    assert cache.get("udid", "/A") is None
+    assert [e.name for e in cache.get("udid", "/B")][-1] == "new"
+    assert cache._bytes <= budget
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.engine import DeviceEngine, LatestRequest
+
+@pytest.fixture
+def engine():
+    server = FakeAfcServer(rtt=0)
+    for n in range(100):
+        server.add_file(f"/F/file{n:02d}.txt", b"x" * n)
+    pool = AfcSessionPool(server.connect, size=2)
+    engine = DeviceEngine(None, pool, workers=4)
+    yield engine
+    engine.close()
+    pool.close()
+
+def test_stat_and_a_streamed_list(engine):
+    assert engine.run(engine.stat("/F/file07.txt"), timeout=5)["st_size"] == 7
+    batches = []
+    entries = engine.run(engine.list("/F", on_batch=batches.append), timeout=5)
+    # every row reached on_batch before the listing came back
+    assert sorted(e.name for batch in batches for e in batch) == sorted(e.name for e in entries)
+    assert len(entries) == 100
+    assert sorted(e.name for e in engine.run(engine.list("/F"), timeout=5)) == sorted(e.name for e in entries)
+
+def test_a_timeout_also_stops_the_work_on_the_device(engine):
+    stopped = threading.Event()
+
+    def slow(stop):
+        if stop.wait(5):
+            stopped.set()
+
+    with pytest.raises(TimeoutError):
+        engine.run(engine._stoppable(slow, 0.05), timeout=5)
+    assert stopped.wait(5)
+
+def test_operations_under_one_key_are_joined(engine):
+    release = threading.Event()
+    results = []
+    done = threading.Event()
+
+    async def slow_listing():
+        await engine.call(release.wait, 5)
+        return "listing"
+
+    def on_done(result, error):
+        results.append((result, error))
+        if len(results) == 2:
+            done.set()
+
+    first = engine.submit(slow_listing(), on_done, key="/F")
+    second = engine.submit(slow_listing(), on_done, key="/F")
+    assert second is first and engine.stats().coalesced == 1
+    release.set()
+    assert done.wait(5)
+    assert results == [("listing", None), ("listing", None)]
+    # the key is free again once the first one is over
+    third = engine.submit(asyncio.sleep(0, "again"), key="/F")
+    assert third is not first and third.result(5) == "again"
+
+def test_a_cancelled_operation_never_reports(engine):
+    results = []
+    future = engine.submit(asyncio.sleep(5), lambda result, error: results.append(error))
+    assert future.cancel()
+    engine.run(asyncio.sleep(0.05), timeout=5)
+    assert results == []
+
+def test_errors_reach_on_done(engine):
+    outcome = []
+    engine.submit(engine.stat("/missing"), lambda result, error: outcome.append((result, error))).exception(5)
+    engine.run(asyncio.sleep(0.05), timeout=5)
+    [(result, error)] = outcome
+    assert result is None and error is not None
+
+def test_a_new_listing_cancels_the_stale_one_on_the_device(engine):
+    latest = LatestRequest(engine, "listing")
+    stopped = threading.Event()
+    shown = []
+
+    def stale(stop):
+        if stop.wait(5):
+            stopped.set()
+
+    def make(generation):
+        if generation == 1:
+            return engine._stoppable(stale, None)
+        return asyncio.sleep(0, generation)
+
+    def on_done(result, error):
+        if latest.is_current(result):
+            shown.append(result)
+
+    first = latest.submit(make, on_done)
+    # the first listing has started on the device before the user moves on
+    engine.run(asyncio.sleep(0.05), timeout=5)
+    second = latest.submit(make, on_done)
+    assert (first, second) == (1, 2) and latest.cancelled == 1
+    assert stopped.wait(5)
+    engine.run(asyncio.sleep(0.05), timeout=5)
+    assert shown == [2]
+    assert latest.is_current(2) and not latest.is_current(1)
+
+def test_leaving_without_a_new_listing_cancels_it_too(engine):
+    latest = LatestRequest(engine, "listing")
+    stopped = threading.Event()
+
+    def slow(stop):
+        if stop.wait(5):
+            stopped.set()
+
+    generation = latest.submit(lambda generation: engine._stoppable(slow, None))
+    engine.run(asyncio.sleep(0.05), timeout=5)
+    latest.cancel()
+    assert stopped.wait(5)
+    assert latest.cancelled == 1 and not latest.is_current(generation)
+    # nothing outstanding: a second cancel has nothing to stop
+    latest.cancel()
+    assert latest.cancelled == 1
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc.history import NavigationHistory
+
+def test_back_forward_and_a_new_visit_drops_the_forward_paths():
+    history = NavigationHistory(limit=3)
+    for path in ("/", "/A", "/A/B"):
+        history.visit(path)
+    history.visit("/A/B")
+    assert history.back() == "/A"
+    assert history.back() == "/"
+    assert history.back() is None
+    assert history.forward() == "/A"
+    history.visit("/C")
+    assert not history.can_forward()
+    history.visit("/D")
+    # over the limit: the oldest path goes
+    assert [history.back(), history.back(), history.back()] == ["/C", "/A", None]
+
+def test_retained_views_and_the_mtime_check():
+    history = NavigationHistory(retained=2)
+    listing = ["a", "b"]
+    history.remember("/A", listing, mtime=100.0)
+    history.save_view("/A", ["[FILE] a"], 0.5)
+    # the same listing served again from cache keeps its mtime and view state
+    history.remember("/A", listing)
+    state = history.view("/A")
+    assert (state.mtime, state.selection, state.scroll) == (100.0, ["[FILE] a"], 0.5)
+    assert history.is_current("/A", 100.0)
+    assert not history.is_current("/A", 101.0)
+    assert not history.is_current("/A", None)
+    history.remember("/B", [], mtime=1.0)
+    history.remember("/C", [], mtime=1.0)
+    assert history.view("/A") is None
+    history.invalidate("/B")
+    assert history.view("/B") is None and history.view("/C") is not None
@@ -0,0 +1,43 @@
+import ast
+import glob
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.startup_benchmark import TARGETS, import_times
+
+SOURCES = [os.path.join(ROOT, name) for name in ("pyafc.py", "pyside6afc.py")] + sorted(glob.glob(os.path.join(ROOT, "pyafc", "*.py")))
+
+def device_imports():
+    # every `from pymobiledevice3... import ...`, but not the ones guarded by an
+    # except ImportError, which expect to miss on some versions
+    for path in SOURCES:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        guarded = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Try) and any(isinstance(h.type, ast.Name) and h.type.id == "ImportError" for h in node.handlers):
+                guarded.update(id(child) for stmt in node.body for child in ast.walk(stmt))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and (node.module or "").startswith("pymobiledevice3") and id(node) not in guarded:
+                for alias in node.names:
+                    yield f"{os.path.relpath(path, ROOT)}:{node.lineno}", node.module, alias.name
+
+@pytest.mark.parametrize("where,module,name", sorted(set(device_imports())))
+def test_lazy_device_imports_exist(where, module, name):
+    # these only run once a device is connected, so nothing else would notice a wrong one
+    assert hasattr(importlib.import_module(module), name), f"{where}: {module} has no {name}"
+
+@pytest.mark.parametrize("target", ["pyafc.cli", "pyafc.gui"])
+def test_entry_points_leave_device_services_for_first_use(target):
+    code, forbidden = TARGETS[target]
+    status, rows, other = import_times(code)
+    if status:
+        pytest.skip(other[-1] if other else f"exit {status}")
+    loaded = sorted({name for name, _, _ in rows if any(name == f or name.startswith(f + ".") for f in forbidden)})
+    assert loaded == []
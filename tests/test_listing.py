@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirectoryLister, DirEntry, ListingCancelled, coalesce, walk, walk_parallel
+
+class LoopingLister:
+    # a jailbroken-style root: /var links to /private/var, which links back to /
+    TREE = {
+        "/": [DirEntry("private", "/private", True, 0, None), DirEntry("var", "/var", True, 0, None, True)],
+        "/private": [DirEntry("var", "/private/var", True, 0, None)],
+        "/private/var": [DirEntry("log.txt", "/private/var/log.txt", False, 5, None),
+                         DirEntry("root", "/private/var/root", True, 0, None, True)],
+    }
+
+    def list(self, path):
+        # following a link would list the same folders again, forever
+        return self.TREE.get(path, self.TREE["/"])
+
+def test_walk_does_not_follow_links():
+    paths = [path for path, _ in walk(LoopingLister(), "/")]
+    assert sorted(paths) == ["/", "/private", "/private/var"]
+
+def test_walk_parallel_does_not_follow_links():
+    paths = [path for path, _ in walk_parallel(LoopingLister(), "/", workers=2)]
+    assert sorted(paths) == ["/", "/private", "/private/var"]
+
+@pytest.fixture
+def lister():
+    server = FakeAfcServer(rtt=0)
+    for n in range(200):
+        server.add_file(f"/F/file{n:03d}.txt", b"x" * n)
+    server.add_dir("/F/sub")
+    pool = AfcSessionPool(server.connect, size=3)
+    lister = DirectoryLister(pool, batch_size=16)
+    yield lister
+    lister.close()
+    pool.close()
+
+def test_iter_list_streams_the_same_entries_as_list(lister):
+    batches = list(lister.iter_list("/F"))
+    # 201 names over 16-entry stat batches
+    assert len(batches) == 13 and all(len(batch) <= 16 for batch in batches)
+    # the fake stamps folders with the time of the stat, so mtimes are left out
+    streamed = sorted((e.name, e.size, e.is_dir) for batch in batches for e in batch)
+    assert streamed == sorted((e.name, e.size, e.is_dir) for e in lister.list("/F"))
+    assert [name for name, _, is_dir in streamed if is_dir] == ["sub"]
+
+def test_iter_list_stops_between_stats_once_cancelled(lister):
+    with pytest.raises(ListingCancelled):
+        for _ in lister.iter_list("/F", cancelled=lambda: True):
+            pass
+
+def test_coalesce_merges_small_batches_up_to_max_entries():
+    batches = [[n] for n in range(10)]
+    assert list(coalesce(batches, interval=3600, max_entries=4)) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    # a zero interval passes every batch straight through
+    assert list(coalesce(batches[:3], interval=0, max_entries=100)) == [[0], [1], [2]]
+    assert list(coalesce([])) == []
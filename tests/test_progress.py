@@ -0,0 +1,19 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc.progress import TransferMonitor
+from pyafc.transfer import TransferItem, TransferReport
+
+def test_monitor_keeps_failures_and_recent_files_only():
+    monitor = TransferMonitor("Downloading", TransferReport(), history=3)
+    for i in range(10):
+        item = TransferItem(f"/R/{i}.txt", f"/tmp/{i}.txt", 1)
+        monitor.start_file(item)
+        monitor.add_bytes(item, 1)
+        monitor.finish_file(item, OSError("gone") if i == 2 else None)
+    stats = monitor.to_dict()
+    assert [f["src"] for f in stats["files"]] == ["/R/2.txt", "/R/7.txt", "/R/8.txt", "/R/9.txt"]
+    assert stats["files"][0]["error"] == "gone"
+    assert stats["files_omitted"] == 6
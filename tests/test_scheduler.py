@@ -0,0 +1,108 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.scheduler import BULK, DONE, NORMAL, PAUSED, QUEUED, RUNNING, TransferScheduler
+from pyafc.transfer import DownloadEngine, TransferItem
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_paused_jobs_give_up_their_slots_and_sessions(tmp_path):
+    server = FakeAfcServer(rtt=0.001)
+    for n in range(3):
+        server.add_file(f"/big{n}.bin", bytes([n]) * (4 * 1024 * 1024))
+    pool = AfcSessionPool(server.connect, size=2)
+    engine = DownloadEngine(pool, workers=1, chunk_size=64 * 1024)
+    scheduler = TransferScheduler(max_concurrent=2, directory=None)
+    def download(n):
+        item = TransferItem(f"/big{n}.bin", str(tmp_path / f"big{n}.bin"), None)
+        return lambda job: engine.download([item], control=job)
+    first = scheduler.submit("first", "download", run=download(0))
+    second = scheduler.submit("second", "download", run=download(1))
+    wait_for(lambda: os.path.exists(tmp_path / "big1.bin") and os.path.getsize(tmp_path / "big1.bin") > 0)
+    scheduler.pause(first.id)
+    scheduler.pause(second.id)
+    # both slots and both sessions are free again, so a third job runs to the end
+    third = scheduler.submit("third", "download", run=download(2))
+    wait_for(lambda: third.state == DONE)
+    assert first.state == PAUSED and second.state == PAUSED
+    scheduler.resume(first.id)
+    scheduler.resume(second.id)
+    wait_for(lambda: first.state == DONE and second.state == DONE)
+    for n in range(3):
+        with open(tmp_path / f"big{n}.bin", "rb") as f:
+            assert f.read() == bytes([n]) * (4 * 1024 * 1024)
+    pool.close()
+
+def test_move_and_set_priority_reorder_waiting_jobs():
+    scheduler = TransferScheduler(max_concurrent=1, directory=None)
+    gate = threading.Event()
+    started = []
+    def run(name):
+        def _run(job):
+            started.append(name)
+            gate.wait()
+        return _run
+    blocker = scheduler.submit("blocker", "x", run=run("blocker"))
+    a = scheduler.submit("a", "x", run=run("a"))
+    b = scheduler.submit("b", "x", run=run("b"), priority=BULK)
+    c = scheduler.submit("c", "x", run=run("c"), priority=BULK)
+    assert blocker.state == RUNNING
+    assert scheduler.move(c.id, -2)
+    assert c.priority == NORMAL
+    assert scheduler.set_priority(b.id, NORMAL)
+    assert [job.name for job in scheduler.jobs()] == ["blocker", "c", "a", "b"]
+    gate.set()
+    wait_for(lambda: len(started) == 4)
+    assert started == ["blocker", "c", "a", "b"]
+
+def test_a_paused_job_keeps_its_slot_until_its_sessions_are_back():
+    server = FakeAfcServer(rtt=0)
+    pool = AfcSessionPool(server.connect, size=1)
+    scheduler = TransferScheduler(max_concurrent=1, directory=None)
+    holding, release = threading.Event(), threading.Event()
+    def first_run(job):
+        with job.leases(pool).lease():
+            holding.set()
+            release.wait()
+        job.checkpoint()
+    def second_run(job):
+        with job.leases(pool).lease(timeout=5):
+            pass
+    first = scheduler.submit("first", "x", run=first_run)
+    holding.wait(5)
+    second = scheduler.submit("second", "x", run=second_run)
+    scheduler.pause(first.id)
+    # the only session is still out, so the slot does not go to a job that would wait on it
+    time.sleep(0.05)
+    assert first.state == PAUSED and second.state == QUEUED
+    release.set()
+    wait_for(lambda: second.state == DONE)
+    assert first.state == PAUSED
+    scheduler.resume(first.id)
+    wait_for(lambda: first.state == DONE)
+    pool.close()
+
+def test_a_job_that_finishes_while_paused_is_done():
+    scheduler = TransferScheduler(max_concurrent=1, directory=None)
+    running, finish = threading.Event(), threading.Event()
+    def run(job):
+        running.set()
+        finish.wait()
+    job = scheduler.submit("job", "x", run=run)
+    running.wait(5)
+    scheduler.pause(job.id)
+    finish.set()
+    # its last chunk was already done when the pause came in
+    wait_for(lambda: job.state == DONE)
+    assert not scheduler.cancel(job.id)
+    assert job.state == DONE
@@ -0,0 +1,67 @@
+import fnmatch
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc import search
+from pyafc.search import FilenameIndex
+
+def random_names(count, seed=7):
+    rng = random.Random(seed)
+    stems = ["IMG_", "img_", "DSC", "notes", "Report", "backup", "a", "zz"]
+    exts = [".jpg", ".JPG", ".heic", ".txt", ".mov", ""]
+    return [f"{rng.choice(stems)}{rng.randrange(10000):04d}{rng.choice(exts)}" for _ in range(count)]
+
+def build(names, joined):
+    index = FilenameIndex()
+    for n, name in enumerate(names):
+        index.add(f"/D{n % 50}/{name}", size=n)
+    if joined:
+        index.prepare()
+    return index
+
+def paths(entries):
+    return sorted(e.path for e in entries)
+
+@pytest.mark.parametrize("joined", [True, False])
+@pytest.mark.parametrize("postings", [True, False])
+@pytest.mark.parametrize("query", ["img_00", "0042", ".JPG", "notes", "zz9", "*.heic", "img_?1*", "[ab]*", "*[!0-9].txt", "q"])
+def test_search_finds_what_a_full_scan_finds(monkeypatch, joined, postings, query):
+    # no cap on the hits, and once without the trigram postings so the scans run too
+    monkeypatch.setattr(search, "MAX_MATCHES", 100000)
+    if not postings:
+        monkeypatch.setattr(FilenameIndex, "_narrow", lambda self, grams: None)
+    names = random_names(3000)
+    index = build(names, joined)
+    q = query.lower()
+    if any(c in q for c in search.GLOB_CHARS):
+        expected = [f"/D{n % 50}/{name}" for n, name in enumerate(names) if fnmatch.fnmatchcase(name.lower(), q)]
+    else:
+        expected = [f"/D{n % 50}/{name}" for n, name in enumerate(names) if q in name.lower()]
+    assert paths(index.search(query, limit=100000)) == sorted(expected)
+
+def test_exact_and_prefix_hits_rank_first():
+    index = FilenameIndex()
+    for path in ["/a/my-photo.jpg", "/b/photo.jpg.bak", "/c/photo.jpg", "/d/old photo.jpg"]:
+        index.add(path)
+    index.prepare()
+    assert [e.path for e in index.search("PHOTO.JPG")] == ["/c/photo.jpg", "/b/photo.jpg.bak", "/a/my-photo.jpg", "/d/old photo.jpg"]
+
+def test_names_added_after_the_join_are_found():
+    index = build(random_names(200), joined=True)
+    index.add("/new/unique-name.txt", size=3)
+    index.add("/new/unique-name.txt", size=4)
+    [entry] = index.search("unique-name")
+    assert (entry.path, entry.size) == ("/new/unique-name.txt", 4)
+    assert len(index) == 201
+
+def test_fuzzy_search_tolerates_a_typo():
+    index = FilenameIndex()
+    for path in ["/x/vacation-video.mov", "/x/vacancy.txt", "/x/notes.txt"]:
+        index.add(path)
+    assert index.search("vacaton-video") == []
+    assert index.search("vacaton-video", fuzzy=True)[0].path == "/x/vacation-video.mov"
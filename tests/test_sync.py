@@ -0,0 +1,78 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc import sync as sync_module
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirEntry, DirectoryLister
+from pyafc.sync import FolderSync
+from pyafc.transfer import DownloadEngine
+
+def run_sync(server, local_root, **options):
+    pool = AfcSessionPool(server.connect, size=2)
+    lister = DirectoryLister(pool)
+    try:
+        return FolderSync(lister, DownloadEngine(pool, workers=2)).sync("/R", local_root, **options)
+    finally:
+        lister.close()
+        pool.close()
+
+def write(path, data=b"local"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def test_delete_removes_files_gone_from_device(tmp_path):
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/R/A/x.txt", b"x")
+    local = str(tmp_path / "R")
+    write(os.path.join(local, "A", "old.txt"))
+    report = run_sync(server, local, delete=True)
+    assert not report.failed
+    assert report.deleted == 1
+    assert os.listdir(os.path.join(local, "A")) == ["x.txt"]
+
+def test_delete_keeps_device_files_when_a_local_folder_cannot_be_created(tmp_path):
+    # a local file named like a device folder must not cut the walk short and
+    # leave the rest of the tree looking deleted
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/R/A/x.txt", b"x")
+    server.add_file("/R/B/y.txt", b"y")
+    local = str(tmp_path / "R")
+    write(os.path.join(local, "A"))
+    write(os.path.join(local, "B", "y.txt"), b"y")
+    report = run_sync(server, local, delete=True)
+    assert [item.src for item, _ in report.failed] == ["/R/A"]
+    assert os.path.isfile(os.path.join(local, "A"))
+    assert os.path.isfile(os.path.join(local, "B", "y.txt"))
+    assert report.deleted == 0
+
+def test_delete_skipped_when_the_item_source_fails(tmp_path, monkeypatch):
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/R/A/x.txt", b"x")
+    server.add_file("/R/B/y.txt", b"y")
+    local = str(tmp_path / "R")
+    write(os.path.join(local, "B", "y.txt"), b"y")
+    write(os.path.join(local, "extra.txt"))
+    real_is_current = sync_module.is_current
+    def failing_is_current(local_path, entry, tolerance):
+        if entry.path == "/R/B/y.txt":
+            raise RuntimeError("boom")
+        return real_is_current(local_path, entry, tolerance)
+    monkeypatch.setattr(sync_module, "is_current", failing_is_current)
+    report = run_sync(server, local, delete=True)
+    assert report.failed
+    assert report.deleted == 0
+    assert os.path.isfile(os.path.join(local, "B", "y.txt"))
+    assert os.path.isfile(os.path.join(local, "extra.txt"))
+
+def test_files_of_unknown_size_or_age_are_not_current(tmp_path):
+    path = str(tmp_path / "x.txt")
+    write(path, b"x")
+    mtime = os.path.getmtime(path)
+    assert sync_module.is_current(path, DirEntry("x.txt", "/R/x.txt", False, 1, mtime))
+    assert not sync_module.is_current(path, DirEntry("x.txt", "/R/x.txt", False, None, None))
+    assert not sync_module.is_current(path, DirEntry("x.txt", "/R/x.txt", False, 1, None))
+    assert not sync_module.is_current(path, DirEntry("x.txt", "/R/x.txt", False, None, mtime))
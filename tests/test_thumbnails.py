@@ -0,0 +1,94 @@
+import io
+import os
+import struct
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc import thumbnails
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirEntry
+from pyafc.thumbnails import ThumbnailCache, ThumbnailLoader
+
+class CountingSession:
+    # no lseek, like pymobiledevice3's AfcService; without raw_ops it cannot
+    # send FILE_SEEK either
+    def __init__(self, inner, reads, raw_ops=True):
+        self.inner = inner
+        self.reads = reads
+        self.raw_ops = raw_ops
+
+    def __getattr__(self, name):
+        if name == "lseek" or (name == "_do_operation" and not self.raw_ops):
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def fread(self, handle, size):
+        data = self.inner.fread(handle, size)
+        self.reads.append(len(data))
+        return data
+
+def load(tmp_path, data, name="IMG_0001.HEIC", raw_ops=True):
+    server = FakeAfcServer(rtt=0)
+    server.add_file(f"/DCIM/{name}", data)
+    reads = []
+    pool = AfcSessionPool(lambda: CountingSession(server.connect(), reads, raw_ops), size=2)
+    loader = ThumbnailLoader(pool, ThumbnailCache(str(tmp_path / "thumbs")), "udid", processes=1)
+    done, result = threading.Event(), []
+    loader.request([DirEntry(name, f"/DCIM/{name}", False, len(data), 1.0)], lambda entry, thumb: (result.append(thumb), done.set()))
+    assert done.wait(30)
+    loader.close()
+    pool.close()
+    return result[0], sum(reads)
+
+def test_heic_without_decoder_is_neither_read_nor_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnails, "heif_supported", lambda: False)
+    thumb, read = load(tmp_path, b"\0" * 4096)
+    assert thumb is None and read == 0
+    assert os.listdir(tmp_path / "thumbs") == []
+
+@pytest.mark.parametrize("raw_ops", [True, False])
+def test_heic_thumbnail_comes_from_ranged_reads(tmp_path, raw_ops):
+    pillow_heif = pytest.importorskip("pillow_heif")
+    from PIL import Image
+    pillow_heif.register_heif_opener()
+    out = io.BytesIO()
+    Image.effect_noise((1024, 768), 64).convert("RGB").save(out, "HEIF", quality=60, thumbnails=[160])
+    data = out.getvalue()
+    thumb, read = load(tmp_path, data, raw_ops=raw_ops)
+    assert Image.open(io.BytesIO(thumb)).size == (128, 96)
+    if raw_ops:
+        assert read < len(data) / 4
+
+def jpeg_with_exif_thumbnail(thumb, app1_at, pad):
+    # APP1 starts app1_at bytes in, the thumbnail pad bytes after its IFD1
+    tiff = b"II*\0" + struct.pack("<I", 8)
+    tiff += struct.pack("<H", 1) + struct.pack("<HHII", 0x0112, 3, 1, 6) + struct.pack("<I", 26)
+    tiff += struct.pack("<H", 2) + struct.pack("<HHII", 0x0201, 4, 1, 56 + pad) + struct.pack("<HHII", 0x0202, 4, 1, len(thumb))
+    tiff += struct.pack("<I", 0) + b"\0" * pad + thumb
+    data = b"\xff\xd8"
+    while len(data) + 4 < app1_at:
+        filler = min(60000, app1_at - len(data) - 4)
+        data += b"\xff\xe2" + struct.pack(">H", filler + 2) + b"\0" * filler
+    app1 = b"Exif\0\0" + tiff
+    return data + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + b"\xff\xd9"
+
+@pytest.mark.parametrize("raw_ops", [True, False])
+@pytest.mark.parametrize("pad", [0, 12000])
+def test_exif_thumbnail_past_the_head_on_a_session_without_lseek(tmp_path, raw_ops, pad):
+    # the thumbnail straddles the 64 KiB head (pad 0) or lies wholly past it
+    thumb = b"\xff\xd8" + os.urandom(3000) + b"\xff\xd9"
+    data = jpeg_with_exif_thumbnail(thumb, thumbnails.HEAD_BYTES - 1000, pad)
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/DCIM/IMG_0001.JPG", data)
+    pool = AfcSessionPool(lambda: CountingSession(server.connect(), [], raw_ops), size=1)
+    loader = ThumbnailLoader(pool, ThumbnailCache(str(tmp_path / "thumbs")), "udid", processes=1)
+    try:
+        assert loader._read(DirEntry("IMG_0001.JPG", "/DCIM/IMG_0001.JPG", False, len(data), 1.0)) == (thumb, 6)
+    finally:
+        loader.close()
+        pool.close()
@@ -0,0 +1,92 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.journal import TransferJournal, journal_key
+from pyafc.listing import to_timestamp
+from pyafc.transfer import RESUME_MIN_SIZE, DownloadEngine, TransferItem, UploadEngine
+
+class AfcServiceLike:
+    # the session as pymobiledevice3 hands it out: no lseek. With raw_ops=False
+    # it cannot send FILE_SEEK either and has to read forward
+    def __init__(self, session, raw_ops=True):
+        self.session = session
+        self.raw_ops = raw_ops
+        self.read = 0
+
+    def fread(self, handle, size):
+        data = self.session.fread(handle, size)
+        self.read += len(data)
+        return data
+
+    def __getattr__(self, name):
+        if name == "lseek" or (name == "_do_operation" and not self.raw_ops):
+            raise AttributeError(name)
+        return getattr(self.session, name)
+
+def test_download_of_a_file_that_grew_since_it_was_listed(tmp_path):
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/Logs/app.log", b"a" * 1000)
+    # the size a cached listing still reports
+    item = TransferItem("/Logs/app.log", str(tmp_path / "app.log"), 10)
+    pool = AfcSessionPool(server.connect, size=1)
+    report = DownloadEngine(pool, workers=1).download([item])
+    pool.close()
+    assert not report.failed
+    with open(item.dst, "rb") as f:
+        assert f.read() == b"a" * 1000
+
+def _resumed_download(tmp_path, raw_ops):
+    size = RESUME_MIN_SIZE + 1000
+    data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/big.bin", data)
+    sessions = []
+    def connect():
+        sessions.append(AfcServiceLike(server.connect(), raw_ops))
+        return sessions[-1]
+    dst = str(tmp_path / "big.bin")
+    # an earlier run got half way before it stopped
+    with open(dst, "wb") as f:
+        f.write(data[:size // 2])
+    journal = TransferJournal("test", str(tmp_path / "journal"))
+    journal.update(journal_key("download", "/big.bin", dst), size // 2, size, to_timestamp(server.mtimes["/big.bin"]))
+    pool = AfcSessionPool(connect, size=1)
+    report = DownloadEngine(pool, workers=1, journal=journal).download([TransferItem("/big.bin", dst, size)])
+    pool.close()
+    assert not report.failed
+    assert report.bytes_done == size - size // 2
+    with open(dst, "rb") as f:
+        assert f.read() == data
+    return sum(s.read for s in sessions), size
+
+def test_download_resumes_on_a_session_without_lseek(tmp_path):
+    read, size = _resumed_download(tmp_path, raw_ops=True)
+    # FILE_SEEK: only the missing half comes over the wire
+    assert read == size - size // 2
+
+def test_download_resumes_on_a_session_that_cannot_seek(tmp_path):
+    read, size = _resumed_download(tmp_path, raw_ops=False)
+    # read forward: the first half is read again and dropped, not written twice
+    assert read == size
+
+def test_upload_resumes_on_a_session_without_lseek(tmp_path):
+    size = RESUME_MIN_SIZE + 1000
+    data = os.urandom(size)
+    src = str(tmp_path / "big.bin")
+    with open(src, "wb") as f:
+        f.write(data)
+    server = FakeAfcServer(rtt=0)
+    server.add_dir("/Up")
+    server.add_file("/Up/big.bin", data[:size // 2])
+    journal = TransferJournal("test", str(tmp_path / "journal"))
+    journal.update(journal_key("upload", src, "/Up/big.bin"), size // 2, size, os.path.getmtime(src))
+    pool = AfcSessionPool(lambda: AfcServiceLike(server.connect()), size=2)
+    report = UploadEngine(pool, workers=1, journal=journal).upload([TransferItem(src, "/Up/big.bin", size)])
+    pool.close()
+    assert not report.failed
+    assert report.bytes_done == size - size // 2
+    assert server.files["/Up/big.bin"] == data
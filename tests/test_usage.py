@@ -0,0 +1,78 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_afc import FakeAfcServer
+from pyafc.afc_pool import AfcSessionPool
+from pyafc.listing import DirectoryLister
+from pyafc.usage import DiskUsage, UsageAnalyzer, UsageCache, format_usage_row
+
+def analyze(server, root):
+    pool = AfcSessionPool(server.connect, size=2)
+    lister = DirectoryLister(pool)
+    try:
+        return UsageAnalyzer(lister, workers=2).analyze(DiskUsage(root))
+    finally:
+        lister.close()
+        pool.close()
+
+def test_recursive_sizes_and_drill_down():
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/M/top.bin", b"t" * 10)
+    server.add_file("/M/A/a1.bin", b"a" * 100)
+    server.add_file("/M/A/deep/a2.bin", b"a" * 1000)
+    server.add_file("/M/B/b1.bin", b"b" * 50)
+    usage = analyze(server, "/M")
+    assert usage.complete and not usage.failed
+    assert usage.total("/M") == (1160, 4, True)
+    assert [(item.entry.name, item.size, item.files) for item in usage.children("/M")] == \
+        [("A", 1100, 2), ("B", 50, 1), ("top.bin", 10, 1)]
+    assert [item.entry.name for item in usage.children("/M", sort="name")] == ["A", "B", "top.bin"]
+    # a subfolder is answered from the same walk
+    assert [(item.entry.name, item.size) for item in usage.children("/M/A")] == [("deep", 1000), ("a1.bin", 100)]
+    assert usage.children("/M/missing") is None
+    assert format_usage_row(usage.children("/M")[0], 1160, width=10).split()[-1] == "A/"
+
+class FailingLister:
+    # /M/B cannot be read
+    def __init__(self, lister):
+        self.lister = lister
+        self.pool = lister.pool
+
+    def list(self, path):
+        if path == "/M/B":
+            raise OSError("Permission denied")
+        return self.lister.list(path)
+
+    def close(self):
+        self.lister.close()
+
+def test_an_unreadable_folder_is_reported_and_the_walk_still_finishes():
+    server = FakeAfcServer(rtt=0)
+    server.add_file("/M/A/a1.bin", b"a" * 100)
+    server.add_file("/M/B/b1.bin", b"b" * 50)
+    pool = AfcSessionPool(server.connect, size=2)
+    lister = FailingLister(DirectoryLister(pool))
+    usage = UsageAnalyzer(lister, workers=2).analyze(DiskUsage("/M"))
+    lister.close()
+    pool.close()
+    assert usage.failed == ["/M/B"]
+    # the walk is over, and /M/B adds nothing to the total
+    assert usage.complete
+    assert usage.total("/M") == (100, 1, True)
+    assert "1 unreadable folder(s)" in usage.summary()
+
+def test_usage_cache_serves_the_deepest_tree_and_drops_stopped_ones():
+    cache = UsageCache()
+    whole, photos = DiskUsage("/"), DiskUsage("/DCIM")
+    cache.put("udid", photos)
+    cache.put("udid", whole)
+    # the whole-device tree covers /DCIM, so the older one goes
+    assert cache.find("udid", "/DCIM/100APPLE") is whole
+    cache.put("udid", DiskUsage("/DCIM"))
+    assert cache.find("udid", "/DCIM").root == "/DCIM"
+    whole.cancelled = True
+    assert cache.find("udid", "/Books") is None
+    cache.invalidate("udid", "/DCIM/x.jpg")
+    assert cache.find("udid", "/DCIM") is None
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+tk = pytest.importorskip("tkinter")
+
+from pyafc.virtual_list import VirtualListbox
+
+@pytest.fixture
+def listbox():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"no display: {e}")
+    root.geometry("300x200")
+    box = VirtualListbox(root, selectmode=tk.EXTENDED, borderwidth=0, highlightthickness=0)
+    box.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    yield box
+    root.destroy()
+
+def on_screen(box):
+    # what the real Listbox holds
+    return list(tk.Listbox.get(box, 0, tk.END))
+
+def test_a_huge_list_keeps_only_the_visible_rows(listbox):
+    items = [f"row {n}" for n in range(100000)]
+    listbox.set_items(items, selected=["row 5", "row 7"])
+    rows = listbox._rows()
+    assert listbox.size() == 100000
+    assert on_screen(listbox) == items[:rows + 1]
+    assert listbox.curselection() == (5, 7)
+    assert listbox.get(99999) == "row 99999" and listbox.get(0, 2) == ("row 0", "row 1", "row 2")
+    listbox.yview_moveto(0.5)
+    assert on_screen(listbox)[0] == "row 50000"
+    first, last = listbox.yview()
+    assert first == 0.5 and last == (50000 + rows) / 100000
+    listbox.see(99999)
+    assert on_screen(listbox)[-1] == "row 99999"
+    assert listbox.nearest(0) == 100000 - rows
+
+def test_scrolling_a_few_rows_matches_a_full_redraw(listbox):
+    items = [f"row {n}" for n in range(500)]
+    listbox.set_items(items)
+    for rows in (3, 3, -2, 40, -41, 1):
+        listbox.yview_scroll(rows, tk.UNITS)
+        top = listbox._top
+        assert on_screen(listbox) == items[top:top + listbox._rows() + 1]
+
+def test_insert_and_delete_move_selection_and_colours(listbox):
+    listbox.set_items(["a", "b", "c", "d"], colors={2: "red"}, selected=["c"])
+    listbox.insert(0, "x", "y")
+    assert listbox.curselection() == (4,) and listbox._colors == {4: "red"}
+    listbox.delete(1, 3)
+    assert listbox.get(0, tk.END) == ("x", "c", "d")
+    assert listbox.curselection() == (1,) and listbox._colors == {1: "red"}
+    listbox.selection_set(0, tk.END)
+    assert listbox.curselection() == (0, 1, 2)
+    listbox.selection_clear(1)
+    assert listbox.curselection() == (0, 2)
+
+def test_appended_rows_show_after_one_idle_render(listbox):
+    listbox.set_items([])
+    for n in range(3):
+        listbox.append_items([f"row {n}"])
+    assert on_screen(listbox) == []
+    listbox.update_idletasks()
+    assert on_screen(listbox) == ["row 0", "row 1", "row 2"]
@@ -0,0 +1,24 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyafc.workers import Workers
+
+def test_dropped_click_is_reported():
+    workers = Workers(interactive=1, bulk=1)
+    workers.interactive.max_queued = 1
+    release = threading.Event()
+    started = threading.Event()
+    dropped = []
+    try:
+        workers.run(lambda: (started.set(), release.wait(5)))
+        started.wait(5)
+        assert workers.run(lambda: None, key="reboot", on_dropped=lambda: dropped.append("reboot")) is not None
+        # a different action is not folded into the one already queued
+        assert workers.run(lambda: None, key="shutdown", on_dropped=lambda: dropped.append("shutdown")) is None
+        assert dropped == ["shutdown"]
+    finally:
+        release.set()
+        workers.shutdown()